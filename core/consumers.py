@@ -136,6 +136,27 @@ class PlantViewerConsumer(AsyncWebsocketConsumer):
             'element_id': event['element_id'],
             'user': event['user']
         }))
+    
+    async def extraction_job(self, event):
+        """Estado da extração de metadados da planta (plant_viewer.notifications)"""
+        await self.send(text_data=json.dumps({
+            'type': 'extraction_job',
+            'job': event['job']
+        }))
+    
+    async def extraction_progress(self, event):
+        """Progresso de uma etapa da extração (eventos já limitados na origem)"""
+        await self.send(text_data=json.dumps({
+            'type': 'extraction_progress',
+            'progress': event['progress']
+        }))
+    
+    async def metadata_sections(self, event):
+        """Seções de metadados gravadas, prontas para leitura pela API"""
+        await self.send(text_data=json.dumps({
+            'type': 'metadata_sections',
+            'sections': event['sections']
+        }))
 
 
 # Funções auxiliares para enviar atualizações do Django
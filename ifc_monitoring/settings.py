@@ -359,6 +359,63 @@ CELERY_BEAT_SCHEDULE = {
     },
 }
 
+# ==================== CHANNELS CONFIGURATION ====================
+# Channel layer usada pelos consumers WebSocket (core/consumers.py) e pelas notificações
+# de extração enviadas dos workers Celery (plant_viewer/notifications.py). Precisa ser
+# compartilhada entre processos, por isso só é configurada com Redis; sem REDIS_URL as
+# notificações são ignoradas e os clientes acompanham a extração pela API.
+if os.getenv('REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.getenv('REDIS_URL')],
+            },
+        }
+    }
+
+# ==================== IFC PROCESSING CONFIGURATION ====================
+# Threads do iterador de geometria do IfcOpenShell (0 = todos os núcleos)
+IFC_GEOMETRY_THREADS = int(os.getenv('IFC_GEOMETRY_THREADS', '0'))
+# Cache em disco da tesselação por produto (vazio = diretório temporário do sistema)
+IFC_GEOMETRY_CACHE_DIR = os.getenv('IFC_GEOMETRY_CACHE_DIR', '')
+# Tamanho máximo do cache de geometria (MB; 0 desativa), com remoção LRU
+IFC_GEOMETRY_CACHE_MB = int(os.getenv('IFC_GEOMETRY_CACHE_MB', '1024'))
+# Plantas baixas: tolerância (m) do Douglas–Peucker e altura (m) do plano de corte
+IFC_FLOOR_PLAN_TOLERANCE = float(os.getenv('IFC_FLOOR_PLAN_TOLERANCE', '0.02'))
+IFC_FLOOR_PLAN_CUT_HEIGHT = float(os.getenv('IFC_FLOOR_PLAN_CUT_HEIGHT', '1.0'))
+# Mede o pico de memória (tracemalloc) de cada coletor da extração de metadados.
+# Apenas para diagnóstico: o tracemalloc deixa a extração várias vezes mais lenta
+IFC_EXTRACTION_PROFILE_MEMORY = os.getenv('IFC_EXTRACTION_PROFILE_MEMORY', 'False').lower() == 'true'
+# Número de plantas com índice espacial (R-tree) mantido em memória por processo
+IFC_SPATIAL_INDEX_MAX_PLANTS = int(os.getenv('IFC_SPATIAL_INDEX_MAX_PLANTS', '32'))
+# Tamanho máximo de upload de arquivos IFC (MB)
+IFC_MAX_UPLOAD_MB = int(os.getenv('IFC_MAX_UPLOAD_MB', '1024'))
+# Arquivos maiores que este limite (MB) são processados no modo de memória limitada
+IFC_LOW_MEMORY_THRESHOLD_MB = int(os.getenv('IFC_LOW_MEMORY_THRESHOLD_MB', '100'))
+# Pico de RSS desejado no modo de memória limitada (MB)
+IFC_MEMORY_BUDGET_MB = int(os.getenv('IFC_MEMORY_BUDGET_MB', '1536'))
+# Exportação GLB: posições int16 e normais octaédricas (KHR_mesh_quantization)
+IFC_GLB_QUANTIZE = os.getenv('IFC_GLB_QUANTIZE', 'True').lower() == 'true'
+# Nível gzip do GLB gravado (0 = sem compressão)
+IFC_GLB_COMPRESSION_LEVEL = int(os.getenv('IFC_GLB_COMPRESSION_LEVEL', '9'))
+# Gera GLBs de níveis de detalhe (malhas simplificadas e caixas) junto com o GLB completo
+IFC_GLB_LOD = os.getenv('IFC_GLB_LOD', 'True').lower() == 'true'
+# Lado (m) da célula de grade dos tiles de geometria por andar (0 = sem tiles)
+IFC_GLB_TILE_SIZE = float(os.getenv('IFC_GLB_TILE_SIZE', '25'))
+# Cache (s) dos tiles servidos com versão na URL
+IFC_GLB_TILE_MAX_AGE = int(os.getenv('IFC_GLB_TILE_MAX_AGE', '31536000'))
+# Cache (s) das respostas de metadados; revalidadas por ETag/Last-Modified
+IFC_METADATA_MAX_AGE = int(os.getenv('IFC_METADATA_MAX_AGE', '0'))
+# Validade (s) das respostas de metadados serializadas e comprimidas no cache (0 desativa)
+IFC_RESPONSE_CACHE_TIMEOUT = int(os.getenv('IFC_RESPONSE_CACHE_TIMEOUT', '86400'))
+# Validade (s) do lock distribuído que impede duas extrações simultâneas da mesma planta;
+# renovado no início de cada etapa, deve cobrir a etapa mais longa mais a espera do retry
+IFC_EXTRACTION_LOCK_TIMEOUT = int(os.getenv('IFC_EXTRACTION_LOCK_TIMEOUT', '3600'))
+# Intervalo mínimo (ms) entre eventos de progresso da extração de uma planta (somando as
+# etapas paralelas) enviados pelo WebSocket
+IFC_PROGRESS_INTERVAL_MS = int(os.getenv('IFC_PROGRESS_INTERVAL_MS', '500'))
+
 # Configurações específicas para produção no Render
 if not DEBUG:
     # Configurações de segurança para produção
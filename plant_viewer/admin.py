@@ -1,7 +1,7 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
 from unfold.decorators import display
-from .models import BuildingPlan
+from .models import BuildingPlan, ExtractionJob, IfcElement
 
 
 @admin.register(BuildingPlan)
@@ -29,7 +29,8 @@ class BuildingPlanAdmin(ModelAdmin):
     
     readonly_fields = [
         'uploaded_at',
-        'get_file_size'
+        'get_file_size',
+        'glb_file'
     ]
     
     fieldsets = (
@@ -37,7 +38,7 @@ class BuildingPlanAdmin(ModelAdmin):
             'fields': ('name', 'description', 'is_active')
         }),
         ('Arquivo IFC', {
-            'fields': ('ifc_file', 'get_file_size')
+            'fields': ('ifc_file', 'get_file_size', 'glb_file')
         }),
         ('Metadados', {
             'fields': ('uploaded_at',),
@@ -70,3 +71,38 @@ class BuildingPlanAdmin(ModelAdmin):
             request, 
             f'{updated} planta(s) foram desativada(s) com sucesso.'
         )
+
+
+@admin.register(IfcElement)
+class IfcElementAdmin(ModelAdmin):
+    """
+    Consulta do índice de elementos IFC (somente leitura).
+    As linhas são geradas pela extração de metadados da planta.
+    """
+    list_display = ['express_id', 'ifc_type', 'name', 'storey', 'plant']
+    list_filter = ['plant', 'ifc_type']
+    search_fields = ['name', 'global_id']
+    list_select_related = ['plant']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ExtractionJob)
+class ExtractionJobAdmin(ModelAdmin):
+    """
+    Acompanhamento dos jobs de extração de metadados (somente leitura).
+    Os jobs são criados ao agendar o fluxo Celery de extração.
+    """
+    list_display = ['created_at', 'plant', 'status', 'stage', 'reason', 'finished_at']
+    list_filter = ['status', 'reason']
+    list_select_related = ['plant']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
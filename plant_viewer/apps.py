@@ -8,4 +8,4 @@ class PlantViewerConfig(AppConfig):
     
     def ready(self):
         """Configurações que devem ser executadas quando o app está pronto."""
-        pass
+        from . import signals  # noqa: F401
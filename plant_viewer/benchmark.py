@@ -0,0 +1,493 @@
+"""
+Benchmark do processamento IFC com modelos sintéticos.
+
+build_synthetic_model gera modelos IFC4 de tamanho configurável (andares,
+espaços, elementos com e sem IfcMappedItem, materiais e property sets)
+criando as entidades diretamente, sem a camada ifcopenshell.api, para
+que modelos de 100k elementos sejam gerados em segundos.
+
+run_benchmark mede o tempo de parede e o pico de RSS de cada método do
+IFCProcessor e da extração completa (extraction.extract_metadata) em
+cada tamanho; compare_with_baseline compara o resultado com um JSON de
+referência (ver o management command benchmark_ifc).
+"""
+
+import gc
+import json
+import logging
+import os
+import platform
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import ifcopenshell
+import ifcopenshell.api.context
+import ifcopenshell.api.project
+import ifcopenshell.api.unit
+import ifcopenshell.guid
+import ifcopenshell.util.unit
+from django.utils import timezone
+
+from .memory import MB, MemoryMonitor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# Baseline versionado com o repositório
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+
+# Classes geradas (em rodízio) e dimensões em metros: comprimento, largura, altura
+ELEMENT_CLASSES = (
+    ('IfcWall', (1.5, 0.2, 3.0)),
+    ('IfcSlab', (4.0, 4.0, 0.2)),
+    ('IfcColumn', (0.3, 0.3, 3.0)),
+    ('IfcBeam', (4.0, 0.2, 0.4)),
+    ('IfcDoor', (0.9, 0.1, 2.1)),
+    ('IfcWindow', (1.2, 0.1, 1.2)),
+    ('IfcMember', (2.0, 0.1, 0.1)),
+    ('IfcFurnishingElement', (1.0, 0.6, 0.8)),
+)
+
+# Espaçamento (m) da grade de elementos em cada andar
+GRID_SPACING = 2.0
+
+# Diferenças menores que isso são ruído de medição e nunca contam como regressão
+MIN_TIME_DELTA_S = 0.05
+MIN_RSS_DELTA_MB = 8.0
+
+
+def build_synthetic_model(elements: int = 1000, storeys: Optional[int] = None, spaces_per_storey: int = 4,
+                          mapped_ratio: float = 0.5, psets_per_element: int = 2,
+                          properties_per_pset: int = 3, materials: int = 8, storey_height: float = 3.0):
+    """
+    Cria um modelo IFC4 sintético para benchmark.
+
+    Os elementos são distribuídos em rodízio entre ELEMENT_CLASSES, numa
+    grade de GRID_SPACING metros em cada andar. A fração mapped_ratio
+    reutiliza a representação do tipo da classe (IfcRepresentationMap +
+    IfcMappedItem); os demais têm a própria extrusão.
+
+    Args:
+        elements: Número de elementos construtivos (sem contar espaços e estrutura espacial)
+        storeys: Número de andares (padrão: um a cada 500 elementos, no mínimo 1)
+        spaces_per_storey: IfcSpace por andar
+        mapped_ratio: Fração dos elementos com geometria compartilhada (0 a 1)
+        psets_per_element: IfcPropertySet por elemento
+        properties_per_pset: IfcPropertySingleValue por property set
+        materials: Materiais distintos (associados em rodízio; 0 desativa)
+        storey_height: Pé-direito em metros
+
+    Returns:
+        ifcopenshell.file: Modelo em memória
+    """
+    if storeys is None:
+        storeys = max(1, elements // 500)
+
+    model = ifcopenshell.api.project.create_file(version='IFC4')
+    project = model.create_entity(
+        'IfcProject', GlobalId=ifcopenshell.guid.new(), Name=f'Benchmark {elements} elementos'
+    )
+    ifcopenshell.api.unit.assign_unit(model)
+    context = ifcopenshell.api.context.add_context(model, context_type='Model')
+    body = ifcopenshell.api.context.add_context(
+        model, context_type='Model', context_identifier='Body', target_view='MODEL_VIEW', parent=context
+    )
+    # Coordenadas escritas nas unidades do projeto (milímetros por padrão)
+    unit = 1 / ifcopenshell.util.unit.calculate_unit_scale(model)
+
+    origin = model.create_entity('IfcCartesianPoint', Coordinates=(0.0, 0.0, 0.0))
+    identity = model.create_entity('IfcAxis2Placement3D', Location=origin)
+    z_axis = model.create_entity('IfcDirection', DirectionRatios=(0.0, 0.0, 1.0))
+    profile_position = model.create_entity(
+        'IfcAxis2Placement2D', Location=model.create_entity('IfcCartesianPoint', Coordinates=(0.0, 0.0))
+    )
+
+    def placement(relative_to, x=0.0, y=0.0, z=0.0):
+        location = model.create_entity('IfcCartesianPoint', Coordinates=(x * unit, y * unit, z * unit))
+        return model.create_entity(
+            'IfcLocalPlacement', PlacementRelTo=relative_to,
+            RelativePlacement=model.create_entity('IfcAxis2Placement3D', Location=location),
+        )
+
+    def extrusion(size):
+        length, width, height = size
+        profile = model.create_entity(
+            'IfcRectangleProfileDef', ProfileType='AREA', Position=profile_position,
+            XDim=length * unit, YDim=width * unit,
+        )
+        solid = model.create_entity(
+            'IfcExtrudedAreaSolid', SweptArea=profile, Position=identity,
+            ExtrudedDirection=z_axis, Depth=height * unit,
+        )
+        return model.create_entity(
+            'IfcShapeRepresentation', ContextOfItems=body, RepresentationIdentifier='Body',
+            RepresentationType='SweptSolid', Items=[solid],
+        )
+
+    def aggregate(relating, related):
+        model.create_entity(
+            'IfcRelAggregates', GlobalId=ifcopenshell.guid.new(),
+            RelatingObject=relating, RelatedObjects=related,
+        )
+
+    site = model.create_entity('IfcSite', GlobalId=ifcopenshell.guid.new(), Name='Site',
+                               ObjectPlacement=placement(None))
+    building = model.create_entity('IfcBuilding', GlobalId=ifcopenshell.guid.new(), Name='Edifício',
+                                   ObjectPlacement=placement(site.ObjectPlacement))
+    aggregate(project, [site])
+    aggregate(site, [building])
+
+    # Um tipo por classe: representação compartilhada pelos elementos mapeados
+    types = []
+    for ifc_class, size in ELEMENT_CLASSES:
+        representation_map = model.create_entity(
+            'IfcRepresentationMap', MappingOrigin=identity, MappedRepresentation=extrusion(size)
+        )
+        element_type = model.create_entity(
+            f'{ifc_class}Type', GlobalId=ifcopenshell.guid.new(), Name=f'{ifc_class[3:]} padrão',
+            RepresentationMaps=[representation_map],
+        )
+        for attribute in ('PredefinedType', 'OperationType', 'PartitioningType'):
+            if hasattr(element_type, attribute):
+                setattr(element_type, attribute, 'NOTDEFINED')
+        operator = model.create_entity('IfcCartesianTransformationOperator3D', LocalOrigin=origin)
+        mapped_item = model.create_entity('IfcMappedItem', MappingSource=representation_map,
+                                          MappingTarget=operator)
+        types.append((element_type, mapped_item, []))
+
+    material_groups = [
+        (model.create_entity('IfcMaterial', Name=f'Material {index}'), [])
+        for index in range(materials)
+    ]
+
+    per_storey = -(-elements // storeys)
+    columns = max(1, int(per_storey ** 0.5))
+    created = 0
+    mapped_count = 0
+    for level in range(storeys):
+        elevation = level * storey_height
+        storey_placement = placement(building.ObjectPlacement, z=elevation)
+        storey = model.create_entity(
+            'IfcBuildingStorey', GlobalId=ifcopenshell.guid.new(), Name=f'Nível {level}',
+            ObjectPlacement=storey_placement, Elevation=elevation * unit,
+        )
+        aggregate(building, [storey])
+
+        spaces = []
+        for index in range(spaces_per_storey):
+            representation = model.create_entity(
+                'IfcProductDefinitionShape', Representations=[extrusion((4.0, 4.0, storey_height))]
+            )
+            spaces.append(model.create_entity(
+                'IfcSpace', GlobalId=ifcopenshell.guid.new(), Name=f'Sala {level}-{index}',
+                ObjectPlacement=placement(storey_placement, x=index * 5.0, y=-5.0),
+                Representation=representation,
+            ))
+        if spaces:
+            aggregate(storey, spaces)
+
+        contained = []
+        for index in range(min(per_storey, elements - created)):
+            class_index = created % len(ELEMENT_CLASSES)
+            ifc_class, size = ELEMENT_CLASSES[class_index]
+            element_type, mapped_item, typed = types[class_index]
+
+            # Distribuição uniforme dos mapeados ao longo do modelo
+            mapped = int((created + 1) * mapped_ratio) > mapped_count
+            if mapped:
+                mapped_count += 1
+                shape = model.create_entity(
+                    'IfcShapeRepresentation', ContextOfItems=body, RepresentationIdentifier='Body',
+                    RepresentationType='MappedRepresentation', Items=[mapped_item],
+                )
+            else:
+                shape = extrusion(size)
+
+            row, column = divmod(index, columns)
+            element = model.create_entity(
+                ifc_class, GlobalId=ifcopenshell.guid.new(), Name=f'{ifc_class[3:]} {level}-{index}',
+                ObjectPlacement=placement(storey_placement, x=column * GRID_SPACING, y=row * GRID_SPACING),
+                Representation=model.create_entity('IfcProductDefinitionShape', Representations=[shape]),
+            )
+            contained.append(element)
+            if mapped:
+                typed.append(element)
+            if material_groups:
+                material_groups[created % len(material_groups)][1].append(element)
+
+            for pset_index in range(psets_per_element):
+                properties = [
+                    model.create_entity(
+                        'IfcPropertySingleValue', Name=f'Propriedade{prop_index}',
+                        NominalValue=model.create_entity('IfcLabel', f'Valor {created}-{prop_index}'),
+                    )
+                    for prop_index in range(properties_per_pset)
+                ]
+                pset_name = f'Pset_{ifc_class[3:]}Common' if pset_index == 0 else f'Dados_{pset_index}'
+                pset = model.create_entity(
+                    'IfcPropertySet', GlobalId=ifcopenshell.guid.new(), Name=pset_name,
+                    HasProperties=properties,
+                )
+                model.create_entity(
+                    'IfcRelDefinesByProperties', GlobalId=ifcopenshell.guid.new(),
+                    RelatedObjects=[element], RelatingPropertyDefinition=pset,
+                )
+            created += 1
+
+        if contained:
+            model.create_entity(
+                'IfcRelContainedInSpatialStructure', GlobalId=ifcopenshell.guid.new(),
+                RelatingStructure=storey, RelatedElements=contained,
+            )
+
+    for element_type, _, typed in types:
+        if typed:
+            model.create_entity(
+                'IfcRelDefinesByType', GlobalId=ifcopenshell.guid.new(),
+                RelatedObjects=typed, RelatingType=element_type,
+            )
+    for material, related in material_groups:
+        if related:
+            model.create_entity(
+                'IfcRelAssociatesMaterial', GlobalId=ifcopenshell.guid.new(),
+                RelatedObjects=related, RelatingMaterial=material,
+            )
+
+    return model
+
+
+class _RssSampler:
+    """Amostra o RSS em uma thread enquanto uma etapa do MemoryMonitor está aberta."""
+
+    def __init__(self, monitor: MemoryMonitor, interval: float = 0.01):
+        self.monitor = monitor
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.monitor.sample()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _measure(name: str, func: Callable[[], Any], repeat: int = 1) -> Tuple[Dict[str, Any], Any]:
+    """
+    Executa func medindo tempo de parede e pico de RSS.
+
+    Returns:
+        tuple: (medição, resultado da última execução)
+    """
+    times = []
+    peak_mb = delta_mb = 0.0
+    value = None
+    for _ in range(max(1, repeat)):
+        value = None
+        gc.collect()
+        monitor = MemoryMonitor()
+        with _RssSampler(monitor), monitor.stage(name) as stage:
+            value = func()
+        times.append(stage.seconds)
+        peak_mb = max(peak_mb, stage.peak_rss / MB)
+        delta_mb = max(delta_mb, (stage.peak_rss - stage.rss_start) / MB)
+    return {
+        'time_s': round(min(times), 4),
+        'peak_rss_mb': round(peak_mb, 1),
+        'peak_delta_mb': round(delta_mb, 1),
+    }, value
+
+
+def processor_methods(processor) -> Dict[str, Callable[[], Any]]:
+    """
+    Métodos do IFCProcessor medidos pelo benchmark, por nome.
+
+    Os argumentos (elemento, GlobalId, termo de busca) vêm do próprio modelo.
+    """
+    sample = next(iter(processor.model.by_type('IfcWall')), None) or processor.model.by_type('IfcProduct')[0]
+    return {
+        'get_project_info': processor.get_project_info,
+        'get_building_elements': processor.get_building_elements,
+        'get_element_properties': lambda: processor.get_element_properties(sample.id()),
+        'get_element_by_global_id': lambda: processor.get_element_by_global_id(sample.GlobalId),
+        'search_elements_by_name': lambda: processor.search_elements_by_name('Wall 0-1'),
+        'get_spatial_structure': processor.get_spatial_structure,
+        'get_storey_map': processor.get_storey_map,
+        'get_property_sets': processor.get_property_sets,
+        'get_materials': processor.get_materials,
+        'get_statistics': processor.get_statistics,
+        'get_world_coordinates': processor.get_world_coordinates,
+        'get_spaces_with_coordinates': processor.get_spaces_with_coordinates,
+        'get_geometry': processor.get_geometry,
+        'get_bounds': processor.get_bounds,
+    }
+
+
+def benchmark_file(path: str, methods: Optional[Iterable[str]] = None, repeat: int = 1) -> Dict[str, Any]:
+    """
+    Mede a abertura, os métodos do IFCProcessor e a extração completa de um arquivo.
+
+    Cada método roda em um IFCProcessor novo sobre o modelo já aberto, sem
+    o cache de geometria em disco, para não aproveitar resultados
+    memorizados por medições anteriores.
+
+    Args:
+        path: Arquivo IFC
+        methods: Nomes a medir (padrão: todos, incluindo 'open' e 'extract_metadata')
+        repeat: Execuções por método (vale o menor tempo e o maior pico)
+
+    Returns:
+        dict: Medição (time_s, peak_rss_mb, peak_delta_mb) por nome
+    """
+    from django.test.utils import override_settings
+    from .extraction import extract_metadata
+    from .ifc_processor import IFCProcessor
+
+    selected = set(methods) if methods else None
+    results = {}
+
+    def fresh_processor():
+        processor = IFCProcessor(path)
+        processor.model = model
+        return processor
+
+    with override_settings(IFC_GEOMETRY_CACHE_MB=0):
+        opener = IFCProcessor(path)
+        results['open'], opened = _measure('open', opener.open)
+        if not opened:
+            raise ValueError(f'Não foi possível abrir o arquivo IFC: {path}')
+        model = opener.model
+        if selected is not None and 'open' not in selected:
+            del results['open']
+
+        for name in processor_methods(fresh_processor()):
+            if selected is None or name in selected:
+                processor = fresh_processor()
+                results[name], _ = _measure(name, processor_methods(processor)[name], repeat)
+
+        if selected is None or 'extract_metadata' in selected:
+            processor = fresh_processor()
+            results['extract_metadata'], _ = _measure(
+                'extract_metadata', lambda: extract_metadata(processor, profile_memory=False), repeat
+            )
+
+    unknown = (selected or set()) - set(results)
+    if unknown:
+        raise ValueError(f"Métodos desconhecidos: {', '.join(sorted(unknown))}")
+    return results
+
+
+def run_benchmark(sizes: Iterable[int] = DEFAULT_SIZES, methods: Optional[Iterable[str]] = None,
+                  repeat: int = 1, model_options: Optional[Dict[str, Any]] = None,
+                  directory: Optional[str] = None, on_size: Optional[Callable] = None) -> Dict[str, Any]:
+    """
+    Gera um modelo sintético por tamanho e mede o processamento de cada um.
+
+    Args:
+        sizes: Números de elementos
+        methods: Nomes medidos (ver benchmark_file)
+        repeat: Execuções por método
+        model_options: Argumentos extras de build_synthetic_model
+        directory: Onde gravar os arquivos temporários (padrão: TMPDIR)
+        on_size: Chamado com (tamanho, resultado) ao fim de cada tamanho
+
+    Returns:
+        dict: Ambiente ('environment') e resultados por tamanho ('sizes')
+    """
+    model_options = model_options or {}
+    report = {
+        'environment': {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'ifcopenshell': ifcopenshell.version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'model_options': model_options,
+        'sizes': {},
+    }
+    for size in sizes:
+        started = time.perf_counter()
+        model = build_synthetic_model(size, **model_options)
+        handle, path = tempfile.mkstemp(prefix='ifc_benchmark_', suffix='.ifc', dir=directory)
+        os.close(handle)
+        try:
+            model.write(path)
+            generate_s = time.perf_counter() - started
+            products = len(model.by_type('IfcProduct'))
+            del model
+            result = {
+                'elements': size,
+                'products': products,
+                'file_mb': round(os.path.getsize(path) / MB, 2),
+                'generate_s': round(generate_s, 2),
+                'methods': benchmark_file(path, methods, repeat),
+            }
+        finally:
+            os.unlink(path)
+        report['sizes'][str(size)] = result
+        logger.info(f"Benchmark de {size} elementos concluído ({result['file_mb']} MB)")
+        if on_size is not None:
+            on_size(size, result)
+    return report
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                          tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    Compara um resultado com o baseline.
+
+    Uma medição é regressão (ou melhoria) se piorar (ou melhorar) mais que
+    tolerance em termos relativos e mais que MIN_TIME_DELTA_S /
+    MIN_RSS_DELTA_MB em termos absolutos. O RSS comparado é o acréscimo
+    durante o método (peak_delta_mb), menos dependente do que rodou antes.
+
+    Returns:
+        list: Uma linha por (tamanho, método, métrica) com baseline, atual, razão e status
+              ('regression', 'improvement', 'ok' ou 'new')
+    """
+    rows = []
+    metrics = (('time_s', MIN_TIME_DELTA_S), ('peak_delta_mb', MIN_RSS_DELTA_MB))
+    for size, result in report.get('sizes', {}).items():
+        base_methods = baseline.get('sizes', {}).get(size, {}).get('methods', {})
+        for method, measurement in result['methods'].items():
+            base = base_methods.get(method)
+            for metric, min_delta in metrics:
+                current = measurement[metric]
+                row = {'size': size, 'method': method, 'metric': metric, 'current': current,
+                       'baseline': None, 'ratio': None, 'status': 'new'}
+                if base is not None and metric in base:
+                    previous = base[metric]
+                    row['baseline'] = previous
+                    row['ratio'] = round(current / previous, 2) if previous else None
+                    delta = current - previous
+                    if abs(delta) <= min_delta or abs(delta) <= tolerance * previous:
+                        row['status'] = 'ok'
+                    else:
+                        row['status'] = 'regression' if delta > 0 else 'improvement'
+                rows.append(row)
+    return rows
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """Baseline gravado ou None se o arquivo não existe."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    """Grava o resultado em JSON (formato do baseline)."""
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2, ensure_ascii=False)
+        output.write('\n')
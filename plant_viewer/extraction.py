@@ -0,0 +1,535 @@
+"""
+Pipeline de extração de metadados IFC em passagem única.
+
+Cada IfcProduct do modelo é visitado uma única vez e entregue a coletores
+plugáveis. Para adicionar um novo campo aos metadados basta criar um
+Collector e incluí-lo em DEFAULT_COLLECTORS, sem nova varredura do modelo.
+"""
+
+import time
+import tracemalloc
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from .ifc_processor import SPATIAL_CONTEXT_TYPES
+
+logger = logging.getLogger(__name__)
+
+
+class Collector:
+    """
+    Coletor base do pipeline.
+
+    Attributes:
+        name: Nome único do coletor (chave em results e nas estatísticas)
+        metadata_key: Se definido, o resultado é gravado diretamente nesta
+                      chave dos metadados
+        visits_products: False para coletores que só usam start/finish
+    """
+
+    name = ''
+    metadata_key: Optional[str] = None
+    visits_products = True
+
+    def start(self, processor) -> None:
+        """Chamado uma vez antes da varredura."""
+
+    def visit(self, element, element_type: str) -> None:
+        """Chamado para cada IfcProduct do modelo."""
+
+    def finish(self, results: Dict[str, Any]) -> Any:
+        """
+        Chamado após a varredura, na ordem dos coletores.
+
+        Args:
+            results: Resultados dos coletores já finalizados
+
+        Returns:
+            Resultado do coletor
+        """
+        return None
+
+
+class TypeCountCollector(Collector):
+    """Conta produtos por classe IFC."""
+
+    name = 'type_counts'
+
+    def start(self, processor):
+        self.counts: Dict[str, int] = {}
+
+    def visit(self, element, element_type):
+        self.counts[element_type] = self.counts.get(element_type, 0) + 1
+
+    def finish(self, results):
+        return dict(sorted(self.counts.items(), key=lambda x: x[1], reverse=True))
+
+
+class GeometryFlagCollector(Collector):
+    """Conta produtos que possuem representação geométrica."""
+
+    name = 'geometry_flag'
+
+    def start(self, processor):
+        self.total_with_geometry = 0
+
+    def visit(self, element, element_type):
+        if element.Representation:
+            self.total_with_geometry += 1
+
+    def finish(self, results):
+        return self.total_with_geometry
+
+
+class CoordinatesCollector(Collector):
+    """Posição global de cada produto, resolvida em lote pela cadeia de placements."""
+
+    name = 'coordinates'
+    visits_products = False
+
+    def start(self, processor):
+        self.processor = processor
+
+    def finish(self, results):
+        return self.processor.get_world_coordinates()
+
+
+class StoreyCollector(Collector):
+    """Andar (IfcBuildingStorey) que contém cada produto."""
+
+    name = 'storeys'
+    visits_products = False
+
+    def start(self, processor):
+        self.processor = processor
+
+    def finish(self, results):
+        return self.processor.get_storey_map()
+
+
+class SpilledElements:
+    """
+    building_elements mantido em disco (modo de memória limitada).
+
+    Os elementos ficam num SpillStore na ordem da varredura; andar e
+    coordenadas são completados durante a leitura. values() entrega um
+    único grupo com todos os elementos, então quem percorre
+    building_elements.values() (ex.: IfcElement.rebuild_for_plant) lê os
+    elementos em streaming, sem montar o agrupamento por tipo em memória.
+    """
+
+    def __init__(self, store, complete):
+        self.store = store
+        self._complete = complete
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __bool__(self) -> bool:
+        return bool(self.store)
+
+    def iter_elements(self):
+        for item in self.store.values():
+            yield self._complete(item)
+
+    def values(self):
+        return [self.iter_elements()]
+
+    def close(self) -> None:
+        self.store.close()
+
+
+class ElementListCollector(Collector):
+    """
+    Lista elementos não espaciais agrupados por tipo (building_elements).
+
+    No modo de memória limitada os elementos vão para um SpillStore e o
+    resultado é um SpilledElements (lido em streaming).
+    """
+
+    name = 'element_list'
+    metadata_key = 'building_elements'
+
+    def start(self, processor):
+        from .memory import SpillStore
+
+        self.elements_by_type: Dict[str, List[Dict]] = {}
+        self.spill = SpillStore() if processor.low_memory else None
+
+    def visit(self, element, element_type):
+        if element_type in SPATIAL_CONTEXT_TYPES:
+            return
+
+        element_id = element.id()
+        item = {
+            'id': element_id,
+            'global_id': element.GlobalId,
+            'name': element.Name or f'{element_type}_{element_id}',
+            'description': element.Description or '',
+            'type': element_type,
+        }
+        if self.spill is not None:
+            self.spill[element_id] = item
+        else:
+            self.elements_by_type.setdefault(element_type, []).append(item)
+
+    def finish(self, results):
+        coordinates = results.get('coordinates', {})
+        # Só o ID e o nome do andar: o mapa não retém as entidades IFC
+        storeys = {
+            element_id: (storey.id(), storey.Name or f'IfcBuildingStorey_{storey.id()}')
+            for element_id, storey in results.get('storeys', {}).items()
+        }
+        missing = {'x': 0.0, 'y': 0.0, 'z': 0.0, 'has_coordinates': False}
+
+        def complete(item):
+            storey_id, storey_name = storeys.get(item['id'], (None, ''))
+            item['storey_id'] = storey_id
+            item['storey'] = storey_name
+            coords = coordinates.get(item['id'], missing)
+            item['x_coordinate'] = coords.get('x', 0.0)
+            item['y_coordinate'] = coords.get('y', 0.0)
+            item['z_coordinate'] = coords.get('z', 0.0)
+            item['has_coordinates'] = coords.get('has_coordinates', False)
+            return item
+
+        if self.spill is not None:
+            return SpilledElements(self.spill, complete)
+        for elements in self.elements_by_type.values():
+            for item in elements:
+                complete(item)
+        return self.elements_by_type
+
+
+class PropertySetCollector(Collector):
+    """Property sets e quantity sets de todos os objetos, extraídos em lote."""
+
+    name = 'property_sets'
+    metadata_key = 'property_sets'
+    visits_products = False
+
+    def start(self, processor):
+        self.processor = processor
+
+    def finish(self, results):
+        return self.processor.get_property_sets()
+
+
+class MaterialCollector(Collector):
+    """Material associado a cada elemento."""
+
+    name = 'materials'
+    metadata_key = 'materials'
+    visits_products = False
+
+    def start(self, processor):
+        self.processor = processor
+
+    def finish(self, results):
+        return self.processor.get_materials()
+
+
+class PropertyTextCollector(Collector):
+    """Valores textuais de propriedades por elemento, para o índice de busca."""
+
+    name = 'property_text'
+    metadata_key = 'search_text'
+    visits_products = False
+    max_length = 2000
+
+    def finish(self, results):
+        texts = {}
+        for element_id, sets in results.get('property_sets', {}).items():
+            values = [
+                value
+                for props in sets.values()
+                for value, _source in props.values()
+                if any(ch.isalpha() for ch in value)
+            ]
+            if values:
+                texts[element_id] = ' '.join(values)[:self.max_length]
+        return texts
+
+
+class BoundsCollector(Collector):
+    """Limites do modelo a partir da passagem de geometria."""
+
+    name = 'bounds'
+    metadata_key = 'bounds'
+    visits_products = False
+
+    def start(self, processor):
+        self.processor = processor
+
+    def finish(self, results):
+        return self.processor.get_bounds()
+
+
+class SpaceCollector(Collector):
+    """Espaços (IfcSpace) com coordenadas, área, volume e altura."""
+
+    name = 'spaces'
+    metadata_key = 'spaces'
+    visits_products = False
+
+    def start(self, processor):
+        self.processor = processor
+
+    def finish(self, results):
+        # Depois de BoundsCollector: a área de reserva reaproveita a passagem de geometria
+        return self.processor.get_spaces_with_coordinates()
+
+
+class SpatialStructureCollector(Collector):
+    """Hierarquia espacial projeto -> site -> edifício -> andar."""
+
+    name = 'spatial_structure'
+    metadata_key = 'spatial_structure'
+    visits_products = False
+
+    def start(self, processor):
+        self.processor = processor
+
+    def finish(self, results):
+        return self.processor.get_spatial_structure()
+
+
+class FloorPlanCollector(Collector):
+    """Polígonos de planta baixa (espaços e paredes) por andar."""
+
+    name = 'floor_plans'
+    metadata_key = 'floor_plans'
+    visits_products = False
+
+    def start(self, processor):
+        self.processor = processor
+
+    def finish(self, results):
+        from .floor_plan import build_floor_plans
+
+        return build_floor_plans(self.processor)
+
+
+DEFAULT_COLLECTORS = (
+    TypeCountCollector,
+    GeometryFlagCollector,
+    CoordinatesCollector,
+    StoreyCollector,
+    ElementListCollector,
+    PropertySetCollector,
+    MaterialCollector,
+    PropertyTextCollector,
+    BoundsCollector,
+    SpaceCollector,
+    SpatialStructureCollector,
+    FloorPlanCollector,
+)
+
+# Etapas da extração distribuída (ver tasks.extraction_workflow): coletores
+# de cada etapa. 'index' roda primeiro, pois abre o fluxo e descarta o
+# resultado parcial de um fluxo anterior; PARALLEL_STAGES rodam em paralelo
+# em seguida e a conclusão publica tudo de uma vez.
+EXTRACTION_STAGES = {
+    'index': (
+        TypeCountCollector,
+        GeometryFlagCollector,
+        CoordinatesCollector,
+        StoreyCollector,
+        ElementListCollector,
+        MaterialCollector,
+    ),
+    'properties': (PropertySetCollector, PropertyTextCollector),
+    'geometry': (BoundsCollector, SpaceCollector, FloorPlanCollector),
+    'spatial_structure': (SpatialStructureCollector,),
+}
+PARALLEL_STAGES = ('properties', 'geometry', 'spatial_structure')
+
+
+class _CollectorStats:
+    """Tempo e memória acumulados de um coletor."""
+
+    __slots__ = ('seconds', 'peak_bytes', 'retained_bytes')
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.retained_bytes = 0
+
+    def as_dict(self, profile_memory: bool) -> Dict[str, Any]:
+        return {
+            'time_ms': round(self.seconds * 1000, 2),
+            'peak_memory_kb': round(self.peak_bytes / 1024, 1) if profile_memory else None,
+            'retained_memory_kb': round(self.retained_bytes / 1024, 1) if profile_memory else None,
+        }
+
+
+class MetadataPipeline:
+    """
+    Executa os coletores sobre uma única varredura dos IfcProduct.
+
+    O tempo de cada coletor é sempre medido; o pico e a memória Python
+    retida (tracemalloc) são medidos quando profile_memory está ativo.
+    O RSS do processo é registrado por etapa no monitor do processador.
+    """
+
+    def __init__(self, processor, collectors=None, profile_memory: Optional[bool] = None, progress=None):
+        """
+        Args:
+            processor: IFCProcessor com o modelo já aberto
+            collectors: Classes ou instâncias de Collector (padrão: DEFAULT_COLLECTORS)
+            profile_memory: Mede pico de memória por coletor
+                            (padrão: settings.IFC_EXTRACTION_PROFILE_MEMORY,
+                            desligado; o tracemalloc deixa a varredura várias
+                            vezes mais lenta e aumenta o consumo de memória,
+                            então nunca é usado no modo de memória limitada)
+            progress: Objeto com begin(fase, total), update(processados, total)
+                      e flush() (ver notifications.ProgressReporter). Recebe a
+                      varredura dos produtos e, pelo processador, a tesselação
+                      e as plantas baixas dos coletores de geometria
+        """
+        self.processor = processor
+        self.progress = progress
+        self.monitor = processor.monitor
+        self.collectors = [
+            c() if isinstance(c, type) else c
+            for c in (collectors if collectors is not None else DEFAULT_COLLECTORS)
+        ]
+        if profile_memory is None:
+            profile_memory = (
+                not processor.low_memory and
+                getattr(settings, 'IFC_EXTRACTION_PROFILE_MEMORY', False)
+            )
+        self.profile_memory = profile_memory
+        self.stats: Dict[str, _CollectorStats] = {c.name: _CollectorStats() for c in self.collectors}
+        self.elements_visited = 0
+        self.total_seconds = 0.0
+
+    def _call(self, collector, method, *args):
+        stats = self.stats[collector.name]
+        if self.profile_memory:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        value = method(*args)
+        stats.seconds += time.perf_counter() - started
+        if self.profile_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            stats.retained_bytes += current - base
+            if peak - base > stats.peak_bytes:
+                stats.peak_bytes = peak - base
+        return value
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Executa o pipeline.
+
+        Returns:
+            dict: Resultados indexados pelo nome do coletor
+        """
+        started_tracing = self.profile_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+
+        started = time.perf_counter()
+        previous_progress = self.processor.progress
+        self.processor.progress = self.progress
+        try:
+            for collector in self.collectors:
+                self._call(collector, collector.start, self.processor)
+
+            visitors = [c for c in self.collectors if c.visits_products]
+            with self.monitor.stage('products'):
+                products = self.processor.model.by_type('IfcProduct')
+                total = len(products)
+                if self.progress is not None:
+                    self.progress.begin('products', total)
+                for element in products:
+                    element_type = element.is_a()
+                    self.elements_visited += 1
+                    for collector in visitors:
+                        self._call(collector, collector.visit, element, element_type)
+                    if self.progress is not None:
+                        self.progress.update(self.elements_visited, total)
+                if self.progress is not None:
+                    self.progress.flush()
+
+            results: Dict[str, Any] = {}
+            for collector in self.collectors:
+                with self.monitor.stage(f'collector:{collector.name}'):
+                    results[collector.name] = self._call(collector, collector.finish, results)
+        finally:
+            self.processor.progress = previous_progress
+            if started_tracing:
+                tracemalloc.stop()
+
+        self.total_seconds = time.perf_counter() - started
+        return results
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Relatório de desempenho da última execução.
+
+        Returns:
+            dict: Tempo total, elementos visitados, tempo/pico de memória por
+                  coletor e RSS por etapa ('memory')
+        """
+        return {
+            'total_time_ms': round(self.total_seconds * 1000, 2),
+            'elements_visited': self.elements_visited,
+            'low_memory': self.processor.low_memory,
+            'collectors': {name: s.as_dict(self.profile_memory) for name, s in self.stats.items()},
+            'memory': self.monitor.report(),
+        }
+
+
+def extract_metadata(processor, collectors=None, profile_memory: Optional[bool] = None,
+                     progress=None) -> Dict[str, Any]:
+    """
+    Extrai os metadados completos de um modelo em passagem única.
+
+    Args:
+        processor: IFCProcessor com o modelo já aberto
+        collectors: Coletores opcionais (padrão: DEFAULT_COLLECTORS)
+        profile_memory: Mede pico de memória por coletor
+        progress: Receptor do progresso da varredura (ver MetadataPipeline)
+
+    Returns:
+        dict: project_info, building_elements, spatial_structure, statistics,
+              bounds e o relatório de extração em 'extraction'
+    """
+    pipeline = MetadataPipeline(processor, collectors, profile_memory, progress)
+    results = pipeline.run()
+    model = processor.model
+
+    metadata = {
+        c.metadata_key: results[c.name]
+        for c in pipeline.collectors if c.metadata_key
+    }
+
+    type_counts = results.get('type_counts')
+    if type_counts is not None:
+        total_elements = sum(type_counts.values())
+        project = model.by_type('IfcProject')
+        metadata['project_info'] = {
+            'name': (project[0].Name if project else None) or 'Sem nome',
+            'description': (project[0].Description if project else None) or '',
+            'schema': model.schema,
+            'total_elements': total_elements,
+        }
+        metadata['statistics'] = {
+            'total_elements': total_elements,
+            'total_with_geometry': results.get('geometry_flag', 0),
+            'elements_by_type': type_counts,
+            'total_types': len(type_counts),
+            'schema': model.schema,
+            'total_properties': len(model.by_type('IfcPropertySet')),
+        }
+
+    metadata['extraction'] = pipeline.get_report()
+    logger.info(
+        f"Extração em passagem única: {pipeline.elements_visited} produtos em "
+        f"{metadata['extraction']['total_time_ms']} ms"
+    )
+    return metadata
@@ -0,0 +1,373 @@
+"""
+Plantas baixas 2D pré-calculadas por andar.
+
+Cada espaço (IfcSpace) e parede (IfcWall) é cortado por um plano
+horizontal na altura de corte acima da base do elemento. Os segmentos da
+seção da malha são encadeados em anéis, simplificados por Douglas–Peucker
+e agrupados por andar como GeoJSON (X/Y do modelo em metros). O resultado
+fica nos metadados da planta (seção floor_plans) e é servido sem nenhum
+processamento 3D na requisição.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from django.conf import settings as django_settings
+
+from .geometry import iter_world_meshes
+from .geometry_cache import get_geometry_cache
+
+logger = logging.getLogger(__name__)
+
+# Classes cortadas e o tipo de feição correspondente
+FLOOR_PLAN_KINDS = (('IfcSpace', 'space'), ('IfcWall', 'wall'))
+
+# Andar dos elementos fora de qualquer IfcBuildingStorey
+NO_STOREY_KEY = 's0'
+
+# Casas decimais das coordenadas servidas (milímetros)
+COORDINATE_DECIMALS = 3
+
+
+def get_floor_plan_tolerance() -> float:
+    """Tolerância (m) do Douglas–Peucker (IFC_FLOOR_PLAN_TOLERANCE)."""
+    return float(getattr(django_settings, 'IFC_FLOOR_PLAN_TOLERANCE', 0.02))
+
+
+def get_floor_plan_cut_height() -> float:
+    """Altura (m) do plano de corte acima da base de cada elemento (IFC_FLOOR_PLAN_CUT_HEIGHT)."""
+    return float(getattr(django_settings, 'IFC_FLOOR_PLAN_CUT_HEIGHT', 1.0))
+
+
+def storey_key(storey) -> str:
+    """Chave do andar na seção floor_plans (prefixada para não ser lida como índice JSON)."""
+    return f's{storey.id()}' if storey is not None else NO_STOREY_KEY
+
+
+def section_segments(verts: np.ndarray, faces: np.ndarray, z: float) -> np.ndarray:
+    """
+    Segmentos da interseção de uma malha triangulada com o plano horizontal z.
+
+    Returns:
+        np.ndarray: Array (k, 2, 2) com as extremidades XY de cada segmento
+    """
+    if not len(faces):
+        return np.empty((0, 2, 2))
+    triangles = np.asarray(verts, dtype=np.float64)[np.asarray(faces)]
+    height = triangles[:, :, 2] - z
+    # Vértices sobre o plano contam como acima (evita segmentos degenerados)
+    above = height >= 0
+    crossing = above.any(axis=1) & ~above.all(axis=1)
+    triangles, height, above = triangles[crossing], height[crossing], above[crossing]
+
+    points = []
+    masks = []
+    for a, b in ((0, 1), (1, 2), (2, 0)):
+        mask = above[:, a] != above[:, b]
+        denominator = np.where(mask, height[:, a] - height[:, b], 1.0)
+        t = (height[:, a] / denominator)[:, None]
+        points.append(triangles[:, a, :2] + (triangles[:, b, :2] - triangles[:, a, :2]) * t)
+        masks.append(mask)
+    # Cada triângulo cortado tem exatamente duas arestas cruzando o plano
+    points = np.stack(points, axis=1)
+    masks = np.stack(masks, axis=1)
+    return points[masks].reshape(-1, 2, 2)
+
+
+def chain_rings(segments: np.ndarray, precision: float = 1e-6) -> List[np.ndarray]:
+    """
+    Encadeia segmentos em anéis fechados.
+
+    Extremidades a menos de precision são consideradas o mesmo ponto.
+    Cadeias abertas (malhas não fechadas) são descartadas.
+
+    Returns:
+        list: Anéis (n, 2) sem repetir o primeiro ponto
+    """
+    if not len(segments):
+        return []
+    keys = np.rint(segments / precision).astype(np.int64)
+    neighbours: Dict[tuple, List[tuple]] = {}
+    points: Dict[tuple, np.ndarray] = {}
+    for (start_key, end_key), (start, end) in zip(keys.tolist(), segments):
+        start_key, end_key = tuple(start_key), tuple(end_key)
+        if start_key == end_key:
+            continue
+        neighbours.setdefault(start_key, []).append(end_key)
+        neighbours.setdefault(end_key, []).append(start_key)
+        points[start_key], points[end_key] = start, end
+
+    rings = []
+    visited = set()
+    for origin in neighbours:
+        if origin in visited:
+            continue
+        ring = [origin]
+        visited.add(origin)
+        previous, current = None, origin
+        closed = False
+        while True:
+            candidates = [n for n in neighbours[current] if n != previous]
+            following = next((n for n in candidates if n not in visited), None)
+            if following is None:
+                closed = origin in candidates and len(ring) > 2
+                break
+            ring.append(following)
+            visited.add(following)
+            previous, current = current, following
+        if closed:
+            rings.append(np.array([points[key] for key in ring]))
+    return rings
+
+
+def _perpendicular_distances(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    direction = end - start
+    length = np.hypot(*direction)
+    if length == 0:
+        return np.hypot(*(points - start).T)
+    return np.abs(direction[0] * (points[:, 1] - start[1]) - direction[1] * (points[:, 0] - start[0])) / length
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Simplifica uma polilinha aberta mantendo os pontos a mais de tolerance da corda.
+
+    Returns:
+        np.ndarray: Pontos mantidos (sempre inclui o primeiro e o último)
+    """
+    if len(points) < 3:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _perpendicular_distances(points[first + 1:last], points[first], points[last])
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.extend(((first, split), (split, last)))
+    return points[keep]
+
+
+def simplify_ring(ring: np.ndarray, tolerance: float) -> Optional[np.ndarray]:
+    """
+    Douglas–Peucker em um anel fechado.
+
+    O anel é dividido no ponto mais distante do primeiro e as duas metades
+    são simplificadas separadamente.
+
+    Returns:
+        np.ndarray: Anel simplificado ou None se restarem menos de 3 pontos
+    """
+    split = int(np.argmax(np.hypot(*(ring - ring[0]).T)))
+    if split == 0:
+        return None
+    closed = np.vstack([ring, ring[:1]])
+    first = douglas_peucker(closed[:split + 1], tolerance)
+    second = douglas_peucker(closed[split:], tolerance)
+    simplified = np.vstack([first[:-1], second[:-1]])
+    return simplified if len(simplified) >= 3 else None
+
+
+def ring_area(ring: np.ndarray) -> float:
+    """Área com sinal (positiva no sentido anti-horário) pela fórmula do laço."""
+    x, y = ring[:, 0], ring[:, 1]
+    return float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def _point_in_ring(point: np.ndarray, ring: np.ndarray) -> bool:
+    x, y = point
+    xs, ys = ring[:, 0], ring[:, 1]
+    next_xs, next_ys = np.roll(xs, -1), np.roll(ys, -1)
+    crosses = (ys > y) != (next_ys > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        intersection = xs + (y - ys) * (next_xs - xs) / (next_ys - ys)
+    return bool(np.count_nonzero(crosses & (x < intersection)) % 2)
+
+
+def section_polygons(verts: np.ndarray, faces: np.ndarray, z: float, tolerance: float) -> List[List[np.ndarray]]:
+    """
+    Polígonos da seção horizontal de uma malha.
+
+    Anéis contidos em um número ímpar de outros anéis são furos. Anéis
+    externos ficam no sentido anti-horário e furos no horário (RFC 7946).
+
+    Returns:
+        list: Polígonos, cada um [anel externo, furos...]
+    """
+    rings = []
+    for ring in chain_rings(section_segments(verts, faces, z)):
+        simplified = simplify_ring(ring, tolerance)
+        if simplified is not None and abs(ring_area(simplified)) > tolerance ** 2:
+            rings.append(simplified)
+    rings.sort(key=lambda ring: -abs(ring_area(ring)))
+
+    polygons: List[List[np.ndarray]] = []
+    owners: List[int] = []
+    for index, ring in enumerate(rings):
+        containers = [other for other in range(index) if _point_in_ring(ring[0], rings[other])]
+        if len(containers) % 2:
+            # Furo do menor anel externo que o contém
+            owner = owners[containers[-1]]
+            polygons[owner].append(ring if ring_area(ring) < 0 else ring[::-1])
+            owners.append(owner)
+        else:
+            owners.append(len(polygons))
+            polygons.append([ring if ring_area(ring) > 0 else ring[::-1]])
+    return polygons
+
+
+def _coordinates(polygons: List[List[np.ndarray]]) -> List:
+    """Polígonos no formato de coordenadas do GeoJSON (anéis fechados, em metros)."""
+    return [
+        [np.vstack([ring, ring[:1]]).round(COORDINATE_DECIMALS).tolist() for ring in polygon]
+        for polygon in polygons
+    ]
+
+
+def build_floor_plans(processor, tolerance: Optional[float] = None,
+                      cut_height: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Calcula as plantas baixas de todos os andares do modelo.
+
+    Args:
+        processor: IFCProcessor com o modelo aberto
+        tolerance: Tolerância do Douglas–Peucker em metros (padrão: IFC_FLOOR_PLAN_TOLERANCE)
+        cut_height: Altura de corte em metros (padrão: IFC_FLOOR_PLAN_CUT_HEIGHT)
+
+    Returns:
+        dict: tolerance, cut_height, index (andares por elevação, com
+              contagens e bbox) e storeys ({chave do andar: FeatureCollection})
+    """
+    if tolerance is None:
+        tolerance = get_floor_plan_tolerance()
+    if cut_height is None:
+        cut_height = get_floor_plan_cut_height()
+    model = processor.model
+    storey_map = processor.get_storey_map()
+    # Elevação dos andares vem na unidade do projeto; a geometria, em metros
+    unit_scale = processor.get_placement_resolver().unit_scale
+
+    products = {}
+    for ifc_class, kind in FLOOR_PLAN_KINDS:
+        for product in model.by_type(ifc_class):
+            if product.Representation:
+                products[product.id()] = (product, kind)
+
+    progress = processor.progress
+    if progress is not None:
+        progress.begin('floor_plans', len(products))
+
+    storeys: Dict[str, Dict[str, Any]] = {}
+    for express_id, _, verts, faces in iter_world_meshes(
+        model, include=[product for product, _ in products.values()], cache=get_geometry_cache(),
+        progress=progress
+    ):
+        if not len(verts):
+            continue
+        product, kind = products[express_id]
+        bottom, top = float(verts[:, 2].min()), float(verts[:, 2].max())
+        polygons = section_polygons(verts, faces, bottom + min(cut_height, (top - bottom) / 2), tolerance)
+        if not polygons:
+            continue
+
+        storey = storey_map.get(express_id)
+        key = storey_key(storey)
+        if key not in storeys:
+            storeys[key] = {
+                'id': storey.id() if storey is not None else None,
+                'key': key,
+                'name': (storey.Name or f'IfcBuildingStorey_{storey.id()}') if storey is not None else '',
+                'elevation': (
+                    round(float(storey.Elevation) * unit_scale, 3)
+                    if storey is not None and storey.Elevation is not None else None
+                ),
+                'features': [],
+            }
+        storeys[key]['features'].append({
+            'type': 'Feature',
+            'id': express_id,
+            'geometry': {'type': 'MultiPolygon', 'coordinates': _coordinates(polygons)},
+            'properties': {
+                'kind': kind,
+                'ifc_type': product.is_a(),
+                'global_id': product.GlobalId,
+                'name': product.Name or f'{product.is_a()}_{express_id}',
+                'area': round(sum(
+                    abs(ring_area(polygon[0])) - sum(abs(ring_area(hole)) for hole in polygon[1:])
+                    for polygon in polygons
+                ), 3),
+            },
+        })
+    if progress is not None:
+        progress.flush()
+
+    index = []
+    collections = {}
+    for key, data in sorted(
+        storeys.items(), key=lambda item: (item[1]['elevation'] is None, item[1]['elevation'] or 0.0, item[0])
+    ):
+        points = np.array([
+            point
+            for feature in data['features']
+            for polygon in feature['geometry']['coordinates']
+            for point in polygon[0]
+        ])
+        bbox = [*points.min(axis=0).round(COORDINATE_DECIMALS).tolist(),
+                *points.max(axis=0).round(COORDINATE_DECIMALS).tolist()]
+        kinds = [feature['properties']['kind'] for feature in data['features']]
+        index.append({
+            'id': data['id'],
+            'key': key,
+            'name': data['name'],
+            'elevation': data['elevation'],
+            'spaces': kinds.count('space'),
+            'walls': kinds.count('wall'),
+            'bbox': bbox,
+        })
+        collections[key] = {'type': 'FeatureCollection', 'bbox': bbox, 'features': data['features']}
+
+    logger.info(
+        f"Plantas baixas calculadas: {len(index)} andares, "
+        f"{sum(len(c['features']) for c in collections.values())} polígonos"
+    )
+    return {'tolerance': tolerance, 'cut_height': cut_height, 'index': index, 'storeys': collections}
+
+
+def floor_plan_to_svg(collection: Dict[str, Any]) -> str:
+    """
+    Converte a FeatureCollection de um andar em SVG.
+
+    O eixo Y é invertido (Y do modelo para cima). Cada feição vira um
+    <path> com data-id, data-kind e classe pelo tipo (space/wall).
+    """
+    from xml.sax.saxutils import quoteattr
+
+    min_x, min_y, max_x, max_y = collection.get('bbox') or (0, 0, 1, 1)
+    width, height = max(max_x - min_x, 1e-3), max(max_y - min_y, 1e-3)
+    paths = []
+    # Espaços por baixo das paredes
+    for feature in sorted(collection['features'], key=lambda feature: feature['properties']['kind'] != 'space'):
+        commands = []
+        for polygon in feature['geometry']['coordinates']:
+            for ring in polygon:
+                commands.append(
+                    'M' + 'L'.join(f'{x:g},{-y:g}' for x, y in ring[:-1]) + 'Z'
+                )
+        properties = feature['properties']
+        paths.append(
+            f'<path class="{properties["kind"]}" data-id="{feature["id"]}" data-kind="{properties["kind"]}" '
+            f'd="{"".join(commands)}"><title>{quoteattr(properties["name"])[1:-1]}</title></path>'
+        )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{min_x:g} {-max_y:g} {width:g} {height:g}" '
+        f'fill-rule="evenodd">'
+        '<style>.space{fill:#cfe3f5;stroke:#2196F3;stroke-width:0.02}'
+        '.wall{fill:#424242;stroke:none}</style>'
+        + ''.join(paths) + '</svg>'
+    )
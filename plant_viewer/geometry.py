@@ -0,0 +1,248 @@
+"""
+Passagem única de geometria sobre um modelo IFC.
+
+Usa ifcopenshell.geom.iterator com múltiplas threads e reduções NumPy
+para calcular, em uma só travessia, a bounding box de cada elemento,
+os limites do modelo e a geometria dos espaços (IfcSpace). Com um
+GeometryCache (geometry_cache.py) só os produtos alterados são tesselados.
+"""
+
+import os
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import ifcopenshell
+import ifcopenshell.geom
+from django.conf import settings as django_settings
+
+logger = logging.getLogger(__name__)
+
+
+def get_geometry_threads() -> int:
+    """
+    Número de threads usadas pelo iterador de geometria.
+
+    Configurável por IFC_GEOMETRY_THREADS; 0 usa todos os núcleos disponíveis.
+    """
+    threads = getattr(django_settings, 'IFC_GEOMETRY_THREADS', 0)
+    return threads if threads > 0 else (os.cpu_count() or 1)
+
+
+def create_geometry_settings(use_world_coords: bool = True) -> 'ifcopenshell.geom.settings':
+    """Cria as configurações de tesselação usadas pelo processador."""
+    settings = ifcopenshell.geom.settings()
+    settings.set('use-world-coords', use_world_coords)
+    return settings
+
+
+def bounds_to_dict(bbox_min, bbox_max) -> Dict[str, Any]:
+    """Converte min/max em dicionário com min, max, center e size."""
+    bbox_min = [float(v) for v in bbox_min]
+    bbox_max = [float(v) for v in bbox_max]
+    axes = ('x', 'y', 'z')
+    return {
+        'min': dict(zip(axes, bbox_min)),
+        'max': dict(zip(axes, bbox_max)),
+        'center': {a: (lo + hi) / 2 for a, lo, hi in zip(axes, bbox_min, bbox_max)},
+        'size': {a: hi - lo for a, lo, hi in zip(axes, bbox_min, bbox_max)},
+    }
+
+
+class GeometryPassResult:
+    """
+    Resultado de uma passagem de geometria.
+
+    Attributes:
+        element_bounds: {express_id: (min xyz, max xyz)} de cada produto tesselado
+        spaces: {express_id: dados de geometria do IfcSpace}
+        element_types: {express_id: classe IFC} dos produtos tesselados
+    """
+
+    def __init__(self):
+        self.element_bounds: Dict[int, tuple] = {}
+        self.element_types: Dict[int, str] = {}
+        self.spaces: Dict[int, Dict[str, Any]] = {}
+
+    def __len__(self):
+        return len(self.element_bounds)
+
+    def get_bounds(self) -> Optional[Dict[str, Any]]:
+        """
+        Limites do modelo a partir das bounding boxes dos elementos.
+
+        Returns:
+            dict: min, max, center e size ou None se nada foi tesselado
+        """
+        if not self.element_bounds:
+            return None
+        mins = np.array([b[0] for b in self.element_bounds.values()])
+        maxs = np.array([b[1] for b in self.element_bounds.values()])
+        return bounds_to_dict(mins.min(axis=0), maxs.max(axis=0))
+
+
+def iterate_shapes(model, settings, num_threads: Optional[int] = None,
+                   include: Optional[Iterable] = None, exclude: Optional[Iterable] = None):
+    """
+    Gera as formas tesseladas do modelo usando o iterador multi-thread.
+
+    Args:
+        model: ifcopenshell.file aberto
+        settings: ifcopenshell.geom.settings
+        num_threads: Threads do iterador (padrão: get_geometry_threads())
+        include: Lista opcional de produtos a processar
+        exclude: Produtos ou classes IFC a ignorar (ex.: ['IfcSpace'])
+
+    Yields:
+        Formas retornadas pelo iterador (shape.id, shape.geometry, ...)
+    """
+    if include is not None:
+        include = list(include)
+        if not include:
+            return
+
+    iterator = ifcopenshell.geom.iterator(
+        settings, model, num_threads or get_geometry_threads(), include=include,
+        exclude=list(exclude) if exclude else None
+    )
+    if not iterator.initialize():
+        return
+
+    while True:
+        yield iterator.get()
+        if not iterator.next():
+            break
+
+
+def shape_vertices(geometry) -> np.ndarray:
+    """Vértices de uma geometria tesselada como array (n, 3)."""
+    return np.frombuffer(geometry.verts_buffer, dtype=np.float64).reshape(-1, 3)
+
+
+def _add_shape(result: GeometryPassResult, express_id: int, ifc_type: str, verts: np.ndarray) -> None:
+    """Registra a bounding box (e, para IfcSpace, a área projetada) de um produto tesselado."""
+    if not len(verts):
+        return
+
+    bbox_min = np.asarray(verts.min(axis=0))
+    bbox_max = np.asarray(verts.max(axis=0))
+    result.element_bounds[express_id] = (bbox_min, bbox_max)
+    result.element_types[express_id] = ifc_type
+
+    if ifc_type == 'IfcSpace':
+        size = bbox_max - bbox_min
+        result.spaces[express_id] = {
+            'min': bbox_min,
+            'max': bbox_max,
+            'footprint_area': float(size[0] * size[1]),
+        }
+
+
+def shape_faces(geometry) -> np.ndarray:
+    """Triângulos de uma geometria tesselada como array (m, 3) de índices."""
+    return np.frombuffer(geometry.faces_buffer, dtype=np.int32).reshape(-1, 3)
+
+
+def iter_world_meshes(model, num_threads: Optional[int] = None,
+                      include: Optional[Iterable] = None, cache=None,
+                      progress=None, offset: int = 0, total: Optional[int] = None):
+    """
+    Gera as malhas dos produtos em coordenadas globais, usando o cache quando houver.
+
+    Args:
+        model: ifcopenshell.file aberto
+        num_threads: Threads do iterador (padrão: get_geometry_threads())
+        include: Lista opcional de produtos a processar
+        cache: GeometryCache opcional (geometry_cache.py); só os produtos
+               sem entrada no cache são tesselados
+        progress: Receptor opcional com update(processados, total), chamado
+                  a cada malha entregue (ver notifications.ProgressReporter)
+        offset: Produtos já processados antes desta chamada (passagens em lotes)
+        total: Total de produtos da passagem (padrão: offset + produtos desta chamada)
+
+    Yields:
+        tuple: (express_id, classe IFC, vértices (n, 3), faces (m, 3))
+    """
+    settings = create_geometry_settings(use_world_coords=True)
+
+    if include is None and (cache is not None or progress is not None):
+        # Mesmos produtos que o iterador processa sem filtro (aberturas são subtraídas, não tesseladas)
+        include = [
+            product for product in model.by_type('IfcProduct')
+            if product.Representation and not product.is_a('IfcOpeningElement')
+        ]
+    elif include is not None:
+        include = list(include)
+    if progress is not None and total is None:
+        total = offset + len(include)
+    processed = offset
+
+    keys: Dict[int, str] = {}
+    if cache is not None:
+        from .geometry_cache import SubgraphHasher, settings_fingerprint
+
+        hasher = SubgraphHasher(model, settings_fingerprint(settings))
+        misses = []
+        for product in include:
+            key = hasher.product(product)
+            cached = cache.get(key)
+            if cached is None:
+                keys[product.id()] = key
+                misses.append(product)
+            else:
+                yield product.id(), product.is_a(), cached[0], cached[1]
+                if progress is not None:
+                    processed += 1
+                    progress.update(processed, total)
+        include = misses
+
+    for shape in iterate_shapes(model, settings, num_threads, include):
+        verts = shape_vertices(shape.geometry)
+        faces = shape_faces(shape.geometry)
+        if shape.id in keys:
+            cache.put(keys.pop(shape.id), verts, faces)
+        yield shape.id, shape.type, verts, faces
+        if progress is not None:
+            processed += 1
+            progress.update(processed, total)
+
+    # Produtos que o iterador não tesselou: entrada vazia evita tentar de novo
+    for key in keys.values():
+        cache.put(key, np.empty((0, 3)), np.empty((0, 3), dtype=np.int32))
+
+
+def run_geometry_pass(model, num_threads: Optional[int] = None,
+                      include: Optional[Iterable] = None,
+                      result: Optional[GeometryPassResult] = None,
+                      cache=None, progress=None, offset: int = 0,
+                      total: Optional[int] = None) -> GeometryPassResult:
+    """
+    Executa uma travessia de geometria em coordenadas globais.
+
+    Args:
+        model: ifcopenshell.file aberto
+        num_threads: Threads do iterador (padrão: get_geometry_threads())
+        include: Lista opcional de produtos a processar
+        result: Resultado existente a complementar (passagens em lotes)
+        cache: GeometryCache opcional (ver iter_world_meshes)
+        progress, offset, total: Progresso por forma tesselada (ver iter_world_meshes)
+
+    Returns:
+        GeometryPassResult: Bounding boxes por elemento, limites e espaços
+    """
+    partial = result is not None
+    if result is None:
+        result = GeometryPassResult()
+    hits = cache.hits if cache is not None else 0
+
+    for express_id, ifc_type, verts, _ in iter_world_meshes(
+        model, num_threads, include, cache, progress=progress, offset=offset, total=total
+    ):
+        _add_shape(result, express_id, ifc_type, verts)
+
+    if not partial:
+        message = f"Passagem de geometria concluída: {len(result)} elementos tesselados"
+        if cache is not None:
+            message += f" ({cache.hits - hits} do cache)"
+        logger.info(message)
+    return result
@@ -0,0 +1,253 @@
+"""
+Cache em disco, endereçado por conteúdo, da tesselação de produtos IFC.
+
+A chave de cada produto é o hash do subgrafo que determina a sua forma:
+classe, representação, placement (com toda a cadeia PlacementRelTo) e
+aberturas (IfcRelVoidsElement), mais as unidades do projeto, as
+configurações de tesselação e a versão do IfcOpenShell. O hash é uma
+árvore de Merkle: cada entidade resume a classe, os atributos e o hash das
+entidades referenciadas, sem os números de instância (#id), que mudam
+entre revisões do arquivo. Assim, ao reprocessar uma revisão só os
+produtos alterados voltam a ser tesselados.
+
+Cada entrada são dois arrays .npy (vértices e faces) lidos com
+mmap_mode='r'. O tamanho total é limitado (IFC_GEOMETRY_CACHE_MB) e as
+entradas usadas há mais tempo (mtime, atualizado a cada leitura) são
+removidas primeiro.
+"""
+
+import hashlib
+import os
+import tempfile
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import ifcopenshell
+from django.conf import settings as django_settings
+
+logger = logging.getLogger(__name__)
+
+# Incrementar quando o formato das entradas mudar
+GEOMETRY_CACHE_VERSION = 1
+
+# Após exceder o limite, remove entradas até esta fração do tamanho máximo
+EVICTION_TARGET = 0.9
+
+_VERTS_SUFFIX = '.verts.npy'
+_FACES_SUFFIX = '.faces.npy'
+
+
+def get_geometry_cache() -> Optional['GeometryCache']:
+    """
+    Cache de geometria configurado (IFC_GEOMETRY_CACHE_DIR, IFC_GEOMETRY_CACHE_MB).
+
+    Returns:
+        GeometryCache ou None se o cache estiver desativado (tamanho 0)
+    """
+    max_mb = getattr(django_settings, 'IFC_GEOMETRY_CACHE_MB', 1024)
+    if max_mb <= 0:
+        return None
+    directory = getattr(django_settings, 'IFC_GEOMETRY_CACHE_DIR', None)
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), 'ifc_geometry_cache')
+    return GeometryCache(str(directory), int(max_mb * 1024 * 1024))
+
+
+def settings_fingerprint(settings) -> bytes:
+    """Resumo das configurações de tesselação e da versão do IfcOpenShell."""
+    values = []
+    for name in settings.setting_names():
+        try:
+            values.append((name, settings.get(name)))
+        except Exception:
+            continue  # Configuração sem valor definido
+    return repr((GEOMETRY_CACHE_VERSION, ifcopenshell.version, sorted(values))).encode()
+
+
+class SubgraphHasher:
+    """
+    Hash de conteúdo dos subgrafos de entidades de um modelo.
+
+    Os hashes de entidades compartilhadas (contextos, placements de
+    andares, representações mapeadas) são memorizados e calculados uma vez.
+    """
+
+    def __init__(self, model, salt: bytes = b''):
+        """
+        Args:
+            model: ifcopenshell.file aberto
+            salt: Bytes incluídos em todas as chaves de produto (ex.: configurações)
+        """
+        self.model = model
+        self._memo: Dict[int, bytes] = {}
+        digest = hashlib.blake2b(salt, digest_size=16)
+        # Unidades do projeto alteram a escala da tesselação
+        for units in model.by_type('IfcUnitAssignment'):
+            digest.update(self.entity(units))
+        self._salt = digest.digest()
+
+    def entity(self, entity) -> bytes:
+        """Hash (16 bytes) da entidade e de tudo o que ela referencia."""
+        key = entity.id()
+        if key and key in self._memo:
+            return self._memo[key]
+
+        digest = hashlib.blake2b(entity.is_a().encode(), digest_size=16)
+        for index in range(len(entity)):
+            self._update(digest, entity[index])
+        value = digest.digest()
+        # Valores tipados embutidos (ex.: IfcLabel) não têm #id próprio
+        if key:
+            self._memo[key] = value
+        return value
+
+    def _update(self, digest, value) -> None:
+        if isinstance(value, ifcopenshell.entity_instance):
+            digest.update(b'#')
+            digest.update(self.entity(value))
+        elif isinstance(value, (tuple, list)):
+            digest.update(b'(')
+            for item in value:
+                self._update(digest, item)
+            digest.update(b')')
+        else:
+            digest.update(repr(value).encode())
+            digest.update(b',')
+
+    def product(self, product) -> str:
+        """
+        Chave do cache de um produto.
+
+        Returns:
+            str: Hash hexadecimal da forma do produto
+        """
+        digest = hashlib.blake2b(self._salt, digest_size=20)
+        digest.update(product.is_a().encode())
+        for attribute in ('Representation', 'ObjectPlacement'):
+            self._update(digest, getattr(product, attribute, None))
+        for rel in getattr(product, 'HasOpenings', None) or ():
+            opening = rel.RelatedOpeningElement
+            digest.update(b'opening')
+            self._update(digest, opening.Representation)
+            self._update(digest, opening.ObjectPlacement)
+        return digest.hexdigest()
+
+
+class GeometryCache:
+    """
+    Entradas de tesselação (vértices e faces) em arquivos .npy.
+
+    Seguro para vários processos: cada arquivo é gravado em um temporário
+    e renomeado, e entradas removidas por outro processo viram misses.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key[:2], key)
+        return base + _VERTS_SUFFIX, base + _FACES_SUFFIX
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Lê uma entrada mapeada em memória.
+
+        Returns:
+            tuple: (vértices (n, 3) float64, faces (m, 3) int32) ou None
+        """
+        verts_path, faces_path = self._paths(key)
+        try:
+            verts = np.load(verts_path, mmap_mode='r')
+            faces = np.load(faces_path, mmap_mode='r')
+            # mtime marca o último uso (LRU)
+            os.utime(verts_path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return verts, faces
+
+    def put(self, key: str, verts: np.ndarray, faces: np.ndarray) -> None:
+        """Grava uma entrada e remove as mais antigas se o limite for excedido."""
+        verts_path, faces_path = self._paths(key)
+        os.makedirs(os.path.dirname(verts_path), exist_ok=True)
+        written = 0
+        # Faces antes dos vértices: get() só encontra entradas completas
+        for path, array in ((faces_path, np.ascontiguousarray(faces, dtype=np.int32)),
+                            (verts_path, np.ascontiguousarray(verts, dtype=np.float64))):
+            handle, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(handle, 'wb') as stream:
+                    np.save(stream, array)
+                # Sobrescrita de uma entrada existente: só a diferença entra no total
+                try:
+                    written -= os.path.getsize(path)
+                except OSError:
+                    pass
+                os.replace(temporary_path, path)
+            except OSError as e:
+                logger.warning(f"Falha ao gravar entrada do cache de geometria {key}: {e}")
+                if os.path.exists(temporary_path):
+                    os.unlink(temporary_path)
+                return
+            written += os.path.getsize(path)
+
+        if self._size is None:
+            self._size = self.size_bytes()
+        else:
+            self._size += written
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(último uso, bytes, chave) de todas as entradas."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(_VERTS_SUFFIX):
+                    continue
+                key = name[:-len(_VERTS_SUFFIX)]
+                verts_path, faces_path = self._paths(key)
+                try:
+                    stat = os.stat(verts_path)
+                    size = stat.st_size + os.path.getsize(faces_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, size, key))
+        return entries
+
+    def size_bytes(self) -> int:
+        """Tamanho total das entradas em disco."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """
+        Remove as entradas usadas há mais tempo até EVICTION_TARGET do limite.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        entries = sorted(self._entries())
+        size = sum(entry[1] for entry in entries)
+        target = self.max_bytes * EVICTION_TARGET
+        removed = 0
+        for _, entry_size, key in entries:
+            if size <= target:
+                break
+            for path in self._paths(key):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            size -= entry_size
+            removed += 1
+        self._size = size
+        if removed:
+            logger.info(f"Cache de geometria: {removed} entradas removidas (LRU), {size} bytes em uso")
+        return removed
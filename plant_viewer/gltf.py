@@ -0,0 +1,641 @@
+"""
+Conversão de modelos IFC para glTF binário (GLB) sem ferramentas externas.
+
+A geometria é tesselada pelo ifcopenshell.geom.iterator em coordenadas
+locais: cada produto vira um nó com a sua matriz de posicionamento e
+aponta para uma malha. Representações compartilhadas (IfcMappedItem de
+um IfcRepresentationMap) e geometrias idênticas são gravadas uma única
+vez e reutilizadas por vários nós (instanciamento do glTF), e todos os
+buffers vão em um único chunk binário.
+
+Cada nó leva o GlobalId como nome e os dados do elemento em extras
+(ifcId, global_id, type, name), que o GLTFLoader do three.js expõe em
+object.userData; o mapa GlobalId → índice do nó fica em scenes[0].extras.
+
+Com quantize=True as malhas são codificadas por mesh_encoding (posições
+int16 via KHR_mesh_quantization, normais octaédricas no atributo
+_NORMAL_OCT, triângulos e vértices reordenados) e, com compressão, o GLB
+é gravado em gzip para ser servido com Content-Encoding.
+
+Na mesma passagem podem ser gerados GLBs de níveis de detalhe (lod.py):
+versões simplificadas de cada malha e uma caixa por elemento, com os
+mesmos nós e GlobalIds, para o visualizador carregar do mais grosso ao
+mais detalhado.
+
+Com um TileSet (tiles.py) os mesmos nós também são distribuídos em GLBs
+por andar e célula de grade, para carregamento progressivo.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import os
+import struct
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings as django_settings
+
+from .geometry import create_geometry_settings, iterate_shapes
+from .lod import LOD_LEVELS, PROXY_LEVEL, bounding_box_proxy, face_normals, simplify_mesh
+from .mesh_encoding import (
+    dequantization_matrix,
+    octahedral_encode,
+    optimize_triangle_order,
+    optimize_vertex_fetch,
+    quantize_positions,
+    scale_normals,
+)
+
+logger = logging.getLogger(__name__)
+
+GLB_MAGIC = 0x46546C67  # 'glTF'
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+SHORT = 5122
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+FLOAT = 5126
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+KHR_MESH_QUANTIZATION = 'KHR_mesh_quantization'
+# Atributo específico da aplicação (prefixo '_'), decodificado pelo visualizador
+NORMAL_OCT_ATTRIBUTE = '_NORMAL_OCT'
+
+# IFC usa Z para cima; glTF usa Y para cima (rotação de -90° em X)
+Z_UP_TO_Y_UP = [-math.sqrt(0.5), 0.0, 0.0, math.sqrt(0.5)]
+
+IDENTITY = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+# Volumes abstratos que não devem aparecer no visualizador
+DEFAULT_EXCLUDED_TYPES = ('IfcSpace', 'IfcOpeningElement')
+
+DEFAULT_COLOR = (0.8, 0.8, 0.8)
+
+# Bytes por vértice sem codificação: posição e normal em float32
+RAW_VERTEX_BYTES = 24
+
+
+def get_glb_quantize() -> bool:
+    """Se a exportação GLB quantiza posições e normais (IFC_GLB_QUANTIZE)."""
+    return getattr(django_settings, 'IFC_GLB_QUANTIZE', True)
+
+
+def get_glb_compression_level() -> int:
+    """Nível gzip do GLB gravado (IFC_GLB_COMPRESSION_LEVEL; 0 desativa)."""
+    return getattr(django_settings, 'IFC_GLB_COMPRESSION_LEVEL', 9)
+
+
+def _pad(data: bytes, fill: bytes = b'\x00') -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def _material_key(material) -> Tuple:
+    """Nome, cor difusa e transparência de um material do iterador."""
+    try:
+        color = tuple(round(float(c), 4) for c in material.diffuse.components)
+    except Exception:
+        color = DEFAULT_COLOR
+    transparency = material.transparency
+    if transparency is None or math.isnan(transparency):
+        transparency = 0.0
+    return material.name, color, round(float(transparency), 4)
+
+
+class MeshArrays:
+    """
+    Malha triangulada em arrays NumPy.
+
+    Attributes:
+        positions: (n, 3) float64
+        normals: (n, 3) float64 ou None
+        triangles: (m, 3) índices
+        material_ids: (m,) índice em materials de cada triângulo
+        materials: Chaves de material (ver _material_key)
+    """
+
+    __slots__ = ('positions', 'normals', 'triangles', 'material_ids', 'materials')
+
+    def __init__(self, positions, normals, triangles, material_ids, materials):
+        self.positions = positions
+        self.normals = normals
+        self.triangles = triangles
+        self.material_ids = material_ids
+        self.materials = materials
+
+    @classmethod
+    def from_geometry(cls, geometry) -> 'MeshArrays':
+        """Converte a geometria tesselada do ifcopenshell."""
+        positions = np.frombuffer(geometry.verts_buffer, dtype=np.float64).reshape(-1, 3)
+        normals = np.frombuffer(geometry.normals_buffer, dtype=np.float64)
+        normals = normals.reshape(-1, 3) if normals.size == positions.size else None
+        triangles = np.frombuffer(geometry.faces_buffer, dtype=np.int32).reshape(-1, 3)
+        material_ids = np.frombuffer(geometry.material_ids_buffer, dtype=np.int32)
+        if len(material_ids) != len(triangles):
+            material_ids = np.zeros(len(triangles), dtype=np.int32)
+        materials = [_material_key(material) for material in geometry.materials]
+        return cls(positions, normals, triangles, material_ids, materials)
+
+
+class GlbBuilder:
+    """
+    Monta um documento glTF 2.0 com um único buffer binário.
+
+    Os blocos binários são acumulados em ordem e alinhados a 4 bytes;
+    to_bytes() gera o contêiner GLB (cabeçalho + chunks JSON e BIN).
+    """
+
+    def __init__(self, generator: str = 'plant_viewer IFC→GLB', quantize: bool = False):
+        self.asset = {'version': '2.0', 'generator': generator}
+        self.quantize = quantize
+        self.nodes: List[Dict[str, Any]] = []
+        self.meshes: List[Dict[str, Any]] = []
+        self.materials: List[Dict[str, Any]] = []
+        self.accessors: List[Dict[str, Any]] = []
+        self.buffer_views: List[Dict[str, Any]] = []
+        self.scene_extras: Dict[str, Any] = {}
+        self.extensions_used: List[str] = []
+        self.extensions_required: List[str] = []
+        # Desquantização de cada malha, composta na matriz dos nós que a usam
+        self.mesh_matrices: Dict[int, np.ndarray] = {}
+        self.raw_bytes = 0
+        self.triangles = 0
+        self.encoding_seconds = 0.0
+        self._chunks: List[bytes] = []
+        self._length = 0
+        self._material_index: Dict[Tuple, int] = {}
+        if quantize:
+            self.extensions_used.append(KHR_MESH_QUANTIZATION)
+            self.extensions_required.append(KHR_MESH_QUANTIZATION)
+
+    @property
+    def binary_size(self) -> int:
+        return self._length
+
+    def add_buffer_view(self, data: bytes, target: Optional[int] = None, byte_stride: Optional[int] = None) -> int:
+        """Anexa dados ao buffer e retorna o índice do bufferView."""
+        view = {'buffer': 0, 'byteOffset': self._length, 'byteLength': len(data)}
+        if byte_stride is not None:
+            view['byteStride'] = byte_stride
+        if target is not None:
+            view['target'] = target
+        padded = _pad(data)
+        self._chunks.append(padded)
+        self._length += len(padded)
+        self.buffer_views.append(view)
+        return len(self.buffer_views) - 1
+
+    def add_accessor(self, buffer_view: int, component_type: int, count: int, accessor_type: str,
+                     minimum=None, maximum=None, normalized: bool = False) -> int:
+        accessor = {
+            'bufferView': buffer_view,
+            'componentType': component_type,
+            'count': count,
+            'type': accessor_type,
+        }
+        if normalized:
+            accessor['normalized'] = True
+        if minimum is not None:
+            cast = float if component_type == FLOAT else int
+            accessor['min'] = [cast(v) for v in minimum]
+            accessor['max'] = [cast(v) for v in maximum]
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+    def add_material(self, key: Tuple) -> int:
+        """Material PBR equivalente ao estilo de superfície IFC (reutilizado por chave)."""
+        index = self._material_index.get(key)
+        if index is None:
+            name, color, transparency = key
+            alpha = 1.0 - transparency
+            material = {
+                'name': name or 'IfcMaterial',
+                'pbrMetallicRoughness': {
+                    'baseColorFactor': [*color, alpha],
+                    'metallicFactor': 0.0,
+                    'roughnessFactor': 0.9,
+                },
+                # Faces IFC nem sempre têm orientação consistente
+                'doubleSided': True,
+            }
+            if alpha < 1.0:
+                material['alphaMode'] = 'BLEND'
+            self.materials.append(material)
+            index = self._material_index[key] = len(self.materials) - 1
+        return index
+
+    def _add_attributes(self, mesh: MeshArrays) -> Tuple[Dict[str, int], Optional[np.ndarray]]:
+        positions = mesh.positions
+        attributes = {}
+        matrix = None
+
+        if self.quantize:
+            quantized, center, half_extent = quantize_positions(positions)
+            matrix = dequantization_matrix(center, half_extent)
+            # Cada elemento de vértice deve ocupar múltiplos de 4 bytes
+            padded = np.zeros((len(quantized), 4), dtype=np.int16)
+            padded[:, :3] = quantized
+            attributes['POSITION'] = self.add_accessor(
+                self.add_buffer_view(padded.tobytes(), ARRAY_BUFFER, byte_stride=8), SHORT, len(quantized), 'VEC3',
+                quantized.min(axis=0), quantized.max(axis=0), normalized=True,
+            )
+            if mesh.normals is not None:
+                # O visualizador aplica às normais a inversa transposta da
+                # matriz do nó, que inclui a escala diag(meia-extensão) da
+                # desquantização: gravadas pré-multiplicadas por essa escala,
+                # voltam à direção original depois da transformação
+                encoded = octahedral_encode(scale_normals(mesh.normals, half_extent))
+                attributes[NORMAL_OCT_ATTRIBUTE] = self.add_accessor(
+                    self.add_buffer_view(encoded.tobytes(), ARRAY_BUFFER), SHORT, len(encoded), 'VEC2',
+                    normalized=True,
+                )
+        else:
+            positions = positions.astype(np.float32)
+            attributes['POSITION'] = self.add_accessor(
+                self.add_buffer_view(positions.tobytes(), ARRAY_BUFFER), FLOAT, len(positions), 'VEC3',
+                positions.min(axis=0), positions.max(axis=0),
+            )
+            if mesh.normals is not None:
+                attributes['NORMAL'] = self.add_accessor(
+                    self.add_buffer_view(mesh.normals.astype(np.float32).tobytes(), ARRAY_BUFFER),
+                    FLOAT, len(positions), 'VEC3'
+                )
+        return attributes, matrix
+
+    def add_mesh(self, mesh: MeshArrays, name: Optional[str] = None) -> Optional[int]:
+        """
+        Grava a malha com uma primitiva por material.
+
+        Posições e normais são compartilhadas entre as primitivas; cada uma
+        tem o seu próprio buffer de índices.
+
+        Returns:
+            int: Índice da malha ou None se não há triângulos
+        """
+        if not len(mesh.triangles):
+            return None
+        started = time.perf_counter()
+        self.raw_bytes += len(mesh.positions) * RAW_VERTEX_BYTES + mesh.triangles.size * 4
+        self.triangles += len(mesh.triangles)
+
+        triangles, material_ids = mesh.triangles, mesh.material_ids
+        if self.quantize:
+            order = optimize_triangle_order(triangles, mesh.positions, groups=material_ids)
+            triangles, material_ids = triangles[order], material_ids[order]
+            triangles, vertex_order = optimize_vertex_fetch(triangles, len(mesh.positions))
+            mesh = MeshArrays(
+                mesh.positions[vertex_order],
+                mesh.normals[vertex_order] if mesh.normals is not None else None,
+                triangles, material_ids, mesh.materials,
+            )
+
+        attributes, matrix = self._add_attributes(mesh)
+
+        if len(mesh.positions) < 65535:
+            index_dtype, index_type = np.uint16, UNSIGNED_SHORT
+        else:
+            index_dtype, index_type = np.uint32, UNSIGNED_INT
+
+        primitives = []
+        for material_id in np.unique(material_ids):
+            indices = triangles[material_ids == material_id].astype(index_dtype).ravel()
+            primitive = {
+                'attributes': attributes,
+                'indices': self.add_accessor(
+                    self.add_buffer_view(indices.tobytes(), ELEMENT_ARRAY_BUFFER), index_type, len(indices), 'SCALAR'
+                ),
+                'mode': 4,
+            }
+            if 0 <= material_id < len(mesh.materials):
+                primitive['material'] = self.add_material(mesh.materials[int(material_id)])
+            primitives.append(primitive)
+
+        definition = {'primitives': primitives}
+        if name:
+            definition['name'] = name
+        self.meshes.append(definition)
+        index = len(self.meshes) - 1
+        if matrix is not None:
+            self.mesh_matrices[index] = matrix
+        self.encoding_seconds += time.perf_counter() - started
+        return index
+
+    def add_node(self, mesh: Optional[int] = None, matrix: Optional[Sequence[float]] = None,
+                 name: Optional[str] = None, extras: Optional[Dict[str, Any]] = None,
+                 children: Optional[List[int]] = None, rotation: Optional[List[float]] = None) -> int:
+        """
+        Adiciona um nó.
+
+        Args:
+            mesh: Índice da malha
+            matrix: Matriz 4x4 em ordem de coluna (16 valores), como no glTF
+        """
+        node: Dict[str, Any] = {}
+        if name:
+            node['name'] = name
+        if mesh is not None:
+            node['mesh'] = mesh
+            if mesh in self.mesh_matrices:
+                placement = np.eye(4) if matrix is None else np.asarray(matrix, dtype=np.float64).reshape(4, 4).T
+                matrix = (placement @ self.mesh_matrices[mesh]).T.ravel()
+        if matrix is not None and tuple(matrix) != IDENTITY:
+            node['matrix'] = [float(v) for v in matrix]
+        if rotation is not None:
+            node['rotation'] = rotation
+        if children:
+            node['children'] = children
+        if extras:
+            node['extras'] = extras
+        self.nodes.append(node)
+        return len(self.nodes) - 1
+
+    def to_json(self, root_nodes: List[int]) -> Dict[str, Any]:
+        scene: Dict[str, Any] = {'nodes': root_nodes}
+        if self.scene_extras:
+            scene['extras'] = self.scene_extras
+        document: Dict[str, Any] = {'asset': self.asset}
+        if self.extensions_used:
+            document['extensionsUsed'] = self.extensions_used
+            document['extensionsRequired'] = self.extensions_required
+        document.update({'scene': 0, 'scenes': [scene], 'nodes': self.nodes})
+        for key, values in (('meshes', self.meshes), ('materials', self.materials),
+                            ('accessors', self.accessors), ('bufferViews', self.buffer_views)):
+            if values:
+                document[key] = values
+        if self._length:
+            document['buffers'] = [{'byteLength': self._length}]
+        return document
+
+    def to_bytes(self, root_nodes: List[int]) -> bytes:
+        """Serializa o documento como GLB."""
+        json_chunk = _pad(
+            json.dumps(self.to_json(root_nodes), separators=(',', ':'), ensure_ascii=False).encode('utf-8'),
+            b' ',
+        )
+        chunks = [struct.pack('<II', len(json_chunk), CHUNK_JSON), json_chunk]
+        if self._length:
+            chunks.append(struct.pack('<II', self._length, CHUNK_BIN))
+            chunks.extend(self._chunks)
+        body_length = sum(len(chunk) for chunk in chunks)
+        return struct.pack('<III', GLB_MAGIC, GLB_VERSION, 12 + body_length) + b''.join(chunks)
+
+
+def read_glb(data: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """
+    Separa um GLB (opcionalmente em gzip) em documento JSON e chunk binário.
+
+    Raises:
+        ValueError: Se o conteúdo não for um GLB 2.0
+    """
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    if len(data) < 20:
+        raise ValueError('Conteúdo curto demais para um GLB')
+    magic, version, length = struct.unpack_from('<III', data, 0)
+    if magic != GLB_MAGIC or version != GLB_VERSION or length != len(data):
+        raise ValueError('Cabeçalho GLB inválido')
+    json_length, json_type = struct.unpack_from('<II', data, 12)
+    if json_type != CHUNK_JSON:
+        raise ValueError('Primeiro chunk do GLB não é JSON')
+    document = json.loads(data[20:20 + json_length].decode('utf-8'))
+    binary = b''
+    offset = 20 + json_length
+    if offset < len(data):
+        bin_length, bin_type = struct.unpack_from('<II', data, offset)
+        if bin_type == CHUNK_BIN:
+            binary = data[offset + 8:offset + 8 + bin_length]
+    return document, binary
+
+
+def _geometry_key(geometry) -> str:
+    """Hash do conteúdo tesselado, para unir geometrias idênticas de representações distintas."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(geometry.verts_buffer)
+    digest.update(geometry.faces_buffer)
+    digest.update(geometry.material_ids_buffer)
+    for material in geometry.materials:
+        digest.update(repr(_material_key(material)).encode())
+    return digest.hexdigest()
+
+
+def build_lod_meshes(mesh: MeshArrays) -> Dict[str, MeshArrays]:
+    """
+    Versões simplificadas e a caixa envolvente de uma malha (ver lod.py).
+
+    Níveis que não reduzem a malha reutilizam o nível anterior.
+
+    Returns:
+        dict: {nível: MeshArrays} para cada nível de LOD_LEVELS e PROXY_LEVEL
+    """
+    levels: Dict[str, MeshArrays] = {}
+    previous = mesh
+    for name, ratio in LOD_LEVELS:
+        simplified = simplify_mesh(mesh.positions, mesh.triangles, mesh.material_ids, ratio)
+        if simplified is not None:
+            positions, triangles, material_ids = simplified
+            positions, normals, triangles = face_normals(positions, triangles)
+            previous = MeshArrays(positions, normals, triangles, material_ids, mesh.materials)
+        levels[name] = previous
+
+    positions, normals, triangles = bounding_box_proxy(mesh.positions)
+    material_ids = np.full(len(triangles), mesh.material_ids[0] if len(mesh.material_ids) else 0, dtype=np.int32)
+    levels[PROXY_LEVEL] = MeshArrays(positions, normals, triangles, material_ids, mesh.materials)
+    return levels
+
+
+def _write_glb(builder: GlbBuilder, children: List[int], node_ids: Dict[str, int],
+               output_path: str, compression_level: int) -> Dict[str, Any]:
+    """Fecha a cena, serializa e grava o GLB (em gzip se compression_level > 0)."""
+    builder.scene_extras['ifc_nodes'] = node_ids
+    root = builder.add_node(name='IfcModel', children=children, rotation=Z_UP_TO_Y_UP)
+    data = builder.to_bytes([root])
+    glb_size = len(data)
+
+    started = time.perf_counter()
+    if compression_level:
+        data = gzip.compress(data, compresslevel=compression_level, mtime=0)
+    compression_seconds = time.perf_counter() - started
+
+    temporary_path = f'{output_path}.tmp'
+    with open(temporary_path, 'wb') as handle:
+        handle.write(data)
+    os.replace(temporary_path, output_path)
+
+    return {
+        'meshes': len(builder.meshes),
+        'triangles': builder.triangles,
+        'geometry_bytes': builder.binary_size,
+        'glb_bytes': glb_size,
+        'size_bytes': len(data),
+        'compression_seconds': compression_seconds,
+    }
+
+
+def convert_ifc_to_glb(model, output_path: str, num_threads: Optional[int] = None,
+                       include: Optional[Iterable] = None,
+                       exclude_types: Iterable[str] = DEFAULT_EXCLUDED_TYPES,
+                       quantize: Optional[bool] = None,
+                       compression_level: Optional[int] = None,
+                       lod_outputs: Optional[Dict[str, str]] = None,
+                       tiles=None, tiles_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Converte um modelo IFC aberto em um arquivo GLB.
+
+    Args:
+        model: ifcopenshell.file aberto
+        output_path: Caminho do arquivo gerado (gravado de forma atômica)
+        num_threads: Threads do iterador de geometria
+        include: Lista opcional de produtos a converter
+        exclude_types: Classes IFC ignoradas quando include não é informado
+        quantize: Codifica posições/normais (padrão: IFC_GLB_QUANTIZE)
+        compression_level: Nível gzip do arquivo (padrão: IFC_GLB_COMPRESSION_LEVEL; 0 grava o GLB puro)
+        lod_outputs: {nível: caminho} dos GLBs de níveis de detalhe a gerar
+                     na mesma passagem (níveis de LOD_LEVELS e PROXY_LEVEL)
+        tiles: TileSet (tiles.py) que recebe cada nó para os GLBs por tile
+        tiles_dir: Diretório onde os GLBs dos tiles são gravados
+
+    Returns:
+        dict: Estatísticas (nós, malhas, instâncias reutilizadas, tamanhos,
+              tempos por etapa, com LODs os dados de cada nível em 'levels'
+              e com tiles o manifesto em 'tiles')
+    """
+    if quantize is None:
+        quantize = get_glb_quantize()
+    if compression_level is None:
+        compression_level = get_glb_compression_level()
+    lod_outputs = lod_outputs or {}
+    known_levels = {name for name, _ in LOD_LEVELS} | {PROXY_LEVEL}
+    unknown = set(lod_outputs) - known_levels
+    if unknown:
+        raise ValueError(f"Níveis de detalhe desconhecidos: {', '.join(sorted(unknown))}")
+    if tiles is not None and not tiles_dir:
+        raise ValueError('tiles_dir é obrigatório com tiles')
+
+    started = time.perf_counter()
+    settings = create_geometry_settings(use_world_coords=False)
+    # Vértices duplicados nas arestas vivas para que cada face tenha a sua normal
+    settings.set('weld-vertices', False)
+
+    builder = GlbBuilder(quantize=quantize)
+    lod_builders = {level: GlbBuilder(quantize=quantize) for level in lod_outputs}
+    # Malha de cada nível para cada malha completa
+    lod_meshes: Dict[int, Dict[str, Optional[int]]] = {}
+    lod_seconds = 0.0
+    # Malhas completas mantidas em memória só para montar os tiles
+    mesh_arrays: Dict[int, MeshArrays] = {}
+    tile_seconds = 0.0
+    meshes_by_geometry: Dict[str, Optional[int]] = {}
+    meshes_by_content: Dict[str, Optional[int]] = {}
+    node_ids: Dict[str, int] = {}
+    children: List[int] = []
+    lod_children: Dict[str, List[int]] = {level: [] for level in lod_outputs}
+    # Mapa de GlobalId de cada nível, montado junto com node_ids: GlobalIds
+    # repetidos no IFC ficam com o último nó, como no GLB completo
+    lod_node_ids: Dict[str, Dict[str, int]] = {level: {} for level in lod_outputs}
+    reused = 0
+
+    exclude = None if include is not None else list(exclude_types or ()) or None
+    for shape in iterate_shapes(model, settings, num_threads, include, exclude):
+        geometry = shape.geometry
+        geometry_id = str(geometry.id)
+
+        if geometry_id in meshes_by_geometry:
+            mesh = meshes_by_geometry[geometry_id]
+            reused += mesh is not None
+        else:
+            content_key = _geometry_key(geometry)
+            if content_key in meshes_by_content:
+                mesh = meshes_by_content[content_key]
+                reused += mesh is not None
+            else:
+                arrays = MeshArrays.from_geometry(geometry)
+                mesh = meshes_by_content[content_key] = builder.add_mesh(arrays, name=shape.type)
+                if mesh is not None and tiles is not None:
+                    mesh_arrays[mesh] = arrays
+                if mesh is not None and lod_builders:
+                    lod_started = time.perf_counter()
+                    levels = build_lod_meshes(arrays)
+                    lod_meshes[mesh] = {
+                        level: lod_builder.add_mesh(levels[level], name=shape.type)
+                        for level, lod_builder in lod_builders.items()
+                    }
+                    lod_seconds += time.perf_counter() - lod_started
+            meshes_by_geometry[geometry_id] = mesh
+
+        if mesh is None:
+            continue
+
+        extras = {'ifcId': shape.id, 'global_id': shape.guid, 'type': shape.type, 'name': shape.name}
+        matrix = shape.transformation.matrix
+        node = builder.add_node(mesh=mesh, matrix=matrix, name=shape.guid, extras=extras)
+        children.append(node)
+        node_ids[shape.guid] = node
+        for level, lod_builder in lod_builders.items():
+            lod_node = lod_builder.add_node(mesh=lod_meshes[mesh][level], matrix=matrix, name=shape.guid, extras=extras)
+            lod_children[level].append(lod_node)
+            lod_node_ids[level][shape.guid] = lod_node
+        if tiles is not None:
+            tile_started = time.perf_counter()
+            tiles.add(mesh, mesh_arrays[mesh], matrix, shape.guid, extras)
+            tile_seconds += time.perf_counter() - tile_started
+
+    # Tesselação: o laço do iterador sem a codificação das malhas completas,
+    # os LODs e os tiles (que já incluem a codificação das suas malhas)
+    tessellation_seconds = time.perf_counter() - started - lod_seconds - tile_seconds - builder.encoding_seconds
+    written = _write_glb(builder, children, node_ids, output_path, compression_level)
+    levels = {}
+    for level, lod_builder in lod_builders.items():
+        levels[level] = _write_glb(
+            lod_builder, lod_children[level], lod_node_ids[level], lod_outputs[level], compression_level
+        )
+    manifest = None
+    if tiles is not None:
+        tile_started = time.perf_counter()
+        manifest = tiles.write(tiles_dir, compression_level)
+        tile_seconds += time.perf_counter() - tile_started
+    compression_seconds = sum(level['compression_seconds'] for level in (written, *levels.values()))
+    encoding_seconds = builder.encoding_seconds + sum(b.encoding_seconds for b in lod_builders.values())
+
+    stats = {
+        'nodes': len(node_ids),
+        'meshes': written['meshes'],
+        'reused_meshes': reused,
+        'materials': len(builder.materials),
+        'triangles': written['triangles'],
+        'quantized': quantize,
+        'compressed': bool(compression_level),
+        # Buffers das malhas em float32 sem codificação, para comparação
+        'raw_geometry_bytes': builder.raw_bytes,
+        'geometry_bytes': written['geometry_bytes'],
+        'glb_bytes': written['glb_bytes'],
+        'size_bytes': written['size_bytes'],
+        'time_ms': {
+            'tessellation': round(tessellation_seconds * 1000, 2),
+            'lod': round(lod_seconds * 1000, 2),
+            'tiles': round(tile_seconds * 1000, 2),
+            'encoding': round(encoding_seconds * 1000, 2),
+            'compression': round(compression_seconds * 1000, 2),
+            'total': round((time.perf_counter() - started) * 1000, 2),
+        },
+    }
+    if levels:
+        stats['levels'] = {
+            level: {key: value for key, value in data.items() if key != 'compression_seconds'}
+            for level, data in levels.items()
+        }
+    if manifest is not None:
+        stats['tiles'] = manifest
+    logger.info(
+        f"GLB gerado em {output_path}: {stats['nodes']} nós, {stats['meshes']} malhas "
+        f"({stats['reused_meshes']} instâncias reutilizadas), geometria {stats['raw_geometry_bytes']} → "
+        f"{stats['geometry_bytes']} bytes, arquivo {stats['size_bytes']} bytes"
+        + (f", níveis de detalhe: {', '.join(levels)}" if levels else '')
+        + (f", {len(manifest['tiles'])} tiles" if manifest else '')
+    )
+    return stats
@@ -4,38 +4,86 @@ Utiliza IfcOpenShell para leitura e interpretação de arquivos IFC.
 """
 
 import ifcopenshell
-import ifcopenshell.geom
 from typing import Dict, List, Any, Optional
 import json
 import logging
 
+from .geometry import GeometryPassResult, run_geometry_pass
+from .geometry_cache import get_geometry_cache
+from .memory import MemoryMonitor, SpillStore, get_memory_budget_bytes
+from .placement import PlacementResolver
+from .properties import (
+    extract_materials,
+    extract_property_sets,
+    iter_property_sets,
+    material_name,
+    parse_property_definition,
+)
+
 logger = logging.getLogger(__name__)
 
+# Tipos ignorados na listagem de elementos (apenas contexto espacial)
+SPATIAL_CONTEXT_TYPES = frozenset({
+    "IfcProject", "IfcSite", "IfcBuilding", "IfcBuildingStorey",
+    "IfcGrid", "IfcGridAxis"
+})
+
 
 class IFCProcessor:
     """
     Processa arquivos IFC e extrai metadados estruturados.
+    
+    No modo de memória limitada (low_memory) o arquivo é aberto com
+    carregamento preguiçoso, a geometria e as propriedades são processadas
+    por classe IFC em lotes e o RSS de cada etapa é registrado em
+    self.monitor. Vão para disco (SpillStore) e são lidos em streaming na
+    gravação do banco os property sets e a lista de elementos
+    (extraction.ElementListCollector). Continuam em memória, com poucos
+    valores por elemento: coordenadas globais (get_world_coordinates),
+    andar (get_storey_map), material (get_materials) e bounding boxes
+    (GeometryPassResult.element_bounds).
     """
     
-    def __init__(self, ifc_file_path: str):
+    # Produtos por lote de geometria no modo de memória limitada
+    GEOMETRY_BATCH_SIZE = 2000
+    MIN_GEOMETRY_BATCH_SIZE = 100
+    
+    def __init__(self, ifc_file_path: str, low_memory: bool = False,
+                 memory_budget_bytes: Optional[int] = None):
         """
         Inicializa o processador com caminho do arquivo IFC.
         
         Args:
             ifc_file_path: Caminho completo para o arquivo IFC
+            low_memory: Ativa o processamento com memória limitada
+            memory_budget_bytes: Pico de RSS desejado (padrão: IFC_MEMORY_BUDGET_MB
+                                 no modo de memória limitada)
         """
         self.file_path = ifc_file_path
         self.model = None
+        self.low_memory = low_memory
+        if memory_budget_bytes is None and low_memory:
+            memory_budget_bytes = get_memory_budget_bytes()
+        self.monitor = MemoryMonitor(memory_budget_bytes)
+        # Resultados da passagem de geometria, por filtro de classes
+        self._geometry: Dict[Optional[tuple], GeometryPassResult] = {}
+        # Matrizes globais de placements, memorizadas por modelo
+        self._placements: Optional[PlacementResolver] = None
+        # Receptor do progresso da tesselação (notifications.ProgressReporter),
+        # definido pelo MetadataPipeline durante a extração
+        self.progress = None
         
     def open(self) -> bool:
         """
         Abre o arquivo IFC.
-        
+
         Returns:
             bool: True se o arquivo foi aberto com sucesso, False caso contrário
         """
         try:
-            self.model = ifcopenshell.open(self.file_path)
+            with self.monitor.stage('open'):
+                # Carregamento preguiçoso: instâncias interpretadas sob demanda
+                self.model = ifcopenshell.open(self.file_path, lazy=self.low_memory)
             logger.info(f"Arquivo IFC aberto com sucesso: {self.file_path}")
             return True
         except Exception as e:
@@ -77,12 +125,7 @@ class IFCProcessor:
             return {}
         
         elements_by_type = {}
-        
-        # Tipos a serem ignorados (apenas contexto espacial)
-        skip_types = {
-            "IfcProject", "IfcSite", "IfcBuilding", "IfcBuildingStorey",
-            "IfcGrid", "IfcGridAxis"
-        }
+        skip_types = SPATIAL_CONTEXT_TYPES
         
         try:
             # Buscar TODOS os produtos IFC
@@ -150,30 +193,22 @@ class IFCProcessor:
                 'properties': {}
             }
             
-            # Extrair property sets
+            # Extrair property sets e quantity sets (todos os tipos de valor)
             if hasattr(element, 'IsDefinedBy'):
                 for definition in element.IsDefinedBy:
                     if definition.is_a('IfcRelDefinesByProperties'):
-                        property_set = definition.RelatingPropertyDefinition
-                        if property_set.is_a('IfcPropertySet'):
-                            properties['properties'][property_set.Name] = {}
-                            for prop in property_set.HasProperties:
-                                if prop.is_a('IfcPropertySingleValue'):
-                                    try:
-                                        value = str(prop.NominalValue.wrappedValue) if prop.NominalValue else 'N/A'
-                                        properties['properties'][property_set.Name][prop.Name] = value
-                                    except:
-                                        properties['properties'][property_set.Name][prop.Name] = 'N/A'
+                        for set_name, name, value in parse_property_definition(
+                            definition.RelatingPropertyDefinition
+                        ):
+                            properties['properties'].setdefault(set_name, {})[name] = value
             
             # Extrair material
             if hasattr(element, 'HasAssociations'):
                 for association in element.HasAssociations:
                     if association.is_a('IfcRelAssociatesMaterial'):
-                        material = association.RelatingMaterial
-                        if material.is_a('IfcMaterial'):
-                            properties['material'] = material.Name
-                        elif material.is_a('IfcMaterialLayerSetUsage'):
-                            properties['material'] = material.ForLayerSet.MaterialLayers[0].Material.Name
+                        name = material_name(association.RelatingMaterial)
+                        if name:
+                            properties['material'] = name
             
             return properties
         except Exception as e:
@@ -244,6 +279,112 @@ class IFCProcessor:
         
         return node
     
+    def get_storey_map(self) -> Dict[int, Any]:
+        """
+        Mapeia cada produto ao andar (IfcBuildingStorey) que o contém.
+        
+        Considera contenção espacial direta, elementos dentro de espaços
+        e partes de elementos agregados.
+        
+        Returns:
+            dict: {express_id do produto: entidade IfcBuildingStorey}
+        """
+        if not self.model:
+            return {}
+        
+        storey_of_structure = {}
+        
+        def resolve(structure):
+            """Sobe na decomposição espacial até encontrar um andar."""
+            key = structure.id()
+            if key not in storey_of_structure:
+                storey = None
+                if structure.is_a('IfcBuildingStorey'):
+                    storey = structure
+                else:
+                    for rel in getattr(structure, 'Decomposes', None) or []:
+                        storey = resolve(rel.RelatingObject)
+                        break
+                storey_of_structure[key] = storey
+            return storey_of_structure[key]
+        
+        storey_map = {}
+        try:
+            for rel in self.model.by_type('IfcRelContainedInSpatialStructure'):
+                storey = resolve(rel.RelatingStructure)
+                if storey is None:
+                    continue
+                for element in rel.RelatedElements:
+                    storey_map[element.id()] = storey
+            
+            for rel in self.model.by_type('IfcRelAggregates'):
+                parent = rel.RelatingObject
+                if parent.is_a('IfcSpatialStructureElement'):
+                    storey = resolve(parent)
+                else:
+                    storey = storey_map.get(parent.id())
+                if storey is None:
+                    continue
+                for child in rel.RelatedObjects:
+                    if not child.is_a('IfcBuildingStorey'):
+                        storey_map.setdefault(child.id(), storey)
+        except Exception as e:
+            logger.error(f"Erro ao mapear andares dos elementos: {e}")
+        
+        return storey_map
+    
+    def get_property_sets(self) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        """
+        Extrai todos os property sets e quantity sets do modelo em lote.
+        
+        Returns:
+            dict: {express_id: {conjunto: {propriedade: (valor, origem)}}}
+        """
+        if not self.model:
+            return {}
+        
+        if self.low_memory:
+            return self._spill_property_sets()
+        return extract_property_sets(self.model)
+    
+    def _products_by_class(self, products=None) -> Dict[str, List]:
+        """Agrupa produtos por classe IFC (ordem alfabética das classes)."""
+        groups: Dict[str, List] = {}
+        for product in products if products is not None else self.model.by_type('IfcProduct'):
+            groups.setdefault(product.is_a(), []).append(product)
+        return dict(sorted(groups.items()))
+    
+    def _spill_property_sets(self) -> SpillStore:
+        """
+        Property sets por classe IFC, gravados em disco à medida que são extraídos.
+        
+        Returns:
+            SpillStore: {express_id: {conjunto: {propriedade: (valor, origem)}}}
+        """
+        store = SpillStore()
+        with self.monitor.stage('properties'):
+            for ifc_class, products in self._products_by_class().items():
+                with self.monitor.stage(f'properties:{ifc_class}'):
+                    for element_id, sets in iter_property_sets(products):
+                        store[element_id] = sets
+        logger.info(
+            f"Property sets de {len(store)} objetos gravados em disco "
+            f"({store.size_bytes / 1024 / 1024:.1f} MB)"
+        )
+        return store
+    
+    def get_materials(self) -> Dict[int, str]:
+        """
+        Retorna o material associado a cada elemento.
+        
+        Returns:
+            dict: {express_id: nome do material}
+        """
+        if not self.model:
+            return {}
+        
+        return extract_materials(self.model)
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         Retorna estatísticas do modelo IFC.
@@ -322,6 +463,89 @@ class IFCProcessor:
         
         return results
     
+    def get_geometry(self, ifc_types: Optional[tuple] = None) -> Optional[GeometryPassResult]:
+        """
+        Executa (uma única vez) a passagem de geometria multi-thread.
+        
+        Produtos cuja forma já está no cache de geometria em disco
+        (geometry_cache.py) não são tesselados de novo.
+        
+        Args:
+            ifc_types: Se informado, limita a passagem a estas classes IFC.
+                       O resultado da passagem completa é reutilizado quando existir.
+            
+        Returns:
+            GeometryPassResult ou None se erro
+        """
+        if not self.model:
+            return None
+        
+        if None in self._geometry:
+            return self._geometry[None]
+        
+        if ifc_types not in self._geometry:
+            try:
+                include = None
+                if ifc_types:
+                    include = [
+                        product
+                        for ifc_type in ifc_types
+                        for product in self.model.by_type(ifc_type)
+                        if product.Representation
+                    ]
+                cache = get_geometry_cache()
+                if self.progress is not None:
+                    self.progress.begin('geometry')
+                if self.low_memory:
+                    self._geometry[ifc_types] = self._run_bounded_geometry(include, cache=cache)
+                else:
+                    with self.monitor.stage('geometry'):
+                        self._geometry[ifc_types] = run_geometry_pass(
+                            self.model, include=include, cache=cache, progress=self.progress
+                        )
+                if self.progress is not None:
+                    self.progress.flush()
+            except Exception as e:
+                logger.error(f"Erro na passagem de geometria: {e}")
+                return None
+        
+        return self._geometry[ifc_types]
+    
+    def _run_bounded_geometry(self, products=None, cache=None) -> GeometryPassResult:
+        """
+        Passagem de geometria por classe IFC, em lotes limitados.
+        
+        Cada lote usa um iterador próprio, liberado ao final. Se o RSS
+        ultrapassar o orçamento, o tamanho dos lotes seguintes é reduzido.
+        """
+        if products is None:
+            products = [p for p in self.model.by_type('IfcProduct') if p.Representation]
+        
+        result = GeometryPassResult()
+        batch_size = self.GEOMETRY_BATCH_SIZE
+        done = 0
+        with self.monitor.stage('geometry'):
+            for ifc_class, items in self._products_by_class(products).items():
+                with self.monitor.stage(f'geometry:{ifc_class}'):
+                    start = 0
+                    while start < len(items):
+                        batch = items[start:start + batch_size]
+                        run_geometry_pass(
+                            self.model, include=batch, result=result, cache=cache,
+                            progress=self.progress, offset=done, total=len(products)
+                        )
+                        done += len(batch)
+                        start += len(batch)
+                        if self.monitor.over_budget() and batch_size > self.MIN_GEOMETRY_BATCH_SIZE:
+                            batch_size = max(self.MIN_GEOMETRY_BATCH_SIZE, batch_size // 2)
+                            logger.warning(
+                                f"Orçamento de memória excedido em {ifc_class}; "
+                                f"lotes de geometria reduzidos para {batch_size}"
+                            )
+        
+        logger.info(f"Passagem de geometria em lotes concluída: {len(result)} elementos tesselados")
+        return result
+    
     def get_bounds(self) -> Optional[Dict[str, Any]]:
         """
         Calcula os limites (bounding box) do modelo.
@@ -329,65 +553,59 @@ class IFCProcessor:
         Returns:
             dict: Coordenadas min/max do modelo ou None se erro
         """
+        geometry = self.get_geometry()
+        if geometry is None:
+            return None
+        
+        return geometry.get_bounds()
+    
+    def get_placement_resolver(self) -> Optional[PlacementResolver]:
+        """
+        Resolvedor de placements do modelo aberto (memorizado).
+        
+        Returns:
+            PlacementResolver ou None se o modelo não estiver aberto
+        """
         if not self.model:
             return None
+        if self._placements is None or self._placements.model is not self.model:
+            self._placements = PlacementResolver(self.model)
+        return self._placements
+    
+    def get_world_coordinates(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Origem global (em metros) de todos os IfcProduct, resolvida em lote.
+        
+        Returns:
+            dict: {express_id: {x, y, z, has_coordinates}}
+        """
+        resolver = self.get_placement_resolver()
+        if resolver is None:
+            return {}
         
         try:
-            settings = ifcopenshell.geom.settings()
-            settings.set(settings.USE_WORLD_COORDS, True)
-            
-            min_x = min_y = min_z = float('inf')
-            max_x = max_y = max_z = float('-inf')
-            
-            for product in self.model.by_type("IfcProduct"):
-                if not product.Representation:
-                    continue
-                
-                try:
-                    shape = ifcopenshell.geom.create_shape(settings, product)
-                    verts = shape.geometry.verts
-                    
-                    for i in range(0, len(verts), 3):
-                        x, y, z = verts[i], verts[i+1], verts[i+2]
-                        min_x = min(min_x, x)
-                        min_y = min(min_y, y)
-                        min_z = min(min_z, z)
-                        max_x = max(max_x, x)
-                        max_y = max(max_y, y)
-                        max_z = max(max_z, z)
-                except:
-                    continue
-            
-            if min_x == float('inf'):
-                return None
-            
-            return {
-                'min': {'x': min_x, 'y': min_y, 'z': min_z},
-                'max': {'x': max_x, 'y': max_y, 'z': max_z},
-                'center': {
-                    'x': (min_x + max_x) / 2,
-                    'y': (min_y + max_y) / 2,
-                    'z': (min_z + max_z) / 2
-                },
-                'size': {
-                    'x': max_x - min_x,
-                    'y': max_y - min_y,
-                    'z': max_z - min_z
-                }
-            }
+            origins = resolver.world_coordinates()
         except Exception as e:
-            logger.error(f"Erro ao calcular bounds: {e}")
-            return None
+            logger.error(f"Erro ao resolver placements: {e}")
+            return {}
+        
+        return {
+            element_id: {'x': x, 'y': y, 'z': z, 'has_coordinates': True}
+            for element_id, (x, y, z) in origins.items()
+        }
     
     def _extract_element_coordinates(self, element) -> Dict[str, Any]:
         """
-        Extrai coordenadas de um elemento IFC.
+        Extrai a posição global de um elemento IFC.
+        
+        Compõe toda a cadeia PlacementRelTo (rotações e translações),
+        reutilizando os placements pais já resolvidos.
         
         Args:
             element: Elemento IFC
             
         Returns:
-            dict: Coordenadas x, y, z e flag has_coordinates
+            dict: Coordenadas x, y, z (metros) e flag has_coordinates
         """
         coordinates = {
             'x': 0.0,
@@ -397,37 +615,12 @@ class IFCProcessor:
         }
         
         try:
-            if hasattr(element, 'ObjectPlacement') and element.ObjectPlacement:
-                placement = element.ObjectPlacement
-                
-                # Tentar RelativePlacement primeiro
-                if hasattr(placement, 'RelativePlacement'):
-                    rel_placement = placement.RelativePlacement
-                    if hasattr(rel_placement, 'Location'):
-                        location = rel_placement.Location
-                        if hasattr(location, 'Coordinates'):
-                            coords = location.Coordinates
-                            if len(coords) >= 3:
-                                coordinates['x'] = float(coords[0])
-                                coordinates['y'] = float(coords[1])
-                                coordinates['z'] = float(coords[2])
-                                coordinates['has_coordinates'] = True
-                
-                # Se não encontrou, tentar PlacementRelTo (transformação hierárquica)
-                if not coordinates['has_coordinates'] and hasattr(placement, 'PlacementRelTo'):
-                    # Recursivamente buscar coordenadas do elemento pai
-                    parent_placement = placement.PlacementRelTo
-                    if hasattr(parent_placement, 'RelativePlacement'):
-                        rel_placement = parent_placement.RelativePlacement
-                        if hasattr(rel_placement, 'Location'):
-                            location = rel_placement.Location
-                            if hasattr(location, 'Coordinates'):
-                                coords = location.Coordinates
-                                if len(coords) >= 3:
-                                    coordinates['x'] = float(coords[0])
-                                    coordinates['y'] = float(coords[1])
-                                    coordinates['z'] = float(coords[2])
-                                    coordinates['has_coordinates'] = True
+            matrix = self.get_placement_resolver().world_matrix(element)
+            if matrix is not None:
+                coordinates['x'] = float(matrix[0, 3])
+                coordinates['y'] = float(matrix[1, 3])
+                coordinates['z'] = float(matrix[2, 3])
+                coordinates['has_coordinates'] = True
         except Exception as e:
             logger.debug(f"Erro ao extrair coordenadas do elemento {element.id()}: {e}")
         
@@ -447,9 +640,6 @@ class IFCProcessor:
             spaces = self.model.by_type("IfcSpace")
             spaces_data = []
             
-            settings = ifcopenshell.geom.settings()
-            settings.set(settings.USE_WORLD_COORDS, True)
-            
             for space in spaces:
                 space_info = {
                     'id': space.id(),
@@ -466,22 +656,11 @@ class IFCProcessor:
                     'height': 0.0
                 }
                 
-                # Extrair coordenadas do placement
-                try:
-                    if hasattr(space, 'ObjectPlacement') and space.ObjectPlacement:
-                        placement = space.ObjectPlacement
-                        if hasattr(placement, 'RelativePlacement'):
-                            rel_placement = placement.RelativePlacement
-                            if hasattr(rel_placement, 'Location'):
-                                location = rel_placement.Location
-                                if hasattr(location, 'Coordinates'):
-                                    coords = location.Coordinates
-                                    if len(coords) >= 3:
-                                        space_info['x_coordinate'] = float(coords[0])
-                                        space_info['y_coordinate'] = float(coords[1])
-                                        space_info['z_coordinate'] = float(coords[2])
-                except Exception as e:
-                    logger.warning(f"Erro ao extrair coordenadas do espaço {space.id()}: {e}")
+                # Extrair coordenadas globais do placement
+                coordinates = self._extract_element_coordinates(space)
+                space_info['x_coordinate'] = coordinates['x']
+                space_info['y_coordinate'] = coordinates['y']
+                space_info['z_coordinate'] = coordinates['z']
                 
                 # Extrair propriedades quantitativas
                 try:
@@ -507,24 +686,12 @@ class IFCProcessor:
                 except Exception as e:
                     logger.warning(f"Erro ao extrair quantidades do espaço {space.id()}: {e}")
                 
-                # Se não conseguiu extrair área, tentar calcular da geometria
+                # Se não conseguiu extrair área, usar a projeção da bounding box
                 if space_info['area'] == 0.0 and space.Representation:
-                    try:
-                        shape = ifcopenshell.geom.create_shape(settings, space)
-                        # Estimativa simples de área baseada no bounding box
-                        verts = shape.geometry.verts
-                        if len(verts) >= 3:
-                            min_x = min_y = float('inf')
-                            max_x = max_y = float('-inf')
-                            for i in range(0, len(verts), 3):
-                                x, y = verts[i], verts[i+1]
-                                min_x = min(min_x, x)
-                                min_y = min(min_y, y)
-                                max_x = max(max_x, x)
-                                max_y = max(max_y, y)
-                            space_info['area'] = (max_x - min_x) * (max_y - min_y)
-                    except Exception as e:
-                        logger.warning(f"Erro ao calcular área da geometria: {e}")
+                    geometry = self.get_geometry(ifc_types=('IfcSpace',))
+                    space_geometry = geometry.spaces.get(space.id()) if geometry else None
+                    if space_geometry:
+                        space_info['area'] = space_geometry['footprint_area']
                 
                 spaces_data.append(space_info)
             
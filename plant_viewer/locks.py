@@ -0,0 +1,105 @@
+"""
+Lock distribuído por planta para a extração de metadados.
+
+O lock é uma linha de ExtractionLock com a planta como chave primária:
+o INSERT é atômico em qualquer banco, então só um agendamento por planta
+passa entre workers e execuções sobrepostas do Celery Beat. Fica no
+banco e não no cache porque backends de cache descartam chaves (o cache
+de banco com MAX_ENTRIES remove as primeiras em ordem de chave, justamente
+as dos locks), o que deixaria dois fluxos rodarem juntos. O token
+aleatório garante que apenas quem adquiriu o lock o libera (ou renova),
+e a validade o solta se o worker morrer no meio do fluxo. Cada etapa do
+fluxo renova o lock ao começar, então a validade só precisa cobrir uma
+etapa (com a espera do retry), não o fluxo inteiro.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def get_extraction_lock_timeout() -> int:
+    """Validade (s) do lock de extração (IFC_EXTRACTION_LOCK_TIMEOUT)."""
+    return int(getattr(settings, 'IFC_EXTRACTION_LOCK_TIMEOUT', 3600))
+
+
+def acquire_extraction_lock(plant_id: int, timeout: Optional[int] = None) -> Optional[str]:
+    """
+    Tenta adquirir o lock de extração da planta.
+
+    Um lock vencido (worker que morreu) é descartado antes da tentativa.
+
+    Args:
+        plant_id: ID da BuildingPlan
+        timeout: Validade em segundos (padrão: get_extraction_lock_timeout())
+
+    Returns:
+        str: Token do lock ou None se outra extração já o detém
+    """
+    from .models import ExtractionLock
+
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=timeout or get_extraction_lock_timeout())
+    try:
+        with transaction.atomic():
+            ExtractionLock.objects.filter(plant_id=plant_id, expires_at__lte=now).delete()
+            ExtractionLock.objects.create(plant_id=plant_id, token=token, expires_at=expires_at)
+    except IntegrityError:
+        return None
+    return token
+
+
+def renew_extraction_lock(plant_id: int, token: Optional[str], timeout: Optional[int] = None) -> bool:
+    """
+    Estende a validade do lock se ele ainda pertence ao token.
+
+    Um lock vencido que ninguém adquiriu ainda tem a linha do token e é
+    renovado; se outro fluxo já o adquiriu, a renovação falha.
+
+    Args:
+        plant_id: ID da BuildingPlan
+        token: Token devolvido por acquire_extraction_lock
+        timeout: Nova validade em segundos a partir de agora (padrão: get_extraction_lock_timeout())
+
+    Returns:
+        bool: True se o lock foi renovado
+    """
+    from .models import ExtractionLock
+
+    if not token:
+        return False
+    expires_at = timezone.now() + timedelta(seconds=timeout or get_extraction_lock_timeout())
+    return ExtractionLock.objects.filter(plant_id=plant_id, token=token).update(expires_at=expires_at) > 0
+
+
+def release_extraction_lock(plant_id: int, token: Optional[str]) -> bool:
+    """
+    Libera o lock se ele ainda pertence ao token.
+
+    Returns:
+        bool: True se o lock foi liberado
+    """
+    from .models import ExtractionLock
+
+    if not token:
+        return False
+    deleted, _ = ExtractionLock.objects.filter(plant_id=plant_id, token=token).delete()
+    if not deleted:
+        logger.warning(f"Lock de extração da planta {plant_id} expirou ou pertence a outro fluxo")
+        return False
+    return True
+
+
+def is_extraction_locked(plant_id: int) -> bool:
+    """Indica se há uma extração em andamento para a planta."""
+    from .models import ExtractionLock
+
+    return ExtractionLock.objects.filter(plant_id=plant_id, expires_at__gt=timezone.now()).exists()
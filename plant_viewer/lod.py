@@ -0,0 +1,139 @@
+"""
+Níveis de detalhe (LOD) por malha para a exportação GLB.
+
+Cada malha completa gera versões simplificadas por agrupamento de vértices
+em grade (vertex clustering): os vértices de cada célula viram um só, e os
+triângulos degenerados ou repetidos são descartados. O tamanho da célula
+é escolhido por busca binária para atingir a fração de triângulos pedida.
+O nível mais grosso é uma caixa (bounding box) por elemento.
+
+As funções trabalham com arrays NumPy: posições (n, 3), triângulos (m, 3)
+e o material de cada triângulo (m,).
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# (nome, fração de triângulos) do mais detalhado ao mais grosso
+LOD_LEVELS = (('medium', 0.35), ('low', 0.1))
+PROXY_LEVEL = 'proxy'
+
+# Malhas com poucos triângulos não são simplificadas
+MIN_SIMPLIFY_TRIANGLES = 48
+
+_SEARCH_STEPS = 10
+
+# Caixa unitária: 4 vértices por face, para normais por face
+_BOX_FACES = (
+    ((0, 0, -1), ((0, 0, 0), (0, 1, 0), (1, 1, 0), (1, 0, 0))),
+    ((0, 0, 1), ((0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1))),
+    ((0, -1, 0), ((0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1))),
+    ((0, 1, 0), ((0, 1, 0), (0, 1, 1), (1, 1, 1), (1, 1, 0))),
+    ((-1, 0, 0), ((0, 0, 0), (0, 0, 1), (0, 1, 1), (0, 1, 0))),
+    ((1, 0, 0), ((1, 0, 0), (1, 1, 0), (1, 1, 1), (1, 0, 1))),
+)
+
+
+def cluster_vertices(positions: np.ndarray, triangles: np.ndarray, material_ids: np.ndarray,
+                     cell_size: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Une os vértices de cada célula da grade na média das suas posições.
+
+    Returns:
+        tuple: (posições, triângulos, materiais) sem triângulos degenerados ou repetidos
+    """
+    cells = np.floor((positions - positions.min(axis=0)) / cell_size).astype(np.int64)
+    _, cluster, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    cluster = cluster.ravel()
+    merged = np.zeros((len(counts), 3))
+    np.add.at(merged, cluster, positions)
+    merged /= counts[:, None]
+
+    remapped = cluster[triangles]
+    keep = (
+        (remapped[:, 0] != remapped[:, 1])
+        & (remapped[:, 1] != remapped[:, 2])
+        & (remapped[:, 0] != remapped[:, 2])
+    )
+    remapped, material_ids = remapped[keep], material_ids[keep]
+    if len(remapped):
+        # Mesmo triângulo vindo de faces diferentes: mantém a primeira ocorrência
+        _, first = np.unique(np.sort(remapped, axis=1), axis=0, return_index=True)
+        first.sort()
+        remapped, material_ids = remapped[first], material_ids[first]
+
+    used, compact = np.unique(remapped, return_inverse=True)
+    return merged[used], compact.reshape(-1, 3), material_ids
+
+
+def simplify_mesh(positions: np.ndarray, triangles: np.ndarray, material_ids: np.ndarray,
+                  ratio: float) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Simplifica a malha até no máximo ratio × triângulos originais.
+
+    Returns:
+        tuple: (posições, triângulos, materiais) ou None se a malha não pode
+               ser reduzida (poucos triângulos ou agrupamento sem efeito)
+    """
+    target = int(len(triangles) * ratio)
+    if len(triangles) < MIN_SIMPLIFY_TRIANGLES or target < 1:
+        return None
+
+    diagonal = float(np.linalg.norm(positions.max(axis=0) - positions.min(axis=0)))
+    if diagonal <= 0:
+        return None
+
+    # Busca binária da célula: maior célula → menos triângulos
+    low, high = diagonal / 4096, diagonal
+    best = None
+    for _ in range(_SEARCH_STEPS):
+        cell_size = np.sqrt(low * high)
+        result = cluster_vertices(positions, triangles, material_ids, cell_size)
+        if len(result[1]) <= target:
+            if len(result[1]):
+                best = result
+            high = cell_size
+        else:
+            low = cell_size
+
+    if best is None or len(best[1]) >= len(triangles):
+        return None
+    return best
+
+
+def face_normals(positions: np.ndarray, triangles: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Separa os vértices por triângulo com a normal da face.
+
+    Malhas simplificadas têm poucas faces; vértices próprios evitam normais
+    médias em arestas vivas.
+
+    Returns:
+        tuple: (posições (3m, 3), normais (3m, 3), triângulos (m, 3))
+    """
+    corners = positions[triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    length[length == 0] = 1.0
+    normals = np.repeat(normals / length, 3, axis=0)
+    return corners.reshape(-1, 3), normals, np.arange(len(triangles) * 3).reshape(-1, 3)
+
+
+def bounding_box_proxy(positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Caixa alinhada aos eixos locais que envolve a malha (12 triângulos).
+
+    Returns:
+        tuple: (posições (24, 3), normais (24, 3), triângulos (12, 3))
+    """
+    bbox_min = positions.min(axis=0)
+    size = positions.max(axis=0) - bbox_min
+    corners, normals, triangles = [], [], []
+    for normal, face in _BOX_FACES:
+        base = len(corners)
+        corners.extend(face)
+        normals.extend([normal] * 4)
+        triangles.extend([(base, base + 1, base + 2), (base, base + 2, base + 3)])
+    corners = bbox_min + np.array(corners, dtype=np.float64) * size
+    return corners, np.array(normals, dtype=np.float64), np.array(triangles)
@@ -0,0 +1,184 @@
+"""
+Management command para medir o desempenho do processamento IFC.
+
+Uso:
+    python manage.py benchmark_ifc                              # 1k, 10k e 100k elementos
+    python manage.py benchmark_ifc --sizes 1000,10000           # Tamanhos específicos
+    python manage.py benchmark_ifc --methods open,get_statistics,extract_metadata
+    python manage.py benchmark_ifc --save-baseline              # Regrava o baseline
+    python manage.py benchmark_ifc --fail-on-regression         # Erro se houver regressão
+
+Gera modelos IFC4 sintéticos (ver plant_viewer/benchmark.py), mede o tempo
+de parede e o pico de RSS de cada método do IFCProcessor e da extração
+completa, e compara com o baseline (plant_viewer/benchmark_baseline.json).
+Os tempos dependem da máquina: regrave o baseline ao trocar de ambiente.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from plant_viewer import benchmark
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def int_list(value):
+    try:
+        return [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise CommandError(f'Lista de tamanhos inválida: {value}')
+
+
+class Command(BaseCommand):
+    help = 'Mede o processamento IFC com modelos sintéticos e compara com o baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int_list,
+            default=list(benchmark.DEFAULT_SIZES),
+            help='Números de elementos separados por vírgula (padrão: 1000,10000,100000)'
+        )
+
+        parser.add_argument(
+            '--methods',
+            type=str,
+            default='',
+            help='Métodos a medir separados por vírgula (padrão: todos, incluindo open e extract_metadata)'
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Execuções por método (vale o menor tempo)'
+        )
+
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            default=benchmark.DEFAULT_BASELINE_PATH,
+            help='Arquivo JSON do baseline'
+        )
+
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Grava o resultado como novo baseline'
+        )
+
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Grava o resultado em JSON neste arquivo'
+        )
+
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Variação relativa aceita antes de apontar regressão (padrão: 0.25)'
+        )
+
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Termina com erro se alguma medição regredir'
+        )
+
+        parser.add_argument('--storeys', type=int, help='Andares do modelo (padrão: um a cada 500 elementos)')
+        parser.add_argument('--spaces-per-storey', type=int, default=4, help='IfcSpace por andar')
+        parser.add_argument('--mapped-ratio', type=float, default=0.5,
+                            help='Fração dos elementos com IfcMappedItem (0 a 1)')
+        parser.add_argument('--psets-per-element', type=int, default=2, help='Property sets por elemento')
+        parser.add_argument('--properties-per-pset', type=int, default=3, help='Propriedades por property set')
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        if not sizes or min(sizes) <= 0:
+            raise CommandError('Informe ao menos um tamanho positivo em --sizes')
+        if not 0 <= options['mapped_ratio'] <= 1:
+            raise CommandError('--mapped-ratio deve estar entre 0 e 1')
+        methods = [name.strip() for name in options['methods'].split(',') if name.strip()] or None
+
+        model_options = {
+            'storeys': options['storeys'],
+            'spaces_per_storey': options['spaces_per_storey'],
+            'mapped_ratio': options['mapped_ratio'],
+            'psets_per_element': options['psets_per_element'],
+            'properties_per_pset': options['properties_per_pset'],
+        }
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n⏱ Benchmark do processamento IFC: {', '.join(str(size) for size in sizes)} elementos\n"
+        ))
+        try:
+            report = benchmark.run_benchmark(
+                sizes, methods=methods, repeat=options['repeat'],
+                model_options=model_options, on_size=self.print_size,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            benchmark.save_report(report, options['output'])
+            self.stdout.write(f"Resultado gravado em {options['output']}")
+
+        if options['save_baseline']:
+            benchmark.save_report(report, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Baseline gravado em {options['baseline']}"))
+            return
+
+        baseline = benchmark.load_baseline(options['baseline'])
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline não encontrado ({options['baseline']}); use --save-baseline para criá-lo"
+            ))
+            return
+        if baseline.get('model_options', {}) != report['model_options']:
+            self.stdout.write(self.style.WARNING(
+                'Opções do modelo diferentes das do baseline: a comparação pode não ser válida'
+            ))
+
+        rows = benchmark.compare_with_baseline(report, baseline, tolerance=options['tolerance'])
+        regressions = self.print_comparison(rows)
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{regressions} medição(ões) com regressão em relação ao baseline')
+
+    def print_size(self, size, result):
+        """Tabela de tempos e RSS de um tamanho."""
+        self.stdout.write(
+            f"{size} elementos ({result['products']} IfcProduct, {result['file_mb']} MB, "
+            f"gerado em {result['generate_s']}s)"
+        )
+        self.stdout.write(f"  {'método':<28} {'tempo (s)':>10} {'pico RSS (MB)':>14} {'acréscimo (MB)':>15}")
+        for name, measurement in result['methods'].items():
+            self.stdout.write(
+                f"  {name:<28} {measurement['time_s']:>10.4f} {measurement['peak_rss_mb']:>14.1f} "
+                f"{measurement['peak_delta_mb']:>15.1f}"
+            )
+        self.stdout.write('')
+
+    def print_comparison(self, rows):
+        """
+        Lista as medições fora da tolerância.
+
+        Returns:
+            int: Número de regressões
+        """
+        changed = [row for row in rows if row['status'] in ('regression', 'improvement')]
+        new = sum(1 for row in rows if row['status'] == 'new')
+        self.stdout.write(self.style.SUCCESS('📊 Comparação com o baseline:'))
+        for row in changed:
+            style = self.style.ERROR if row['status'] == 'regression' else self.style.SUCCESS
+            label = 'regressão' if row['status'] == 'regression' else 'melhoria'
+            ratio = f"{row['ratio']}x" if row['ratio'] is not None else '-'
+            self.stdout.write(style(
+                f"  {label:<10} {row['size']:>7} {row['method']:<28} {row['metric']:<14} "
+                f"{row['baseline']} → {row['current']} ({ratio})"
+            ))
+        regressions = sum(1 for row in changed if row['status'] == 'regression')
+        self.stdout.write(
+            f"  {len(rows) - len(changed) - new} dentro da tolerância, {len(changed) - regressions} melhoria(s), "
+            f"{regressions} regressão(ões), {new} sem baseline"
+        )
+        return regressions
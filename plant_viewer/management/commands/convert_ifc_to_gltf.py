@@ -5,11 +5,14 @@ Uso:
     python manage.py convert_ifc_to_gltf                    # Converte todas as plantas ativas
     python manage.py convert_ifc_to_gltf --plant-id 1       # Converte planta específica
     python manage.py convert_ifc_to_gltf --force            # Força reconversão mesmo se já existe
+    python manage.py convert_ifc_to_gltf --method ifcconvert  # Usa o binário IfcConvert
 
-Nota: Esta é uma implementação básica. Para produção, considere usar:
-    - IfcConvert (parte do IfcOpenShell)
-    - BlenderBIM (Blender plugin)
-    - Serviços de conversão especializados
+O método padrão (builtin) converte no próprio processo com o iterador de
+geometria do IfcOpenShell (ver plant_viewer/gltf.py): gera um único GLB com
+malhas compartilhadas entre instâncias de IfcMappedItem, gravado em
+BuildingPlan.glb_file e servido ao visualizador em /api/plants/{id}/glb/.
+Os métodos ifcconvert e blender dependem de binários externos e gravam o
+.gltf ao lado do arquivo IFC.
 """
 
 from django.core.management.base import BaseCommand, CommandError
@@ -40,15 +43,23 @@ class Command(BaseCommand):
         parser.add_argument(
             '--method',
             type=str,
-            default='ifcconvert',
-            choices=['ifcconvert', 'blender', 'manual'],
-            help='Método de conversão a usar'
+            default='builtin',
+            choices=['builtin', 'ifcconvert', 'blender', 'manual'],
+            help='Método de conversão a usar (manual é sinônimo de builtin)'
+        )
+        
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=None,
+            help='Threads do iterador de geometria (método builtin)'
         )
 
     def handle(self, *args, **options):
         plant_id = options.get('plant_id')
         force = options.get('force', False)
-        method = options.get('method', 'ifcconvert')
+        method = options.get('method', 'builtin')
+        self.threads = options.get('threads')
         
         # Filtrar plantas
         if plant_id:
@@ -88,14 +99,14 @@ class Command(BaseCommand):
         self.stdout.write(f'  ✗ Erros: {error_count}')
         self.stdout.write(f'  ⊘ Pulados: {plants.count() - success_count - error_count}')
     
-    def convert_plant(self, plant, force=False, method='ifcconvert'):
+    def convert_plant(self, plant, force=False, method='builtin'):
         """
         Converte um arquivo IFC para glTF.
         
         Args:
             plant: BuildingPlan instance
             force: Se True, reconverte mesmo se já existe
-            method: Método de conversão ('ifcconvert', 'blender', 'manual')
+            method: Método de conversão ('builtin', 'ifcconvert', 'blender', 'manual')
             
         Returns:
             bool: True se converteu, False se pulou
@@ -110,6 +121,9 @@ class Command(BaseCommand):
         if not os.path.exists(plant.ifc_file.path):
             raise FileNotFoundError(f"Arquivo IFC não encontrado: {plant.ifc_file.path}")
         
+        if method in ('builtin', 'manual'):
+            return self.convert_builtin(plant, force)
+        
         # Definir caminho do arquivo glTF
         ifc_path = plant.ifc_file.path
         gltf_path = ifc_path.rsplit('.', 1)[0] + '.gltf'
@@ -123,8 +137,6 @@ class Command(BaseCommand):
             return self.convert_with_ifcconvert(ifc_path, gltf_path)
         elif method == 'blender':
             return self.convert_with_blender(ifc_path, gltf_path)
-        elif method == 'manual':
-            return self.convert_manual(ifc_path, gltf_path)
         
         return False
     
@@ -253,54 +265,36 @@ except Exception as e:
             except:
                 pass
     
-    def convert_manual(self, ifc_path, gltf_path):
+    def convert_builtin(self, plant, force=False):
         """
-        Conversão manual usando IfcOpenShell Python (limitado).
+        Converte no próprio processo com o IfcOpenShell (sem binários externos).
         
-        Esta é uma implementação básica que extrai geometrias e cria
-        um arquivo glTF simples. Para produção, use IfcConvert ou Blender.
+        Returns:
+            bool: True se converteu, False se o GLB já estava atualizado
         """
-        self.stdout.write('  Método: Manual (IfcOpenShell Python)')
-        self.stdout.write(self.style.WARNING(
-            '  ⚠ Conversão manual é limitada. Recomenda-se usar IfcConvert ou Blender.'
-        ))
-        
-        try:
-            import ifcopenshell
-            import ifcopenshell.geom
-            import json
-        except ImportError:
-            raise ImportError('IfcOpenShell não instalado. Instale: pip install ifcopenshell')
-        
-        # Abrir arquivo IFC
-        ifc_file = ifcopenshell.open(ifc_path)
-        
-        # Configurar settings de geometria
-        settings = ifcopenshell.geom.settings()
-        settings.set(settings.USE_WORLD_COORDS, True)
+        self.stdout.write('  Método: builtin (IfcOpenShell → GLB)')
         
-        # Estrutura básica do glTF
-        gltf = {
-            "asset": {
-                "version": "2.0",
-                "generator": "IFC Django Converter"
-            },
-            "scene": 0,
-            "scenes": [{"nodes": [0]}],
-            "nodes": [],
-            "meshes": [],
-            "buffers": [],
-            "bufferViews": [],
-            "accessors": []
-        }
-        
-        # Esta é uma implementação muito simplificada
-        # Para produção, use bibliotecas especializadas
-        
-        self.stdout.write(self.style.WARNING(
-            '  ⚠ Implementação manual não está completa. '
-            'Use --method=ifcconvert ou --method=blender'
-        ))
+        stats = plant.build_glb(force=force, num_threads=getattr(self, 'threads', None))
+        if stats is None:
+            return False
         
-        return False
-
+        self.stdout.write(
+            f"  {stats['nodes']} nós, {stats['meshes']} malhas "
+            f"({stats['reused_meshes']} instâncias reutilizadas)"
+        )
+        self.stdout.write(
+            f"  Geometria: {stats['raw_geometry_bytes'] / 1024:.1f} KB em float32 → "
+            f"{stats['geometry_bytes'] / 1024:.1f} KB codificada; "
+            f"arquivo: {stats['size_bytes'] / 1024:.1f} KB em {stats['time_ms']['total'] / 1000:.1f}s"
+        )
+        for level, data in stats.get('levels', {}).items():
+            self.stdout.write(
+                f"  Nível {level}: {data['triangles']} triângulos, {data['size_bytes'] / 1024:.1f} KB"
+            )
+        if stats.get('tiles'):
+            tiles = stats['tiles']['tiles']
+            self.stdout.write(
+                f"  Tiles: {len(tiles)} em {len(stats['tiles']['storeys'])} andares "
+                f"(maior: {max((tile['size_bytes'] for tile in tiles), default=0) / 1024:.1f} KB)"
+            )
+        return True
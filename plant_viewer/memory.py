@@ -0,0 +1,224 @@
+"""
+Controle de memória do processamento IFC.
+
+MemoryMonitor mede o RSS do processo por etapa (atual e pico) e compara
+com um orçamento explícito; SpillStore guarda resultados intermediários
+em disco para que não precisem ficar inteiros em memória.
+"""
+
+import gc
+import os
+import pickle
+import sys
+import tempfile
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def peak_rss_bytes() -> int:
+    """Pico de RSS do processo desde o início (getrusage; 0 se indisponível)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss_bytes() -> int:
+    """RSS atual do processo (/proc no Linux; pico como aproximação nos demais)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def get_memory_budget_bytes() -> int:
+    """Orçamento de memória do modo limitado (IFC_MEMORY_BUDGET_MB)."""
+    return int(getattr(settings, 'IFC_MEMORY_BUDGET_MB', 1536) * MB)
+
+
+class _Stage:
+    __slots__ = ('name', 'started', 'seconds', 'rss_start', 'rss_end', 'peak_rss', 'process_peak_start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.rss_start = current_rss_bytes()
+        self.rss_end = None
+        self.peak_rss = self.rss_start
+        self.process_peak_start = peak_rss_bytes()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'stage': self.name,
+            'time_ms': round((self.seconds or 0.0) * 1000, 2),
+            'rss_start_mb': round(self.rss_start / MB, 1),
+            'rss_end_mb': round((self.rss_end or self.rss_start) / MB, 1),
+            'peak_rss_mb': round(self.peak_rss / MB, 1),
+        }
+
+
+class MemoryMonitor:
+    """
+    RSS por etapa de processamento, com orçamento de pico.
+
+    O pico de cada etapa combina as amostras feitas durante a etapa com o
+    pico do processo (getrusage): se o pico do processo subiu durante a
+    etapa, ele ocorreu nela.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None):
+        self.budget_bytes = budget_bytes
+        self.stages: List[_Stage] = []
+        self._open: List[_Stage] = []
+        self.budget_exceeded = False
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede uma etapa (pode ser aninhada)."""
+        current = _Stage(name)
+        self.stages.append(current)
+        self._open.append(current)
+        try:
+            yield current
+        finally:
+            self._open.remove(current)
+            current.seconds = time.perf_counter() - current.started
+            current.rss_end = self.sample()
+            process_peak = peak_rss_bytes()
+            if process_peak > current.process_peak_start:
+                current.peak_rss = max(current.peak_rss, process_peak)
+
+    def sample(self) -> int:
+        """Amostra o RSS atual e atualiza o pico das etapas abertas."""
+        rss = current_rss_bytes()
+        for stage in self._open:
+            if rss > stage.peak_rss:
+                stage.peak_rss = rss
+        if self.budget_bytes and rss > self.budget_bytes:
+            self.budget_exceeded = True
+        return rss
+
+    def over_budget(self) -> bool:
+        """True se o RSS atual excede o orçamento (após liberar o coletor de lixo)."""
+        if not self.budget_bytes or self.sample() <= self.budget_bytes:
+            return False
+        gc.collect()
+        return self.sample() > self.budget_bytes
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Relatório por etapa.
+
+        Returns:
+            dict: Orçamento, pico do processo e RSS/tempo de cada etapa
+        """
+        return {
+            'budget_mb': round(self.budget_bytes / MB, 1) if self.budget_bytes else None,
+            'budget_exceeded': self.budget_exceeded,
+            'process_peak_rss_mb': round(peak_rss_bytes() / MB, 1),
+            'stages': [stage.as_dict() for stage in self.stages],
+        }
+
+
+class SpillStore:
+    """
+    Mapeamento somente-inclusão mantido em disco.
+
+    Os pares são serializados (pickle) em lotes em um arquivo temporário e
+    lidos de volta em streaming por items(). Cada chave deve ser gravada
+    uma única vez.
+    """
+
+    def __init__(self, batch_size: int = 1000, directory: Optional[str] = None):
+        """
+        Args:
+            batch_size: Pares mantidos em memória antes de gravar um lote
+            directory: Diretório do arquivo temporário (padrão: TMPDIR)
+        """
+        self.batch_size = batch_size
+        handle, self.path = tempfile.mkstemp(prefix='ifc_spill_', suffix='.pkl', dir=directory)
+        self._file = os.fdopen(handle, 'w+b')
+        self._buffer: List[Tuple[Any, Any]] = []
+        self._count = 0
+
+    def __setitem__(self, key, value) -> None:
+        self._buffer.append((key, value))
+        self._count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def flush(self) -> None:
+        """Grava o lote pendente no disco."""
+        if self._buffer:
+            pickle.dump(self._buffer, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._buffer = []
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """Lê os pares do disco em ordem de inclusão."""
+        self.flush()
+        self._file.flush()
+        with open(self.path, 'rb') as reader:
+            while True:
+                try:
+                    batch = pickle.load(reader)
+                except EOFError:
+                    return
+                yield from batch
+
+    def values(self) -> Iterator[Any]:
+        for _, value in self.items():
+            yield value
+
+    @property
+    def size_bytes(self) -> int:
+        self.flush()
+        self._file.flush()
+        return os.path.getsize(self.path)
+
+    def close(self) -> None:
+        """Remove o arquivo temporário."""
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
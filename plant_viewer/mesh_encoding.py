@@ -0,0 +1,183 @@
+"""
+Codificação compacta de malhas para o visualizador web (NumPy puro).
+
+- Posições quantizadas em int16 normalizado relativo à bounding box da
+  malha; a desquantização é uma matriz (translação + escala) que o glTF
+  aplica pelo nó (KHR_mesh_quantization).
+- Normais em codificação octaédrica com dois int16 (4 bytes por vértice,
+  contra 12 em float32).
+- Triângulos reordenados pela curva de Morton dos centróides, para
+  localidade no cache de vértices da GPU, e vértices renumerados na
+  ordem do primeiro uso (localidade de leitura).
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+INT16_MAX = 32767
+
+
+def quantize_positions(positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Quantiza posições em int16 normalizado relativo à bounding box.
+
+    Args:
+        positions: Array (n, 3) de floats
+
+    Returns:
+        tuple: (array int16 (n, 3), centro (3,), meia-extensão (3,)) tal que
+               posição ≈ centro + q / 32767 * meia-extensão
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    bbox_min = positions.min(axis=0)
+    bbox_max = positions.max(axis=0)
+    center = (bbox_min + bbox_max) / 2
+    half_extent = (bbox_max - bbox_min) / 2
+    # Eixos degenerados (malha plana) não precisam de escala
+    half_extent[half_extent <= 0] = 1.0
+    quantized = np.rint((positions - center) / half_extent * INT16_MAX)
+    return np.clip(quantized, -INT16_MAX, INT16_MAX).astype(np.int16), center, half_extent
+
+
+def dequantization_matrix(center: np.ndarray, half_extent: np.ndarray) -> np.ndarray:
+    """Matriz 4x4 que leva posições int16 normalizadas ([-1, 1]) de volta às coordenadas da malha."""
+    matrix = np.diag([*half_extent, 1.0])
+    matrix[:3, 3] = center
+    return matrix
+
+
+def octahedral_encode(normals: np.ndarray) -> np.ndarray:
+    """
+    Codifica normais unitárias no octaedro, em dois int16 normalizados.
+
+    Args:
+        normals: Array (n, 3)
+
+    Returns:
+        np.ndarray: Array int16 (n, 2)
+    """
+    normals = np.asarray(normals, dtype=np.float64)
+    length = np.abs(normals).sum(axis=1, keepdims=True)
+    length[length == 0] = 1.0
+    projected = normals / length
+    x, y, z = projected[:, 0], projected[:, 1], projected[:, 2]
+
+    # Hemisfério inferior é dobrado sobre os cantos do quadrado
+    folded_x = np.where(z < 0, (1 - np.abs(y)) * np.where(x >= 0, 1.0, -1.0), x)
+    folded_y = np.where(z < 0, (1 - np.abs(x)) * np.where(y >= 0, 1.0, -1.0), y)
+    encoded = np.stack([folded_x, folded_y], axis=1)
+    return np.clip(np.rint(encoded * INT16_MAX), -INT16_MAX, INT16_MAX).astype(np.int16)
+
+
+def scale_normals(normals: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Normais que, transformadas pela inversa transposta de diag(scale),
+    voltam às normais originais.
+
+    Args:
+        normals: Array (n, 3) de normais unitárias
+        scale: Escala por eixo (3,) aplicada pela matriz do nó
+
+    Returns:
+        np.ndarray: Normais unitárias (n, 3)
+    """
+    scaled = np.asarray(normals, dtype=np.float64) * scale
+    length = np.linalg.norm(scaled, axis=1, keepdims=True)
+    length[length == 0] = 1.0
+    return scaled / length
+
+
+def octahedral_decode(encoded: np.ndarray) -> np.ndarray:
+    """Inverso de octahedral_encode: int16 (n, 2) → normais unitárias (n, 3)."""
+    values = np.asarray(encoded, dtype=np.float64) / INT16_MAX
+    x, y = values[:, 0], values[:, 1]
+    z = 1 - np.abs(x) - np.abs(y)
+    shift = np.clip(-z, 0, None)
+    x = x - np.where(x >= 0, shift, -shift)
+    y = y - np.where(y >= 0, shift, -shift)
+    normals = np.stack([x, y, z], axis=1)
+    return normals / np.linalg.norm(normals, axis=1, keepdims=True)
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Intercala 10 bits com dois zeros entre cada bit (código de Morton 3D)."""
+    values = values.astype(np.uint32) & 0x3FF
+    values = (values | (values << 16)) & 0x030000FF
+    values = (values | (values << 8)) & 0x0300F00F
+    values = (values | (values << 4)) & 0x030C30C3
+    values = (values | (values << 2)) & 0x09249249
+    return values
+
+
+def morton_codes(points: np.ndarray) -> np.ndarray:
+    """Códigos de Morton de 30 bits de pontos normalizados pela bounding box."""
+    bbox_min = points.min(axis=0)
+    extent = points.max(axis=0) - bbox_min
+    extent[extent <= 0] = 1.0
+    cells = np.clip((points - bbox_min) / extent * 1023, 0, 1023).astype(np.uint32)
+    return _spread_bits(cells[:, 0]) | (_spread_bits(cells[:, 1]) << 1) | (_spread_bits(cells[:, 2]) << 2)
+
+
+def optimize_triangle_order(triangles: np.ndarray, positions: np.ndarray,
+                            groups: np.ndarray = None) -> np.ndarray:
+    """
+    Ordena triângulos pela curva de Morton dos centróides.
+
+    Triângulos vizinhos no espaço passam a ser vizinhos no buffer, o que
+    aumenta o reaproveitamento de vértices já transformados pela GPU.
+
+    Args:
+        triangles: Array (m, 3) de índices
+        positions: Array (n, 3) de posições
+        groups: Chave primária opcional (m,), ex.: material de cada triângulo
+
+    Returns:
+        np.ndarray: Permutação (m,) dos triângulos
+    """
+    if len(triangles) < 2:
+        return np.arange(len(triangles))
+    centroids = positions[triangles].mean(axis=1)
+    codes = morton_codes(centroids)
+    if groups is None:
+        return np.argsort(codes, kind='stable')
+    return np.lexsort((codes, groups))
+
+
+def optimize_vertex_fetch(triangles: np.ndarray, vertex_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Renumera vértices na ordem do primeiro uso pelos triângulos.
+
+    Vértices não referenciados são descartados.
+
+    Returns:
+        tuple: (triângulos renumerados, índices antigos na nova ordem)
+    """
+    flat = triangles.ravel()
+    _, first_use = np.unique(flat, return_index=True)
+    order = flat[np.sort(first_use)]
+    remap = np.full(vertex_count, -1, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return remap[triangles], order
+
+
+def average_cache_miss_ratio(triangles: np.ndarray, cache_size: int = 16) -> float:
+    """
+    Misses por triângulo em um cache FIFO de vértices (ACMR).
+
+    Vai de 0.5 (ótimo teórico) a 3.0 (nenhum reaproveitamento).
+    """
+    if not len(triangles):
+        return 0.0
+    cache = []
+    cached = set()
+    misses = 0
+    for index in np.asarray(triangles).ravel().tolist():
+        if index in cached:
+            continue
+        misses += 1
+        cache.append(index)
+        cached.add(index)
+        if len(cache) > cache_size:
+            cached.discard(cache.pop(0))
+    return misses / len(triangles)
@@ -0,0 +1,159 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:08
+
+import django.core.validators
+import django.db.models.deletion
+import plant_viewer.models
+from django.db import migrations, models
+
+
+def move_building_elements_to_table(apps, schema_editor):
+    """Copia building_elements do JSON de metadados para IfcElement."""
+    BuildingPlan = apps.get_model("plant_viewer", "BuildingPlan")
+    IfcElement = apps.get_model("plant_viewer", "IfcElement")
+
+    for plant in BuildingPlan.objects.exclude(metadata__isnull=True).iterator():
+        metadata = plant.metadata or {}
+        building_elements = metadata.pop("building_elements", None) or {}
+        rows = [
+            IfcElement(
+                plant=plant,
+                express_id=item["id"],
+                global_id=item.get("global_id") or "",
+                ifc_type=item.get("type") or element_type,
+                name=(item.get("name") or "")[:255],
+                description=item.get("description") or "",
+                x=item.get("x_coordinate", 0.0),
+                y=item.get("y_coordinate", 0.0),
+                z=item.get("z_coordinate", 0.0),
+                has_coordinates=item.get("has_coordinates", False),
+            )
+            for element_type, items in building_elements.items()
+            for item in items
+        ]
+        IfcElement.objects.bulk_create(rows, batch_size=2000, ignore_conflicts=True)
+        plant.metadata = metadata
+        plant.save(update_fields=["metadata"])
+
+
+def move_building_elements_to_json(apps, schema_editor):
+    """Reverte: grava building_elements de volta no JSON de metadados."""
+    BuildingPlan = apps.get_model("plant_viewer", "BuildingPlan")
+
+    for plant in BuildingPlan.objects.exclude(metadata__isnull=True).iterator():
+        building_elements = {}
+        for element in plant.ifc_elements.order_by("ifc_type", "express_id"):
+            building_elements.setdefault(element.ifc_type, []).append({
+                "id": element.express_id,
+                "global_id": element.global_id,
+                "name": element.name,
+                "description": element.description,
+                "type": element.ifc_type,
+                "x_coordinate": element.x,
+                "y_coordinate": element.y,
+                "z_coordinate": element.z,
+                "has_coordinates": element.has_coordinates,
+            })
+        plant.metadata = {**plant.metadata, "building_elements": building_elements}
+        plant.save(update_fields=["metadata"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0003_buildingplan_metadata"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="buildingplan",
+            name="ifc_file",
+            field=models.FileField(
+                help_text="Arquivo IFC da planta industrial (.ifc) - Máximo 100 MB",
+                upload_to="ifc_files/%Y/%m/%d/",
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["ifc"]
+                    ),
+                    plant_viewer.models.validate_ifc_file_size,
+                    plant_viewer.models.validate_ifc_content,
+                ],
+                verbose_name="Arquivo IFC",
+            ),
+        ),
+        migrations.CreateModel(
+            name="IfcElement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("express_id", models.PositiveIntegerField(verbose_name="ID STEP")),
+                ("global_id", models.CharField(max_length=22, verbose_name="GlobalId")),
+                ("ifc_type", models.CharField(max_length=64, verbose_name="Tipo IFC")),
+                (
+                    "name",
+                    models.CharField(blank=True, max_length=255, verbose_name="Nome"),
+                ),
+                ("description", models.TextField(blank=True, verbose_name="Descrição")),
+                (
+                    "storey_express_id",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="ID do Andar"
+                    ),
+                ),
+                (
+                    "storey",
+                    models.CharField(blank=True, max_length=255, verbose_name="Andar"),
+                ),
+                ("x", models.FloatField(default=0.0)),
+                ("y", models.FloatField(default=0.0)),
+                ("z", models.FloatField(default=0.0)),
+                ("has_coordinates", models.BooleanField(default=False)),
+                ("bbox_min_x", models.FloatField(blank=True, null=True)),
+                ("bbox_min_y", models.FloatField(blank=True, null=True)),
+                ("bbox_min_z", models.FloatField(blank=True, null=True)),
+                ("bbox_max_x", models.FloatField(blank=True, null=True)),
+                ("bbox_max_y", models.FloatField(blank=True, null=True)),
+                ("bbox_max_z", models.FloatField(blank=True, null=True)),
+                (
+                    "plant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ifc_elements",
+                        to="plant_viewer.buildingplan",
+                        verbose_name="Planta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Elemento IFC",
+                "verbose_name_plural": "Elementos IFC",
+                "ordering": ["plant", "express_id"],
+                "indexes": [
+                    models.Index(
+                        fields=["plant", "ifc_type"], name="ifcelement_plant_type_idx"
+                    ),
+                    models.Index(
+                        fields=["plant", "storey_express_id"],
+                        name="ifcelement_plant_storey_idx",
+                    ),
+                    models.Index(
+                        fields=["plant", "global_id"], name="ifcelement_plant_guid_idx"
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("plant", "express_id"),
+                        name="unique_ifc_element_per_plant",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            move_building_elements_to_table, move_building_elements_to_json
+        ),
+    ]
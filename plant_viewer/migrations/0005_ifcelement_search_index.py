@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+
+# DDL copiado para a migração: não depende de plant_viewer.search, que pode mudar
+FTS_TABLE = "plant_viewer_element_fts"
+
+PG_SEARCH_VECTOR = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || ifc_type || ' ' || "
+    "coalesce(description, '') || ' ' || global_id || ' ' || coalesce(search_text, ''))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    """Cria o índice textual adequado ao banco (FTS5 ou tsvector/pg_trgm)."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, ifc_type, description, global_id, properties, "
+            "plant_id UNINDEXED, element_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} "
+            "(name, ifc_type, description, global_id, properties, plant_id, element_id) "
+            "SELECT name, ifc_type, description, global_id, search_text, plant_id, id "
+            "FROM plant_viewer_ifcelement"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS ifcelement_search_vector_idx "
+            f"ON plant_viewer_ifcelement USING gin ({PG_SEARCH_VECTOR})"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS ifcelement_name_trgm_idx "
+            "ON plant_viewer_ifcelement USING gin (name gin_trgm_ops)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS ifcelement_search_vector_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS ifcelement_name_trgm_idx")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0004_ifcelement"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ifcelement",
+            name="search_text",
+            field=models.TextField(
+                blank=True,
+                help_text="Valores textuais de propriedades indexados na busca",
+                verbose_name="Texto de Busca",
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
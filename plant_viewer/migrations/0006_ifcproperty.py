@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0005_ifcelement_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ifcelement",
+            name="material",
+            field=models.CharField(blank=True, max_length=255, verbose_name="Material"),
+        ),
+        migrations.CreateModel(
+            name="IfcProperty",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "element_express_id",
+                    models.PositiveIntegerField(verbose_name="ID STEP do Elemento"),
+                ),
+                (
+                    "pset",
+                    models.CharField(
+                        max_length=255, verbose_name="Conjunto de Propriedades"
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, verbose_name="Propriedade")),
+                (
+                    "value",
+                    models.CharField(blank=True, max_length=255, verbose_name="Valor"),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[("instance", "Instância"), ("type", "Tipo")],
+                        default="instance",
+                        max_length=8,
+                        verbose_name="Origem",
+                    ),
+                ),
+                (
+                    "plant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ifc_properties",
+                        to="plant_viewer.buildingplan",
+                        verbose_name="Planta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Propriedade IFC",
+                "verbose_name_plural": "Propriedades IFC",
+                "indexes": [
+                    models.Index(
+                        fields=["plant", "element_express_id"],
+                        name="ifcproperty_plant_element_idx",
+                    ),
+                    models.Index(
+                        fields=["plant", "pset", "name", "value"],
+                        name="ifcproperty_plant_value_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:20
+
+import django.core.validators
+import plant_viewer.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0006_ifcproperty"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="buildingplan",
+            name="ifc_file",
+            field=models.FileField(
+                help_text="Arquivo IFC da planta industrial (.ifc)",
+                upload_to="ifc_files/%Y/%m/%d/",
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["ifc"]
+                    ),
+                    plant_viewer.models.validate_ifc_file_size,
+                    plant_viewer.models.validate_ifc_content,
+                ],
+                verbose_name="Arquivo IFC",
+            ),
+        ),
+    ]
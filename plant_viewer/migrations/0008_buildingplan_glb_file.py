@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0007_ifc_file_help_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="buildingplan",
+            name="glb_file",
+            field=models.FileField(
+                blank=True,
+                help_text="Geometria convertida do IFC em glTF binário (gerada por convert_ifc_to_gltf)",
+                null=True,
+                upload_to="glb_files/%Y/%m/%d/",
+                verbose_name="Geometria GLB",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0008_buildingplan_glb_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="buildingplan",
+            name="glb_stats",
+            field=models.JSONField(
+                blank=True,
+                help_text="Tamanhos e tempos da última conversão para GLB",
+                null=True,
+                verbose_name="Estatísticas do GLB",
+            ),
+        ),
+    ]
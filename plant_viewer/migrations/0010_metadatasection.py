@@ -0,0 +1,133 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:45
+
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Cópia do formato de MetadataSection na época desta migração: a migração
+# não deve depender do modelo atual, que pode mudar depois
+SPLIT_SECTIONS = {"floor_plans": "storeys"}
+PATH_SEPARATOR = "/"
+COMPRESSION_LEVEL = 6
+# Elementos ficam em IfcElement (0004): não viram seção
+SKIPPED_KEYS = {"building_elements"}
+
+
+def encode(value):
+    """Serializa e comprime um valor: (bytes comprimidos, tamanho sem compressão)."""
+    raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, COMPRESSION_LEVEL), len(raw)
+
+
+def decode(data):
+    """Descomprime e desserializa o conteúdo de uma seção."""
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def encode_sections(metadata):
+    """Divide e comprime os metadados em [(seção, bytes comprimidos, tamanho)]."""
+    rows = []
+    for section, value in metadata.items():
+        if section in SKIPPED_KEYS:
+            continue
+        split_key = SPLIT_SECTIONS.get(section)
+        if split_key and isinstance(value, dict) and isinstance(value.get(split_key), dict):
+            value = dict(value)
+            for key, item in value.pop(split_key).items():
+                rows.append((PATH_SEPARATOR.join((section, split_key, key)), *encode(item)))
+        rows.append((section, *encode(value)))
+    return rows
+
+
+def decode_sections(rows):
+    """Inverso de encode_sections: aceita qualquer seção dividida em seção/chave/item."""
+    metadata = {}
+    split = []
+    for section, data in rows:
+        if PATH_SEPARATOR in section:
+            split.append((section.split(PATH_SEPARATOR), data))
+        else:
+            metadata[section] = decode(data)
+    for (section, split_key, key), data in split:
+        metadata.setdefault(section, {}).setdefault(split_key, {})[key] = decode(data)
+    return metadata
+
+
+def move_metadata_to_sections(apps, schema_editor):
+    """Copia o JSON de metadados de cada planta para seções comprimidas (sem building_elements)."""
+    BuildingPlan = apps.get_model("plant_viewer", "BuildingPlan")
+    MetadataSection = apps.get_model("plant_viewer", "MetadataSection")
+
+    for plant in BuildingPlan.objects.exclude(metadata__isnull=True).iterator():
+        MetadataSection.objects.bulk_create([
+            MetadataSection(plant=plant, section=section, data=data, raw_size=raw_size)
+            for section, data, raw_size in encode_sections(plant.metadata)
+        ])
+
+
+def move_metadata_to_json(apps, schema_editor):
+    """Reverte: grava as seções de volta no JSON de metadados."""
+    BuildingPlan = apps.get_model("plant_viewer", "BuildingPlan")
+    MetadataSection = apps.get_model("plant_viewer", "MetadataSection")
+
+    for plant in BuildingPlan.objects.filter(metadata_sections__isnull=False).distinct().iterator():
+        rows = MetadataSection.objects.filter(plant=plant).values_list("section", "data")
+        plant.metadata = decode_sections(rows)
+        plant.save(update_fields=["metadata"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0009_buildingplan_glb_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MetadataSection",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("section", models.CharField(max_length=255, verbose_name="Seção")),
+                ("data", models.BinaryField(verbose_name="Dados (JSON comprimido)")),
+                (
+                    "raw_size",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Tamanho sem compressão"
+                    ),
+                ),
+                (
+                    "plant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="metadata_sections",
+                        to="plant_viewer.buildingplan",
+                        verbose_name="Planta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Seção de Metadados",
+                "verbose_name_plural": "Seções de Metadados",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("plant", "section"),
+                        name="unique_metadata_section_per_plant",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(move_metadata_to_sections, move_metadata_to_json),
+        migrations.RemoveField(
+            model_name="buildingplan",
+            name="metadata",
+        ),
+    ]
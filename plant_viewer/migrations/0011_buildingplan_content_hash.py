@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0010_metadatasection"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="buildingplan",
+            name="content_hash",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="SHA-256 do arquivo IFC usado na última extração de metadados",
+                max_length=64,
+                verbose_name="Impressão Digital do Conteúdo",
+            ),
+        ),
+    ]
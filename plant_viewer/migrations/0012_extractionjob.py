@@ -0,0 +1,108 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:58
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0011_buildingplan_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExtractionJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Na fila"),
+                            ("running", "Em execução"),
+                            ("succeeded", "Concluído"),
+                            ("failed", "Falhou"),
+                        ],
+                        default="queued",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(blank=True, max_length=32, verbose_name="Motivo"),
+                ),
+                ("force", models.BooleanField(default=False, verbose_name="Forçada")),
+                (
+                    "stage",
+                    models.CharField(
+                        blank=True, max_length=32, verbose_name="Etapa Atual"
+                    ),
+                ),
+                (
+                    "completed_stages",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Etapas Concluídas"
+                    ),
+                ),
+                (
+                    "total_stages",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Total de Etapas"
+                    ),
+                ),
+                (
+                    "workflow_id",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="ID do Fluxo Celery"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Erro")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Criado Em"),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Iniciado Em"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Concluído Em"
+                    ),
+                ),
+                (
+                    "plant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="extraction_jobs",
+                        to="plant_viewer.buildingplan",
+                        verbose_name="Planta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Extração de Metadados",
+                "verbose_name_plural": "Extrações de Metadados",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["plant", "status"],
+                        name="extractionjob_plant_status_idx",
+                    )
+                ],
+            },
+        ),
+    ]
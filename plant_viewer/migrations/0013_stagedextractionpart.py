@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0012_extractionjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StagedExtractionPart",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("stage", models.CharField(max_length=32, verbose_name="Etapa")),
+                ("part", models.CharField(max_length=32, verbose_name="Parte")),
+                (
+                    "sequence",
+                    models.PositiveIntegerField(default=0, verbose_name="Sequência"),
+                ),
+                ("data", models.BinaryField(verbose_name="Dados (JSON comprimido)")),
+                (
+                    "raw_size",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Tamanho sem compressão"
+                    ),
+                ),
+                (
+                    "plant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="staged_extraction_parts",
+                        to="plant_viewer.buildingplan",
+                        verbose_name="Planta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Parte de Extração em Andamento",
+                "verbose_name_plural": "Partes de Extração em Andamento",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("plant", "stage", "part", "sequence"),
+                        name="unique_staged_extraction_part",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0013_stagedextractionpart"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExtractionLock",
+            fields=[
+                (
+                    "plant",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="extraction_lock",
+                        serialize=False,
+                        to="plant_viewer.buildingplan",
+                        verbose_name="Planta",
+                    ),
+                ),
+                ("token", models.CharField(max_length=32, verbose_name="Token")),
+                (
+                    "acquired_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Adquirido Em"
+                    ),
+                ),
+                ("expires_at", models.DateTimeField(verbose_name="Expira Em")),
+            ],
+            options={
+                "verbose_name": "Lock de Extração",
+                "verbose_name_plural": "Locks de Extração",
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0014_extractionlock"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="stagedextractionpart",
+            name="unique_staged_extraction_part",
+        ),
+        migrations.AddField(
+            model_name="stagedextractionpart",
+            name="job",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="staged_parts",
+                to="plant_viewer.extractionjob",
+                verbose_name="Job de Extração",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="stagedextractionpart",
+            constraint=models.UniqueConstraint(
+                fields=("plant", "job", "stage", "part", "sequence"),
+                name="unique_staged_extraction_part",
+            ),
+        ),
+    ]
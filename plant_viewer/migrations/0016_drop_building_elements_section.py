@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:10
+
+from django.db import migrations
+
+
+def drop_building_elements_section(apps, schema_editor):
+    """Remove a seção building_elements copiada por versões anteriores da 0010 (os elementos estão em IfcElement)."""
+    MetadataSection = apps.get_model("plant_viewer", "MetadataSection")
+    MetadataSection.objects.filter(section="building_elements").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plant_viewer", "0015_stagedextractionpart_job"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_building_elements_section, migrations.RunPython.noop),
+    ]
@@ -1,50 +1,56 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
 from django.core.cache import cache
 from django.utils import timezone
+import os
 import json
+import shutil
+import tempfile
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
 
+def get_max_upload_mb():
+    """Tamanho máximo de upload em MB (IFC_MAX_UPLOAD_MB)."""
+    return getattr(settings, 'IFC_MAX_UPLOAD_MB', 1024)
+
+
 def validate_ifc_file_size(file):
     """
     Valida o tamanho do arquivo IFC.
-    Limite: 100MB para evitar problemas de memória
+    Limite configurável por IFC_MAX_UPLOAD_MB; arquivos acima de
+    IFC_LOW_MEMORY_THRESHOLD_MB são processados no modo de memória limitada.
     """
-    max_size = 100 * 1024 * 1024  # 100 MB
-    if file.size > max_size:
-        raise ValidationError(f'Arquivo muito grande. Tamanho máximo permitido: 100 MB. Tamanho atual: {file.size / 1024 / 1024:.2f} MB')
+    max_mb = get_max_upload_mb()
+    if file.size > max_mb * 1024 * 1024:
+        raise ValidationError(f'Arquivo muito grande. Tamanho máximo permitido: {max_mb} MB. Tamanho atual: {file.size / 1024 / 1024:.2f} MB')
 
 
 def validate_ifc_content(file):
     """
     Valida o conteúdo básico do arquivo IFC.
-    Verifica se o arquivo começa com o header IFC válido.
+    Verifica o header ISO-10303-21, as seções HEADER/DATA e o FILE_SCHEMA
+    lendo apenas o cabeçalho (sem carregar o modelo).
     """
+    from .step_scanner import StepFormatError, scan_step_header
+    
     try:
-        # Ler os primeiros 1024 bytes para verificar o header
-        file.seek(0)
-        content = file.read(1024).decode('utf-8', errors='ignore')
-        file.seek(0)  # Reset file pointer
-        
-        # Verificar se contém header IFC válido
-        if not content.startswith('ISO-10303-21'):
-            raise ValidationError('Arquivo não é um arquivo IFC válido. Deve começar com ISO-10303-21.')
-        
-        # Verificar se contém seções obrigatórias
-        required_sections = ['HEADER', 'DATA']
-        for section in required_sections:
-            if section not in content:
-                raise ValidationError(f'Arquivo IFC inválido: seção {section} não encontrada.')
-                
-    except UnicodeDecodeError:
-        raise ValidationError('Arquivo não é um arquivo IFC válido (erro de codificação).')
+        header = scan_step_header(file)
+    except StepFormatError as e:
+        raise ValidationError(str(e))
     except Exception as e:
         logger.error(f'Erro ao validar arquivo IFC: {e}')
         raise ValidationError('Erro ao validar arquivo IFC.')
+    
+    if not header.has_data_section:
+        raise ValidationError('Arquivo IFC inválido: seção DATA não encontrada.')
+    
+    if header.schema and not header.schema.startswith('IFC'):
+        raise ValidationError(f'Schema não suportado: {header.schema}. Esperado um schema IFC.')
 
 
 class BuildingPlan(models.Model):
@@ -67,7 +73,7 @@ class BuildingPlan(models.Model):
             validate_ifc_content
         ],
         verbose_name="Arquivo IFC",
-        help_text="Arquivo IFC da planta industrial (.ifc) - Máximo 100 MB"
+        help_text="Arquivo IFC da planta industrial (.ifc)"
     )
     
     uploaded_at = models.DateTimeField(
@@ -89,18 +95,34 @@ class BuildingPlan(models.Model):
         help_text="Define se esta planta está ativa e disponível para visualização"
     )
     
-    metadata = models.JSONField(
+    metadata_updated_at = models.DateTimeField(
         blank=True,
         null=True,
-        verbose_name="Metadados IFC",
-        help_text="Metadados extraídos do arquivo IFC (cache)"
+        verbose_name="Metadados Atualizados Em",
+        help_text="Data da última extração de metadados"
     )
     
-    metadata_updated_at = models.DateTimeField(
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name="Impressão Digital do Conteúdo",
+        help_text="SHA-256 do arquivo IFC usado na última extração de metadados"
+    )
+    
+    glb_file = models.FileField(
+        upload_to='glb_files/%Y/%m/%d/',
         blank=True,
         null=True,
-        verbose_name="Metadados Atualizados Em",
-        help_text="Data da última extração de metadados"
+        verbose_name="Geometria GLB",
+        help_text="Geometria convertida do IFC em glTF binário (gerada por convert_ifc_to_gltf)"
+    )
+    
+    glb_stats = models.JSONField(
+        blank=True,
+        null=True,
+        verbose_name="Estatísticas do GLB",
+        help_text="Tamanhos e tempos da última conversão para GLB"
     )
     
     class Meta:
@@ -125,54 +147,473 @@ class BuildingPlan(models.Model):
                 return "Arquivo não encontrado"
         return "N/A"
     
-    def extract_metadata(self, force_update=False):
+    def get_file_info(self):
+        """
+        Cabeçalho do arquivo IFC (schema, aplicação, FILE_NAME) sem abrir o modelo.
+        
+        O resultado fica em cache enquanto o arquivo não muda (mtime/tamanho).
+        
+        Returns:
+            dict: Dados do cabeçalho ou None se o arquivo não puder ser lido
+        """
+        from .step_scanner import StepFormatError, scan_step_header
+        
+        if not self.ifc_file:
+            return None
+        
+        try:
+            stat = os.stat(self.ifc_file.path)
+        except (OSError, ValueError):
+            return None
+        
+        cache_key = f'plant_file_info_{self.pk}_{stat.st_mtime_ns}_{stat.st_size}'
+        info = cache.get(cache_key)
+        if info is None:
+            try:
+                header = scan_step_header(self.ifc_file.path)
+            except (StepFormatError, OSError) as e:
+                logger.warning(f"Cabeçalho IFC ilegível na planta {self.id}: {e}")
+                return None
+            info = {
+                'schema': header.schema,
+                'application': header.application,
+                'file_name': header.file_name,
+                'size': header.size,
+            }
+            cache.set(cache_key, info, timeout=None)
+        return info
+    
+    def get_content_hash(self):
+        """
+        SHA-256 do conteúdo atual do arquivo IFC.
+        
+        O hash fica em cache enquanto o arquivo não muda (mtime/tamanho),
+        então verificações periódicas não releem o arquivo inteiro.
+        
+        Returns:
+            str: Hash hexadecimal ou None se o arquivo não puder ser lido
+        """
+        from .step_scanner import hash_step_file
+        
+        if not self.ifc_file:
+            return None
+        
+        try:
+            stat = os.stat(self.ifc_file.path)
+        except (OSError, ValueError):
+            return None
+        
+        cache_key = f'plant_content_hash_{self.pk}_{stat.st_mtime_ns}_{stat.st_size}'
+        content_hash = cache.get(cache_key)
+        if content_hash is None:
+            try:
+                content_hash = hash_step_file(self.ifc_file.path)
+            except OSError as e:
+                logger.warning(f"Arquivo IFC ilegível na planta {self.id}: {e}")
+                return None
+            cache.set(cache_key, content_hash, timeout=None)
+        return content_hash
+    
+    def is_metadata_current(self, content_hash=None, section=None):
+        """
+        Indica se os metadados foram extraídos do conteúdo atual do arquivo.
+        
+        Args:
+            content_hash: Hash atual, se já calculado (padrão: get_content_hash())
+            section: Seção que os metadados devem conter; metadados extraídos
+                     antes de a seção existir não são atuais
+            
+        Returns:
+            bool: True se a impressão digital gravada confere com o arquivo
+        """
+        if not self.metadata_updated_at or not self.content_hash:
+            return False
+        if section and not self.metadata_sections.filter(section=section).exists():
+            return False
+        return (content_hash or self.get_content_hash()) == self.content_hash
+    
+    def has_current_glb(self):
+        """
+        Indica se o GLB convertido existe e é mais novo que o arquivo IFC.
+        
+        Returns:
+            bool: True se o GLB pode ser servido ao visualizador
+        """
+        if not self.glb_file or not self.ifc_file:
+            return False
+        try:
+            return os.path.getmtime(self.glb_file.path) >= os.path.getmtime(self.ifc_file.path)
+        except (OSError, ValueError):
+            return False
+    
+    def get_glb_levels(self):
+        """
+        Níveis de detalhe gravados na última conversão.
+        
+        Returns:
+            dict: {nível: nome do arquivo no storage}
+        """
+        levels = (self.glb_stats or {}).get('levels', {})
+        return {level: data['file'] for level, data in levels.items() if data.get('file')}
+    
+    def get_glb_tiles(self):
+        """
+        Tiles (andar × célula de grade) gravados na última conversão.
+        
+        Returns:
+            dict: {id do tile: entrada do manifesto com o arquivo no storage}
+        """
+        manifest = (self.glb_stats or {}).get('tiles') or {}
+        return {tile['id']: tile for tile in manifest.get('tiles', []) if tile.get('file')}
+    
+    def build_glb(self, force=False, num_threads=None, lod=None, tile_size=None):
+        """
+        Converte a geometria do IFC em GLB (ver gltf.convert_ifc_to_glb).
+        
+        Com níveis de detalhe, os GLBs simplificados e de caixas são gravados
+        ao lado do principal e registrados em glb_stats['levels']. As
+        estatísticas de tamanho e tempo da conversão ficam em glb_stats.
+        Com tiles, um GLB por andar e célula de grade é gravado em um
+        diretório ao lado e o manifesto fica em glb_stats['tiles'].
+        
+        Args:
+            force: Se True, reconverte mesmo se o GLB estiver atualizado
+            num_threads: Threads do iterador de geometria
+            lod: Gera os níveis de detalhe (padrão: IFC_GLB_LOD)
+            tile_size: Lado da célula dos tiles em metros (padrão:
+                IFC_GLB_TILE_SIZE; 0 não gera tiles)
+            
+        Returns:
+            dict: Estatísticas da conversão ou None se o GLB já estava atualizado
+            
+        Raises:
+            ValueError: Se a planta não tem arquivo IFC ou ele não pode ser aberto
+        """
+        from django.core.files import File
+        from .gltf import convert_ifc_to_glb
+        from .ifc_processor import IFCProcessor
+        from .lod import LOD_LEVELS, PROXY_LEVEL
+        from .tiles import TileSet, get_glb_tile_size
+        
+        if not self.ifc_file:
+            raise ValueError("Planta não possui arquivo IFC")
+        if not force and self.has_current_glb():
+            return None
+        if lod is None:
+            lod = getattr(settings, 'IFC_GLB_LOD', True)
+        if tile_size is None:
+            tile_size = get_glb_tile_size()
+        
+        processor = IFCProcessor(self.ifc_file.path)
+        if not processor.open():
+            raise ValueError(f"Não foi possível abrir o arquivo IFC da planta {self.id}")
+        
+        levels = [name for name, _ in LOD_LEVELS] + [PROXY_LEVEL] if lod else []
+        temporary_dir = tempfile.mkdtemp(prefix='glb_')
+        temporary_path = os.path.join(temporary_dir, 'full.glb')
+        lod_outputs = {level: os.path.join(temporary_dir, f'{level}.glb') for level in levels}
+        tiles = TileSet(tile_size, processor.get_storey_map()) if tile_size > 0 else None
+        try:
+            stats = convert_ifc_to_glb(
+                processor.model, temporary_path, num_threads=num_threads, lod_outputs=lod_outputs,
+                tiles=tiles, tiles_dir=temporary_dir,
+            )
+            previous = [self.glb_file.name] if self.glb_file else []
+            previous += self.get_glb_levels().values()
+            previous += [tile['file'] for tile in self.get_glb_tiles().values()]
+            
+            base = os.path.splitext(os.path.basename(self.ifc_file.name))[0]
+            suffix = '.glb.gz' if stats['compressed'] else '.glb'
+            with open(temporary_path, 'rb') as glb:
+                self.glb_file.save(base + suffix, File(glb), save=False)
+            for level, path in lod_outputs.items():
+                name = self.glb_file.field.generate_filename(self, f'{base}.{level}{suffix}')
+                with open(path, 'rb') as glb:
+                    stats['levels'][level]['file'] = self.glb_file.storage.save(name, File(glb))
+            for tile in stats.get('tiles', {}).get('tiles', []):
+                name = self.glb_file.field.generate_filename(self, f"{base}_tiles/{tile['id']}{suffix}")
+                with open(tile.pop('path'), 'rb') as glb:
+                    tile['file'] = self.glb_file.storage.save(name, File(glb))
+            
+            self.glb_stats = stats
+            self.save(update_fields=['glb_file', 'glb_stats'])
+            current = {self.glb_file.name, *self.get_glb_levels().values()}
+            current.update(tile['file'] for tile in self.get_glb_tiles().values())
+            for name in previous:
+                if name not in current:
+                    self.glb_file.storage.delete(name)
+        finally:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+        
+        logger.info(
+            f"GLB da planta {self.id} gerado: {stats['nodes']} nós, {stats['meshes']} malhas, "
+            f"{stats['size_bytes']} bytes"
+            + (f" (+ níveis {', '.join(levels)})" if levels else "")
+            + (f" e {len(self.get_glb_tiles())} tiles" if tiles else "")
+        )
+        return stats
+    
+    def requires_low_memory(self):
+        """
+        Indica se o arquivo deve ser processado no modo de memória limitada.
+        
+        Returns:
+            bool: True se o arquivo excede IFC_LOW_MEMORY_THRESHOLD_MB
+        """
+        threshold = getattr(settings, 'IFC_LOW_MEMORY_THRESHOLD_MB', 100) * 1024 * 1024
+        try:
+            return bool(self.ifc_file) and self.ifc_file.size > threshold
+        except (OSError, ValueError):
+            return False
+    
+    def extract_metadata(self, force_update=False, low_memory=None):
         """
         Extrai metadados do arquivo IFC.
         
+        Os elementos são gravados na tabela IfcElement; as seções agregadas
+        (project_info, statistics, bounds...) vão comprimidas para MetadataSection.
+        
         Args:
             force_update: Se True, força atualização mesmo se já existir cache
+            low_memory: Força (ou desativa) o modo de memória limitada
+                        (padrão: requires_low_memory())
             
         Returns:
-            dict: Metadados extraídos do IFC
+            dict: Metadados extraídos do IFC (incluindo building_elements)
         """
         from .ifc_processor import IFCProcessor
+        from .extraction import extract_metadata as extract_ifc_metadata
+        from .search import rebuild_search_index
         
         # Verificar cache
-        if self.metadata and not force_update:
+        if self.metadata_updated_at and not force_update:
             logger.info(f"Usando metadados em cache para planta {self.id}")
-            return self.metadata
+            return {**MetadataSection.load_all(self), 'building_elements': self.get_building_elements()}
         
         if not self.ifc_file:
             logger.warning(f"Planta {self.id} não possui arquivo IFC")
             return {}
         
+        if low_memory is None:
+            low_memory = self.requires_low_memory()
+        
+        property_sets = {}
+        building_elements = {}
         try:
-            logger.info(f"Extraindo metadados do IFC para planta {self.id}")
-            processor = IFCProcessor(self.ifc_file.path)
+            logger.info(
+                f"Extraindo metadados do IFC para planta {self.id}"
+                f"{' (modo de memória limitada)' if low_memory else ''}"
+            )
+            # Hash antes da leitura: se o arquivo mudar durante a extração,
+            # a próxima verificação periódica percebe a diferença
+            content_hash = self.get_content_hash() or ''
+            processor = IFCProcessor(self.ifc_file.path, low_memory=low_memory)
             
             if not processor.open():
                 logger.error(f"Falha ao abrir arquivo IFC da planta {self.id}")
                 return {}
             
-            metadata = {
-                'project_info': processor.get_project_info(),
-                'building_elements': processor.get_building_elements(),
-                'spatial_structure': processor.get_spatial_structure(),
-                'statistics': processor.get_statistics(),
-                'bounds': processor.get_bounds()
-            }
+            # Passagem única sobre os IfcProduct com coletores plugáveis
+            metadata = extract_ifc_metadata(processor)
+            building_elements = metadata.pop('building_elements', {})
+            search_text = metadata.pop('search_text', {})
+            property_sets = metadata.pop('property_sets', {})
+            materials = metadata.pop('materials', {})
+            geometry = processor.get_geometry()
             
-            # Salvar cache no banco
-            self.metadata = metadata
-            self.metadata_updated_at = timezone.now()
-            self.save(update_fields=['metadata', 'metadata_updated_at'])
+            # Salvar índice de elementos, propriedades, índice de busca e cache no banco
+            with processor.monitor.stage('database'):
+                with transaction.atomic():
+                    IfcElement.rebuild_for_plant(
+                        self, building_elements, geometry.element_bounds if geometry else {},
+                        search_text, materials
+                    )
+                    IfcProperty.rebuild_for_plant(self, property_sets)
+                    rebuild_search_index(self.id)
+                    metadata['extraction']['memory'] = processor.monitor.report()
+                    MetadataSection.rebuild_for_plant(self, metadata)
+                    self.metadata_updated_at = timezone.now()
+                    self.content_hash = content_hash
+                    self.save(update_fields=['metadata_updated_at', 'content_hash'])
             
             logger.info(f"Metadados extraídos com sucesso para planta {self.id}")
-            return metadata
+            if hasattr(building_elements, 'close'):
+                # Elementos em disco (memória limitada): devolvidos a partir da tabela, como no cache
+                building_elements.close()
+                building_elements = self.get_building_elements()
+            return {**metadata, 'building_elements': building_elements}
             
         except Exception as e:
             logger.error(f"Erro ao extrair metadados da planta {self.id}: {e}")
             return {}
+        finally:
+            # Elementos e property sets do modo de memória limitada ficam em arquivos temporários
+            for spilled in (property_sets, building_elements):
+                if hasattr(spilled, 'close'):
+                    spilled.close()
+    
+    def run_extraction_stage(self, stage, low_memory=None, progress=None, job_id=None):
+        """
+        Executa uma etapa da extração distribuída e grava o seu resultado.
+        
+        Cada etapa abre o arquivo IFC no próprio processo e roda só os
+        coletores de EXTRACTION_STAGES[stage]:
+        - index: elementos, materiais, project_info e statistics
+        - properties: propriedades e texto de busca dos elementos
+        - geometry: bounding box dos elementos, bounds e floor_plans
+        - spatial_structure: hierarquia espacial
+        
+        O resultado vai para StagedExtractionPart, não para as tabelas
+        servidas pela API: a versão anterior continua inteira até
+        finish_staged_extraction. Na primeira extração da planta (sem
+        versão anterior) as seções da etapa também são publicadas já, para
+        a API servi-las antes da conclusão.
+        
+        Args:
+            stage: Nome da etapa
+            low_memory: Força (ou desativa) o modo de memória limitada
+            progress: notifications.ProgressReporter da etapa; recebe o
+                      progresso da varredura e, após o commit, as seções publicadas
+            job_id: ExtractionJob do fluxo, dono das linhas gravadas
+            
+        Returns:
+            dict: Relatório da etapa (tempos, memória, processo)
+            
+        Raises:
+            ValueError: Se a etapa não existir ou o arquivo não puder ser aberto
+        """
+        import socket
+        import time
+        from .ifc_processor import IFCProcessor
+        from .extraction import EXTRACTION_STAGES, extract_metadata as extract_ifc_metadata
+        
+        if stage not in EXTRACTION_STAGES:
+            raise ValueError(f'Etapa de extração desconhecida: {stage}')
+        if not self.ifc_file:
+            raise ValueError(f'Planta {self.id} não possui arquivo IFC')
+        if low_memory is None:
+            low_memory = self.requires_low_memory()
+        
+        started = time.perf_counter()
+        processor = IFCProcessor(self.ifc_file.path, low_memory=low_memory)
+        if not processor.open():
+            raise ValueError(f'Falha ao abrir arquivo IFC da planta {self.id}')
+        
+        metadata = extract_ifc_metadata(processor, collectors=EXTRACTION_STAGES[stage], progress=progress)
+        report = metadata.pop('extraction')
+        property_sets = metadata.pop('property_sets', {})
+        building_elements = metadata.pop('building_elements', {})
+        try:
+            parts = []
+            if stage == 'index':
+                parts.append(('elements', (item for elements in building_elements.values() for item in elements)))
+                parts.append(('materials', metadata.pop('materials').items()))
+            elif stage == 'properties':
+                parts.append(('properties', property_sets.items()))
+                parts.append(('search_text', metadata.pop('search_text').items()))
+            elif stage == 'geometry':
+                geometry = processor.get_geometry()
+                parts.append(('bounds', (
+                    (express_id, [float(v) for v in (*bounds[0], *bounds[1])])
+                    for express_id, bounds in (geometry.element_bounds if geometry else {}).items()
+                )))
+            parts.append(('sections', [metadata]))
+            
+            with processor.monitor.stage('database'):
+                with transaction.atomic():
+                    if stage == 'index':
+                        # index abre o fluxo: descarta o que sobrou de fluxos encerrados
+                        StagedExtractionPart.clear_stale(self)
+                    # Nova tentativa da etapa substitui o que ela já tinha gravado
+                    StagedExtractionPart.clear(self, job_id, stage)
+                    StagedExtractionPart.write(self, stage, parts, job_id)
+                    first_extraction = not BuildingPlan.objects.filter(
+                        pk=self.pk, metadata_updated_at__isnull=False
+                    ).exists()
+                    if first_extraction:
+                        MetadataSection.update_sections(self, metadata)
+                        if progress is not None:
+                            sections = list(metadata)
+                            transaction.on_commit(lambda: progress.sections_ready(sections))
+                    
+                    report['memory'] = processor.monitor.report()
+                    report['wall_time_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                    report['worker'] = f'{socket.gethostname()}:{os.getpid()}'
+                    StagedExtractionPart.write(self, stage, [('report', [report])], job_id)
+        finally:
+            for spilled in (property_sets, building_elements):
+                if hasattr(spilled, 'close'):
+                    spilled.close()
+        
+        logger.info(f"Etapa '{stage}' da extração da planta {self.id} concluída em {report['wall_time_ms']} ms")
+        return report
+    
+    def finish_staged_extraction(self, started_at=None, content_hash=None, job_id=None):
+        """
+        Conclui a extração distribuída: publica o resultado das etapas.
+        
+        Elementos, propriedades, seções e índice de busca são substituídos
+        a partir de StagedExtractionPart na mesma transação que muda
+        metadata_updated_at (e com ele o ETag e a chave do cache de
+        respostas), então a API passa da versão anterior para a nova de uma
+        vez.
+        
+        Args:
+            started_at: Início do fluxo (datetime ou ISO 8601), para o tempo total
+            content_hash: Hash do arquivo calculado no agendamento (padrão:
+                          get_content_hash())
+            job_id: ExtractionJob do fluxo cujas etapas são publicadas
+            
+        Returns:
+            dict: Seção extraction (sem as etapas)
+            
+        Raises:
+            ValueError: Se faltar o resultado de alguma etapa
+        """
+        import time
+        from django.utils.dateparse import parse_datetime
+        from .extraction import EXTRACTION_STAGES
+        from .search import rebuild_search_index
+        
+        reports = StagedExtractionPart.reports(self, job_id)
+        missing = sorted(set(EXTRACTION_STAGES) - set(reports))
+        if missing:
+            raise ValueError(f'Planta {self.id}: etapas sem resultado gravado: {", ".join(missing)}')
+        
+        started = time.perf_counter()
+        with transaction.atomic():
+            metadata = {}
+            for sections in StagedExtractionPart.iter_items(self, 'sections', job_id):
+                metadata.update(sections)
+            element_bounds = {
+                express_id: (bbox[:3], bbox[3:])
+                for express_id, bbox in StagedExtractionPart.iter_items(self, 'bounds', job_id)
+            }
+            IfcElement.rebuild_for_plant(
+                self, {'staged': StagedExtractionPart.iter_items(self, 'elements', job_id)}, element_bounds,
+                dict(StagedExtractionPart.iter_items(self, 'search_text', job_id)),
+                dict(StagedExtractionPart.iter_items(self, 'materials', job_id)),
+            )
+            IfcProperty.rebuild_for_plant(self, StagedExtractionPart.iter_items(self, 'properties', job_id))
+            search_started = time.perf_counter()
+            rebuild_search_index(self.id)
+            now = timezone.now()
+            if isinstance(started_at, str):
+                started_at = parse_datetime(started_at)
+            summary = {
+                'mode': 'staged',
+                'search_time_ms': round((time.perf_counter() - search_started) * 1000, 2),
+                'publish_time_ms': round((time.perf_counter() - started) * 1000, 2),
+                'total_time_ms': round((now - started_at).total_seconds() * 1000, 2) if started_at else None,
+            }
+            MetadataSection.rebuild_for_plant(self, {**metadata, 'extraction': {**summary, 'stages': reports}})
+            StagedExtractionPart.clear(self, job_id)
+            self.metadata_updated_at = now
+            self.content_hash = content_hash or self.get_content_hash() or ''
+            self.save(update_fields=['metadata_updated_at', 'content_hash'])
+        
+        logger.info(f"Extração em etapas da planta {self.id} concluída ({summary['total_time_ms']} ms)")
+        return summary
     
     def get_metadata(self):
         """
@@ -183,6 +624,36 @@ class BuildingPlan(models.Model):
         """
         return self.extract_metadata(force_update=False)
     
+    def get_metadata_section(self, section, *path):
+        """
+        Retorna uma única seção dos metadados sem carregar as demais.
+        
+        Só a linha de MetadataSection da seção é lida e descomprimida. O
+        arquivo IFC nunca é aberto aqui: seção ausente (metadados ainda não
+        extraídos ou anteriores à seção) retorna None, e a view responde
+        com o job de extração (ver BuildingPlanViewSet._metadata_pending).
+        
+        Args:
+            section: Chave dos metadados (statistics, bounds, spatial_structure...)
+            *path: Chaves aninhadas dentro da seção (ex.: 'storeys', 's12')
+            
+        Returns:
+            Valor da seção ou None
+        """
+        return MetadataSection.load(self, section, *path)
+    
+    def get_building_elements(self):
+        """
+        Monta os elementos agrupados por tipo a partir da tabela IfcElement.
+        
+        Returns:
+            dict: {tipo IFC: [elementos]} no formato de building_elements
+        """
+        elements_by_type = {}
+        for element in self.ifc_elements.order_by('ifc_type', 'express_id'):
+            elements_by_type.setdefault(element.ifc_type, []).append(element.to_dict())
+        return elements_by_type
+    
     def refresh_metadata(self):
         """
         Força atualização dos metadados.
@@ -191,3 +662,750 @@ class BuildingPlan(models.Model):
             dict: Metadados atualizados
         """
         return self.extract_metadata(force_update=True)
+
+
+class IfcElement(models.Model):
+    """
+    Índice normalizado dos elementos IFC de uma planta.
+    
+    Uma linha por IfcProduct não espacial, preenchida na extração de
+    metadados, para que os endpoints consultem linhas indexadas em vez
+    de desserializar o JSON completo de metadados.
+    """
+    plant = models.ForeignKey(
+        BuildingPlan,
+        on_delete=models.CASCADE,
+        related_name='ifc_elements',
+        verbose_name="Planta"
+    )
+    express_id = models.PositiveIntegerField(verbose_name="ID STEP")
+    global_id = models.CharField(max_length=22, verbose_name="GlobalId")
+    ifc_type = models.CharField(max_length=64, verbose_name="Tipo IFC")
+    name = models.CharField(max_length=255, blank=True, verbose_name="Nome")
+    description = models.TextField(blank=True, verbose_name="Descrição")
+    search_text = models.TextField(
+        blank=True,
+        verbose_name="Texto de Busca",
+        help_text="Valores textuais de propriedades indexados na busca"
+    )
+    material = models.CharField(max_length=255, blank=True, verbose_name="Material")
+    
+    storey_express_id = models.PositiveIntegerField(blank=True, null=True, verbose_name="ID do Andar")
+    storey = models.CharField(max_length=255, blank=True, verbose_name="Andar")
+    
+    # Posição de inserção (ObjectPlacement)
+    x = models.FloatField(default=0.0)
+    y = models.FloatField(default=0.0)
+    z = models.FloatField(default=0.0)
+    has_coordinates = models.BooleanField(default=False)
+    
+    # Bounding box em coordenadas globais (nula para elementos sem geometria)
+    bbox_min_x = models.FloatField(blank=True, null=True)
+    bbox_min_y = models.FloatField(blank=True, null=True)
+    bbox_min_z = models.FloatField(blank=True, null=True)
+    bbox_max_x = models.FloatField(blank=True, null=True)
+    bbox_max_y = models.FloatField(blank=True, null=True)
+    bbox_max_z = models.FloatField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name = "Elemento IFC"
+        verbose_name_plural = "Elementos IFC"
+        ordering = ['plant', 'express_id']
+        constraints = [
+            models.UniqueConstraint(fields=['plant', 'express_id'], name='unique_ifc_element_per_plant'),
+        ]
+        indexes = [
+            models.Index(fields=['plant', 'ifc_type'], name='ifcelement_plant_type_idx'),
+            models.Index(fields=['plant', 'storey_express_id'], name='ifcelement_plant_storey_idx'),
+            models.Index(fields=['plant', 'global_id'], name='ifcelement_plant_guid_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.ifc_type} #{self.express_id} ({self.name})'
+    
+    @property
+    def bbox(self):
+        """Bounding box como dicionário min/max ou None."""
+        if self.bbox_min_x is None:
+            return None
+        return {
+            'min': {'x': self.bbox_min_x, 'y': self.bbox_min_y, 'z': self.bbox_min_z},
+            'max': {'x': self.bbox_max_x, 'y': self.bbox_max_y, 'z': self.bbox_max_z},
+        }
+    
+    # Campo de to_dict -> colunas necessárias (projeção com fields=)
+    FIELD_COLUMNS = {
+        'id': ('express_id',),
+        'global_id': ('global_id',),
+        'name': ('name',),
+        'description': ('description',),
+        'type': ('ifc_type',),
+        'storey_id': ('storey_express_id',),
+        'storey': ('storey',),
+        'x_coordinate': ('x',),
+        'y_coordinate': ('y',),
+        'z_coordinate': ('z',),
+        'has_coordinates': ('has_coordinates',),
+        'bbox': ('bbox_min_x', 'bbox_min_y', 'bbox_min_z', 'bbox_max_x', 'bbox_max_y', 'bbox_max_z'),
+        'material': ('material',),
+    }
+    
+    @classmethod
+    def columns_for(cls, fields):
+        """
+        Colunas do banco necessárias para montar os campos pedidos.
+        
+        Args:
+            fields: Nomes de campos de to_dict
+            
+        Raises:
+            ValueError: Se algum campo não existir
+        """
+        unknown = [name for name in fields if name not in cls.FIELD_COLUMNS]
+        if unknown:
+            raise ValueError(
+                f'Campos desconhecidos: {", ".join(unknown)} '
+                f'(disponíveis: {", ".join(cls.FIELD_COLUMNS)})'
+            )
+        return sorted({column for name in fields for column in cls.FIELD_COLUMNS[name]})
+    
+    def to_dict(self, fields=None):
+        """
+        Representação no formato de building_elements dos metadados.
+        
+        Args:
+            fields: Campos a incluir (padrão: todos)
+        """
+        return {
+            name: self.bbox if name == 'bbox' else getattr(self, self.FIELD_COLUMNS[name][0])
+            for name in (fields or self.FIELD_COLUMNS)
+        }
+    
+    @staticmethod
+    def bbox_columns(bounds):
+        """
+        Colunas bbox_* de uma bounding box.
+        
+        Args:
+            bounds: (min xyz, max xyz) ou None
+        """
+        bbox = [float(v) for v in (*bounds[0], *bounds[1])] if bounds is not None else [None] * 6
+        return dict(zip(IfcElement.FIELD_COLUMNS['bbox'], bbox))
+    
+    @classmethod
+    def rebuild_for_plant(cls, plant, building_elements, element_bounds=None, search_text=None,
+                          materials=None, batch_size=2000):
+        """
+        Substitui o índice de elementos da planta.
+        
+        Args:
+            plant: BuildingPlan
+            building_elements: {tipo IFC: [elementos]} como produzido pela extração
+            element_bounds: {express_id: (min xyz, max xyz)} da passagem de geometria
+            search_text: {express_id: texto de propriedades} para o índice de busca
+            materials: {express_id: nome do material}
+            batch_size: Tamanho dos lotes de bulk_create
+            
+        Returns:
+            int: Número de elementos gravados
+        """
+        element_bounds = element_bounds or {}
+        search_text = search_text or {}
+        materials = materials or {}
+        total = 0
+        
+        with transaction.atomic():
+            cls.objects.filter(plant=plant).delete()
+            rows = []
+            for elements in building_elements.values():
+                for item in elements:
+                    rows.append(cls(
+                        plant=plant,
+                        express_id=item['id'],
+                        global_id=item['global_id'],
+                        ifc_type=item['type'],
+                        name=(item.get('name') or '')[:255],
+                        description=item.get('description') or '',
+                        search_text=search_text.get(item['id'], ''),
+                        material=(materials.get(item['id']) or '')[:255],
+                        storey_express_id=item.get('storey_id'),
+                        storey=(item.get('storey') or '')[:255],
+                        x=item.get('x_coordinate', 0.0),
+                        y=item.get('y_coordinate', 0.0),
+                        z=item.get('z_coordinate', 0.0),
+                        has_coordinates=item.get('has_coordinates', False),
+                        **cls.bbox_columns(element_bounds.get(item['id'])),
+                    ))
+                    # Gravar em lotes para não manter todas as instâncias em memória
+                    if len(rows) >= batch_size:
+                        cls.objects.bulk_create(rows)
+                        total += len(rows)
+                        rows = []
+            cls.objects.bulk_create(rows)
+            total += len(rows)
+        
+        logger.info(f"Índice de elementos da planta {plant.id} atualizado: {total} elementos")
+        return total
+
+
+class IfcProperty(models.Model):
+    """
+    Armazenamento consultável de propriedades e quantidades IFC.
+    
+    Uma linha por (objeto, conjunto, propriedade), preenchida em lote na
+    extração de metadados. Inclui propriedades herdadas do tipo (source='type').
+    """
+    SOURCE_CHOICES = [
+        ('instance', 'Instância'),
+        ('type', 'Tipo'),
+    ]
+    
+    plant = models.ForeignKey(
+        BuildingPlan,
+        on_delete=models.CASCADE,
+        related_name='ifc_properties',
+        verbose_name="Planta"
+    )
+    element_express_id = models.PositiveIntegerField(verbose_name="ID STEP do Elemento")
+    pset = models.CharField(max_length=255, verbose_name="Conjunto de Propriedades")
+    name = models.CharField(max_length=255, verbose_name="Propriedade")
+    value = models.CharField(max_length=255, blank=True, verbose_name="Valor")
+    source = models.CharField(max_length=8, choices=SOURCE_CHOICES, default='instance', verbose_name="Origem")
+    
+    class Meta:
+        verbose_name = "Propriedade IFC"
+        verbose_name_plural = "Propriedades IFC"
+        indexes = [
+            models.Index(fields=['plant', 'element_express_id'], name='ifcproperty_plant_element_idx'),
+            models.Index(fields=['plant', 'pset', 'name', 'value'], name='ifcproperty_plant_value_idx'),
+        ]
+    
+    def __str__(self):
+        return f'#{self.element_express_id} {self.pset}.{self.name} = {self.value}'
+    
+    @classmethod
+    def get_element_property_sets(cls, plant, express_id):
+        """
+        Propriedades de um elemento em uma única leitura indexada.
+        
+        Returns:
+            dict: {conjunto: {propriedade: valor}}
+        """
+        property_sets = {}
+        rows = cls.objects.filter(plant=plant, element_express_id=express_id).values_list('pset', 'name', 'value')
+        for pset, name, value in rows:
+            property_sets.setdefault(pset, {})[name] = value
+        return property_sets
+    
+    @classmethod
+    def rebuild_for_plant(cls, plant, property_sets, batch_size=5000):
+        """
+        Substitui as propriedades armazenadas da planta.
+        
+        Args:
+            plant: BuildingPlan
+            property_sets: {express_id: {conjunto: {propriedade: (valor, origem)}}}
+                           ou iterável de pares (express_id, conjuntos)
+            batch_size: Tamanho dos lotes de bulk_create
+            
+        Returns:
+            int: Número de propriedades gravadas
+        """
+        total = 0
+        with transaction.atomic():
+            cls.objects.filter(plant=plant).delete()
+            batch = []
+            pairs = property_sets.items() if hasattr(property_sets, 'items') else property_sets
+            for express_id, sets in pairs:
+                for pset, props in sets.items():
+                    for name, (value, source) in props.items():
+                        batch.append(cls(
+                            plant=plant,
+                            element_express_id=express_id,
+                            pset=pset[:255],
+                            name=name[:255],
+                            value=value[:255],
+                            source=source,
+                        ))
+                if len(batch) >= batch_size:
+                    cls.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            cls.objects.bulk_create(batch)
+            total += len(batch)
+        
+        logger.info(f"Propriedades da planta {plant.id} armazenadas: {total} valores")
+        return total
+
+
+class MetadataSection(models.Model):
+    """
+    Seções dos metadados IFC, fora da linha de BuildingPlan.
+    
+    Uma linha por seção (project_info, statistics, bounds, spatial_structure,
+    floor_plans, extraction), com o JSON comprimido (zlib). Listagens de
+    plantas não trazem os metadados, e cada endpoint descomprime só a
+    seção pedida. Os elementos ficam na tabela IfcElement.
+    
+    Subseções grandes listadas em SPLIT_SECTIONS são gravadas em linhas
+    próprias ("floor_plans/storeys/s12"), para que a planta de um andar
+    seja lida sem as dos outros.
+    """
+    # {seção: chave cujos itens viram linhas próprias}
+    SPLIT_SECTIONS = {'floor_plans': 'storeys', 'extraction': 'stages'}
+    PATH_SEPARATOR = '/'
+    COMPRESSION_LEVEL = 6
+    
+    plant = models.ForeignKey(
+        BuildingPlan,
+        on_delete=models.CASCADE,
+        related_name='metadata_sections',
+        verbose_name="Planta"
+    )
+    section = models.CharField(max_length=255, verbose_name="Seção")
+    data = models.BinaryField(verbose_name="Dados (JSON comprimido)")
+    raw_size = models.PositiveIntegerField(default=0, verbose_name="Tamanho sem compressão")
+    
+    class Meta:
+        verbose_name = "Seção de Metadados"
+        verbose_name_plural = "Seções de Metadados"
+        constraints = [
+            models.UniqueConstraint(fields=['plant', 'section'], name='unique_metadata_section_per_plant'),
+        ]
+    
+    def __str__(self):
+        return f'{self.plant_id}:{self.section} ({len(self.data)} bytes)'
+    
+    @classmethod
+    def encode(cls, value):
+        """
+        Serializa e comprime um valor.
+        
+        Returns:
+            tuple: (bytes comprimidos, tamanho do JSON sem compressão)
+        """
+        import zlib
+        raw = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return zlib.compress(raw, cls.COMPRESSION_LEVEL), len(raw)
+    
+    @staticmethod
+    def decode(data):
+        """Descomprime e desserializa o conteúdo de uma seção."""
+        import zlib
+        return json.loads(zlib.decompress(bytes(data)))
+    
+    @classmethod
+    def encode_sections(cls, metadata):
+        """
+        Divide e comprime os metadados em linhas de seção.
+        
+        Args:
+            metadata: {seção: valor} (sem building_elements)
+            
+        Returns:
+            list: [(nome da seção, bytes comprimidos, tamanho sem compressão)]
+        """
+        rows = []
+        for section, value in metadata.items():
+            split_key = cls.SPLIT_SECTIONS.get(section)
+            if split_key and isinstance(value, dict) and isinstance(value.get(split_key), dict):
+                value = dict(value)
+                for key, item in value.pop(split_key).items():
+                    rows.append((cls.PATH_SEPARATOR.join((section, split_key, key)), *cls.encode(item)))
+            rows.append((section, *cls.encode(value)))
+        return rows
+    
+    @classmethod
+    def decode_sections(cls, rows):
+        """
+        Inverso de encode_sections.
+        
+        Args:
+            rows: Iterável de (nome da seção, bytes comprimidos)
+            
+        Returns:
+            dict: {seção: valor}
+        """
+        metadata = {}
+        split = []
+        for section, data in rows:
+            if cls.PATH_SEPARATOR in section:
+                split.append((section.split(cls.PATH_SEPARATOR), data))
+            else:
+                metadata[section] = cls.decode(data)
+        for (section, split_key, key), data in split:
+            metadata.setdefault(section, {}).setdefault(split_key, {})[key] = cls.decode(data)
+        return metadata
+    
+    @classmethod
+    def rebuild_for_plant(cls, plant, metadata):
+        """
+        Substitui as seções de metadados da planta.
+        
+        Args:
+            plant: BuildingPlan
+            metadata: {seção: valor} (sem building_elements)
+            
+        Returns:
+            int: Tamanho total comprimido em bytes
+        """
+        rows = cls.encode_sections(metadata)
+        with transaction.atomic():
+            cls.objects.filter(plant=plant).delete()
+            cls.objects.bulk_create([
+                cls(plant=plant, section=section, data=data, raw_size=raw_size)
+                for section, data, raw_size in rows
+            ])
+        
+        compressed = sum(len(data) for _, data, _ in rows)
+        logger.info(
+            f"Metadados da planta {plant.id} armazenados: {len(rows)} seções, "
+            f"{sum(raw_size for _, _, raw_size in rows)} → {compressed} bytes"
+        )
+        return compressed
+    
+    @classmethod
+    def update_sections(cls, plant, metadata):
+        """
+        Substitui apenas as seções informadas (e as suas subseções divididas).
+        
+        Args:
+            plant: BuildingPlan
+            metadata: {seção: valor}
+        """
+        if not metadata:
+            return
+        rows = cls.encode_sections(metadata)
+        stale = models.Q(section__in=list(metadata))
+        for section, value in metadata.items():
+            split_key = cls.SPLIT_SECTIONS.get(section)
+            if split_key and isinstance(value, dict) and split_key in value:
+                prefix = cls.PATH_SEPARATOR.join((section, split_key, ''))
+                stale |= models.Q(section__startswith=prefix)
+        with transaction.atomic():
+            cls.objects.filter(plant=plant).filter(stale).delete()
+            cls.objects.bulk_create([
+                cls(plant=plant, section=section, data=data, raw_size=raw_size)
+                for section, data, raw_size in rows
+            ])
+    
+    @classmethod
+    def load(cls, plant, section, *path):
+        """
+        Lê uma seção (ou um valor dentro dela) descomprimindo só a linha necessária.
+        
+        Args:
+            plant: BuildingPlan
+            section: Nome da seção
+            *path: Chaves aninhadas dentro da seção
+            
+        Returns:
+            Valor encontrado ou None
+        """
+        keys = (section, *path)
+        # Linha mais específica disponível: "floor_plans/storeys/s12" antes de "floor_plans"
+        candidates = [cls.PATH_SEPARATOR.join(keys[:size]) for size in range(len(keys), 0, -1)]
+        rows = dict(cls.objects.filter(plant=plant, section__in=candidates).values_list('section', 'data'))
+        for size, name in zip(range(len(keys), 0, -1), candidates):
+            if name in rows:
+                value = cls.decode(rows[name])
+                for key in keys[size:]:
+                    value = value.get(key) if isinstance(value, dict) else None
+                return value
+        return None
+    
+    @classmethod
+    def load_all(cls, plant):
+        """
+        Monta o dicionário completo de metadados a partir de todas as seções.
+        
+        Returns:
+            dict: {seção: valor}
+        """
+        return cls.decode_sections(cls.objects.filter(plant=plant).values_list('section', 'data'))
+
+
+class StagedExtractionPart(models.Model):
+    """
+    Resultado de uma etapa da extração distribuída ainda não publicado.
+    
+    As etapas gravam aqui elementos, propriedades, bounding boxes, seções e
+    relatório, sem tocar nas tabelas servidas pela API; a conclusão do
+    fluxo (BuildingPlan.finish_staged_extraction) publica tudo na mesma
+    transação e apaga as linhas. Cada parte é uma lista de itens em JSON
+    comprimido (como MetadataSection), dividida em linhas de CHUNK_SIZE
+    itens para ser gravada e lida sem montar a lista inteira em memória.
+    
+    As linhas pertencem ao ExtractionJob do fluxo: etapas de um fluxo que
+    falhou e ainda estão rodando não se misturam com as de um fluxo novo
+    da mesma planta, nem apagam as linhas dele. Sem job (execução direta
+    pelo shell ou testes), as linhas ficam com job nulo.
+    """
+    CHUNK_SIZE = 2000
+    
+    plant = models.ForeignKey(
+        BuildingPlan,
+        on_delete=models.CASCADE,
+        related_name='staged_extraction_parts',
+        verbose_name="Planta"
+    )
+    job = models.ForeignKey(
+        'ExtractionJob',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='staged_parts',
+        verbose_name="Job de Extração"
+    )
+    stage = models.CharField(max_length=32, verbose_name="Etapa")
+    part = models.CharField(max_length=32, verbose_name="Parte")
+    sequence = models.PositiveIntegerField(default=0, verbose_name="Sequência")
+    data = models.BinaryField(verbose_name="Dados (JSON comprimido)")
+    raw_size = models.PositiveIntegerField(default=0, verbose_name="Tamanho sem compressão")
+    
+    class Meta:
+        verbose_name = "Parte de Extração em Andamento"
+        verbose_name_plural = "Partes de Extração em Andamento"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['plant', 'job', 'stage', 'part', 'sequence'], name='unique_staged_extraction_part'
+            ),
+        ]
+    
+    def __str__(self):
+        return f'{self.plant_id}:{self.job_id}:{self.stage}/{self.part}#{self.sequence} ({len(self.data)} bytes)'
+    
+    @classmethod
+    def _rows(cls, plant, job_id=None):
+        """Linhas da planta gravadas pelo fluxo do job (job nulo sem job_id)."""
+        rows = cls.objects.filter(plant=plant)
+        if job_id:
+            return rows.filter(job_id=job_id)
+        return rows.filter(job__isnull=True)
+    
+    @classmethod
+    def write(cls, plant, stage, parts, job_id=None):
+        """
+        Grava partes de uma etapa, uma linha a cada CHUNK_SIZE itens.
+        
+        Args:
+            plant: BuildingPlan
+            stage: Nome da etapa
+            parts: Iterável de (nome da parte, iterável de itens JSON)
+            job_id: ExtractionJob do fluxo (opcional)
+        """
+        import itertools
+        
+        for part, items in parts:
+            items = iter(items)
+            for sequence in itertools.count():
+                chunk = list(itertools.islice(items, cls.CHUNK_SIZE))
+                if not chunk:
+                    break
+                data, raw_size = MetadataSection.encode(chunk)
+                cls.objects.create(
+                    plant=plant, job_id=job_id or None, stage=stage, part=part, sequence=sequence,
+                    data=data, raw_size=raw_size,
+                )
+    
+    @classmethod
+    def iter_items(cls, plant, part, job_id=None):
+        """Itens de uma parte (de todas as etapas do fluxo), uma linha descomprimida por vez."""
+        rows = cls._rows(plant, job_id).filter(part=part).order_by('stage', 'sequence').values_list('data', flat=True)
+        for data in rows.iterator():
+            yield from MetadataSection.decode(data)
+    
+    @classmethod
+    def reports(cls, plant, job_id=None):
+        """
+        Relatórios das etapas do fluxo já concluídas.
+        
+        Returns:
+            dict: {etapa: relatório}
+        """
+        rows = cls._rows(plant, job_id).filter(part='report').values_list('stage', 'data')
+        return {stage: MetadataSection.decode(data)[0] for stage, data in rows}
+    
+    @classmethod
+    def clear(cls, plant, job_id=None, stage=None):
+        """
+        Descarta o resultado gravado por um fluxo (ou só o de uma etapa).
+        
+        Args:
+            plant: BuildingPlan ou o seu ID
+            job_id: ExtractionJob do fluxo (padrão: linhas sem job)
+            stage: Etapa (padrão: todas)
+        """
+        rows = cls._rows(plant, job_id)
+        if stage is not None:
+            rows = rows.filter(stage=stage)
+        rows.delete()
+    
+    @classmethod
+    def clear_stale(cls, plant):
+        """
+        Descarta as linhas de fluxos encerrados da planta (ou sem job).
+        
+        Cobre fluxos cujo worker morreu antes da limpeza; as linhas de
+        jobs ainda na fila ou em execução não são tocadas.
+        """
+        cls.objects.filter(plant=plant).exclude(job__status__in=ExtractionJob.ACTIVE_STATUSES).delete()
+
+
+class ExtractionJob(models.Model):
+    """
+    Execução agendada da extração de metadados de uma planta.
+    
+    Criado por tasks.schedule_extraction junto com o fluxo Celery; as
+    etapas atualizam status e progresso, que a API expõe para polling e que
+    são enviados ao grupo WebSocket da planta (ver notifications).
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Na fila'),
+        (RUNNING, 'Em execução'),
+        (SUCCEEDED, 'Concluído'),
+        (FAILED, 'Falhou'),
+    ]
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    plant = models.ForeignKey(
+        BuildingPlan,
+        on_delete=models.CASCADE,
+        related_name='extraction_jobs',
+        verbose_name="Planta"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, verbose_name="Status")
+    reason = models.CharField(max_length=32, blank=True, verbose_name="Motivo")
+    force = models.BooleanField(default=False, verbose_name="Forçada")
+    stage = models.CharField(max_length=32, blank=True, verbose_name="Etapa Atual")
+    completed_stages = models.PositiveSmallIntegerField(default=0, verbose_name="Etapas Concluídas")
+    total_stages = models.PositiveSmallIntegerField(default=0, verbose_name="Total de Etapas")
+    workflow_id = models.CharField(max_length=255, blank=True, verbose_name="ID do Fluxo Celery")
+    error = models.TextField(blank=True, verbose_name="Erro")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado Em")
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name="Iniciado Em")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="Concluído Em")
+    
+    class Meta:
+        verbose_name = "Extração de Metadados"
+        verbose_name_plural = "Extrações de Metadados"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['plant', 'status'], name='extractionjob_plant_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.plant_id}:{self.id} ({self.status})'
+    
+    @property
+    def progress(self):
+        """Fração concluída (0 a 1) do fluxo."""
+        if self.status == self.SUCCEEDED:
+            return 1.0
+        if not self.total_stages:
+            return 0.0
+        return round(min(self.completed_stages / self.total_stages, 1.0), 4)
+    
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+    
+    def to_dict(self):
+        """Estado do job enviado pelo WebSocket da planta."""
+        return {
+            'id': str(self.id),
+            'plant_id': self.plant_id,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'error': self.error,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+    
+    @classmethod
+    def create_for(cls, plant, reason='', force=False):
+        """Job na fila para um novo fluxo de extração (index, etapas paralelas e conclusão)."""
+        from .extraction import PARALLEL_STAGES
+        return cls.objects.create(plant=plant, reason=reason, force=force, total_stages=len(PARALLEL_STAGES) + 2)
+    
+    @classmethod
+    def active_for(cls, plant):
+        """Job na fila ou em execução mais recente da planta (ou None)."""
+        return cls.objects.filter(plant=plant, status__in=cls.ACTIVE_STATUSES).first()
+    
+    @classmethod
+    def _update(cls, job_id, active_only=False, **changes):
+        """
+        Atualiza o job por UPDATE (etapas paralelas não disputam o objeto) e notifica.
+        
+        Args:
+            active_only: Só altera o job ainda na fila ou em execução: uma
+                         etapa irmã que começa ou termina depois da falha
+                         não o tira de FAILED
+        """
+        from .notifications import broadcast_job
+        
+        if not job_id:
+            return None
+        jobs = cls.objects.filter(pk=job_id)
+        if active_only:
+            jobs = jobs.filter(status__in=cls.ACTIVE_STATUSES)
+        updated = jobs.update(**changes)
+        job = cls.objects.filter(pk=job_id).first()
+        if job is not None and updated:
+            broadcast_job(job)
+        return job
+    
+    @classmethod
+    def stage_started(cls, job_id, stage):
+        if not job_id:
+            return None
+        cls.objects.filter(pk=job_id, started_at__isnull=True).update(started_at=timezone.now())
+        return cls._update(job_id, active_only=True, status=cls.RUNNING, stage=stage)
+    
+    @classmethod
+    def stage_finished(cls, job_id, stage):
+        return cls._update(job_id, active_only=True, completed_stages=models.F('completed_stages') + 1)
+    
+    @classmethod
+    def succeeded(cls, job_id):
+        return cls._update(
+            job_id, status=cls.SUCCEEDED, stage='', completed_stages=models.F('total_stages'),
+            finished_at=timezone.now(),
+        )
+    
+    @classmethod
+    def failed(cls, job_id, error, active_only=False):
+        return cls._update(
+            job_id, active_only=active_only, status=cls.FAILED, error=str(error)[:2000], finished_at=timezone.now(),
+        )
+
+
+class ExtractionLock(models.Model):
+    """
+    Lock de extração de metadados de uma planta (ver locks).
+    
+    A planta é a chave primária: só uma linha (um fluxo) por planta.
+    """
+    plant = models.OneToOneField(
+        BuildingPlan,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='extraction_lock',
+        verbose_name="Planta"
+    )
+    token = models.CharField(max_length=32, verbose_name="Token")
+    acquired_at = models.DateTimeField(auto_now_add=True, verbose_name="Adquirido Em")
+    expires_at = models.DateTimeField(verbose_name="Expira Em")
+    
+    class Meta:
+        verbose_name = "Lock de Extração"
+        verbose_name_plural = "Locks de Extração"
+    
+    def __str__(self):
+        return f'{self.plant_id} (até {self.expires_at.isoformat()})'
@@ -0,0 +1,203 @@
+"""
+Notificações em tempo real da extração de metadados.
+
+O estado dos jobs de extração, o progresso de cada etapa e as seções de
+metadados recém-gravadas são enviados ao grupo WebSocket da planta
+(plant_<id>, o mesmo do PlantViewerConsumer) pela channel layer Redis,
+configurada em CHANNEL_LAYERS quando REDIS_URL está definido. Sem o
+pacote channels ou sem CHANNEL_LAYERS, as notificações são ignoradas e
+os clientes acompanham o job pela API.
+"""
+
+import logging
+import time
+from typing import Iterable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_SLOT_KEY = 'ifc_progress_slot:{plant_id}'
+
+
+def plant_group_name(plant_id) -> str:
+    """Grupo WebSocket da planta (ver core.consumers.PlantViewerConsumer)."""
+    return f'plant_{plant_id}'
+
+
+def _channel_layer():
+    try:
+        from channels.layers import get_channel_layer
+    except ImportError:
+        return None
+    return get_channel_layer()
+
+
+def get_progress_interval() -> float:
+    """Intervalo mínimo (s) entre eventos de progresso de uma planta (IFC_PROGRESS_INTERVAL_MS)."""
+    return getattr(settings, 'IFC_PROGRESS_INTERVAL_MS', 500) / 1000
+
+
+def claim_progress_slot(plant_id, interval: float) -> bool:
+    """
+    Reserva o próximo evento de progresso da planta.
+
+    As etapas paralelas da extração rodam em workers distintos, então o
+    intervalo mínimo é controlado por uma chave no cache compartilhado,
+    válida por um intervalo. Falhas do cache não bloqueiam o envio.
+
+    Args:
+        plant_id: ID da BuildingPlan
+        interval: Intervalo mínimo (s) entre eventos da planta
+
+    Returns:
+        bool: True se o evento pode ser enviado agora
+    """
+    if interval <= 0:
+        return True
+
+    from django.core.cache import cache
+
+    try:
+        return cache.add(PROGRESS_SLOT_KEY.format(plant_id=plant_id), 1, timeout=interval)
+    except Exception as e:
+        logger.debug(f"Falha ao reservar evento de progresso da planta {plant_id}: {e}")
+        return True
+
+
+def send_to_plant(plant_id, message: dict, channel_layer=None) -> bool:
+    """
+    Envia uma mensagem ao grupo da planta.
+
+    Falhas da channel layer não interrompem a extração.
+
+    Returns:
+        bool: True se a mensagem foi enviada
+    """
+    channel_layer = channel_layer or _channel_layer()
+    if channel_layer is None:
+        return False
+
+    from asgiref.sync import async_to_sync
+
+    try:
+        async_to_sync(channel_layer.group_send)(plant_group_name(plant_id), message)
+    except Exception as e:
+        logger.warning(f"Falha ao notificar a planta {plant_id} ({message.get('type')}): {e}")
+        return False
+    return True
+
+
+def broadcast_job(job) -> bool:
+    """Envia o estado do job ao grupo da planta."""
+    return send_to_plant(job.plant_id, {'type': 'extraction_job', 'job': job.to_dict()})
+
+
+class ProgressReporter:
+    """
+    Progresso de uma etapa da extração, enviado com limite de frequência.
+
+    update() pode ser chamado a cada elemento: atualizações dentro do
+    intervalo mínimo só guardam o último valor, enviado no próximo evento
+    (ou em flush()). O intervalo vale para a planta inteira: etapas
+    paralelas disputam o mesmo evento (ver claim_progress_slot). Uma etapa pode ter várias fases (varredura dos
+    produtos, tesselação, plantas baixas), cada uma aberta com begin() e
+    com contagem própria. Cada evento traz etapa, fase, elementos
+    processados, total, ETA e RSS do worker. Sem channel layer, todas as
+    chamadas são no-op.
+    """
+
+    def __init__(self, plant_id, stage: str, job_id: Optional[str] = None,
+                 min_interval: Optional[float] = None, channel_layer=None):
+        self.plant_id = plant_id
+        self.stage = stage
+        self.job_id = job_id
+        self.min_interval = get_progress_interval() if min_interval is None else min_interval
+        self.channel_layer = channel_layer or _channel_layer()
+        self.started = time.monotonic()
+        self.phase = None
+        self.phase_started = self.started
+        self.processed = 0
+        self.total = None
+        self.events_sent = 0
+        self._last_attempt = None
+        self._pending = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.channel_layer is not None
+
+    def begin(self, phase: str, total: Optional[int] = None) -> None:
+        """
+        Abre uma nova fase da etapa, com contagem e ETA próprios.
+
+        O valor retido da fase anterior é enviado antes, e a nova fase é
+        anunciada de imediato, sem esperar o intervalo mínimo.
+        """
+        if not self.enabled:
+            return
+        self.flush()
+        self.phase = phase
+        self.phase_started = time.monotonic()
+        self.processed = 0
+        self.total = total
+        self._send(self.phase_started)
+
+    def update(self, processed: int, total: Optional[int] = None) -> None:
+        """Registra o progresso; envia se o intervalo mínimo já passou."""
+        if not self.enabled:
+            return
+        self.processed = processed
+        if total is not None:
+            self.total = total
+        now = time.monotonic()
+        if self._last_attempt is not None and now - self._last_attempt < self.min_interval:
+            self._pending = True
+            return
+        self._last_attempt = now
+        if not claim_progress_slot(self.plant_id, self.min_interval):
+            # Outra etapa da planta enviou há pouco; o valor segue retido
+            self._pending = True
+            return
+        self._send(now)
+
+    def flush(self) -> None:
+        """Envia o último valor retido pelo limite de frequência."""
+        if self.enabled and self._pending:
+            self._send(time.monotonic())
+
+    def _send(self, now: float) -> None:
+        from .memory import MB, current_rss_bytes
+
+        elapsed = now - self.started
+        eta = None
+        if self.total and self.processed:
+            phase_elapsed = now - self.phase_started
+            eta = round(phase_elapsed / self.processed * max(self.total - self.processed, 0), 1)
+        self._last_attempt = now
+        self._pending = False
+        self.events_sent += 1
+        send_to_plant(self.plant_id, {
+            'type': 'extraction_progress',
+            'progress': {
+                'job_id': self.job_id,
+                'plant_id': self.plant_id,
+                'stage': self.stage,
+                'phase': self.phase,
+                'processed': self.processed,
+                'total': self.total,
+                'percent': round(100 * self.processed / self.total, 1) if self.total else None,
+                'elapsed_s': round(elapsed, 1),
+                'eta_s': eta,
+                'rss_mb': round(current_rss_bytes() / MB, 1),
+            },
+        }, self.channel_layer)
+
+    def sections_ready(self, sections: Iterable[str]) -> None:
+        """Avisa que seções de metadados foram gravadas e já podem ser lidas pela API."""
+        sections = sorted(sections)
+        if self.enabled and sections:
+            send_to_plant(self.plant_id, {
+                'type': 'metadata_sections',
+                'sections': {'job_id': self.job_id, 'stage': self.stage, 'sections': sections},
+            }, self.channel_layer)
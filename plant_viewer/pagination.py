@@ -0,0 +1,29 @@
+"""
+Paginação por cursor das listagens de elementos IFC.
+
+O cursor codifica a posição na ordenação por express_id (única por
+planta), então cada página é uma consulta indexada com LIMIT, sem OFFSET
+nem COUNT sobre a tabela inteira, e continua estável se a planta for
+reextraída entre duas páginas.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class ElementCursorPagination(CursorPagination):
+    """
+    Cursor sobre IfcElement ordenado por express_id.
+
+    Query params:
+        - cursor: posição opaca devolvida em next/previous
+        - page_size: elementos por página (padrão: 500, máximo: 5000)
+    """
+
+    ordering = 'express_id'
+    page_size = 500
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
+
+    def get_ordering(self, request, queryset, view):
+        # OrderingFilter do ViewSet se aplica às plantas, não aos elementos
+        return (self.ordering,)
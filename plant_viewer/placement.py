@@ -0,0 +1,172 @@
+"""
+Resolução de posicionamentos IFC (IfcLocalPlacement) em coordenadas globais.
+
+Cada IfcLocalPlacement é composto com toda a cadeia PlacementRelTo como
+matrizes 4x4 (rotação e translação). O resultado de cada placement é
+memorizado, de modo que placements compartilhados (andares, edifício,
+site) são resolvidos uma única vez e o custo total é O(número de placements).
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_IDENTITY = np.eye(4)
+
+
+def _unit(vector, default) -> np.ndarray:
+    """Normaliza uma IfcDirection (ou retorna o eixo padrão)."""
+    if vector is None:
+        return np.array(default, dtype=np.float64)
+    values = np.zeros(3)
+    ratios = vector.DirectionRatios
+    values[:len(ratios)] = ratios
+    norm = np.linalg.norm(values)
+    return values / norm if norm > 0 else np.array(default, dtype=np.float64)
+
+
+def axis_placement_matrix(placement, unit_scale: float = 1.0) -> np.ndarray:
+    """
+    Matriz 4x4 de um IfcAxis2Placement3D ou IfcAxis2Placement2D.
+
+    Args:
+        placement: Entidade IfcAxis2Placement*
+        unit_scale: Fator de conversão da unidade de comprimento para metros
+
+    Returns:
+        np.ndarray: Matriz 4x4 (translação em metros)
+    """
+    matrix = np.eye(4)
+    if placement is None:
+        return matrix
+
+    z_axis = _unit(getattr(placement, 'Axis', None), (0.0, 0.0, 1.0))
+    x_axis = _unit(placement.RefDirection, (1.0, 0.0, 0.0))
+    # RefDirection pode não ser ortogonal a Axis: projetar no plano normal a Z
+    x_axis = x_axis - np.dot(x_axis, z_axis) * z_axis
+    norm = np.linalg.norm(x_axis)
+    if norm == 0:
+        x_axis = np.array([1.0, 0.0, 0.0]) if abs(z_axis[0]) < 0.9 else np.array([0.0, 1.0, 0.0])
+        x_axis = x_axis - np.dot(x_axis, z_axis) * z_axis
+        norm = np.linalg.norm(x_axis)
+    x_axis = x_axis / norm
+    y_axis = np.cross(z_axis, x_axis)
+
+    matrix[:3, 0] = x_axis
+    matrix[:3, 1] = y_axis
+    matrix[:3, 2] = z_axis
+
+    coordinates = placement.Location.Coordinates if placement.Location else ()
+    matrix[:len(coordinates), 3] = [float(c) * unit_scale for c in coordinates]
+    return matrix
+
+
+class PlacementResolver:
+    """
+    Resolve matrizes globais de IfcObjectPlacement com memorização.
+
+    Placements não locais (IfcGridPlacement, IfcLinearPlacement) são
+    resolvidos por ifcopenshell.util.placement.
+    """
+
+    def __init__(self, model, unit_scale: Optional[float] = None):
+        """
+        Args:
+            model: ifcopenshell.file aberto
+            unit_scale: Fator unidade -> metro (padrão: calculado do projeto)
+        """
+        if unit_scale is None:
+            unit_scale = self._model_unit_scale(model)
+        self.model = model
+        self.unit_scale = unit_scale
+        self._matrices: Dict[int, np.ndarray] = {}
+
+    @staticmethod
+    def _model_unit_scale(model) -> float:
+        try:
+            import ifcopenshell.util.unit
+            return float(ifcopenshell.util.unit.calculate_unit_scale(model))
+        except Exception as e:
+            logger.debug(f"Escala de unidade não determinada, usando 1.0: {e}")
+            return 1.0
+
+    def __len__(self) -> int:
+        return len(self._matrices)
+
+    def _local_matrix(self, placement) -> np.ndarray:
+        if placement.is_a('IfcLocalPlacement'):
+            return axis_placement_matrix(placement.RelativePlacement, self.unit_scale)
+
+        import ifcopenshell.util.placement
+        matrix = np.array(ifcopenshell.util.placement.get_local_placement(placement), dtype=np.float64)
+        matrix[:3, 3] *= self.unit_scale
+        return matrix
+
+    def _parent(self, placement):
+        if placement.is_a('IfcLocalPlacement'):
+            return placement.PlacementRelTo
+        return None
+
+    def matrix(self, placement) -> np.ndarray:
+        """
+        Matriz global 4x4 de um placement (identidade se None).
+
+        A cadeia de pais é percorrida iterativamente até o primeiro
+        placement já resolvido, e então composta de cima para baixo.
+        """
+        if placement is None:
+            return _IDENTITY
+
+        pending = []
+        current = placement
+        while current is not None and current.id() not in self._matrices:
+            pending.append(current)
+            current = self._parent(current)
+            if len(pending) > 10000:
+                raise ValueError(f"Cadeia de placements cíclica a partir de #{placement.id()}")
+
+        parent = _IDENTITY if current is None else self._matrices[current.id()]
+        for item in reversed(pending):
+            parent = parent @ self._local_matrix(item)
+            self._matrices[item.id()] = parent
+        return self._matrices[placement.id()]
+
+    def world_matrix(self, product) -> Optional[np.ndarray]:
+        """Matriz global do ObjectPlacement de um produto, ou None se não houver."""
+        placement = getattr(product, 'ObjectPlacement', None)
+        if placement is None:
+            return None
+        return self.matrix(placement)
+
+    def world_coordinates(self, products: Optional[Iterable] = None) -> Dict[int, Tuple[float, float, float]]:
+        """
+        Origem global de cada produto, resolvida em lote.
+
+        Args:
+            products: Produtos a resolver (padrão: todos os IfcProduct do modelo)
+
+        Returns:
+            dict: {express_id: (x, y, z)} em metros, apenas produtos com placement
+        """
+        if products is None:
+            products = self.model.by_type('IfcProduct')
+
+        ids = []
+        matrices = []
+        for product in products:
+            placement = getattr(product, 'ObjectPlacement', None)
+            if placement is None:
+                continue
+            try:
+                matrices.append(self.matrix(placement))
+                ids.append(product.id())
+            except Exception as e:
+                logger.debug(f"Erro ao resolver placement do elemento {product.id()}: {e}")
+
+        if not ids:
+            return {}
+        origins = np.stack(matrices)[:, :3, 3]
+        return dict(zip(ids, map(tuple, origins.tolist())))
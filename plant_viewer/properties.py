@@ -0,0 +1,287 @@
+"""
+Extração em lote de property sets e quantity sets de um modelo IFC.
+
+Cada IfcRelDefinesByProperties (e cada IfcRelDefinesByType) é percorrido
+uma única vez; o conjunto interpretado é distribuído para todos os objetos
+relacionados. Propriedades de tipo são herdadas e sobrescritas pelas da
+instância.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Origem de cada propriedade no armazenamento
+SOURCE_INSTANCE = 'instance'
+SOURCE_TYPE = 'type'
+
+# Atributo de valor de cada subtipo de IfcPhysicalSimpleQuantity
+QUANTITY_VALUE_ATTRIBUTES = {
+    'IfcQuantityLength': 'LengthValue',
+    'IfcQuantityArea': 'AreaValue',
+    'IfcQuantityVolume': 'VolumeValue',
+    'IfcQuantityCount': 'CountValue',
+    'IfcQuantityWeight': 'WeightValue',
+    'IfcQuantityTime': 'TimeValue',
+    'IfcQuantityNumber': 'NumberValue',
+}
+
+
+def _unwrap(value) -> Any:
+    """Extrai o valor Python de um IfcValue (ou retorna o próprio valor)."""
+    if value is None:
+        return None
+    return getattr(value, 'wrappedValue', value)
+
+
+def _join(values: Optional[Iterable]) -> str:
+    return ', '.join(str(_unwrap(v)) for v in values or [] if v is not None)
+
+
+def format_property_value(prop) -> Optional[str]:
+    """
+    Converte uma IfcProperty ou IfcPhysicalQuantity em texto.
+
+    Suporta valores simples, enumerados, limitados (bounded), listas,
+    tabelas, referências e quantidades.
+
+    Returns:
+        str ou None se a propriedade não tiver valor
+    """
+    ifc_class = prop.is_a()
+
+    if ifc_class == 'IfcPropertySingleValue':
+        value = _unwrap(prop.NominalValue)
+        return None if value is None else str(value)
+
+    if ifc_class == 'IfcPropertyEnumeratedValue':
+        return _join(prop.EnumerationValues) or None
+
+    if ifc_class == 'IfcPropertyBoundedValue':
+        lower = _unwrap(prop.LowerBoundValue)
+        upper = _unwrap(prop.UpperBoundValue)
+        set_point = _unwrap(getattr(prop, 'SetPointValue', None))
+        if lower is None and upper is None and set_point is None:
+            return None
+        text = f"{'' if lower is None else lower}..{'' if upper is None else upper}"
+        return f'{text} ({set_point})' if set_point is not None else text
+
+    if ifc_class == 'IfcPropertyListValue':
+        return _join(prop.ListValues) or None
+
+    if ifc_class == 'IfcPropertyTableValue':
+        defining = [_unwrap(v) for v in prop.DefiningValues or []]
+        defined = [_unwrap(v) for v in prop.DefinedValues or []]
+        return '; '.join(f'{a}: {b}' for a, b in zip(defining, defined)) or None
+
+    if ifc_class == 'IfcPropertyReferenceValue':
+        reference = prop.PropertyReference
+        if reference is None:
+            return None
+        return str(getattr(reference, 'Name', None) or reference.is_a())
+
+    attribute = QUANTITY_VALUE_ATTRIBUTES.get(ifc_class)
+    if attribute:
+        value = getattr(prop, attribute, None)
+        return None if value is None else str(value)
+
+    return None
+
+
+def parse_property_definition(definition) -> List[Tuple[str, str, str]]:
+    """
+    Interpreta um IfcPropertySet ou IfcElementQuantity.
+
+    Propriedades e quantidades complexas são achatadas como "Pai.Filho".
+
+    Returns:
+        list: Tuplas (nome do conjunto, nome da propriedade, valor)
+    """
+    set_name = definition.Name or definition.is_a()
+
+    if definition.is_a('IfcPropertySet'):
+        children = definition.HasProperties or []
+        nested_attribute = 'HasProperties'
+    elif definition.is_a('IfcElementQuantity'):
+        children = definition.Quantities or []
+        nested_attribute = 'HasQuantities'
+    else:
+        return []
+
+    rows = []
+    stack = [(child, '') for child in children]
+    while stack:
+        item, prefix = stack.pop()
+        name = f'{prefix}{item.Name}'
+        nested = getattr(item, nested_attribute, None) if item.is_a() in (
+            'IfcComplexProperty', 'IfcPhysicalComplexQuantity'
+        ) else None
+        if nested:
+            stack.extend((child, f'{name}.') for child in nested)
+            continue
+        value = format_property_value(item)
+        if value is not None:
+            rows.append((set_name, name, value))
+    return rows
+
+
+def _definitions(relating) -> Iterable:
+    """IFC4 permite um IfcPropertySetDefinitionSet (tupla) como definição."""
+    if isinstance(relating, (list, tuple)):
+        return relating
+    return [relating]
+
+
+def extract_property_sets(model) -> Dict[int, Dict[str, Dict[str, Tuple[str, str]]]]:
+    """
+    Extrai todos os property/quantity sets do modelo em uma passagem.
+
+    Args:
+        model: ifcopenshell.file aberto
+
+    Returns:
+        dict: {express_id: {conjunto: {propriedade: (valor, origem)}}}
+    """
+    parsed: Dict[int, List[Tuple[str, str, str]]] = {}
+
+    def parse(definition):
+        key = definition.id()
+        if key not in parsed:
+            parsed[key] = parse_property_definition(definition)
+        return parsed[key]
+
+    result: Dict[int, Dict[str, Dict[str, Tuple[str, str]]]] = {}
+
+    def assign(objects, rows, source):
+        for obj in objects or []:
+            target = result.setdefault(obj.id(), {})
+            for set_name, name, value in rows:
+                target.setdefault(set_name, {})[name] = (value, source)
+
+    # Uma relação malformada só descarta a si mesma, não as seguintes
+    skipped = 0
+    # Propriedades herdadas do tipo primeiro: a instância sobrescreve
+    for rel in model.by_type('IfcRelDefinesByType'):
+        try:
+            rows = []
+            for definition in getattr(rel.RelatingType, 'HasPropertySets', None) or []:
+                rows.extend(parse(definition))
+            if rows:
+                assign(rel.RelatedObjects, rows, SOURCE_TYPE)
+        except Exception as e:
+            skipped += 1
+            logger.debug(f"Erro ao extrair property sets da relação {rel.id()}: {e}")
+
+    for rel in model.by_type('IfcRelDefinesByProperties'):
+        try:
+            rows = []
+            for definition in _definitions(rel.RelatingPropertyDefinition):
+                rows.extend(parse(definition))
+            if rows:
+                assign(rel.RelatedObjects, rows, SOURCE_INSTANCE)
+        except Exception as e:
+            skipped += 1
+            logger.debug(f"Erro ao extrair property sets da relação {rel.id()}: {e}")
+
+    if skipped:
+        logger.warning(f"Property sets: {skipped} relações ignoradas por erro")
+    logger.info(f"Property sets extraídos: {len(parsed)} conjuntos para {len(result)} objetos")
+    return result
+
+
+def _type_definitions(product) -> Iterable:
+    """Property sets do tipo do produto (IsTypedBy no IFC4, IsDefinedBy no IFC2X3)."""
+    for rel in getattr(product, 'IsTypedBy', None) or []:
+        yield from rel.RelatingType.HasPropertySets or []
+    for rel in getattr(product, 'IsDefinedBy', None) or []:
+        if rel.is_a('IfcRelDefinesByType'):
+            yield from rel.RelatingType.HasPropertySets or []
+
+
+def iter_property_sets(products: Iterable, cache_size: int = 10000):
+    """
+    Extrai os property/quantity sets produto a produto, pelas relações inversas.
+
+    Variante de extract_property_sets para o modo de memória limitada: nada
+    é acumulado além de um cache limitado de conjuntos já interpretados
+    (conjuntos de tipo são compartilhados por muitos produtos).
+
+    Args:
+        products: Produtos a processar
+        cache_size: Máximo de definições interpretadas mantidas em cache
+
+    Yields:
+        tuple: (express_id, {conjunto: {propriedade: (valor, origem)}})
+    """
+    parsed: Dict[int, List[Tuple[str, str, str]]] = {}
+
+    def parse(definition):
+        key = definition.id()
+        rows = parsed.get(key)
+        if rows is None:
+            if len(parsed) >= cache_size:
+                parsed.clear()
+            rows = parsed[key] = parse_property_definition(definition)
+        return rows
+
+    for product in products:
+        sets: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        try:
+            for definition in _type_definitions(product):
+                for set_name, name, value in parse(definition):
+                    sets.setdefault(set_name, {})[name] = (value, SOURCE_TYPE)
+            for rel in getattr(product, 'IsDefinedBy', None) or []:
+                if not rel.is_a('IfcRelDefinesByProperties'):
+                    continue
+                for definition in _definitions(rel.RelatingPropertyDefinition):
+                    for set_name, name, value in parse(definition):
+                        sets.setdefault(set_name, {})[name] = (value, SOURCE_INSTANCE)
+        except Exception as e:
+            logger.debug(f"Erro ao extrair property sets do elemento {product.id()}: {e}")
+        if sets:
+            yield product.id(), sets
+
+
+def extract_materials(model) -> Dict[int, str]:
+    """
+    Nome do material associado a cada objeto (IfcRelAssociatesMaterial).
+
+    Returns:
+        dict: {express_id: nome do material}
+    """
+    materials: Dict[int, str] = {}
+    try:
+        for rel in model.by_type('IfcRelAssociatesMaterial'):
+            name = material_name(rel.RelatingMaterial)
+            if not name:
+                continue
+            for obj in rel.RelatedObjects:
+                materials[obj.id()] = name
+    except Exception as e:
+        logger.error(f"Erro ao extrair materiais: {e}")
+    return materials
+
+
+def material_name(material) -> Optional[str]:
+    """Nome legível de uma definição de material IFC."""
+    if material is None:
+        return None
+    if material.is_a('IfcMaterial'):
+        return material.Name
+    if material.is_a('IfcMaterialLayerSetUsage'):
+        return material_name(material.ForLayerSet)
+    if material.is_a('IfcMaterialLayerSet'):
+        layers = [layer.Material.Name for layer in material.MaterialLayers or [] if layer.Material]
+        return ' / '.join(layers) or material.LayerSetName
+    if material.is_a('IfcMaterialProfileSetUsage'):
+        return material_name(material.ForProfileSet)
+    if material.is_a('IfcMaterialProfileSet'):
+        profiles = [p.Material.Name for p in material.MaterialProfiles or [] if p.Material]
+        return ' / '.join(profiles) or material.Name
+    if material.is_a('IfcMaterialConstituentSet'):
+        constituents = [c.Material.Name for c in material.MaterialConstituents or [] if c.Material]
+        return ' / '.join(constituents) or material.Name
+    if material.is_a('IfcMaterialList'):
+        return ' / '.join(m.Name for m in material.Materials or [])
+    return getattr(material, 'Name', None)
@@ -0,0 +1,132 @@
+"""
+Cache de respostas prontas para envio dos endpoints de metadados.
+
+Guarda o corpo já serializado e comprimido (gzip e, com o pacote
+opcional brotli instalado, br) no cache do Django. Em um acerto a
+resposta é montada direto dos bytes, sem consultar as seções de
+metadados nem passar pelo renderer do DRF.
+
+As chaves incluem o ETag da resposta (planta, metadata_updated_at,
+action, argumentos e query string; ver views.conditional_metadata), então
+uma nova extração de metadados invalida todas as entradas da planta. As
+codificações de uma entrada compartilham esse ETag, que por isso é fraco,
+e toda resposta leva Vary: Accept-Encoding para que caches intermediários
+não entreguem a um cliente a codificação pedida por outro.
+"""
+
+import gzip
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'plant_response'
+
+# Corpos menores que isso não compensam a compressão
+MIN_COMPRESS_BYTES = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def get_response_cache_timeout() -> int:
+    """Validade (s) das entradas (IFC_RESPONSE_CACHE_TIMEOUT; 0 desativa o cache)."""
+    return int(getattr(django_settings, 'IFC_RESPONSE_CACHE_TIMEOUT', 86400))
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def cache_key(etag: str, base_url: str) -> str:
+    """
+    Chave da entrada de uma resposta.
+
+    Args:
+        etag: ETag da resposta (sem aspas)
+        base_url: Esquema e host da requisição; as respostas têm URLs absolutas
+    """
+    return f'{KEY_PREFIX}:{etag}:{base_url}'
+
+
+def response_body(response) -> Optional[Tuple[bytes, str]]:
+    """
+    Corpo serializado e Content-Type de uma resposta da view.
+
+    Returns:
+        tuple: (bytes, content type) ou None se a resposta não pode ser guardada
+    """
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.response import Response
+
+    if isinstance(response, Response):
+        renderer = JSONRenderer()
+        return renderer.render(response.data), renderer.media_type
+    if getattr(response, 'streaming', False):
+        return None
+    return response.content, response['Content-Type']
+
+
+def encode_entry(body: bytes, content_type: str) -> Dict[str, Any]:
+    """
+    Prepara a entrada do cache.
+
+    Corpos pequenos são guardados sem compressão; os demais só comprimidos
+    (gzip e br), e clientes sem suporte recebem o gzip descompactado.
+    """
+    if len(body) < MIN_COMPRESS_BYTES:
+        return {'content_type': content_type, 'identity': body}
+
+    entry = {'content_type': content_type, 'gzip': gzip.compress(body, GZIP_LEVEL, mtime=0)}
+    brotli = _brotli()
+    if brotli is not None:
+        entry['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return entry
+
+
+def accepted_encodings(header: str) -> set:
+    """Codificações aceitas no Accept-Encoding (ignorando as com q=0)."""
+    accepted = set()
+    for token in header.split(','):
+        name, _, params = token.partition(';')
+        name = name.strip().lower()
+        if name and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(name)
+    return accepted
+
+
+def build_response(entry: Dict[str, Any], accept_encoding: str) -> HttpResponse:
+    """Resposta HTTP com a melhor codificação da entrada aceita pelo cliente."""
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in ('br', 'gzip'):
+        if encoding in entry and (encoding in accepted or '*' in accepted):
+            response = HttpResponse(entry[encoding], content_type=entry['content_type'])
+            response['Content-Encoding'] = encoding
+            break
+    else:
+        body = entry['identity'] if 'identity' in entry else gzip.decompress(entry['gzip'])
+        response = HttpResponse(body, content_type=entry['content_type'])
+    # Também sem compressão: um cache compartilhado não pode servir este corpo a quem pediu gzip
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def get_entry(key: str) -> Optional[Dict[str, Any]]:
+    """Entrada guardada ou None."""
+    return cache.get(key)
+
+
+def put_entry(key: str, entry: Dict[str, Any], timeout: int) -> None:
+    """Guarda a entrada; falhas do backend de cache não afetam a resposta."""
+    try:
+        cache.set(key, entry, timeout=timeout)
+    except Exception as e:
+        logger.warning(f"Falha ao guardar resposta no cache ({key}): {e}")
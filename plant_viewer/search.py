@@ -0,0 +1,205 @@
+"""
+Índice de busca textual de elementos IFC.
+
+O índice é montado na extração de metadados a partir da tabela IfcElement
+e consultado sem abrir o arquivo IFC. O backend depende do banco:
+
+- SQLite: tabela virtual FTS5 (plant_viewer_element_fts) com ranking BM25
+- PostgreSQL: índice GIN sobre tsvector e índice de trigramas (pg_trgm) no nome
+- Outros: busca icontains na tabela IfcElement
+
+A tabela FTS5 e os índices do PostgreSQL são criados pela migração
+0005_ifcelement_search_index.
+"""
+
+import re
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.db import connection
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'plant_viewer_element_fts'
+
+# Expressão indexada no PostgreSQL (deve ser idêntica à do índice GIN da migração 0005)
+PG_SEARCH_VECTOR = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || ifc_type || ' ' || "
+    "coalesce(description, '') || ' ' || global_id || ' ' || coalesce(search_text, ''))"
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize_query(query: str) -> List[str]:
+    """Separa o termo de busca em palavras (sem operadores)."""
+    return _TOKEN_RE.findall(query.lower())
+
+
+class ElementSearchBackend:
+    """Busca por substring (icontains), usada quando não há índice textual."""
+
+    vendor = None
+
+    def rebuild(self, plant_id: int) -> None:
+        """Reindexa os elementos da planta a partir de IfcElement."""
+
+    def remove(self, plant_id: int) -> None:
+        """Remove a planta do índice."""
+
+    def search(self, plant_id: int, query: str, ifc_type: Optional[str] = None,
+               limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Busca elementos da planta.
+
+        Args:
+            plant_id: ID da BuildingPlan
+            query: Termo de busca; cada palavra é tratada como prefixo
+            ifc_type: Filtra por classe IFC (ex: IfcWall)
+            limit: Número máximo de resultados
+
+        Returns:
+            list: Elementos ordenados por relevância
+        """
+        from .models import IfcElement
+
+        condition = Q()
+        for token in tokenize_query(query):
+            condition &= (
+                Q(name__icontains=token) | Q(description__icontains=token) |
+                Q(global_id__icontains=token) | Q(ifc_type__icontains=token) |
+                Q(search_text__icontains=token)
+            )
+        queryset = IfcElement.objects.filter(condition, plant_id=plant_id)
+        if ifc_type:
+            queryset = queryset.filter(ifc_type=ifc_type)
+
+        return [
+            {
+                'id': row['express_id'],
+                'global_id': row['global_id'],
+                'name': row['name'],
+                'type': row['ifc_type'],
+                'description': row['description'],
+                'rank': None,
+            }
+            for row in queryset.order_by('name').values(
+                'express_id', 'global_id', 'name', 'ifc_type', 'description'
+            )[:limit]
+        ]
+
+    @staticmethod
+    def _rows(cursor) -> List[Dict[str, Any]]:
+        return [
+            {
+                'id': express_id,
+                'global_id': global_id,
+                'name': name,
+                'type': ifc_type,
+                'description': description,
+                'rank': round(float(rank), 4),
+            }
+            for express_id, global_id, name, ifc_type, description, rank in cursor.fetchall()
+        ]
+
+
+class SQLiteFTSBackend(ElementSearchBackend):
+    """Índice FTS5 com prefixos e ranking BM25 (nome pesa mais)."""
+
+    vendor = 'sqlite'
+
+    def rebuild(self, plant_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE plant_id = %s", [plant_id])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} "
+                "(name, ifc_type, description, global_id, properties, plant_id, element_id) "
+                "SELECT name, ifc_type, description, global_id, search_text, plant_id, id "
+                "FROM plant_viewer_ifcelement WHERE plant_id = %s",
+                [plant_id]
+            )
+
+    def remove(self, plant_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE plant_id = %s", [plant_id])
+
+    def search(self, plant_id, query, ifc_type=None, limit=50):
+        tokens = tokenize_query(query)
+        if not tokens:
+            return []
+
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        sql = (
+            "SELECT e.express_id, e.global_id, e.name, e.ifc_type, e.description, "
+            f"bm25({FTS_TABLE}, 10.0, 2.0, 1.0, 5.0, 1.0) AS rank "
+            f"FROM {FTS_TABLE} JOIN plant_viewer_ifcelement e ON e.id = {FTS_TABLE}.element_id "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.plant_id = %s"
+        )
+        params = [match, plant_id]
+        if ifc_type:
+            sql += " AND e.ifc_type = %s"
+            params.append(ifc_type)
+        sql += " ORDER BY rank LIMIT %s"
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            results = self._rows(cursor)
+
+        # BM25 do SQLite é negativo (menor = melhor); expor como positivo
+        for row in results:
+            row['rank'] = -row['rank']
+        return results
+
+
+class PostgresSearchBackend(ElementSearchBackend):
+    """Busca por tsvector (prefixos) combinada com similaridade de trigramas no nome."""
+
+    vendor = 'postgresql'
+
+    def search(self, plant_id, query, ifc_type=None, limit=50):
+        tokens = tokenize_query(query)
+        if not tokens:
+            return []
+
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        sql = (
+            "SELECT express_id, global_id, name, ifc_type, description, "
+            f"ts_rank({PG_SEARCH_VECTOR}, to_tsquery('simple', %s)) + similarity(name, %s) AS rank "
+            "FROM plant_viewer_ifcelement "
+            f"WHERE plant_id = %s AND ({PG_SEARCH_VECTOR} @@ to_tsquery('simple', %s) OR name %% %s)"
+        )
+        params = [tsquery, query, plant_id, tsquery, query]
+        if ifc_type:
+            sql += " AND ifc_type = %s"
+            params.append(ifc_type)
+        sql += " ORDER BY rank DESC LIMIT %s"
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return self._rows(cursor)
+
+
+_BACKENDS = {
+    SQLiteFTSBackend.vendor: SQLiteFTSBackend,
+    PostgresSearchBackend.vendor: PostgresSearchBackend,
+}
+
+
+def get_search_backend(vendor: Optional[str] = None) -> ElementSearchBackend:
+    """Retorna o backend de busca adequado ao banco configurado."""
+    return _BACKENDS.get(vendor or connection.vendor, ElementSearchBackend)()
+
+
+def rebuild_search_index(plant_id: int) -> None:
+    """Reindexa os elementos de uma planta."""
+    get_search_backend().rebuild(plant_id)
+    logger.info(f"Índice de busca da planta {plant_id} atualizado")
+
+
+def search_elements(plant_id: int, query: str, ifc_type: Optional[str] = None,
+                    limit: int = 50) -> List[Dict[str, Any]]:
+    """Busca elementos de uma planta no índice textual."""
+    return get_search_backend().search(plant_id, query, ifc_type=ifc_type, limit=limit)
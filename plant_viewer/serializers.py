@@ -2,8 +2,35 @@
 Serializers para API REST do plant_viewer.
 """
 
+from django.urls import reverse
 from rest_framework import serializers
-from .models import BuildingPlan
+from .models import BuildingPlan, ExtractionJob, get_max_upload_mb
+
+
+def get_glb_url(plant, request):
+    """URL absoluta do endpoint do GLB, se a geometria convertida estiver atualizada."""
+    if request and plant.has_current_glb():
+        return request.build_absolute_uri(reverse('plant_viewer:api-plant-glb', args=[plant.pk]))
+    return None
+
+
+def get_glb_lod_urls(plant, request):
+    """URLs dos níveis de detalhe do GLB, do mais grosso ao mais detalhado."""
+    from .lod import LOD_LEVELS, PROXY_LEVEL
+    
+    url = get_glb_url(plant, request)
+    if url is None:
+        return None
+    levels = plant.get_glb_levels()
+    order = [PROXY_LEVEL] + [name for name, _ in reversed(LOD_LEVELS)]
+    return {level: f'{url}?lod={level}' for level in order if level in levels} or None
+
+
+def get_glb_tiles_url(plant, request):
+    """URL absoluta do manifesto de tiles, se a última conversão gerou tiles."""
+    if request and plant.has_current_glb() and plant.get_glb_tiles():
+        return request.build_absolute_uri(reverse('plant_viewer:api-plant-tiles', args=[plant.pk]))
+    return None
 
 
 class BuildingPlanListSerializer(serializers.ModelSerializer):
@@ -14,6 +41,8 @@ class BuildingPlanListSerializer(serializers.ModelSerializer):
     
     file_size = serializers.SerializerMethodField()
     ifc_url = serializers.SerializerMethodField()
+    file_info = serializers.SerializerMethodField()
+    glb_url = serializers.SerializerMethodField()
     
     class Meta:
         model = BuildingPlan
@@ -24,13 +53,19 @@ class BuildingPlanListSerializer(serializers.ModelSerializer):
             'uploaded_at',
             'is_active',
             'file_size',
-            'ifc_url'
+            'ifc_url',
+            'glb_url',
+            'file_info'
         ]
     
     def get_file_size(self, obj):
         """Retorna tamanho do arquivo formatado."""
         return obj.get_file_size()
     
+    def get_file_info(self, obj):
+        """Retorna schema e aplicação de origem lidos do cabeçalho IFC."""
+        return obj.get_file_info()
+    
     def get_ifc_url(self, obj):
         """Retorna URL absoluta do arquivo IFC."""
         if obj.ifc_file:
@@ -38,6 +73,10 @@ class BuildingPlanListSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.ifc_file.url)
         return None
+    
+    def get_glb_url(self, obj):
+        """Retorna URL do GLB convertido (None se não houver)."""
+        return get_glb_url(obj, self.context.get('request'))
 
 
 class BuildingPlanSerializer(serializers.ModelSerializer):
@@ -47,6 +86,9 @@ class BuildingPlanSerializer(serializers.ModelSerializer):
     """
     
     ifc_url = serializers.SerializerMethodField()
+    glb_url = serializers.SerializerMethodField()
+    glb_lod_urls = serializers.SerializerMethodField()
+    glb_tiles_url = serializers.SerializerMethodField()
     file_size = serializers.SerializerMethodField()
     metadata = serializers.SerializerMethodField()
     has_metadata = serializers.SerializerMethodField()
@@ -58,6 +100,10 @@ class BuildingPlanSerializer(serializers.ModelSerializer):
             'name',
             'description',
             'ifc_url',
+            'glb_url',
+            'glb_lod_urls',
+            'glb_tiles_url',
+            'glb_stats',
             'uploaded_at',
             'is_active',
             'file_size',
@@ -65,7 +111,7 @@ class BuildingPlanSerializer(serializers.ModelSerializer):
             'metadata_updated_at',
             'has_metadata'
         ]
-        read_only_fields = ['uploaded_at', 'metadata_updated_at']
+        read_only_fields = ['uploaded_at', 'metadata_updated_at', 'glb_stats']
     
     def get_ifc_url(self, obj):
         """Retorna URL absoluta do arquivo IFC."""
@@ -75,6 +121,18 @@ class BuildingPlanSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.ifc_file.url)
         return None
     
+    def get_glb_url(self, obj):
+        """Retorna URL do GLB convertido (None se não houver)."""
+        return get_glb_url(obj, self.context.get('request'))
+    
+    def get_glb_lod_urls(self, obj):
+        """Retorna URLs dos níveis de detalhe do GLB (proxy → medium)."""
+        return get_glb_lod_urls(obj, self.context.get('request'))
+    
+    def get_glb_tiles_url(self, obj):
+        """Retorna URL do manifesto de tiles da geometria (None se não houver)."""
+        return get_glb_tiles_url(obj, self.context.get('request'))
+    
     def get_file_size(self, obj):
         """Retorna tamanho do arquivo formatado."""
         return obj.get_file_size()
@@ -82,16 +140,52 @@ class BuildingPlanSerializer(serializers.ModelSerializer):
     def get_metadata(self, obj):
         """
         Retorna metadados apenas se solicitado no contexto.
-        Isso evita processamento desnecessário em listagens.
+        Isso evita processamento desnecessário em listagens; plantas ainda
+        sem metadados retornam None (a extração roda em um ExtractionJob).
         """
         include_metadata = self.context.get('include_metadata', False)
-        if include_metadata:
+        if include_metadata and obj.metadata_updated_at is not None:
             return obj.get_metadata()
         return None
     
     def get_has_metadata(self, obj):
         """Indica se a planta tem metadados em cache."""
-        return obj.metadata is not None
+        return obj.metadata_updated_at is not None
+
+
+class ExtractionJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer de um job de extração de metadados (para polling).
+    """
+    
+    progress = serializers.FloatField(read_only=True)
+    url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ExtractionJob
+        fields = [
+            'id',
+            'url',
+            'plant',
+            'status',
+            'reason',
+            'force',
+            'stage',
+            'progress',
+            'completed_stages',
+            'total_stages',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at'
+        ]
+        read_only_fields = fields
+    
+    def get_url(self, obj):
+        """URL absoluta do job, consultada até status succeeded ou failed."""
+        url = reverse('plant_viewer:api-plant-job', args=[obj.plant_id, obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
 
 class BuildingPlanCreateSerializer(serializers.ModelSerializer):
@@ -117,11 +211,11 @@ class BuildingPlanCreateSerializer(serializers.ModelSerializer):
             if not value.name.lower().endswith('.ifc'):
                 raise serializers.ValidationError("O arquivo deve ter extensão .ifc")
             
-            # Verificar tamanho (máximo 100MB)
-            max_size = 100 * 1024 * 1024  # 100MB
-            if value.size > max_size:
+            # Verificar tamanho (IFC_MAX_UPLOAD_MB)
+            max_mb = get_max_upload_mb()
+            if value.size > max_mb * 1024 * 1024:
                 raise serializers.ValidationError(
-                    f"O arquivo é muito grande. Tamanho máximo: 100MB"
+                    f"O arquivo é muito grande. Tamanho máximo: {max_mb}MB"
                 )
         
         return value
@@ -0,0 +1,18 @@
+"""
+Sinais do plant_viewer.
+Mantém caches derivados do arquivo IFC coerentes com o banco.
+"""
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import BuildingPlan
+from .search import get_search_backend
+from .spatial_index import spatial_index_cache
+
+
+@receiver(post_delete, sender=BuildingPlan)
+def invalidate_indexes_on_delete(sender, instance, **kwargs):
+    """Descarta os índices de busca e espacial de plantas removidas."""
+    spatial_index_cache.invalidate(instance.pk)
+    get_search_backend().remove(instance.pk)
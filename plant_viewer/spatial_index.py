@@ -0,0 +1,280 @@
+"""
+Índice espacial (R-tree empacotado STR) sobre as bounding boxes dos elementos.
+
+As bounding boxes são calculadas uma única vez na extração de metadados e
+gravadas em IfcElement. A árvore é montada em arrays NumPy a partir dessas
+colunas e mantida em cache por processo, sem nova passagem de geometria.
+"""
+
+import heapq
+import math
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _box_distance(point: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+    """Distância euclidiana de um ponto a cada caixa (zero se estiver dentro)."""
+    delta = np.maximum(np.maximum(mins - point, point - maxs), 0.0)
+    return np.sqrt((delta * delta).sum(axis=1))
+
+
+class STRTree:
+    """
+    R-tree 3D empacotada pelo algoritmo Sort-Tile-Recursive.
+
+    Cada nível é um par de arrays (mins, maxs); os filhos do nó i do nível
+    superior são as posições [i * node_capacity, (i + 1) * node_capacity)
+    do nível inferior. O nível 0 são as próprias caixas, na ordem do empacotamento.
+    """
+
+    def __init__(self, ids: Sequence[int], mins: np.ndarray, maxs: np.ndarray, node_capacity: int = 16):
+        """
+        Args:
+            ids: Identificadores (express_id) das caixas
+            mins: Array (n, 3) com os cantos mínimos
+            maxs: Array (n, 3) com os cantos máximos
+            node_capacity: Número máximo de filhos por nó
+        """
+        self.node_capacity = node_capacity
+        mins = np.asarray(mins, dtype=np.float64).reshape(-1, 3)
+        maxs = np.asarray(maxs, dtype=np.float64).reshape(-1, 3)
+
+        order = self._str_order((mins + maxs) / 2.0)
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.levels: List[Tuple[np.ndarray, np.ndarray]] = [(mins[order], maxs[order])]
+
+        while len(self.levels[-1][0]) > node_capacity:
+            child_mins, child_maxs = self.levels[-1]
+            starts = np.arange(0, len(child_mins), node_capacity)
+            self.levels.append((
+                np.minimum.reduceat(child_mins, starts, axis=0),
+                np.maximum.reduceat(child_maxs, starts, axis=0),
+            ))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _str_order(self, centers: np.ndarray) -> np.ndarray:
+        """Ordem STR: fatias em X, depois em Y, depois ordenação em Z."""
+        count = len(centers)
+        if count == 0:
+            return np.arange(0)
+
+        leaves = math.ceil(count / self.node_capacity)
+        slices = max(1, math.ceil(leaves ** (1.0 / 3.0)))
+        x_size = slices * slices * self.node_capacity
+        y_size = slices * self.node_capacity
+
+        order = np.argsort(centers[:, 0], kind='stable')
+        result = []
+        for x_start in range(0, count, x_size):
+            x_part = order[x_start:x_start + x_size]
+            x_part = x_part[np.argsort(centers[x_part, 1], kind='stable')]
+            for y_start in range(0, len(x_part), y_size):
+                y_part = x_part[y_start:y_start + y_size]
+                result.append(y_part[np.argsort(centers[y_part, 2], kind='stable')])
+        return np.concatenate(result)
+
+    def _children(self, nodes: np.ndarray, level: int) -> np.ndarray:
+        """Posições no nível level - 1 dos filhos dos nós dados."""
+        size = len(self.levels[level - 1][0])
+        offsets = np.arange(self.node_capacity)
+        children = (nodes[:, None] * self.node_capacity + offsets).ravel()
+        return children[children < size]
+
+    def _search(self, predicate) -> np.ndarray:
+        """Percorre a árvore nível a nível, mantendo os nós que satisfazem predicate."""
+        if not len(self.ids):
+            return np.arange(0)
+
+        top = len(self.levels) - 1
+        mins, maxs = self.levels[top]
+        nodes = np.arange(len(mins))
+        nodes = nodes[predicate(mins, maxs)]
+        for level in range(top, 0, -1):
+            if not len(nodes):
+                break
+            nodes = self._children(nodes, level)
+            mins, maxs = self.levels[level - 1]
+            nodes = nodes[predicate(mins[nodes], maxs[nodes])]
+        return nodes
+
+    def query_box(self, box_min: Sequence[float], box_max: Sequence[float]) -> List[int]:
+        """
+        Elementos cuja bounding box intersecta a caixa dada.
+
+        Returns:
+            list: express_ids encontrados
+        """
+        lo = np.asarray(box_min, dtype=np.float64)
+        hi = np.asarray(box_max, dtype=np.float64)
+        positions = self._search(
+            lambda mins, maxs: np.all((mins <= hi) & (maxs >= lo), axis=1)
+        )
+        return self.ids[positions].tolist()
+
+    def query_point(self, point: Sequence[float]) -> List[int]:
+        """Elementos cuja bounding box contém o ponto."""
+        return self.query_box(point, point)
+
+    def query_radius(self, point: Sequence[float], radius: float) -> List[Tuple[int, float]]:
+        """
+        Elementos a até radius metros do ponto (distância à bounding box).
+
+        Returns:
+            list: (express_id, distância) ordenados pela distância
+        """
+        p = np.asarray(point, dtype=np.float64)
+        positions = self._search(
+            lambda mins, maxs: _box_distance(p, mins, maxs) <= radius
+        )
+        if not len(positions):
+            return []
+        mins, maxs = self.levels[0]
+        distances = _box_distance(p, mins[positions], maxs[positions])
+        ranking = np.argsort(distances, kind='stable')
+        return [(int(self.ids[positions[i]]), float(distances[i])) for i in ranking]
+
+    def nearest(self, point: Sequence[float], k: int = 1,
+                max_distance: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Os k elementos mais próximos do ponto (busca best-first).
+
+        Args:
+            point: Coordenadas (x, y, z)
+            k: Número de vizinhos
+            max_distance: Ignora elementos além desta distância
+
+        Returns:
+            list: (express_id, distância) ordenados pela distância
+        """
+        if not len(self.ids) or k <= 0:
+            return []
+
+        p = np.asarray(point, dtype=np.float64)
+        limit = math.inf if max_distance is None else max_distance
+        top = len(self.levels) - 1
+        mins, maxs = self.levels[top]
+
+        # Entradas do heap: (distância, nível, posição); nível 0 são elementos
+        heap = [
+            (float(d), top, int(i))
+            for i, d in enumerate(_box_distance(p, mins, maxs)) if d <= limit
+        ]
+        heapq.heapify(heap)
+
+        results = []
+        while heap and len(results) < k:
+            distance, level, position = heapq.heappop(heap)
+            if level == 0:
+                results.append((int(self.ids[position]), distance))
+                continue
+            children = self._children(np.array([position]), level)
+            child_mins, child_maxs = self.levels[level - 1]
+            distances = _box_distance(p, child_mins[children], child_maxs[children])
+            for child, child_distance in zip(children.tolist(), distances.tolist()):
+                if child_distance <= limit:
+                    heapq.heappush(heap, (child_distance, level - 1, child))
+        return results
+
+
+class SpatialIndexCache:
+    """
+    Árvores STR por planta, em cache LRU por processo.
+
+    A chave inclui metadata_updated_at: uma nova extração de metadados
+    gera automaticamente uma nova árvore.
+    """
+
+    def __init__(self, max_plants: int):
+        self.max_plants = max_plants
+        self._trees: 'OrderedDict[int, Tuple[Any, STRTree]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, plant) -> STRTree:
+        """
+        Retorna a árvore da planta, montando-a a partir de IfcElement se necessário.
+
+        Args:
+            plant: BuildingPlan com metadados já extraídos
+        """
+        version = plant.metadata_updated_at
+        with self._lock:
+            entry = self._trees.get(plant.pk)
+            if entry is not None and entry[0] == version:
+                self._trees.move_to_end(plant.pk)
+                return entry[1]
+
+        tree = build_tree(plant)
+
+        with self._lock:
+            self._trees[plant.pk] = (version, tree)
+            self._trees.move_to_end(plant.pk)
+            while len(self._trees) > self.max_plants:
+                self._trees.popitem(last=False)
+        return tree
+
+    def invalidate(self, plant_id: int) -> None:
+        """Descarta a árvore da planta."""
+        with self._lock:
+            self._trees.pop(plant_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._trees.clear()
+
+
+def build_tree(plant) -> STRTree:
+    """
+    Monta a árvore STR com as bounding boxes gravadas em IfcElement.
+
+    Returns:
+        STRTree: Árvore com os elementos que possuem geometria
+    """
+    from .models import IfcElement
+
+    rows = np.array(
+        IfcElement.objects.filter(plant=plant, bbox_min_x__isnull=False).values_list(
+            'express_id', 'bbox_min_x', 'bbox_min_y', 'bbox_min_z',
+            'bbox_max_x', 'bbox_max_y', 'bbox_max_z'
+        ),
+        dtype=np.float64,
+    ).reshape(-1, 7)
+
+    tree = STRTree(rows[:, 0].astype(np.int64), rows[:, 1:4], rows[:, 4:7])
+    logger.info(f"Índice espacial da planta {plant.pk} montado: {len(tree)} elementos")
+    return tree
+
+
+spatial_index_cache = SpatialIndexCache(
+    max_plants=getattr(settings, 'IFC_SPATIAL_INDEX_MAX_PLANTS', 32),
+)
+
+
+def get_spatial_index(plant) -> STRTree:
+    """Árvore STR da planta (extraindo os metadados se ainda não houver)."""
+    if plant.metadata_updated_at is None:
+        plant.extract_metadata()
+    return spatial_index_cache.get(plant)
+
+
+def elements_by_id(plant, express_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+    """Linhas de IfcElement resumidas, indexadas pelo express_id."""
+    return {
+        element.express_id: {
+            'id': element.express_id,
+            'global_id': element.global_id,
+            'name': element.name,
+            'type': element.ifc_type,
+            'storey': element.storey,
+            'bbox': element.bbox,
+        }
+        for element in plant.ifc_elements.filter(express_id__in=list(express_ids))
+    }
@@ -0,0 +1,264 @@
+"""
+Leitura rápida de arquivos ISO-10303-21 (STEP) sem interpretar o modelo IFC.
+
+O arquivo é mapeado em memória (mmap) e percorrido com expressões regulares
+em C: o cabeçalho (FILE_SCHEMA, FILE_NAME), a contagem de entidades por
+tipo e o hash do conteúdo são obtidos em uma única passagem, com memória
+constante, sem chamar ifcopenshell.open().
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+STEP_MAGIC = b'ISO-10303-21'
+
+# Bytes lidos do início do arquivo para localizar o cabeçalho
+HEADER_SCAN_BYTES = 256 * 1024
+
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+_HEADER_RE = re.compile(rb'\bHEADER\s*;(.*?)\bENDSEC\s*;', re.S)
+_DATA_RE = re.compile(rb'\bENDSEC\s*;\s*(?:/\*.*?\*/\s*)*DATA\b', re.S)
+_HEADER_ENTITY_RE = re.compile(rb'\b(FILE_DESCRIPTION|FILE_NAME|FILE_SCHEMA)\s*\(', re.S)
+# Instância no início de uma linha ou logo após o ';' da anterior
+_ENTITY_RE = re.compile(rb'(?:^|;)[ \t\r\n]*#\d+[ \t\r\n]*=[ \t\r\n]*([A-Za-z0-9_]+)[ \t\r\n]*\(', re.M)
+_STRING_ESCAPE_RE = re.compile(r"\\X2\\((?:[0-9A-Fa-f]{4})+)\\X0\\|\\X\\([0-9A-Fa-f]{2})|\\S\\(.)")
+
+
+class StepFormatError(ValueError):
+    """Conteúdo que não é um arquivo ISO-10303-21 válido."""
+
+
+def decode_step_string(value: str) -> str:
+    """Decodifica os escapes \\X2\\...\\X0\\, \\X\\hh e \\S\\c de strings STEP."""
+    def replace(match):
+        if match.group(1):
+            data = bytes.fromhex(match.group(1))
+            return data.decode('utf-16-be', errors='replace')
+        if match.group(2):
+            return bytes.fromhex(match.group(2)).decode('latin-1')
+        return chr(ord(match.group(3)) + 128)
+
+    return _STRING_ESCAPE_RE.sub(replace, value.replace("''", "'"))
+
+
+def parse_step_parameters(text: str, start: int = 0):
+    """
+    Interpreta a lista de parâmetros de uma entidade de cabeçalho.
+
+    Args:
+        text: Texto começando em '(' na posição start
+
+    Returns:
+        tuple: (lista aninhada de strings/None, posição após o ')' final)
+    """
+    stack: List[List] = []
+    current: Optional[List] = None
+    position = start
+    length = len(text)
+
+    while position < length:
+        char = text[position]
+        if char == '(':
+            new = []
+            if current is not None:
+                current.append(new)
+                stack.append(current)
+            current = new
+        elif char == ')':
+            if not stack:
+                return current, position + 1
+            current = stack.pop()
+        elif char == "'":
+            end = position + 1
+            while True:
+                end = text.find("'", end)
+                if end == -1:
+                    raise StepFormatError('String não terminada no cabeçalho STEP')
+                if text[end + 1:end + 2] == "'":
+                    end += 2
+                    continue
+                break
+            current.append(decode_step_string(text[position + 1:end]))
+            position = end
+        elif char in '$*':
+            current.append(None)
+        position += 1
+
+    raise StepFormatError('Parâmetros não terminados no cabeçalho STEP')
+
+
+def _first(values) -> Optional[str]:
+    while isinstance(values, list):
+        values = values[0] if values else None
+    return values
+
+
+def _strings(values) -> List[str]:
+    if not isinstance(values, list):
+        return [values] if values else []
+    return [v for v in values if isinstance(v, str) and v]
+
+
+class StepScanResult:
+    """Resultado da leitura de um arquivo STEP."""
+
+    def __init__(self):
+        self.schema: Optional[str] = None
+        self.schemas: List[str] = []
+        self.file_name: Dict[str, Any] = {}
+        self.description: List[str] = []
+        self.has_data_section = False
+        self.entity_counts: Dict[str, int] = {}
+        self.content_hash: Optional[str] = None
+        self.size = 0
+
+    @property
+    def application(self) -> Optional[str]:
+        """Sistema de origem (originating_system ou preprocessor_version)."""
+        return self.file_name.get('originating_system') or self.file_name.get('preprocessor_version')
+
+    @property
+    def total_entities(self) -> int:
+        return sum(self.entity_counts.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'schema': self.schema,
+            'file_name': self.file_name,
+            'description': self.description,
+            'application': self.application,
+            'size': self.size,
+            'total_entities': self.total_entities,
+            'entity_counts': self.entity_counts,
+            'content_hash': self.content_hash,
+        }
+
+    def _read_header(self, header: bytes) -> None:
+        text = header.decode('latin-1')
+        for match in _HEADER_ENTITY_RE.finditer(header):
+            name = match.group(1).decode()
+            params, _ = parse_step_parameters(text, match.end() - 1)
+            params = params or []
+            if name == 'FILE_SCHEMA':
+                self.schemas = _strings(params[0] if params else None)
+                self.schema = self.schemas[0].upper() if self.schemas else None
+            elif name == 'FILE_NAME':
+                keys = ('name', 'time_stamp', 'author', 'organization',
+                        'preprocessor_version', 'originating_system', 'authorization')
+                for key, value in zip(keys, params):
+                    if key in ('author', 'organization'):
+                        self.file_name[key] = _strings(value)
+                    else:
+                        self.file_name[key] = _first(value)
+            elif name == 'FILE_DESCRIPTION':
+                self.description = _strings(params[0] if params else None)
+
+
+def _scan_buffer(buffer, full: bool) -> StepScanResult:
+    result = StepScanResult()
+    result.size = len(buffer)
+
+    head = buffer[:HEADER_SCAN_BYTES]
+    if not bytes(head[:64]).lstrip(b'\xef\xbb\xbf \t\r\n').startswith(STEP_MAGIC):
+        raise StepFormatError('Arquivo não é um arquivo IFC válido. Deve começar com ISO-10303-21.')
+
+    header = _HEADER_RE.search(head)
+    if header is None:
+        raise StepFormatError('Arquivo IFC inválido: seção HEADER não encontrada.')
+    result._read_header(header.group(1))
+    result.has_data_section = _DATA_RE.search(head, header.start()) is not None
+
+    if not full:
+        return result
+
+    result.entity_counts = dict(
+        Counter(m.group(1).decode('ascii').upper() for m in _ENTITY_RE.finditer(buffer, header.end()))
+    )
+
+    result.content_hash = _hash_buffer(buffer)
+    return result
+
+
+def _hash_buffer(buffer) -> str:
+    digest = hashlib.sha256()
+    view = memoryview(buffer)
+    try:
+        for offset in range(0, len(buffer), HASH_CHUNK_BYTES):
+            digest.update(view[offset:offset + HASH_CHUNK_BYTES])
+    finally:
+        view.release()
+    return digest.hexdigest()
+
+
+def _scan_path(path: str, full: bool) -> StepScanResult:
+    if os.path.getsize(path) == 0:
+        raise StepFormatError('Arquivo IFC vazio.')
+    with open(path, 'rb') as handle:
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _scan_buffer(buffer, full)
+
+
+def scan_step(source: Union[str, bytes, Any], full: bool = True) -> StepScanResult:
+    """
+    Lê cabeçalho, contagem de entidades e hash de um arquivo STEP.
+
+    Args:
+        source: Caminho, bytes ou arquivo (UploadedFile, FieldFile)
+        full: Se False, lê apenas o cabeçalho (sem contagem nem hash)
+
+    Returns:
+        StepScanResult
+
+    Raises:
+        StepFormatError: Se o conteúdo não for ISO-10303-21
+        OSError: Se o arquivo não puder ser lido
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return _scan_buffer(source, full)
+    if isinstance(source, (str, os.PathLike)):
+        return _scan_path(os.fspath(source), full)
+
+    # Uploads grandes ficam em arquivo temporário; arquivos salvos têm caminho
+    if hasattr(source, 'temporary_file_path'):
+        return _scan_path(source.temporary_file_path(), full)
+    path = getattr(source, 'path', None)
+    if isinstance(path, str) and os.path.exists(path):
+        return _scan_path(path, full)
+
+    # Uploads pequenos (InMemoryUploadedFile) já estão em memória
+    source.seek(0)
+    try:
+        if full:
+            return _scan_buffer(source.read(), full)
+        return _scan_buffer(source.read(HEADER_SCAN_BYTES), full)
+    finally:
+        source.seek(0)
+
+
+def scan_step_header(source: Union[str, bytes, Any]) -> StepScanResult:
+    """Lê apenas o cabeçalho (schema, aplicação) de um arquivo STEP."""
+    return scan_step(source, full=False)
+
+
+def hash_step_file(path: str) -> str:
+    """
+    SHA-256 do conteúdo de um arquivo (o mesmo de StepScanResult.content_hash).
+
+    Lê o arquivo mapeado em memória, sem a contagem de entidades do scan_step.
+
+    Raises:
+        OSError: Se o arquivo não puder ser lido
+    """
+    if os.path.getsize(path) == 0:
+        return hashlib.sha256().hexdigest()
+    with open(path, 'rb') as handle:
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _hash_buffer(buffer)
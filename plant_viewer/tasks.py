@@ -10,59 +10,289 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def extraction_workflow(plant_id, content_hash='', lock_token=None, job_id=None):
+    """
+    Fluxo Celery da extração de metadados em etapas (fan-out/fan-in).
+    
+    index → [properties | geometry | spatial_structure] → finish
+    
+    Cada etapa grava o seu resultado em StagedExtractionPart, nas linhas
+    do job do fluxo; as etapas independentes rodam em paralelo (group) em
+    qualquer worker livre e o chord publica tudo de uma vez, com o índice
+    de busca e o relatório. Se uma etapa falhar de vez, o job é marcado
+    como falho, o resultado parcial é descartado e a versão anterior dos
+    metadados continua servida. O lock só é liberado pela conclusão ou
+    pelo callback de erro (abort_metadata_extraction), que o Celery chama
+    depois que todas as etapas do chord terminaram: nenhum fluxo novo da
+    planta começa enquanto etapas do anterior ainda rodam. O tempo de cada
+    etapa fica na seção extraction dos metadados.
+    
+    Args:
+        plant_id: ID da BuildingPlan
+        content_hash: Hash do arquivo no agendamento, gravado na conclusão
+        lock_token: Token do lock de extração, liberado ao final do fluxo
+        job_id: ExtractionJob atualizado a cada etapa
+        
+    Returns:
+        celery.canvas.Signature: Fluxo a ser disparado com apply_async()
+    """
+    from celery import chain, chord, group
+    from .extraction import PARALLEL_STAGES
+    
+    abort = abort_metadata_extraction.si(plant_id, lock_token, job_id)
+    return chain(
+        run_extraction_stage.si(plant_id, 'index', lock_token, job_id).on_error(abort),
+        chord(
+            group(run_extraction_stage.si(plant_id, stage, lock_token, job_id) for stage in PARALLEL_STAGES),
+            finish_metadata_extraction.s(
+                plant_id, timezone.now().isoformat(), content_hash, lock_token, job_id
+            ).on_error(abort),
+        ),
+    )
+
+
+def _prepare_extraction(plant, force=False, reason='', section=None):
+    """
+    Verifica impressão digital e lock e cria o job de um novo fluxo.
+    
+    Returns:
+        tuple: (status, job, fluxo, token do lock); fluxo e token só com
+               status 'scheduled', job também com 'locked' (job em andamento)
+    """
+    from .locks import acquire_extraction_lock
+    from .models import ExtractionJob
+    
+    content_hash = plant.get_content_hash()
+    if content_hash is None:
+        return 'error', None, None, None
+    if not force and plant.is_metadata_current(content_hash, section):
+        logger.info(f"Planta {plant.id}: arquivo IFC inalterado, extração ignorada")
+        return 'unchanged', None, None, None
+    
+    lock_token = acquire_extraction_lock(plant.id)
+    if lock_token is None:
+        logger.info(f"Planta {plant.id}: extração já em andamento")
+        return 'locked', ExtractionJob.active_for(plant), None, None
+    
+    job = ExtractionJob.create_for(plant, reason=reason, force=force)
+    workflow = extraction_workflow(plant.id, content_hash, lock_token, str(job.id))
+    return 'scheduled', job, workflow, lock_token
+
+
+def _abort_scheduling(plant_id, job, lock_token, error):
+    """Desfaz lock e job de um fluxo que não pôde ser enviado ao broker."""
+    from .locks import release_extraction_lock
+    from .models import ExtractionJob
+    
+    release_extraction_lock(plant_id, lock_token)
+    ExtractionJob.failed(job.pk, error)
+
+
+def schedule_extraction(plant, force=False, reason='', section=None):
+    """
+    Agenda o fluxo de extração de uma planta, no máximo um por vez.
+    
+    A impressão digital do arquivo é comparada com a da última extração
+    (sem reprocessar arquivos que não mudaram) e o lock distribuído da
+    planta impede que workers concorrentes ou execuções sobrepostas do
+    Beat agendem o mesmo arquivo duas vezes. Cada fluxo agendado tem um
+    ExtractionJob, acompanhado pela API e pelo WebSocket da planta.
+    
+    Args:
+        plant: BuildingPlan
+        force: Se True, reextrai mesmo com o arquivo inalterado
+        reason: Origem do pedido, gravada no job (refresh, metadata_miss, pending...)
+        section: Seção esperada nos metadados; sem ela, o arquivo inalterado
+                 não impede a extração (metadados de uma versão anterior)
+        
+    Returns:
+        dict: status ('scheduled', 'unchanged', 'locked' ou 'error'), o ID
+              do job (agendado ou já em andamento) e, quando agendado, o
+              ID do fluxo
+    """
+    from .models import ExtractionJob
+    
+    status, job, workflow, lock_token = _prepare_extraction(plant, force=force, reason=reason, section=section)
+    if status == 'error':
+        return {'status': 'error', 'error': 'IFC file not readable'}
+    result = {'status': status, 'job_id': str(job.pk) if job is not None else None}
+    if workflow is None:
+        return result
+    
+    try:
+        result['workflow_id'] = workflow.apply_async().id
+    except Exception as e:
+        _abort_scheduling(plant.id, job, lock_token, e)
+        raise
+    ExtractionJob.objects.filter(pk=job.pk).update(workflow_id=result['workflow_id'])
+    return result
+
+
+class ExtractionLockLost(Exception):
+    """O lock de extração da planta passou para outro fluxo."""
+
+
+def _renew_lock_or_fail(plant_id, stage, lock_token, job_id):
+    """
+    Renova o lock do fluxo no início de uma etapa.
+    
+    Retries com espera podem estender o fluxo além da validade do lock;
+    renovado a cada etapa, ele só vence se o worker parar. Se outro fluxo
+    já tiver adquirido o lock, o job falha sem retry.
+    
+    Raises:
+        ExtractionLockLost: Se o lock pertence a outro fluxo
+    """
+    from .locks import renew_extraction_lock
+    from .models import ExtractionJob
+    
+    if lock_token is None or renew_extraction_lock(plant_id, lock_token):
+        return
+    error = f"Etapa '{stage}': lock de extração da planta {plant_id} adquirido por outro fluxo"
+    logger.error(error)
+    ExtractionJob.failed(job_id, error, active_only=True)
+    raise ExtractionLockLost(error)
+
+
 @shared_task(bind=True, max_retries=3)
-def process_ifc_metadata(self, plant_id):
+def run_extraction_stage(self, plant_id, stage, lock_token=None, job_id=None):
     """
-    Processa metadados de um arquivo IFC de forma assíncrona.
+    Executa uma etapa da extração de metadados (ver BuildingPlan.run_extraction_stage).
     
     Args:
-        plant_id: ID da BuildingPlan a processar
+        plant_id: ID da BuildingPlan
+        stage: Nome da etapa (extraction.EXTRACTION_STAGES)
+        lock_token: Token do lock de extração do fluxo
+        job_id: ExtractionJob do fluxo
+        
+    Returns:
+        dict: Etapa, planta e tempo em ms
+    """
+    from .models import BuildingPlan, ExtractionJob, StagedExtractionPart
+    from .notifications import ProgressReporter
+    
+    _renew_lock_or_fail(plant_id, stage, lock_token, job_id)
+    ExtractionJob.stage_started(job_id, stage)
+    try:
+        plant = BuildingPlan.objects.get(id=plant_id)
+        report = plant.run_extraction_stage(
+            stage, progress=ProgressReporter(plant_id, stage, job_id), job_id=job_id
+        )
+    except BuildingPlan.DoesNotExist:
+        logger.error(f"Planta {plant_id} não encontrada")
+        ExtractionJob.failed(job_id, f'Planta {plant_id} não encontrada')
+        raise
+    except Exception as e:
+        logger.error(f"Erro na etapa '{stage}' da extração da planta {plant_id}: {e}")
+        # Retry em caso de erro; esgotadas as tentativas o chord falha e o
+        # callback de erro libera o lock depois que as etapas irmãs terminarem
+        if self.request.retries >= self.max_retries:
+            ExtractionJob.failed(job_id, f"Etapa '{stage}': {e}")
+            StagedExtractionPart.clear(plant_id, job_id)
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+    
+    ExtractionJob.stage_finished(job_id, stage)
+    return {'plant_id': plant_id, 'stage': stage, 'time_ms': report['wall_time_ms']}
+
+
+@shared_task
+def finish_metadata_extraction(stage_results, plant_id, started_at, content_hash='', lock_token=None, job_id=None):
+    """
+    Conclusão (fan-in) da extração em etapas.
+    
+    Args:
+        stage_results: Resultados das etapas paralelas
+        plant_id: ID da BuildingPlan
+        started_at: Início do fluxo (ISO 8601)
+        content_hash: Hash do arquivo no agendamento
+        lock_token: Token do lock de extração da planta
+        job_id: ExtractionJob do fluxo
         
     Returns:
         dict: Status do processamento
     """
-    from .models import BuildingPlan
+    from .locks import release_extraction_lock
+    from .models import BuildingPlan, ExtractionJob, StagedExtractionPart
     
+    _renew_lock_or_fail(plant_id, 'finish', lock_token, job_id)
+    ExtractionJob.stage_started(job_id, 'finish')
     try:
         plant = BuildingPlan.objects.get(id=plant_id)
-        logger.info(f"Iniciando processamento de metadados IFC para planta {plant_id}")
+        summary = plant.finish_staged_extraction(started_at, content_hash, job_id)
+    except Exception as e:
+        # O lock é liberado pelo callback de erro (abort_metadata_extraction)
+        StagedExtractionPart.clear(plant_id, job_id)
+        ExtractionJob.failed(job_id, e)
+        raise
+    release_extraction_lock(plant_id, lock_token)
+    ExtractionJob.succeeded(job_id)
+    return {
+        'status': 'success',
+        'plant_id': plant_id,
+        'stages': {result['stage']: result['time_ms'] for result in stage_results},
+        'total_time_ms': summary['total_time_ms'],
+        'processed_at': timezone.now().isoformat()
+    }
+
+
+@shared_task
+def abort_metadata_extraction(plant_id, lock_token=None, job_id=None):
+    """
+    Callback de erro do fluxo de extração.
+    
+    Chamado pelo Celery quando o index ou a conclusão falham de vez, ou
+    quando uma etapa paralela falhou e todas as do chord já terminaram.
+    Marca o job como falho (se ainda ativo), descarta as linhas gravadas
+    pelo fluxo e libera o lock.
+    
+    Args:
+        plant_id: ID da BuildingPlan
+        lock_token: Token do lock de extração do fluxo
+        job_id: ExtractionJob do fluxo
         
-        # Extrair metadados
-        metadata = plant.extract_metadata(force_update=True)
+    Returns:
+        dict: Planta, job e se o lock foi liberado
+    """
+    from .locks import release_extraction_lock
+    from .models import ExtractionJob, StagedExtractionPart
+    
+    ExtractionJob.failed(job_id, 'Fluxo de extração interrompido', active_only=True)
+    if job_id:
+        StagedExtractionPart.clear(plant_id, job_id)
+    released = release_extraction_lock(plant_id, lock_token)
+    logger.warning(f"Fluxo de extração da planta {plant_id} interrompido (job {job_id})")
+    return {'plant_id': plant_id, 'job_id': job_id, 'released': released}
+
+
+@shared_task
+def process_ifc_metadata(plant_id, force=False, reason='task'):
+    """
+    Processa metadados de um arquivo IFC de forma assíncrona.
+    
+    Dispara o fluxo em etapas (extraction_workflow) via schedule_extraction;
+    as etapas são tarefas próprias, com retry individual.
+    
+    Args:
+        plant_id: ID da BuildingPlan a processar
+        force: Se True, reextrai mesmo com o arquivo inalterado
+        reason: Origem do pedido, gravada no ExtractionJob
         
-        if metadata:
-            logger.info(f"Metadados extraídos com sucesso para planta {plant_id}")
-            return {
-                'status': 'success',
-                'plant_id': plant_id,
-                'metadata_size': len(str(metadata)),
-                'processed_at': timezone.now().isoformat()
-            }
-        else:
-            logger.error(f"Falha ao extrair metadados para planta {plant_id}")
-            return {
-                'status': 'failed',
-                'plant_id': plant_id,
-                'error': 'Failed to extract metadata'
-            }
-            
+    Returns:
+        dict: Status do agendamento
+    """
+    from .models import BuildingPlan
+    
+    try:
+        plant = BuildingPlan.objects.get(id=plant_id)
     except BuildingPlan.DoesNotExist:
         logger.error(f"Planta {plant_id} não encontrada")
         return {
             'status': 'error',
             'error': 'BuildingPlan not found'
         }
-    except Exception as e:
-        logger.error(f"Erro ao processar metadados IFC para planta {plant_id}: {e}")
-        # Retry em caso de erro
-        try:
-            self.retry(countdown=60 * (self.request.retries + 1))
-        except self.MaxRetriesExceededError:
-            return {
-                'status': 'error',
-                'error': str(e),
-                'max_retries_exceeded': True
-            }
+    
+    logger.info(f"Iniciando processamento de metadados IFC para planta {plant_id}")
+    return {'plant_id': plant_id, **schedule_extraction(plant, force=force, reason=reason)}
 
 
 @shared_task
@@ -70,8 +300,15 @@ def process_pending_ifc_files():
     """
     Processa arquivos IFC que ainda não têm metadados extraídos.
     Executado periodicamente pelo Celery Beat.
+    
+    Antes de agendar, o cabeçalho de cada arquivo é lido (sem carregar o
+    modelo): arquivos ausentes ou que não são ISO-10303-21 são ignorados
+    em vez de gerar tarefas que falhariam e seriam repetidas. Metadados
+    antigos de arquivos com a mesma impressão digital não são reextraídos,
+    e plantas com extração em andamento (lock) não são agendadas de novo.
     """
     from .models import BuildingPlan
+    from .step_scanner import StepFormatError, scan_step_header
     from django.db.models import Q
     from datetime import timedelta
     
@@ -82,56 +319,98 @@ def process_pending_ifc_files():
         is_active=True,
         ifc_file__isnull=False
     ).filter(
-        Q(metadata__isnull=True) | 
+        Q(metadata_updated_at__isnull=True) | 
         Q(metadata_updated_at__lt=threshold)
-    )
+    ).only('id', 'ifc_file', 'metadata_updated_at', 'content_hash')
     
-    count = 0
+    counts = {'scheduled': 0, 'unchanged': 0, 'locked': 0}
+    skipped = 0
     for plant in pending_plants:
-        # Agendar processamento assíncrono
-        process_ifc_metadata.delay(plant.id)
-        count += 1
+        try:
+            header = scan_step_header(plant.ifc_file.path)
+        except (StepFormatError, OSError, ValueError) as e:
+            logger.warning(f"Planta {plant.id} ignorada: arquivo IFC inválido ou ausente ({e})")
+            skipped += 1
+            continue
+        
+        if not header.has_data_section:
+            logger.warning(f"Planta {plant.id} ignorada: arquivo IFC sem seção DATA")
+            skipped += 1
+            continue
+        
+        status = schedule_extraction(plant, reason='pending')['status']
+        if status in counts:
+            counts[status] += 1
+        else:
+            skipped += 1
     
-    logger.info(f"Agendado processamento de {count} arquivos IFC")
+    logger.info(
+        f"Agendado processamento de {counts['scheduled']} arquivos IFC "
+        f"({counts['unchanged']} inalterados, {counts['locked']} em andamento, {skipped} ignorados)"
+    )
     return {
         'status': 'success',
-        'scheduled_count': count
+        'scheduled_count': counts['scheduled'],
+        'unchanged_count': counts['unchanged'],
+        'locked_count': counts['locked'],
+        'skipped_count': skipped
     }
 
 
 @shared_task
-def bulk_process_ifc_files(plant_ids):
+def bulk_process_ifc_files(plant_ids, force=False):
     """
     Processa múltiplos arquivos IFC em batch.
     
+    Os fluxos das plantas são disparados juntos (group), então as etapas
+    de todas as plantas se distribuem por todo o pool de workers. Plantas
+    com arquivo inalterado ou extração em andamento ficam de fora.
+    
     Args:
         plant_ids: Lista de IDs de BuildingPlan
+        force: Se True, reextrai mesmo os arquivos inalterados
         
     Returns:
-        dict: Status do processamento em batch
+        dict: Status do agendamento em batch
     """
+    from celery import group
     from .models import BuildingPlan
     
-    results = []
+    plants = BuildingPlan.objects.in_bulk(plant_ids)
+    missing = [plant_id for plant_id in plant_ids if plant_id not in plants]
+    for plant_id in missing:
+        logger.error(f"Planta {plant_id} não encontrada")
+    
+    scheduled, unchanged, locked, workflows = [], [], [], []
     for plant_id in plant_ids:
-        try:
-            plant = BuildingPlan.objects.get(id=plant_id)
-            metadata = plant.extract_metadata(force_update=True)
-            results.append({
-                'plant_id': plant_id,
-                'status': 'success' if metadata else 'failed'
-            })
-        except Exception as e:
-            logger.error(f"Erro ao processar planta {plant_id}: {e}")
-            results.append({
-                'plant_id': plant_id,
-                'status': 'error',
-                'error': str(e)
-            })
+        plant = plants.get(plant_id)
+        if plant is None:
+            continue
+        status, job, workflow, lock_token = _prepare_extraction(plant, force=force, reason='bulk')
+        if status == 'error':
+            missing.append(plant_id)
+        elif status == 'unchanged':
+            unchanged.append(plant_id)
+        elif status == 'locked':
+            locked.append(plant_id)
+        else:
+            scheduled.append((plant_id, job, lock_token))
+            workflows.append(workflow)
+    
+    try:
+        result = group(workflows).apply_async() if workflows else None
+    except Exception as e:
+        for plant_id, job, lock_token in scheduled:
+            _abort_scheduling(plant_id, job, lock_token, e)
+        raise
     
     return {
         'total': len(plant_ids),
-        'results': results,
+        'scheduled': [plant_id for plant_id, _, _ in scheduled],
+        'jobs': {plant_id: str(job.pk) for plant_id, job, _ in scheduled},
+        'unchanged': unchanged,
+        'locked': locked,
+        'missing': missing,
+        'group_id': result.id if result is not None else None,
         'processed_at': timezone.now().isoformat()
     }
-
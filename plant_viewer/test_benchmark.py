@@ -0,0 +1,148 @@
+"""
+Testes para o gerador de modelos sintéticos e o benchmark do processamento IFC.
+"""
+
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from plant_viewer import benchmark
+from plant_viewer.ifc_processor import IFCProcessor
+
+
+class SyntheticModelTests(SimpleTestCase):
+    """Contagens do modelo gerado."""
+
+    def test_counts(self):
+        model = benchmark.build_synthetic_model(
+            40, storeys=2, spaces_per_storey=3, mapped_ratio=0.25, psets_per_element=2, properties_per_pset=3
+        )
+        element_classes = [ifc_class for ifc_class, _ in benchmark.ELEMENT_CLASSES]
+        elements = [e for e in model.by_type('IfcProduct') if e.is_a() in element_classes]
+        self.assertEqual(len(elements), 40)
+        self.assertEqual(len(model.by_type('IfcBuildingStorey')), 2)
+        self.assertEqual(len(model.by_type('IfcSpace')), 6)
+        self.assertEqual(len(model.by_type('IfcPropertySet')), 80)
+        self.assertEqual(len(model.by_type('IfcPropertySingleValue')), 240)
+
+        mapped = [
+            e for e in elements
+            if e.Representation.Representations[0].RepresentationType == 'MappedRepresentation'
+        ]
+        self.assertEqual(len(mapped), 10)
+        # Uma representação compartilhada por classe
+        self.assertEqual(len(model.by_type('IfcRepresentationMap')), len(benchmark.ELEMENT_CLASSES))
+
+    def test_processor_reads_model(self):
+        model = benchmark.build_synthetic_model(16, storeys=2, spaces_per_storey=1, mapped_ratio=0.5)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sintetico.ifc')
+            model.write(path)
+            processor = IFCProcessor(path)
+            self.assertTrue(processor.open())
+
+            storeys = processor.get_storey_map()
+            self.assertEqual(len({storey.id() for storey in storeys.values()}), 2)
+            self.assertEqual(processor.get_statistics()['total_with_geometry'], 18)
+            self.assertEqual(len(processor.get_property_sets()), 16)
+            self.assertEqual(set(processor.get_materials().values()), {f'Material {i}' for i in range(8)})
+
+            # Grade em milímetros: elementos a 2 m, andares a 3 m
+            bounds = processor.get_bounds()
+            self.assertAlmostEqual(bounds['max']['z'], 6.0, places=2)
+
+
+class BenchmarkRunTests(SimpleTestCase):
+    """Medições e comparação com o baseline."""
+
+    def test_run_benchmark(self):
+        report = benchmark.run_benchmark(
+            [24], methods=['open', 'get_statistics', 'get_geometry', 'extract_metadata'],
+            model_options={'storeys': 1},
+        )
+        result = report['sizes']['24']
+        self.assertEqual(result['elements'], 24)
+        self.assertEqual(set(result['methods']), {'open', 'get_statistics', 'get_geometry', 'extract_metadata'})
+        for measurement in result['methods'].values():
+            self.assertGreaterEqual(measurement['time_s'], 0)
+            self.assertGreater(measurement['peak_rss_mb'], 0)
+        self.assertEqual(report['environment']['ifcopenshell'], benchmark.ifcopenshell.version)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            benchmark.run_benchmark([8], methods=['get_statistics', 'inexistente'])
+
+    def test_compare_with_baseline(self):
+        def report(time_s, delta_mb):
+            return {'sizes': {'1000': {'methods': {
+                'get_statistics': {'time_s': time_s, 'peak_rss_mb': 200.0, 'peak_delta_mb': delta_mb},
+            }}}}
+
+        baseline = report(1.0, 100.0)
+        rows = {
+            row['metric']: row
+            for row in benchmark.compare_with_baseline(report(1.5, 50.0), baseline, tolerance=0.25)
+        }
+        self.assertEqual(rows['time_s']['status'], 'regression')
+        self.assertEqual(rows['time_s']['ratio'], 1.5)
+        self.assertEqual(rows['peak_delta_mb']['status'], 'improvement')
+
+        # Dentro da tolerância ou abaixo do ruído absoluto
+        rows = benchmark.compare_with_baseline(report(1.2, 104.0), baseline, tolerance=0.25)
+        self.assertEqual({row['status'] for row in rows}, {'ok'})
+        rows = benchmark.compare_with_baseline(report(0.04, 1.0), report(0.01, 0.5))
+        self.assertEqual({row['status'] for row in rows}, {'ok'})
+
+        rows = benchmark.compare_with_baseline(report(1.0, 1.0), {'sizes': {}})
+        self.assertEqual({row['status'] for row in rows}, {'new'})
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+    """Management command benchmark_ifc."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = os.path.join(directory.name, 'baseline.json')
+
+    def call(self, *args):
+        out = StringIO()
+        call_command(
+            'benchmark_ifc', '--sizes', '16', '--methods', 'open,get_statistics',
+            '--baseline', self.baseline, *args, stdout=out,
+        )
+        return out.getvalue()
+
+    def test_save_and_compare(self):
+        output = self.call()
+        self.assertIn('Baseline não encontrado', output)
+
+        self.call('--save-baseline')
+        with open(self.baseline) as baseline_file:
+            saved = json.load(baseline_file)
+        self.assertEqual(set(saved['sizes']['16']['methods']), {'open', 'get_statistics'})
+
+        output = self.call('--fail-on-regression')
+        self.assertIn('get_statistics', output)
+        self.assertIn('Comparação com o baseline', output)
+
+    def test_regression_fails(self):
+        self.call('--save-baseline')
+        with open(self.baseline) as baseline_file:
+            saved = json.load(baseline_file)
+        saved['sizes']['16']['methods']['get_statistics']['time_s'] = 0.0
+        saved['sizes']['16']['methods']['get_statistics']['peak_delta_mb'] = -100.0
+        with open(self.baseline, 'w') as baseline_file:
+            json.dump(saved, baseline_file)
+
+        with self.assertRaises(CommandError):
+            self.call('--fail-on-regression')
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_ifc', '--sizes', '0', stdout=StringIO())
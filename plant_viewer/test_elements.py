@@ -0,0 +1,289 @@
+"""
+Testes para o índice de elementos IFC (IfcElement) e endpoints derivados.
+"""
+
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from plant_viewer.models import BuildingPlan, ExtractionJob, IfcElement, MetadataSection
+from plant_viewer.testing import build_sample_model
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class IfcElementIndexTests(TestCase):
+    """Testes da extração para a tabela de elementos."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        model = build_sample_model(storeys=2, walls_per_storey=3, spaces_per_storey=1)
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', model.to_string().encode()),
+        )
+        self.client = APIClient()
+
+    def test_extraction_fills_element_table(self):
+        """A extração grava uma linha por elemento, com andar e bounding box."""
+        metadata = self.plant.extract_metadata(force_update=True)
+
+        self.assertEqual(IfcElement.objects.filter(plant=self.plant).count(), 8)
+        self.assertFalse(MetadataSection.objects.filter(plant=self.plant, section='building_elements').exists())
+        self.assertEqual(len(metadata['building_elements']['IfcWall']), 6)
+
+        wall = IfcElement.objects.get(plant=self.plant, name='Parede 1-2')
+        self.assertEqual(wall.storey, 'Nível 1')
+        self.assertAlmostEqual(wall.bbox_min_z, 3.0)
+        self.assertAlmostEqual(wall.bbox_max_x, 5.5)
+
+    def test_element_totals_endpoint(self):
+        """As contagens vêm do banco, por tipo e por andar."""
+        self.plant.extract_metadata(force_update=True)
+
+        response = self.client.get(f'/plant/api/plants/{self.plant.pk}/elements/totals/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['totals'], {'IfcSpace': 2, 'IfcWall': 6})
+        self.assertEqual(sorted(response.json()['storeys'].values()), [4, 4])
+        self.assertEqual(response.json()['total_elements'], 8)
+
+    def test_elements_cursor_pagination(self):
+        """A listagem percorre todos os elementos por cursor, na ordem do ID STEP."""
+        self.plant.extract_metadata(force_update=True)
+
+        url = f'/plant/api/plants/{self.plant.pk}/elements/?page_size=3'
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()['results']), 3)
+            ids += [element['id'] for element in response.json()['results']]
+            url = response.json()['next']
+
+        self.assertEqual(ids, sorted(IfcElement.objects.filter(plant=self.plant).values_list('express_id', flat=True)))
+
+    def test_elements_filters_and_projection(self):
+        """Filtros type, storey e bbox combinados com a projeção fields."""
+        self.plant.extract_metadata(force_update=True)
+        base = f'/plant/api/plants/{self.plant.pk}/elements/'
+        storey = IfcElement.objects.get(plant=self.plant, name='Parede 1-0').storey_express_id
+
+        response = self.client.get(base, {'type': 'IfcWall', 'storey': storey, 'fields': 'id,name'})
+        self.assertEqual(
+            [element['name'] for element in response.json()['results']],
+            ['Parede 1-0', 'Parede 1-1', 'Parede 1-2'],
+        )
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'name'})
+
+        # Caixa em planta que pega só a primeira parede de cada andar
+        response = self.client.get(base, {'type': 'IfcWall', 'bbox': '-1,-1,1,1', 'fields': 'name,bbox'})
+        self.assertEqual([element['name'] for element in response.json()['results']], ['Parede 0-0', 'Parede 1-0'])
+        self.assertIn('min', response.json()['results'][0]['bbox'])
+
+        response = self.client.get(base, {'bbox': '-1,-1,3.5,1,1,10'})
+        self.assertEqual([element['name'] for element in response.json()['results']], ['Parede 1-0'])
+
+    def test_projection_keeps_cursor_column(self):
+        """Campos sem o id não adiam a coluna do cursor (sem consulta por elemento)."""
+        self.plant.extract_metadata(force_update=True)
+        base = f'/plant/api/plants/{self.plant.pk}/elements/'
+
+        queries = {}
+        for fields in ('id,name', 'name'):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(base, {'fields': fields, 'page_size': 3})
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNotNone(response.json()['next'])
+            queries[fields] = len(context.captured_queries)
+        self.assertEqual(queries['name'], queries['id,name'])
+
+    def test_spaces_from_metadata(self):
+        """Espaços vêm da seção spaces, sem abrir o IFC; metadados sem a seção agendam nova extração."""
+        self.plant.extract_metadata(force_update=True)
+        url = f'/plant/api/plants/{self.plant.pk}/spaces/'
+
+        with mock.patch('plant_viewer.ifc_processor.IFCProcessor.open') as open_ifc:
+            response = self.client.get(url)
+        open_ifc.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_spaces'], 2)
+        self.assertAlmostEqual(response.json()['spaces'][0]['area'], 16.0)
+
+        # Metadados extraídos antes da seção existir
+        MetadataSection.objects.filter(plant=self.plant, section='spaces').delete()
+        BuildingPlan.objects.filter(pk=self.plant.pk).update(metadata_updated_at=timezone.now())
+        with mock.patch('plant_viewer.tasks.extraction_workflow') as workflow:
+            workflow.return_value.apply_async.return_value.id = 'fluxo'
+            response = self.client.get(url)
+            # Polling reaproveita o job em andamento, sem forçar nova extração
+            polled = self.client.get(url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['job']['reason'], 'section_miss')
+        self.assertEqual(workflow.call_count, 1)
+        self.assertEqual(polled.status_code, 202)
+        self.assertEqual(polled.json()['job']['id'], response.json()['job']['id'])
+        self.assertFalse(ExtractionJob.objects.get(pk=response.json()['job']['id']).force)
+
+    def test_missing_section_does_not_open_ifc(self):
+        """Seção ausente retorna None em vez de extrair os metadados na requisição."""
+        with mock.patch('plant_viewer.ifc_processor.IFCProcessor.open') as open_ifc:
+            self.assertIsNone(self.plant.get_metadata_section('statistics'))
+        open_ifc.assert_not_called()
+        self.assertIsNone(BuildingPlan.objects.get(pk=self.plant.pk).metadata_updated_at)
+
+    def test_elements_invalid_parameters(self):
+        """Campos desconhecidos e bbox malformada retornam 400."""
+        self.plant.extract_metadata(force_update=True)
+        base = f'/plant/api/plants/{self.plant.pk}/elements/'
+
+        self.assertEqual(self.client.get(base, {'fields': 'id,secret'}).status_code, 400)
+        self.assertEqual(self.client.get(base, {'bbox': '0,0,1'}).status_code, 400)
+        self.assertEqual(self.client.get(base, {'storey': 'térreo'}).status_code, 400)
+
+    def test_section_endpoints(self):
+        """statistics e bounds leem apenas a seção pedida."""
+        self.plant.extract_metadata(force_update=True)
+
+        stats = self.client.get(f'/plant/api/plants/{self.plant.pk}/statistics/')
+        bounds = self.client.get(f'/plant/api/plants/{self.plant.pk}/bounds/')
+
+        self.assertEqual(stats.status_code, 200)
+        self.assertEqual(stats.json()['total_with_geometry'], 8)
+        self.assertEqual(bounds.status_code, 200)
+        self.assertAlmostEqual(bounds.json()['max']['z'], 6.0)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MetadataSectionTests(TestCase):
+    """Seções de metadados comprimidas fora da linha da planta."""
+
+    def setUp(self):
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', build_sample_model().to_string().encode()),
+        )
+        self.metadata = {
+            'statistics': {'total_elements': 3},
+            'floor_plans': {
+                'tolerance': 0.02,
+                'index': [{'key': 's1'}, {'key': 's2'}],
+                'storeys': {'s1': {'features': ['a'] * 200}, 's2': {'features': ['b']}},
+            },
+        }
+
+    def test_sections_round_trip(self):
+        """A divisão em linhas é revertida por decode_sections."""
+        rows = MetadataSection.encode_sections(self.metadata)
+
+        self.assertEqual(
+            sorted(name for name, _, _ in rows),
+            ['floor_plans', 'floor_plans/storeys/s1', 'floor_plans/storeys/s2', 'statistics'],
+        )
+        storey_row = next(row for row in rows if row[0] == 'floor_plans/storeys/s1')
+        self.assertLess(len(storey_row[1]), storey_row[2])
+        self.assertEqual(MetadataSection.decode_sections((name, data) for name, data, _ in rows), self.metadata)
+
+    def test_load_reads_most_specific_row(self):
+        """Um andar é lido da sua própria linha; caminhos ausentes retornam None."""
+        MetadataSection.rebuild_for_plant(self.plant, self.metadata)
+
+        self.assertEqual(MetadataSection.load(self.plant, 'floor_plans', 'storeys', 's2'), {'features': ['b']})
+        self.assertEqual(MetadataSection.load(self.plant, 'floor_plans', 'tolerance'), 0.02)
+        self.assertIsNone(MetadataSection.load(self.plant, 'floor_plans', 'storeys', 's9'))
+        self.assertIsNone(MetadataSection.load(self.plant, 'bounds'))
+        self.assertEqual(MetadataSection.load_all(self.plant), self.metadata)
+
+    def test_listing_does_not_load_metadata(self):
+        """A listagem de plantas não consulta a tabela de seções."""
+        self.plant.extract_metadata(force_update=True)
+
+        with self.assertNumQueries(2):
+            response = APIClient().get('/plant/api/plants/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IFC_METADATA_MAX_AGE=30)
+class ConditionalMetadataTests(TestCase):
+    """ETag/Last-Modified e respostas 304 nos endpoints de metadados."""
+
+    def setUp(self):
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', build_sample_model().to_string().encode()),
+        )
+        self.client = APIClient()
+
+    def test_validators_and_not_modified(self):
+        """Revalidação por ETag ou data responde 304 sem ler as seções."""
+        url = f'/plant/api/plants/{self.plant.pk}/statistics/'
+        with mock.patch('plant_viewer.tasks.extraction_workflow') as workflow:
+            workflow.return_value.apply_async.return_value.id = 'fluxo'
+            first = self.client.get(url)
+        # Sem metadados: 202 com o job de extração, sem validadores
+        self.assertEqual(first.status_code, 202)
+        self.assertNotIn('ETag', first)
+
+        self.plant.extract_metadata()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        # Mesmo validador para br, gzip e identity: fraco, com Vary em toda resposta
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('max-age=30', response['Cache-Control'])
+        self.assertIn('must-revalidate', response['Cache-Control'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        # Comparação fraca: a forma forte do mesmo valor também revalida
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag[2:])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        # Nova extração invalida o ETag
+        self.plant.refresh_from_db()
+        self.plant.extract_metadata(force_update=True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_action_and_query(self):
+        """Actions e filtros diferentes têm ETags diferentes."""
+        self.plant.extract_metadata(force_update=True)
+        base = f'/plant/api/plants/{self.plant.pk}'
+
+        etags = {
+            self.client.get(f'{base}/bounds/')['ETag'],
+            self.client.get(f'{base}/elements/')['ETag'],
+            self.client.get(f'{base}/elements/', {'type': 'IfcWall'})['ETag'],
+            self.client.get(f'{base}/elements/totals/')['ETag'],
+        }
+        self.assertEqual(len(etags), 4)
+
+    def test_errors_are_not_cached(self):
+        """Respostas de erro não recebem validadores."""
+        self.plant.extract_metadata(force_update=True)
+
+        response = self.client.get(f'/plant/api/plants/{self.plant.pk}/floor_plan/999999/')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.client.get('/plant/api/plants/999999/bounds/').status_code, 404)
@@ -0,0 +1,69 @@
+"""
+Testes para o pipeline de extração de metadados em passagem única.
+"""
+
+from django.test import SimpleTestCase
+
+from plant_viewer.extraction import Collector, DEFAULT_COLLECTORS, extract_metadata
+from plant_viewer.ifc_processor import IFCProcessor
+from plant_viewer.testing import build_sample_model
+
+
+class NameLengthCollector(Collector):
+    """Coletor de exemplo que soma o tamanho dos nomes."""
+
+    name = 'name_length'
+    metadata_key = 'name_length'
+
+    def start(self, processor):
+        self.total = 0
+
+    def visit(self, element, element_type):
+        self.total += len(element.Name or '')
+
+    def finish(self, results):
+        return self.total
+
+
+class MetadataPipelineTests(SimpleTestCase):
+    """Testes do MetadataPipeline e dos coletores padrão."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.processor = IFCProcessor('memória')
+        cls.processor.model = build_sample_model(storeys=2, walls_per_storey=3, spaces_per_storey=1)
+
+    def test_metadata_matches_processor_methods(self):
+        """O resultado equivale às chamadas individuais do IFCProcessor."""
+        metadata = extract_metadata(self.processor, profile_memory=False)
+
+        self.assertEqual(metadata['statistics']['elements_by_type'],
+                         self.processor.get_statistics()['elements_by_type'])
+        self.assertEqual(metadata['project_info'], self.processor.get_project_info())
+        self.assertEqual(
+            {t: [e['id'] for e in items] for t, items in metadata['building_elements'].items()},
+            {t: [e['id'] for e in items] for t, items in self.processor.get_building_elements().items()},
+        )
+        self.assertEqual(metadata['statistics']['total_with_geometry'], 8)
+        self.assertIsNotNone(metadata['bounds'])
+        self.assertEqual(metadata['building_elements']['IfcWall'][0]['storey'], 'Nível 0')
+
+    def test_report_per_collector(self):
+        """O relatório traz tempo e pico de memória de cada coletor."""
+        metadata = extract_metadata(self.processor, profile_memory=True)
+        report = metadata['extraction']
+
+        self.assertEqual(report['elements_visited'], 12)
+        for collector in DEFAULT_COLLECTORS:
+            stats = report['collectors'][collector.name]
+            self.assertGreaterEqual(stats['time_ms'], 0)
+            self.assertIsNotNone(stats['peak_memory_kb'])
+
+    def test_custom_collector(self):
+        """Coletores plugáveis adicionam campos sem nova varredura."""
+        metadata = extract_metadata(self.processor, collectors=[NameLengthCollector], profile_memory=False)
+
+        expected = sum(len(p.Name or '') for p in self.processor.model.by_type('IfcProduct'))
+        self.assertEqual(metadata['name_length'], expected)
+        self.assertNotIn('statistics', metadata)
@@ -0,0 +1,143 @@
+"""
+Testes para as plantas baixas 2D pré-calculadas por andar.
+"""
+
+import shutil
+import tempfile
+
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from plant_viewer.floor_plan import (
+    build_floor_plans, douglas_peucker, floor_plan_to_svg, ring_area, section_polygons,
+)
+from plant_viewer.ifc_processor import IFCProcessor
+from plant_viewer.models import BuildingPlan
+from plant_viewer.testing import build_sample_model
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def box(x0, y0, x1, y1, z0=0.0, z1=3.0):
+    """Prisma retangular fechado (8 vértices, 12 triângulos)."""
+    verts = np.array([[x, y, z] for z in (z0, z1) for y in (y0, y1) for x in (x0, x1)], dtype=np.float64)
+    faces = np.array([
+        (0, 2, 1), (1, 2, 3), (4, 5, 6), (5, 7, 6),
+        (0, 1, 4), (1, 5, 4), (2, 6, 3), (3, 6, 7),
+        (0, 4, 2), (2, 4, 6), (1, 3, 5), (3, 7, 5),
+    ])
+    return verts, faces
+
+
+class SectionTests(SimpleTestCase):
+    """Seção horizontal das malhas e simplificação dos contornos."""
+
+    def test_box_section(self):
+        verts, faces = box(0, 0, 4, 2)
+        polygons = section_polygons(verts, faces, 1.0, tolerance=0.01)
+        self.assertEqual(len(polygons), 1)
+        self.assertEqual(len(polygons[0]), 1)
+        self.assertAlmostEqual(ring_area(polygons[0][0]), 8.0)
+
+    def test_section_with_hole(self):
+        # Anel: caixa externa menos caixa interna (faces internas invertidas)
+        outer_verts, outer_faces = box(0, 0, 10, 10)
+        inner_verts, inner_faces = box(4, 4, 6, 6)
+        verts = np.vstack([outer_verts, inner_verts])
+        faces = np.vstack([outer_faces, inner_faces[:, ::-1] + len(outer_verts)])
+
+        polygons = section_polygons(verts, faces, 1.5, tolerance=0.01)
+        self.assertEqual(len(polygons), 1)
+        outer, hole = polygons[0]
+        self.assertAlmostEqual(ring_area(outer), 100.0)
+        self.assertAlmostEqual(ring_area(hole), -4.0)
+
+    def test_plane_outside_mesh(self):
+        verts, faces = box(0, 0, 1, 1)
+        self.assertEqual(section_polygons(verts, faces, 5.0, tolerance=0.01), [])
+
+    def test_douglas_peucker_removes_collinear_points(self):
+        points = np.array([[0, 0], [1, 0.005], [2, 0], [3, -0.004], [4, 0], [4, 3]], dtype=np.float64)
+        simplified = douglas_peucker(points, 0.01)
+        self.assertEqual(simplified.tolist(), [[0, 0], [4, 0], [4, 3]])
+        self.assertEqual(len(douglas_peucker(points, 0.0001)), len(points))
+
+
+@override_settings(IFC_GEOMETRY_CACHE_MB=0)
+class BuildFloorPlansTests(SimpleTestCase):
+    """Plantas baixas do modelo de exemplo."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        processor = IFCProcessor('modelo.ifc')
+        processor.model = build_sample_model(storeys=2, walls_per_storey=3, spaces_per_storey=1)
+        cls.plans = build_floor_plans(processor, tolerance=0.02, cut_height=1.0)
+
+    def test_index_per_storey(self):
+        index = self.plans['index']
+        self.assertEqual([storey['name'] for storey in index], ['Nível 0', 'Nível 1'])
+        self.assertEqual(index[0]['elevation'], 0.0)
+        self.assertEqual([storey['spaces'] for storey in index], [1, 1])
+        self.assertEqual([storey['walls'] for storey in index], [3, 3])
+        self.assertEqual(set(self.plans['storeys']), {storey['key'] for storey in index})
+
+    def test_space_polygon(self):
+        collection = self.plans['storeys'][self.plans['index'][0]['key']]
+        space = next(f for f in collection['features'] if f['properties']['kind'] == 'space')
+        self.assertEqual(space['geometry']['type'], 'MultiPolygon')
+        self.assertAlmostEqual(space['properties']['area'], 16.0, places=2)
+        ring = space['geometry']['coordinates'][0][0]
+        # Anel fechado e simplificado (retângulo)
+        self.assertEqual(ring[0], ring[-1])
+        self.assertEqual(len(ring), 5)
+
+    def test_svg(self):
+        collection = self.plans['storeys'][self.plans['index'][0]['key']]
+        svg = floor_plan_to_svg(collection)
+        self.assertTrue(svg.startswith('<svg'))
+        self.assertEqual(svg.count('class="wall"'), 3)
+        self.assertEqual(svg.count('class="space"'), 1)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IFC_GEOMETRY_CACHE_MB=0)
+class FloorPlanApiTests(TestCase):
+    """Índice e plantas por andar servidos a partir dos metadados."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', build_sample_model(storeys=2).to_string().encode()),
+        )
+        self.plant.extract_metadata()
+
+    def test_index_and_geojson(self):
+        index = self.client.get(f'/plant/api/plants/{self.plant.id}/floor_plan/').json()
+        self.assertEqual(len(index['storeys']), 2)
+
+        response = self.client.get(index['storeys'][1]['url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        collection = response.json()
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertIn('space', {f['properties']['kind'] for f in collection['features']})
+
+    def test_svg_output(self):
+        storey = self.plant.get_metadata_section('floor_plans', 'index')[0]
+        response = self.client.get(f"/plant/api/plants/{self.plant.id}/floor_plan/{storey['id']}/?output=svg")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<path', response.content)
+
+        response = self.client.get(f"/plant/api/plants/{self.plant.id}/floor_plan/{storey['id']}/?output=png")
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_storey(self):
+        response = self.client.get(f'/plant/api/plants/{self.plant.id}/floor_plan/999999/')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,45 @@
+"""
+Testes para a passagem de geometria do IFCProcessor.
+"""
+
+from django.test import SimpleTestCase
+
+from plant_viewer.geometry import run_geometry_pass
+from plant_viewer.ifc_processor import IFCProcessor
+from plant_viewer.testing import build_sample_model
+
+
+class GeometryPassTests(SimpleTestCase):
+    """Testes de bounding boxes por elemento e limites do modelo."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = build_sample_model(storeys=2, walls_per_storey=3, spaces_per_storey=1)
+
+    def test_element_bounds_for_all_products(self):
+        """Cada parede e espaço recebe uma bounding box."""
+        result = run_geometry_pass(self.model, num_threads=2)
+
+        self.assertEqual(len(result), 8)
+        self.assertEqual(len(result.spaces), 2)
+
+    def test_model_bounds(self):
+        """Os limites do modelo combinam todas as bounding boxes."""
+        bounds = run_geometry_pass(self.model, num_threads=1).get_bounds()
+
+        self.assertAlmostEqual(bounds['min']['z'], 0.0)
+        self.assertAlmostEqual(bounds['max']['z'], 6.0)
+        self.assertAlmostEqual(bounds['max']['x'], 5.5)
+        self.assertAlmostEqual(bounds['size']['z'], 6.0)
+
+    def test_processor_reuses_full_pass(self):
+        """get_bounds e espaços compartilham a mesma passagem completa."""
+        processor = IFCProcessor('memória')
+        processor.model = self.model
+
+        processor.get_bounds()
+        spaces = processor.get_spaces_with_coordinates()
+
+        self.assertEqual(list(processor._geometry), [None])
+        self.assertAlmostEqual(spaces[0]['area'], 16.0)
@@ -0,0 +1,111 @@
+"""
+Testes para o cache de tesselação em disco.
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from plant_viewer.geometry import run_geometry_pass
+from plant_viewer.geometry_cache import GeometryCache, SubgraphHasher, get_geometry_cache
+from plant_viewer.testing import build_sample_model
+
+
+class GeometryCacheTests(SimpleTestCase):
+    """Chaves por conteúdo, reaproveitamento entre revisões e remoção LRU."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = GeometryCache(self.directory, 10 * 1024 * 1024)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_identical_model_is_served_from_cache(self):
+        """Outro arquivo com as mesmas formas (GlobalIds e históricos diferentes) não é tesselado."""
+        first = run_geometry_pass(build_sample_model(spaces_per_storey=1), num_threads=1, cache=self.cache)
+        self.assertEqual(self.cache.hits, 0)
+
+        second = run_geometry_pass(build_sample_model(spaces_per_storey=1), num_threads=1, cache=self.cache)
+
+        self.assertEqual(self.cache.hits, len(second))
+        self.assertEqual(first.get_bounds(), second.get_bounds())
+        self.assertEqual(len(second.spaces), len(first.spaces))
+
+    def test_revision_retessellates_only_changed_products(self):
+        model = build_sample_model(walls_per_storey=3)
+        run_geometry_pass(model, num_threads=1, cache=self.cache)
+        hits = self.cache.hits
+
+        wall = model.by_type('IfcWall')[0]
+        # Modelo em milímetros: 10 m à direita
+        location = model.createIfcCartesianPoint((10000.0, 0.0, 0.0))
+        wall.ObjectPlacement = model.createIfcLocalPlacement(
+            wall.ObjectPlacement.PlacementRelTo, model.createIfcAxis2Placement3D(location)
+        )
+        result = run_geometry_pass(model, num_threads=1, cache=self.cache)
+
+        self.assertEqual(self.cache.hits - hits, len(result) - 1)
+        self.assertAlmostEqual(result.element_bounds[wall.id()][0][0], 10.0)
+
+    def test_keys_ignore_instance_numbers(self):
+        model = build_sample_model(walls_per_storey=2)
+        reopened = type(model).from_string(model.to_string())
+        wall = model.by_type('IfcWall')[0]
+
+        self.assertEqual(
+            SubgraphHasher(model).product(wall),
+            SubgraphHasher(reopened).product(reopened.by_guid(wall.GlobalId)),
+        )
+        walls = model.by_type('IfcWall')
+        self.assertNotEqual(SubgraphHasher(model).product(walls[0]), SubgraphHasher(model).product(walls[1]))
+
+    def test_entries_are_memory_mapped(self):
+        verts = np.arange(12, dtype=np.float64).reshape(-1, 3)
+        self.cache.put('ab' * 20, verts, np.array([[0, 1, 2]]))
+
+        cached_verts, cached_faces = self.cache.get('ab' * 20)
+
+        self.assertIsInstance(cached_verts, np.memmap)
+        np.testing.assert_array_equal(cached_verts, verts)
+        self.assertEqual(cached_faces.dtype, np.int32)
+        self.assertIsNone(self.cache.get('cd' * 20))
+
+    def test_lru_eviction(self):
+        verts = np.zeros((1000, 3))
+        faces = np.zeros((0, 3), dtype=np.int32)
+        self.cache.put('00' * 20, verts, faces)
+        entry_size = self.cache.size_bytes()
+        self.cache.max_bytes = int(entry_size * 2.5)
+
+        self.cache.put('11' * 20, verts, faces)
+        # Entrada mais antiga usada por último sobrevive
+        old = os.path.getmtime(self.cache._paths('11' * 20)[0]) - 100
+        os.utime(self.cache._paths('11' * 20)[0], (old, old))
+        self.cache.get('00' * 20)
+        self.cache.put('22' * 20, verts, faces)
+
+        self.assertIsNone(self.cache.get('11' * 20))
+        self.assertIsNotNone(self.cache.get('00' * 20))
+        self.assertIsNotNone(self.cache.get('22' * 20))
+        self.assertLessEqual(self.cache.size_bytes(), self.cache.max_bytes)
+
+    def test_overwrite_keeps_size(self):
+        """Regravar uma chave não soma o tamanho antigo: sem remoções antecipadas."""
+        verts = np.zeros((1000, 3))
+        faces = np.zeros((0, 3), dtype=np.int32)
+        self.cache.put('00' * 20, verts, faces)
+        self.cache.put('11' * 20, verts, faces)
+        self.cache.max_bytes = int(self.cache.size_bytes() * 1.2)
+
+        for _ in range(3):
+            self.cache.put('00' * 20, verts, faces)
+        self.assertEqual(self.cache._size, self.cache.size_bytes())
+        self.assertIsNotNone(self.cache.get('11' * 20))
+
+    @override_settings(IFC_GEOMETRY_CACHE_MB=0)
+    def test_disabled(self):
+        self.assertIsNone(get_geometry_cache())
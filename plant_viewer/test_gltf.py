@@ -0,0 +1,293 @@
+"""
+Testes para a conversão IFC → GLB.
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+from io import StringIO
+
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from plant_viewer.gltf import (
+    FLOAT, NORMAL_OCT_ATTRIBUTE, SHORT, GlbBuilder, MeshArrays, convert_ifc_to_glb, read_glb,
+)
+from plant_viewer.mesh_encoding import octahedral_decode
+from plant_viewer.models import BuildingPlan
+from plant_viewer.testing import build_sample_model
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def convert(model, **options):
+    with tempfile.NamedTemporaryFile(suffix='.glb', delete=False) as handle:
+        path = handle.name
+    try:
+        stats = convert_ifc_to_glb(model, path, num_threads=1, **options)
+        with open(path, 'rb') as glb:
+            return stats, glb.read()
+    finally:
+        os.unlink(path)
+
+
+class GlbConversionTests(SimpleTestCase):
+    """Estrutura do GLB, instanciamento e mapa de GlobalId."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = build_sample_model(storeys=2, walls_per_storey=3, spaces_per_storey=1, columns_per_storey=4)
+        cls.stats, cls.data = convert(cls.model, quantize=False, compression_level=0)
+        cls.document, cls.binary = read_glb(cls.data)
+
+    def test_container(self):
+        magic, version, length = struct.unpack_from('<III', self.data, 0)
+        self.assertEqual((magic, version, length), (0x46546C67, 2, len(self.data)))
+        self.assertEqual(len(self.data) % 4, 0)
+        self.assertEqual(self.document['buffers'][0]['byteLength'], len(self.binary))
+        for view in self.document['bufferViews']:
+            self.assertEqual(view['byteOffset'] % 4, 0)
+
+    def test_global_id_mapping(self):
+        """Um nó por produto com geometria; espaços ficam de fora."""
+        products = [p for p in self.model.by_type('IfcProduct') if p.is_a() in ('IfcWall', 'IfcColumn')]
+        node_ids = self.document['scenes'][0]['extras']['ifc_nodes']
+
+        self.assertEqual(set(node_ids), {p.GlobalId for p in products})
+        for product in products:
+            node = self.document['nodes'][node_ids[product.GlobalId]]
+            self.assertEqual(node['name'], product.GlobalId)
+            self.assertEqual(node['extras']['ifcId'], product.id())
+            self.assertEqual(node['extras']['type'], product.is_a())
+
+    def test_instances_share_meshes(self):
+        """Pilares (IfcMappedItem) e paredes idênticas reutilizam a mesma malha."""
+        node_ids = self.document['scenes'][0]['extras']['ifc_nodes']
+        meshes_by_type = {}
+        for index in node_ids.values():
+            node = self.document['nodes'][index]
+            meshes_by_type.setdefault(node['extras']['type'], set()).add(node['mesh'])
+
+        self.assertEqual(len(meshes_by_type['IfcColumn']), 1)
+        self.assertEqual(len(meshes_by_type['IfcWall']), 1)
+        self.assertEqual(len(self.document['meshes']), 2)
+        self.assertEqual(self.stats['reused_meshes'], len(node_ids) - 2)
+
+    def test_node_matrix_positions_instance(self):
+        """A matriz do nó leva a malha local à posição global do elemento."""
+        node_ids = self.document['scenes'][0]['extras']['ifc_nodes']
+        column = next(c for c in self.model.by_type('IfcColumn') if c.Name == 'Pilar 1-2')
+        node = self.document['nodes'][node_ids[column.GlobalId]]
+
+        matrix = np.array(node['matrix']).reshape(4, 4).T
+        np.testing.assert_allclose(matrix[:3, 3], (6.0, -2.0, 3.0), atol=1e-6)
+
+    def test_positions_accessor(self):
+        primitive = self.document['meshes'][0]['primitives'][0]
+        accessor = self.document['accessors'][primitive['attributes']['POSITION']]
+        view = self.document['bufferViews'][accessor['bufferView']]
+
+        self.assertEqual(accessor['componentType'], FLOAT)
+        positions = np.frombuffer(
+            self.binary, dtype=np.float32, count=accessor['count'] * 3, offset=view['byteOffset']
+        ).reshape(-1, 3)
+        np.testing.assert_allclose(positions.min(axis=0), accessor['min'], atol=1e-6)
+        np.testing.assert_allclose(positions.max(axis=0), accessor['max'], atol=1e-6)
+        self.assertIn('NORMAL', primitive['attributes'])
+
+
+class QuantizedGlbTests(SimpleTestCase):
+    """GLB com posições int16, normais octaédricas e gzip."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = build_sample_model(storeys=2, walls_per_storey=3, spaces_per_storey=1, columns_per_storey=4)
+        cls.raw_stats, raw = convert(cls.model, quantize=False, compression_level=0)
+        cls.raw_document, cls.raw_binary = read_glb(raw)
+        cls.stats, cls.data = convert(cls.model, quantize=True, compression_level=9)
+        cls.document, cls.binary = read_glb(cls.data)
+
+    def _world_positions(self, document, binary, global_id):
+        """Posições do elemento em coordenadas do modelo (matriz do nó aplicada)."""
+        node = document['nodes'][document['scenes'][0]['extras']['ifc_nodes'][global_id]]
+        primitive = document['meshes'][node['mesh']]['primitives'][0]
+        accessor = document['accessors'][primitive['attributes']['POSITION']]
+        view = document['bufferViews'][accessor['bufferView']]
+        if accessor['componentType'] == FLOAT:
+            local = np.frombuffer(binary, np.float32, accessor['count'] * 3, view['byteOffset']).reshape(-1, 3)
+        else:
+            local = np.frombuffer(binary, np.int16, accessor['count'] * 4, view['byteOffset']).reshape(-1, 4)
+            local = local[:, :3] / 32767.0
+        matrix = np.array(node.get('matrix', np.eye(4).ravel())).reshape(4, 4).T
+        return local @ matrix[:3, :3].T + matrix[:3, 3]
+
+    def test_smaller_output(self):
+        self.assertTrue(self.stats['quantized'] and self.stats['compressed'])
+        self.assertEqual(self.data[:2], b'\x1f\x8b')
+        self.assertLess(self.stats['geometry_bytes'], self.raw_stats['geometry_bytes'])
+        self.assertLess(self.stats['size_bytes'] * 2, self.raw_stats['size_bytes'])
+        self.assertEqual(set(self.stats['time_ms']), {'tessellation', 'lod', 'tiles', 'encoding', 'compression', 'total'})
+
+    def test_extension_and_attributes(self):
+        self.assertIn('KHR_mesh_quantization', self.document['extensionsRequired'])
+        attributes = self.document['meshes'][0]['primitives'][0]['attributes']
+        self.assertEqual(self.document['accessors'][attributes['POSITION']]['componentType'], SHORT)
+        self.assertIn(NORMAL_OCT_ATTRIBUTE, attributes)
+        self.assertNotIn('NORMAL', attributes)
+
+    def test_dequantized_positions_match(self):
+        """A matriz do nó desquantiza: mesmas posições do GLB em float32 (erro < 0.1 mm)."""
+        for column in self.model.by_type('IfcColumn')[:2]:
+            expected = self._world_positions(self.raw_document, self.raw_binary, column.GlobalId)
+            actual = self._world_positions(self.document, self.binary, column.GlobalId)
+            np.testing.assert_allclose(
+                np.unique(actual.round(4), axis=0), np.unique(expected.round(4), axis=0), atol=1e-4
+            )
+
+    def test_normals_survive_dequantization_scale(self):
+        """Normal a 45° numa malha 10 x 1 x 1: a inversa transposta da matriz do nó devolve a direção."""
+        normal = np.array([1.0, 1.0, 0.0]) / np.sqrt(2)
+        positions = np.array([[0.0, 0, 0], [10, 0, 0], [0, 1, 1]])
+        mesh = MeshArrays(positions, np.tile(normal, (3, 1)), np.array([[0, 1, 2]]), np.zeros(1, dtype=int), [])
+        builder = GlbBuilder(quantize=True)
+        node = builder.add_node(mesh=builder.add_mesh(mesh))
+        document, binary = read_glb(builder.to_bytes([node]))
+
+        accessor = document['accessors'][document['meshes'][0]['primitives'][0]['attributes'][NORMAL_OCT_ATTRIBUTE]]
+        view = document['bufferViews'][accessor['bufferView']]
+        encoded = np.frombuffer(binary, np.int16, accessor['count'] * 2, view['byteOffset']).reshape(-1, 2)
+        matrix = np.array(document['nodes'][node]['matrix']).reshape(4, 4).T
+        world = octahedral_decode(encoded) @ np.linalg.inv(matrix[:3, :3])
+        world /= np.linalg.norm(world, axis=1, keepdims=True)
+        np.testing.assert_allclose(world, np.tile(normal, (3, 1)), atol=1e-4)
+
+
+class LodGlbTests(SimpleTestCase):
+    """GLBs de níveis de detalhe gerados junto com o completo."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = build_sample_model(storeys=1, walls_per_storey=2, columns_per_storey=2)
+        cls.directory = tempfile.mkdtemp()
+        cls.outputs = {level: os.path.join(cls.directory, f'{level}.glb') for level in ('medium', 'low', 'proxy')}
+        cls.stats, data = convert(cls.model, quantize=False, compression_level=0, lod_outputs=cls.outputs)
+        cls.document, _ = read_glb(data)
+        cls.levels = {}
+        for level, path in cls.outputs.items():
+            with open(path, 'rb') as glb:
+                cls.levels[level] = read_glb(glb.read())[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def test_levels_keep_nodes(self):
+        """Todos os níveis têm os mesmos elementos e matrizes do GLB completo."""
+        node_ids = self.document['scenes'][0]['extras']['ifc_nodes']
+        for document in self.levels.values():
+            level_ids = document['scenes'][0]['extras']['ifc_nodes']
+            self.assertEqual(set(level_ids), set(node_ids))
+            for global_id, index in level_ids.items():
+                self.assertEqual(document['nodes'][index]['extras'], self.document['nodes'][node_ids[global_id]]['extras'])
+
+    def test_proxy_is_bounding_box(self):
+        for mesh in self.levels['proxy']['meshes']:
+            indices = sum(self.levels['proxy']['accessors'][p['indices']]['count'] for p in mesh['primitives'])
+            self.assertEqual(indices, 36)
+
+    def test_stats_per_level(self):
+        self.assertEqual(set(self.stats['levels']), set(self.outputs))
+        for level in ('medium', 'low'):
+            self.assertLessEqual(self.stats['levels'][level]['triangles'], self.stats['triangles'])
+
+    def test_duplicate_global_ids(self):
+        """GlobalIds repetidos não desalinham o mapa dos níveis."""
+        model = build_sample_model(storeys=1, walls_per_storey=3, columns_per_storey=2)
+        walls = model.by_type('IfcWall')
+        walls[1].GlobalId = walls[0].GlobalId
+        outputs = {'low': os.path.join(self.directory, 'duplicado.glb')}
+        _, data = convert(model, quantize=False, compression_level=0, lod_outputs=outputs)
+        document, _ = read_glb(data)
+        with open(outputs['low'], 'rb') as glb:
+            level = read_glb(glb.read())[0]
+
+        node_ids = document['scenes'][0]['extras']['ifc_nodes']
+        level_ids = level['scenes'][0]['extras']['ifc_nodes']
+        self.assertEqual(set(level_ids), set(node_ids))
+        for global_id, index in level_ids.items():
+            self.assertEqual(level['nodes'][index]['name'], global_id)
+            self.assertEqual(level['nodes'][index]['extras'], document['nodes'][node_ids[global_id]]['extras'])
+
+    def test_unknown_level(self):
+        with self.assertRaises(ValueError):
+            convert(self.model, lod_outputs={'ultra': os.path.join(self.directory, 'ultra.glb')})
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GlbStorageTests(TestCase):
+    """GLB gravado na planta, servido pela API e gerado pelo comando."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', build_sample_model(columns_per_storey=2).to_string().encode()),
+        )
+
+    def test_command_builds_and_api_serves_glb(self):
+        response = self.client.get(f'/plant/api/plants/{self.plant.id}/glb/')
+        self.assertEqual(response.status_code, 404)
+
+        call_command('convert_ifc_to_gltf', plant_id=self.plant.id, stdout=StringIO())
+        self.plant.refresh_from_db()
+        self.assertTrue(self.plant.has_current_glb())
+
+        detail = self.client.get(f'/plant/api/plants/{self.plant.id}/?include_metadata=false').json()
+        self.assertTrue(detail['glb_url'].endswith(f'/plant/api/plants/{self.plant.id}/glb/'))
+
+        self.assertEqual(detail['glb_stats']['nodes'], 5)
+
+        response = self.client.get(f'/plant/api/plants/{self.plant.id}/glb/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'model/gltf-binary')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        compressed = b''.join(response.streaming_content)
+
+        # Clientes sem gzip recebem o GLB descompactado
+        response = self.client.get(f'/plant/api/plants/{self.plant.id}/glb/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        plain = b''.join(response.streaming_content)
+        self.assertEqual(plain[:4], b'glTF')
+        self.assertEqual(read_glb(compressed), read_glb(plain))
+        self.assertEqual(len(read_glb(plain)[0]['scenes'][0]['extras']['ifc_nodes']), 5)
+
+        # Níveis de detalhe, do mais grosso ao mais fino
+        self.assertEqual(list(detail['glb_lod_urls']), ['proxy', 'low', 'medium'])
+        response = self.client.get(detail['glb_lod_urls']['proxy'])
+        self.assertEqual(response.status_code, 200)
+        proxy = read_glb(b''.join(response.streaming_content))[0]
+        self.assertEqual(len(proxy['scenes'][0]['extras']['ifc_nodes']), 5)
+        response = self.client.get(f'/plant/api/plants/{self.plant.id}/glb/?lod=ultra')
+        self.assertEqual(response.status_code, 404)
+
+    def test_current_glb_is_not_rebuilt(self):
+        self.assertIsNotNone(self.plant.build_glb(num_threads=1))
+        previous = self.plant.glb_file.path
+        self.assertIsNone(self.plant.build_glb(num_threads=1))
+
+        # Reconversão forçada substitui o arquivo anterior
+        self.assertIsNotNone(self.plant.build_glb(force=True, num_threads=1))
+        self.assertNotEqual(self.plant.glb_file.path, previous)
+        self.assertFalse(os.path.exists(previous))
+        self.assertTrue(self.plant.has_current_glb())
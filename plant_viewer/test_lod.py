@@ -0,0 +1,67 @@
+"""
+Testes para a simplificação de malhas em níveis de detalhe.
+"""
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from plant_viewer.lod import bounding_box_proxy, cluster_vertices, face_normals, simplify_mesh
+from plant_viewer.test_mesh_encoding import grid_mesh
+
+
+def bumpy_grid(size=30):
+    """Grade com relevo senoidal e dois materiais."""
+    positions, triangles = grid_mesh(size)
+    positions[:, 2] = np.sin(positions[:, 0] / 3) * np.cos(positions[:, 1] / 4)
+    return positions, triangles, np.arange(len(triangles)) % 2
+
+
+class LodTests(SimpleTestCase):
+    """Agrupamento de vértices, simplificação e caixa envolvente."""
+
+    def test_simplify_reaches_ratio(self):
+        positions, triangles, material_ids = bumpy_grid()
+
+        result = simplify_mesh(positions, triangles, material_ids, 0.1)
+
+        self.assertIsNotNone(result)
+        simple_positions, simple_triangles, simple_materials = result
+        self.assertLessEqual(len(simple_triangles), len(triangles) * 0.1)
+        self.assertGreater(len(simple_triangles), 0)
+        self.assertEqual(len(simple_materials), len(simple_triangles))
+        self.assertLess(simple_triangles.max(), len(simple_positions))
+        # Vértices agrupados ficam dentro da caixa original
+        self.assertTrue(np.all(simple_positions.min(axis=0) >= positions.min(axis=0) - 1e-9))
+        self.assertTrue(np.all(simple_positions.max(axis=0) <= positions.max(axis=0) + 1e-9))
+
+    def test_small_mesh_is_not_simplified(self):
+        positions, triangles = grid_mesh(2)
+        self.assertIsNone(simplify_mesh(positions, triangles, np.zeros(len(triangles)), 0.1))
+
+    def test_cluster_drops_degenerate_triangles(self):
+        positions, triangles = grid_mesh(4)
+
+        merged, remaining, materials = cluster_vertices(positions, triangles, np.zeros(len(triangles)), 2.0)
+
+        self.assertLess(len(merged), len(positions))
+        self.assertTrue(np.all(remaining[:, 0] != remaining[:, 1]))
+        self.assertTrue(np.all(remaining[:, 1] != remaining[:, 2]))
+        self.assertEqual(len(np.unique(np.sort(remaining, axis=1), axis=0)), len(remaining))
+
+    def test_bounding_box_proxy(self):
+        positions, _, _ = bumpy_grid(5)
+
+        corners, normals, triangles = bounding_box_proxy(positions)
+
+        self.assertEqual((corners.shape, triangles.shape), ((24, 3), (12, 3)))
+        np.testing.assert_allclose(corners.min(axis=0), positions.min(axis=0))
+        np.testing.assert_allclose(corners.max(axis=0), positions.max(axis=0))
+        # Normais apontam para fora da caixa
+        center = corners.mean(axis=0)
+        self.assertTrue(np.all(((corners - center) * normals).sum(axis=1) > 0))
+
+    def test_face_normals(self):
+        positions = np.array([[0.0, 0, 0], [1, 0, 0], [0, 1, 0]])
+        corners, normals, triangles = face_normals(positions, np.array([[0, 1, 2]]))
+        np.testing.assert_allclose(normals, [[0, 0, 1]] * 3)
+        np.testing.assert_array_equal(triangles, [[0, 1, 2]])
@@ -0,0 +1,141 @@
+"""
+Testes para o modo de processamento com memória limitada.
+"""
+
+import os
+import shutil
+import tempfile
+
+import ifcopenshell.api.pset
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from plant_viewer.memory import MemoryMonitor, SpillStore
+from plant_viewer.models import BuildingPlan, IfcElement, IfcProperty
+from plant_viewer.properties import extract_property_sets, iter_property_sets
+from plant_viewer.testing import build_sample_model
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def build_model_with_psets():
+    model = build_sample_model(storeys=2, walls_per_storey=3, spaces_per_storey=1)
+    for wall in model.by_type('IfcWall'):
+        pset = ifcopenshell.api.pset.add_pset(model, product=wall, name='Pset_WallCommon')
+        ifcopenshell.api.pset.edit_pset(model, pset=pset, properties={'FireRating': wall.Name})
+    return model
+
+
+class MemoryToolsTests(SimpleTestCase):
+    """Testes do SpillStore e do MemoryMonitor."""
+
+    def test_spill_store_round_trip(self):
+        store = SpillStore(batch_size=3)
+        for key in range(10):
+            store[key] = {'value': key * 2}
+
+        self.assertEqual(len(store), 10)
+        self.assertEqual(dict(store.items()), {key: {'value': key * 2} for key in range(10)})
+        # Pode ser lido mais de uma vez
+        self.assertEqual(len(list(store.values())), 10)
+
+        store.close()
+        self.assertFalse(os.path.exists(store.path))
+
+    def test_monitor_records_stages(self):
+        monitor = MemoryMonitor(budget_bytes=1)
+        with monitor.stage('externa'):
+            with monitor.stage('interna'):
+                data = bytearray(8 * 1024 * 1024)
+            del data
+
+        report = monitor.report()
+        self.assertEqual([s['stage'] for s in report['stages']], ['externa', 'interna'])
+        self.assertTrue(report['budget_exceeded'])
+        for stage in report['stages']:
+            self.assertGreaterEqual(stage['peak_rss_mb'], stage['rss_start_mb'])
+
+    def test_iter_property_sets_matches_batch_extraction(self):
+        model = build_model_with_psets()
+
+        self.assertEqual(
+            dict(iter_property_sets(model.by_type('IfcProduct'))),
+            extract_property_sets(model),
+        )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class LowMemoryExtractionTests(TestCase):
+    """A extração com memória limitada produz o mesmo resultado da normal."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', build_model_with_psets().to_string().encode()),
+        )
+
+    def _snapshot(self):
+        elements = list(
+            IfcElement.objects.filter(plant=self.plant).order_by('express_id').values_list(
+                'express_id', 'storey', 'x', 'y', 'z', 'bbox_min_x', 'bbox_max_z'
+            )
+        )
+        properties = sorted(
+            IfcProperty.objects.filter(plant=self.plant).values_list('element_express_id', 'name', 'value')
+        )
+        return elements, properties
+
+    def test_low_memory_matches_default_mode(self):
+        normal = self.plant.extract_metadata(force_update=True, low_memory=False)
+        expected = self._snapshot()
+
+        bounded = self.plant.extract_metadata(force_update=True, low_memory=True)
+
+        self.assertEqual(self._snapshot(), expected)
+        self.assertEqual(bounded['bounds'], normal['bounds'])
+        self.assertEqual(bounded['statistics'], normal['statistics'])
+
+        report = bounded['extraction']
+        self.assertTrue(report['low_memory'])
+        stages = [s['stage'] for s in report['memory']['stages']]
+        self.assertIn('geometry:IfcWall', stages)
+        self.assertIn('properties:IfcWall', stages)
+
+    @override_settings(IFC_LOW_MEMORY_THRESHOLD_MB=0)
+    def test_threshold_selects_low_memory_mode(self):
+        self.assertTrue(self.plant.requires_low_memory())
+
+        metadata = self.plant.extract_metadata(force_update=True)
+
+        self.assertTrue(metadata['extraction']['low_memory'])
+        self.assertEqual(IfcElement.objects.filter(plant=self.plant).count(), 8)
+
+    def test_low_memory_spills_element_list(self):
+        from plant_viewer.extraction import ElementListCollector, SpilledElements, StoreyCollector
+        from plant_viewer.extraction import extract_metadata as extract_ifc_metadata
+        from plant_viewer.ifc_processor import IFCProcessor
+
+        results = {}
+        for low_memory in (False, True):
+            processor = IFCProcessor(self.plant.ifc_file.path, low_memory=low_memory)
+            self.assertTrue(processor.open())
+            metadata = extract_ifc_metadata(
+                processor, collectors=[StoreyCollector, ElementListCollector], profile_memory=False
+            )
+            elements = metadata['building_elements']
+            results[low_memory] = sorted(
+                (item for group in elements.values() for item in group), key=lambda item: item['id']
+            )
+            if low_memory:
+                self.assertIsInstance(elements, SpilledElements)
+                self.assertEqual(len(elements), 8)
+                elements.close()
+                self.assertFalse(os.path.exists(elements.store.path))
+
+        self.assertEqual(results[True], results[False])
+        self.assertTrue(all(item['storey'] for item in results[True]))
@@ -0,0 +1,84 @@
+"""
+Testes para a codificação compacta de malhas.
+"""
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from plant_viewer.mesh_encoding import (
+    average_cache_miss_ratio,
+    dequantization_matrix,
+    octahedral_decode,
+    octahedral_encode,
+    optimize_triangle_order,
+    optimize_vertex_fetch,
+    quantize_positions,
+)
+
+
+def grid_mesh(size=40):
+    """Grade plana size x size com dois triângulos por célula."""
+    xs, ys = np.meshgrid(np.arange(size + 1), np.arange(size + 1))
+    positions = np.stack([xs.ravel(), ys.ravel(), np.zeros(xs.size)], axis=1).astype(np.float64)
+    triangles = []
+    for row in range(size):
+        for col in range(size):
+            a = row * (size + 1) + col
+            b, c, d = a + 1, a + size + 1, a + size + 2
+            triangles += [(a, b, c), (b, d, c)]
+    return positions, np.array(triangles)
+
+
+class MeshEncodingTests(SimpleTestCase):
+    """Quantização, normais octaédricas e reordenação."""
+
+    def test_quantization_round_trip(self):
+        rng = np.random.default_rng(7)
+        positions = rng.uniform((-50, 10, 0), (50, 12, 30), size=(500, 3))
+
+        quantized, center, half_extent = quantize_positions(positions)
+        matrix = dequantization_matrix(center, half_extent)
+        restored = (quantized / 32767.0) @ matrix[:3, :3].T + matrix[:3, 3]
+
+        self.assertEqual(quantized.dtype, np.int16)
+        # Erro máximo: meia unidade de quantização do maior eixo
+        np.testing.assert_allclose(restored, positions, atol=100 / 65534)
+
+    def test_flat_mesh_quantization(self):
+        positions = np.array([[0.0, 0.0, 5.0], [1.0, 2.0, 5.0], [2.0, 0.0, 5.0]])
+        quantized, center, half_extent = quantize_positions(positions)
+        self.assertEqual(half_extent[2], 1.0)
+        self.assertTrue(np.all(quantized[:, 2] == 0))
+
+    def test_octahedral_round_trip(self):
+        rng = np.random.default_rng(3)
+        normals = rng.normal(size=(2000, 3))
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+        axes = np.array([[0, 0, 1], [0, 0, -1], [1, 0, 0], [0, -1, 0]], dtype=np.float64)
+        normals = np.vstack([normals, axes])
+
+        decoded = octahedral_decode(octahedral_encode(normals))
+
+        angles = np.degrees(np.arccos(np.clip((decoded * normals).sum(axis=1), -1, 1)))
+        self.assertLess(angles.max(), 0.01)
+
+    def test_reordering_improves_cache_locality(self):
+        positions, triangles = grid_mesh()
+        shuffled = triangles[np.random.default_rng(1).permutation(len(triangles))]
+
+        ordered = shuffled[optimize_triangle_order(shuffled, positions)]
+        remapped, order = optimize_vertex_fetch(ordered, len(positions))
+
+        self.assertLess(average_cache_miss_ratio(ordered), average_cache_miss_ratio(shuffled) / 2)
+        # Mesma geometria, vértices renumerados na ordem do primeiro uso
+        np.testing.assert_array_equal(positions[order][remapped], positions[ordered])
+        first_use = remapped.ravel()[np.sort(np.unique(remapped.ravel(), return_index=True)[1])]
+        np.testing.assert_array_equal(first_use, np.arange(len(order)))
+
+    def test_groups_stay_contiguous(self):
+        positions, triangles = grid_mesh(8)
+        groups = np.arange(len(triangles)) % 3
+
+        order = optimize_triangle_order(triangles, positions, groups=groups)
+
+        self.assertTrue(np.all(np.diff(groups[order]) >= 0))
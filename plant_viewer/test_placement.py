@@ -0,0 +1,72 @@
+"""
+Testes para a resolução de placements em coordenadas globais.
+"""
+
+import numpy as np
+import ifcopenshell.util.placement
+from django.test import SimpleTestCase
+
+from plant_viewer.ifc_processor import IFCProcessor
+from plant_viewer.placement import PlacementResolver
+from plant_viewer.testing import build_sample_model
+
+
+def build_rotated_chain(model, parent=None, depth=3):
+    """Cadeia de IfcLocalPlacement com rotação de 90° em Z e translação em cada nível."""
+    placement = parent
+    for _ in range(depth):
+        axis = model.createIfcAxis2Placement3D(
+            model.createIfcCartesianPoint((1.0, 0.0, 2.0)),
+            model.createIfcDirection((0.0, 0.0, 1.0)),
+            model.createIfcDirection((0.0, 1.0, 0.0)),
+        )
+        placement = model.createIfcLocalPlacement(placement, axis)
+    return placement
+
+
+class PlacementResolverTests(SimpleTestCase):
+    """Testes da composição da cadeia PlacementRelTo."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = build_sample_model(storeys=2, walls_per_storey=3, spaces_per_storey=1)
+
+    def test_rotation_is_composed(self):
+        """Cada nível gira 90° em Z, então as translações locais também giram."""
+        model = build_sample_model(storeys=1, walls_per_storey=0, spaces_per_storey=0)
+        placement = build_rotated_chain(model)
+        matrix = PlacementResolver(model, unit_scale=1.0).matrix(placement)
+
+        # (1,0,2) + Rz90·(1,0,2) + Rz180·(1,0,2) = (0, 1, 6)
+        np.testing.assert_allclose(matrix[:3, 3], (0.0, 1.0, 6.0), atol=1e-9)
+
+    def test_matches_ifcopenshell(self):
+        """O resultado coincide com ifcopenshell.util.placement para todos os produtos."""
+        resolver = PlacementResolver(self.model, unit_scale=1.0)
+        origins = resolver.world_coordinates()
+
+        for product in self.model.by_type('IfcProduct'):
+            if product.ObjectPlacement is None:
+                continue
+            expected = ifcopenshell.util.placement.get_local_placement(product.ObjectPlacement)[:3, 3]
+            np.testing.assert_allclose(origins[product.id()], expected, atol=1e-9)
+
+    def test_shared_parents_resolved_once(self):
+        """Placements compartilhados são memorizados: um cálculo por placement."""
+        resolver = PlacementResolver(self.model, unit_scale=1.0)
+        resolver.world_coordinates()
+
+        self.assertEqual(len(resolver), len(self.model.by_type('IfcLocalPlacement')))
+
+    def test_processor_coordinates(self):
+        """O processador expõe coordenadas globais em metros."""
+        processor = IFCProcessor('memória')
+        processor.model = self.model
+
+        wall = next(w for w in self.model.by_type('IfcWall') if w.Name == 'Parede 1-2')
+        coordinates = processor._extract_element_coordinates(wall)
+
+        self.assertTrue(coordinates['has_coordinates'])
+        self.assertAlmostEqual(coordinates['x'], 4.0)
+        self.assertAlmostEqual(coordinates['z'], 3.0)
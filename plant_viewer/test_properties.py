@@ -0,0 +1,173 @@
+"""
+Testes para a extração de property sets e o armazenamento de propriedades.
+"""
+
+import shutil
+import tempfile
+from unittest import mock
+
+import ifcopenshell.api.pset
+import ifcopenshell.api.root
+import ifcopenshell.api.type
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from plant_viewer.models import BuildingPlan, IfcProperty
+from plant_viewer.properties import extract_property_sets, format_property_value
+from plant_viewer.testing import build_sample_model
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def build_model_with_properties():
+    """Modelo de teste com tipo de parede, psets de tipo/instância e quantidades."""
+    model = build_sample_model(storeys=1, walls_per_storey=3, spaces_per_storey=1)
+    walls = model.by_type('IfcWall')
+
+    wall_type = ifcopenshell.api.root.create_entity(model, ifc_class='IfcWallType', name='Parede Padrão')
+    ifcopenshell.api.type.assign_type(model, related_objects=walls, relating_type=wall_type)
+    type_pset = ifcopenshell.api.pset.add_pset(model, product=wall_type, name='Pset_WallCommon')
+    ifcopenshell.api.pset.edit_pset(model, pset=type_pset, properties={'FireRating': '1h', 'IsExternal': False})
+
+    instance_pset = ifcopenshell.api.pset.add_pset(model, product=walls[0], name='Pset_WallCommon')
+    ifcopenshell.api.pset.edit_pset(model, pset=instance_pset, properties={'FireRating': '2h'})
+
+    qto = ifcopenshell.api.pset.add_qto(model, product=walls[0], name='Qto_WallBaseQuantities')
+    ifcopenshell.api.pset.edit_qto(model, qto=qto, properties={'Length': 1.5})
+
+    storey_pset = ifcopenshell.api.pset.add_pset(
+        model, product=model.by_type('IfcBuildingStorey')[0], name='Pset_Nivel'
+    )
+    ifcopenshell.api.pset.edit_pset(model, pset=storey_pset, properties={'Uso': 'Garagem'})
+    return model
+
+
+class PropertyValueTests(SimpleTestCase):
+    """Testes de conversão de valores de propriedade em texto."""
+
+    def setUp(self):
+        self.model = build_sample_model(storeys=1, walls_per_storey=0, spaces_per_storey=0)
+
+    def test_enumerated_value(self):
+        prop = self.model.createIfcPropertyEnumeratedValue(
+            'Status', None,
+            [self.model.createIfcLabel('NEW'), self.model.createIfcLabel('EXISTING')]
+        )
+        self.assertEqual(format_property_value(prop), 'NEW, EXISTING')
+
+    def test_bounded_value(self):
+        prop = self.model.createIfcPropertyBoundedValue(
+            'Temperatura', None,
+            self.model.createIfcReal(30.0), self.model.createIfcReal(10.0)
+        )
+        self.assertEqual(format_property_value(prop), '10.0..30.0')
+
+    def test_list_value(self):
+        prop = self.model.createIfcPropertyListValue(
+            'Cores', None, [self.model.createIfcLabel('Azul'), self.model.createIfcLabel('Branco')]
+        )
+        self.assertEqual(format_property_value(prop), 'Azul, Branco')
+
+    def test_quantity(self):
+        quantity = self.model.createIfcQuantityArea('NetArea', None, None, 12.5)
+        self.assertEqual(format_property_value(quantity), '12.5')
+
+    def test_type_properties_are_inherited_and_overridden(self):
+        """A instância herda o pset do tipo e sobrescreve os valores próprios."""
+        model = build_model_with_properties()
+        first, second = model.by_type('IfcWall')[:2]
+
+        property_sets = extract_property_sets(model)
+
+        self.assertEqual(property_sets[first.id()]['Pset_WallCommon']['FireRating'], ('2h', 'instance'))
+        self.assertEqual(property_sets[first.id()]['Pset_WallCommon']['IsExternal'], ('False', 'type'))
+        self.assertEqual(property_sets[second.id()]['Pset_WallCommon']['FireRating'], ('1h', 'type'))
+        self.assertEqual(property_sets[first.id()]['Qto_WallBaseQuantities']['Length'], ('1.5', 'instance'))
+
+    def test_malformed_relation_skips_only_itself(self):
+        """Erro numa relação não descarta as propriedades das relações seguintes."""
+        from plant_viewer import properties
+
+        model = build_model_with_properties()
+        first, second = model.by_type('IfcWall')[:2]
+        broken = first.IsDefinedBy[0].RelatingPropertyDefinition
+        parse = properties.parse_property_definition
+
+        def failing_parse(definition):
+            if definition == broken:
+                raise ValueError('malformado')
+            return parse(definition)
+
+        with mock.patch('plant_viewer.properties.parse_property_definition', side_effect=failing_parse):
+            property_sets = extract_property_sets(model)
+
+        self.assertEqual(property_sets[second.id()]['Pset_WallCommon']['FireRating'], ('1h', 'type'))
+        self.assertEqual(
+            len([sets for sets in property_sets.values() if 'Pset_Nivel' in sets]), 1
+        )
+        self.assertEqual(property_sets[first.id()]['Pset_WallCommon']['FireRating'][1], 'type')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PropertyStoreTests(TestCase):
+    """Testes do armazenamento IfcProperty e dos endpoints que o consultam."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        model = build_model_with_properties()
+        self.wall_ids = [wall.id() for wall in model.by_type('IfcWall')]
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', model.to_string().encode()),
+        )
+        self.plant.extract_metadata(force_update=True)
+        self.client = APIClient()
+
+    def test_extraction_fills_property_table(self):
+        properties = IfcProperty.get_element_property_sets(self.plant, self.wall_ids[0])
+
+        self.assertEqual(properties['Pset_WallCommon']['FireRating'], '2h')
+        self.assertIn('Qto_WallBaseQuantities', properties)
+        self.assertEqual(
+            IfcProperty.objects.filter(plant=self.plant, name='FireRating', source='type').count(), 2
+        )
+
+    def test_filter_by_property_value(self):
+        response = self.client.get(
+            f'/plant/api/plants/{self.plant.pk}/properties/',
+            {'pset': 'Pset_WallCommon', 'prop': 'FireRating', 'value': '1h'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['id'] for r in response.data['results']], self.wall_ids[1:])
+        self.assertEqual(response.data['results'][0]['value'], '1h')
+
+    def test_filter_requires_prop(self):
+        response = self.client.get(f'/plant/api/plants/{self.plant.pk}/properties/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_element_properties_reads_store(self):
+        response = self.client.get(f'/plant/api/plants/{self.plant.pk}/element/{self.wall_ids[0]}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['type'], 'IfcWall')
+        self.assertEqual(response.data['properties']['Pset_WallCommon']['FireRating'], '2h')
+
+    def test_spatial_element_properties_without_ifc(self):
+        """Andares não estão em IfcElement: identificação da estrutura espacial, sem abrir o IFC."""
+        storey_id = IfcProperty.objects.get(plant=self.plant, name='Uso').element_express_id
+        with mock.patch('plant_viewer.ifc_processor.IFCProcessor.open') as open_ifc:
+            response = self.client.get(f'/plant/api/plants/{self.plant.pk}/element/{storey_id}/')
+            missing = self.client.get(f'/plant/api/plants/{self.plant.pk}/element/999999/')
+        open_ifc.assert_not_called()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['type'], 'IfcBuildingStorey')
+        self.assertEqual(response.data['name'], 'Nível 0')
+        self.assertEqual(response.data['properties']['Pset_Nivel']['Uso'], 'Garagem')
+        self.assertEqual(missing.status_code, 404)
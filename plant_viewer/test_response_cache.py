@@ -0,0 +1,111 @@
+"""
+Testes para o cache de respostas serializadas e comprimidas.
+"""
+
+import gzip
+import json
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from plant_viewer import response_cache
+from plant_viewer.models import BuildingPlan
+from plant_viewer.testing import build_sample_model
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-cache-tests'}}
+
+
+class EntryTests(SimpleTestCase):
+    """Codificação das entradas e escolha do Content-Encoding."""
+
+    def test_small_body_is_not_compressed(self):
+        entry = response_cache.encode_entry(b'{"a":1}', 'application/json')
+        self.assertEqual(entry['identity'], b'{"a":1}')
+        self.assertNotIn('gzip', entry)
+
+        response = response_cache.build_response(entry, 'gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'{"a":1}')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_large_body_served_by_accept_encoding(self):
+        body = json.dumps({'values': list(range(1000))}).encode()
+        entry = response_cache.encode_entry(body, 'application/json')
+        self.assertNotIn('identity', entry)
+        self.assertLess(len(entry['gzip']), len(body))
+
+        response = response_cache.build_response(entry, 'deflate, gzip;q=0.8')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        # Cliente sem gzip (ou com q=0) recebe o corpo descompactado
+        for header in ('', 'gzip;q=0'):
+            response = response_cache.build_response(entry, header)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response.content, body)
+            self.assertIn('Accept-Encoding', response['Vary'])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CACHES=LOCMEM_CACHE)
+class CachedEndpointTests(TestCase):
+    """Respostas de metadados servidas a partir do cache."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', build_sample_model(storeys=2).to_string().encode()),
+        )
+        self.plant.extract_metadata()
+        self.url = f'/plant/api/plants/{self.plant.pk}/metadata/'
+
+    def test_hit_skips_view(self):
+        first = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(first.content))
+        self.assertIn('statistics', data)
+
+        # Só a leitura de metadata_updated_at: nenhuma seção nem elemento
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        plain = self.client.get(self.url)
+        self.assertEqual(plain.json(), data)
+        # Corpos diferentes byte a byte: o ETag compartilhado é fraco e ambos variam por Accept-Encoding
+        self.assertEqual(plain['ETag'], first['ETag'])
+        self.assertTrue(first['ETag'].startswith('W/'))
+        for response in (first, plain):
+            self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_refresh_invalidates(self):
+        first = self.client.get(self.url)
+        self.plant.extract_metadata(force_update=True)
+
+        # Nova versão dos metadados: a action volta a ser executada
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertGreater(len(queries), 1)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.json()['statistics'], first.json()['statistics'])
+
+    @override_settings(IFC_RESPONSE_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertGreater(len(queries), 1)
@@ -0,0 +1,75 @@
+"""
+Testes para o índice de busca textual de elementos.
+"""
+
+import shutil
+import tempfile
+
+import ifcopenshell.api.pset
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from plant_viewer.models import BuildingPlan
+from plant_viewer.search import search_elements, tokenize_query
+from plant_viewer.testing import build_sample_model
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ElementSearchTests(TestCase):
+    """Testes de prefixo, ranking, filtro por tipo e valores de propriedades."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        model = build_sample_model(storeys=1, walls_per_storey=3, spaces_per_storey=2)
+        wall = model.by_type('IfcWall')[0]
+        pset = ifcopenshell.api.pset.add_pset(model, product=wall, name='Pset_WallCommon')
+        ifcopenshell.api.pset.edit_pset(model, pset=pset, properties={'Reference': 'Concreto armado'})
+
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', model.to_string().encode()),
+        )
+        self.plant.extract_metadata(force_update=True)
+
+    def test_tokenize_query(self):
+        """Operadores e pontuação são descartados."""
+        self.assertEqual(tokenize_query('Parede "0-1" OR *'), ['parede', '0', '1', 'or'])
+
+    def test_prefix_search(self):
+        """Palavras parciais casam como prefixo."""
+        results = search_elements(self.plant.id, 'pare')
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r['type'] == 'IfcWall' for r in results))
+
+    def test_ranking_prefers_best_match(self):
+        """O elemento com mais termos em comum vem primeiro."""
+        results = search_elements(self.plant.id, 'parede 0-2')
+
+        self.assertEqual(results[0]['name'], 'Parede 0-2')
+
+    def test_property_values_and_type_filter(self):
+        """Valores de propriedades são indexados; type filtra por classe."""
+        self.assertEqual(len(search_elements(self.plant.id, 'concr')), 1)
+        self.assertEqual(search_elements(self.plant.id, 'concr', ifc_type='IfcSpace'), [])
+
+    def test_search_endpoint(self):
+        """O endpoint responde a partir do índice."""
+        response = APIClient().get(f'/plant/api/plants/{self.plant.pk}/search/', {'q': 'sala', 'type': 'IfcSpace'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 2)
+
+    def test_delete_plant_removes_index(self):
+        """Remover a planta limpa o índice."""
+        plant_id = self.plant.id
+        self.plant.delete()
+
+        self.assertEqual(search_elements(plant_id, 'parede'), [])
@@ -0,0 +1,127 @@
+"""
+Testes para o índice espacial STR e os endpoints de consulta espacial.
+"""
+
+import shutil
+import tempfile
+
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from plant_viewer.models import BuildingPlan, IfcElement
+from plant_viewer.spatial_index import STRTree, spatial_index_cache
+from plant_viewer.testing import build_sample_model
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class STRTreeTests(SimpleTestCase):
+    """Compara as consultas da árvore com força bruta em caixas aleatórias."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(42)
+        cls.mins = rng.uniform(0, 100, size=(5000, 3))
+        cls.maxs = cls.mins + rng.uniform(0.1, 3, size=(5000, 3))
+        cls.ids = np.arange(1000, 6000)
+        cls.tree = STRTree(cls.ids, cls.mins, cls.maxs)
+
+    def test_box_query_matches_brute_force(self):
+        lo, hi = np.array([20, 30, 40]), np.array([35, 45, 50])
+        expected = self.ids[np.all((self.mins <= hi) & (self.maxs >= lo), axis=1)]
+
+        self.assertEqual(sorted(self.tree.query_box(lo, hi)), sorted(expected.tolist()))
+
+    def test_point_query_matches_brute_force(self):
+        point = np.array([50.0, 50.0, 50.0])
+        expected = self.ids[np.all((self.mins <= point) & (self.maxs >= point), axis=1)]
+
+        self.assertEqual(sorted(self.tree.query_point(point)), sorted(expected.tolist()))
+
+    def test_nearest_matches_brute_force(self):
+        point = np.array([10.0, 80.0, 55.0])
+        delta = np.maximum(np.maximum(self.mins - point, point - self.maxs), 0.0)
+        distances = np.sqrt((delta * delta).sum(axis=1))
+
+        result = self.tree.nearest(point, k=5)
+
+        np.testing.assert_allclose([d for _, d in result], np.sort(distances)[:5])
+
+    def test_radius_limits_nearest(self):
+        point = np.array([10.0, 80.0, 55.0])
+        within = self.tree.query_radius(point, 3.0)
+
+        self.assertTrue(all(distance <= 3.0 for _, distance in within))
+        self.assertEqual(self.tree.nearest(point, k=10000, max_distance=3.0), within)
+
+    def test_empty_tree(self):
+        tree = STRTree([], np.zeros((0, 3)), np.zeros((0, 3)))
+
+        self.assertEqual(tree.query_box((0, 0, 0), (1, 1, 1)), [])
+        self.assertEqual(tree.nearest((0, 0, 0), k=3), [])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SpatialEndpointTests(TestCase):
+    """Testes dos endpoints spatial/box, spatial/point e spatial/nearest."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        spatial_index_cache.clear()
+        model = build_sample_model(storeys=2, walls_per_storey=3, spaces_per_storey=1)
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', model.to_string().encode()),
+        )
+        self.plant.extract_metadata(force_update=True)
+        self.client = APIClient()
+        self.url = f'/plant/api/plants/{self.plant.pk}/spatial'
+
+    def test_box_endpoint(self):
+        response = self.client.get(f'{self.url}/box/', {
+            'min_x': -1, 'min_y': -1, 'min_z': 0.5, 'max_x': 2.5, 'max_y': 1, 'max_z': 2
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(r['name'] for r in response.data['results']), ['Parede 0-0', 'Parede 0-1'])
+
+    def test_point_endpoint(self):
+        response = self.client.get(f'{self.url}/point/', {'x': 1, 'y': 7, 'z': 4})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['name'] for r in response.data['results']], ['Sala 1-0'])
+
+    def test_nearest_endpoint(self):
+        response = self.client.get(f'{self.url}/nearest/', {'x': 4.5, 'y': -2, 'z': 1, 'k': 2})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(results[0]['name'], 'Parede 0-2')
+        self.assertLessEqual(results[0]['distance'], results[1]['distance'])
+
+    def test_nearest_radius(self):
+        response = self.client.get(f'{self.url}/nearest/', {'x': 0, 'y': -50, 'z': 0, 'radius': 3})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 0)
+
+    def test_missing_coordinates(self):
+        response = self.client.get(f'{self.url}/point/', {'x': 1})
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_rebuilt_after_refresh(self):
+        """Nova extração gera nova árvore (a chave inclui metadata_updated_at)."""
+        self.client.get(f'{self.url}/point/', {'x': 1, 'y': 7, 'z': 4})
+        IfcElement.objects.filter(plant=self.plant, name='Sala 1-0').delete()
+        self.plant.extract_metadata(force_update=True)
+
+        response = self.client.get(f'{self.url}/point/', {'x': 1, 'y': 7, 'z': 4})
+
+        self.assertEqual(response.data['total'], 1)
@@ -0,0 +1,521 @@
+"""
+Testes para a extração de metadados em etapas (fan-out/fan-in no Celery).
+"""
+
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from celery import group
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ifc_monitoring.celery import app
+from plant_viewer.extraction import EXTRACTION_STAGES, PARALLEL_STAGES
+from plant_viewer.locks import (
+    acquire_extraction_lock, is_extraction_locked, release_extraction_lock, renew_extraction_lock,
+)
+from plant_viewer.models import (
+    BuildingPlan, ExtractionJob, ExtractionLock, IfcElement, IfcProperty, MetadataSection, StagedExtractionPart,
+)
+from plant_viewer.notifications import ProgressReporter
+from plant_viewer.tasks import (
+    ExtractionLockLost, abort_metadata_extraction, bulk_process_ifc_files, extraction_workflow, finish_metadata_extraction, process_pending_ifc_files,
+    run_extraction_stage, schedule_extraction,
+)
+from plant_viewer.testing import build_sample_model
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'task-tests'}}
+
+
+def element_rows(plant):
+    return list(
+        IfcElement.objects.filter(plant=plant).order_by('express_id').values_list(
+            'express_id', 'ifc_type', 'storey', 'material', 'search_text', 'bbox_min_x', 'bbox_max_z'
+        )
+    )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IFC_GEOMETRY_CACHE_MB=0, CACHES=LOCMEM_CACHE)
+class StagedExtractionTests(TestCase):
+    """As etapas somadas produzem o mesmo resultado da passagem única."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        content = build_sample_model(storeys=2, spaces_per_storey=1).to_string().encode()
+        self.staged = BuildingPlan.objects.create(name='Etapas', ifc_file=SimpleUploadedFile('a.ifc', content))
+        self.single = BuildingPlan.objects.create(name='Única', ifc_file=SimpleUploadedFile('b.ifc', content))
+
+    def test_stages_match_single_pass(self):
+        self.single.extract_metadata(force_update=True)
+
+        # Linhas pequenas: elementos e propriedades divididos em várias partes
+        with mock.patch.object(StagedExtractionPart, 'CHUNK_SIZE', 3):
+            self.staged.run_extraction_stage('index')
+            for stage in reversed(PARALLEL_STAGES):
+                self.staged.run_extraction_stage(stage)
+        self.assertGreater(StagedExtractionPart.objects.filter(plant=self.staged, part='elements').count(), 1)
+        summary = self.staged.finish_staged_extraction()
+
+        self.assertEqual(summary['mode'], 'staged')
+        staged = BuildingPlan.objects.get(pk=self.staged.pk)
+        self.assertIsNotNone(staged.metadata_updated_at)
+        self.assertEqual(staged.content_hash, self.single.content_hash)
+        self.assertEqual(element_rows(self.staged), element_rows(self.single))
+        self.assertEqual(
+            IfcProperty.objects.filter(plant=self.staged).count(),
+            IfcProperty.objects.filter(plant=self.single).count(),
+        )
+        for section in ('project_info', 'statistics', 'bounds', 'spatial_structure', 'floor_plans'):
+            self.assertEqual(
+                MetadataSection.load(self.staged, section),
+                MetadataSection.load(self.single, section),
+                section,
+            )
+
+        # Tempo de cada etapa persistido na seção extraction
+        stages = MetadataSection.load_all(self.staged)['extraction']['stages']
+        self.assertEqual(set(stages), set(EXTRACTION_STAGES))
+        self.assertTrue(all(report['wall_time_ms'] > 0 for report in stages.values()))
+
+    def test_previous_version_served_until_finish(self):
+        """Uma nova extração só substitui elementos, propriedades e seções na conclusão."""
+        self.staged.extract_metadata(force_update=True)
+        updated_at = self.staged.metadata_updated_at
+        elements = element_rows(self.staged)
+        self.assertTrue(all(row[-1] is not None for row in elements))
+        properties = IfcProperty.objects.filter(plant=self.staged).count()
+        sections = MetadataSection.load_all(self.staged)
+
+        self.staged.run_extraction_stage('index')
+        self.staged.run_extraction_stage('properties')
+        self.staged.run_extraction_stage('geometry')
+
+        self.assertEqual(element_rows(self.staged), elements)
+        self.assertEqual(IfcProperty.objects.filter(plant=self.staged).count(), properties)
+        self.assertEqual(MetadataSection.load_all(self.staged), sections)
+        self.assertEqual(BuildingPlan.objects.get(pk=self.staged.pk).metadata_updated_at, updated_at)
+        with self.assertRaises(ValueError):
+            self.staged.finish_staged_extraction()
+
+        self.staged.run_extraction_stage('spatial_structure')
+        self.staged.finish_staged_extraction()
+        self.assertGreater(BuildingPlan.objects.get(pk=self.staged.pk).metadata_updated_at, updated_at)
+        self.assertEqual(element_rows(self.staged), elements)
+        self.assertEqual(IfcProperty.objects.filter(plant=self.staged).count(), properties)
+        self.assertFalse(StagedExtractionPart.objects.filter(plant=self.staged).exists())
+
+    def test_unknown_stage(self):
+        with self.assertRaises(ValueError):
+            self.staged.run_extraction_stage('render')
+
+    def test_workflow(self):
+        previous = app.conf.task_always_eager, app.conf.task_eager_propagates
+        app.conf.task_always_eager = app.conf.task_eager_propagates = True
+        try:
+            result = extraction_workflow(self.staged.pk).apply().get()
+        finally:
+            app.conf.task_always_eager, app.conf.task_eager_propagates = previous
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(set(result['stages']), set(PARALLEL_STAGES))
+        self.single.extract_metadata(force_update=True)
+        self.assertEqual(element_rows(self.staged), element_rows(self.single))
+
+    def test_bulk_schedules_one_workflow_per_plant(self):
+        with mock.patch.object(group, 'apply_async', autospec=True) as apply_async:
+            apply_async.return_value.id = 'grupo'
+            bulk = bulk_process_ifc_files([self.single.pk, 999999, self.staged.pk])
+
+        scheduled_group = apply_async.call_args.args[0]
+        self.assertEqual(len(scheduled_group.tasks), 2)
+        self.assertEqual(bulk['scheduled'], [self.single.pk, self.staged.pk])
+        self.assertEqual(bulk['missing'], [999999])
+        self.assertEqual(bulk['group_id'], 'grupo')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IFC_GEOMETRY_CACHE_MB=0, CACHES=LOCMEM_CACHE)
+class ExtractionDedupTests(TestCase):
+    """Impressão digital do arquivo e lock de extração por planta."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', build_sample_model().to_string().encode()),
+        )
+        patcher = mock.patch('plant_viewer.tasks.extraction_workflow')
+        self.workflow = patcher.start()
+        self.workflow.return_value.apply_async.return_value.id = 'fluxo'
+        self.addCleanup(patcher.stop)
+
+    def test_lock(self):
+        token = acquire_extraction_lock(self.plant.pk)
+        self.assertIsNotNone(token)
+        self.assertIsNone(acquire_extraction_lock(self.plant.pk))
+        self.assertFalse(release_extraction_lock(self.plant.pk, 'outro'))
+        self.assertTrue(release_extraction_lock(self.plant.pk, token))
+        self.assertIsNotNone(acquire_extraction_lock(self.plant.pk))
+
+    def test_lock_survives_cache_eviction(self):
+        """O lock fica no banco: limpar (ou podar) o cache não o solta."""
+        token = acquire_extraction_lock(self.plant.pk)
+        cache.clear()
+        self.assertTrue(is_extraction_locked(self.plant.pk))
+        self.assertIsNone(acquire_extraction_lock(self.plant.pk))
+        self.assertTrue(release_extraction_lock(self.plant.pk, token))
+
+    def test_expired_lock_is_replaced(self):
+        stale = acquire_extraction_lock(self.plant.pk)
+        ExtractionLock.objects.filter(plant=self.plant).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(is_extraction_locked(self.plant.pk))
+
+        token = acquire_extraction_lock(self.plant.pk)
+        self.assertIsNotNone(token)
+        self.assertFalse(release_extraction_lock(self.plant.pk, stale))
+        self.assertTrue(is_extraction_locked(self.plant.pk))
+
+    def test_stage_renews_lock(self):
+        """Cada etapa renova o lock: retries longos não deixam o fluxo sem ele."""
+        schedule_extraction(self.plant)
+        plant_id, _, lock_token, job_id = self.workflow.call_args.args
+        ExtractionLock.objects.filter(plant=self.plant).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(is_extraction_locked(plant_id))
+
+        run_extraction_stage(plant_id, 'index', lock_token, job_id)
+        self.assertTrue(is_extraction_locked(plant_id))
+        self.assertIsNone(acquire_extraction_lock(plant_id))
+        self.assertGreater(
+            ExtractionLock.objects.get(plant=self.plant).expires_at, timezone.now() + timedelta(seconds=3000)
+        )
+        self.assertFalse(renew_extraction_lock(plant_id, 'outro'))
+
+    def test_content_hash_recorded(self):
+        self.assertFalse(self.plant.is_metadata_current())
+        self.plant.extract_metadata()
+        self.assertEqual(len(self.plant.content_hash), 64)
+        self.assertTrue(self.plant.is_metadata_current())
+
+        with open(self.plant.ifc_file.path, 'ab') as handle:
+            handle.write(b'/* revisado */\n')
+        self.assertFalse(self.plant.is_metadata_current())
+
+    def test_schedule_once(self):
+        first = schedule_extraction(self.plant)
+        self.assertEqual(first['status'], 'scheduled')
+        self.assertEqual(first['workflow_id'], 'fluxo')
+        _, content_hash, lock_token, job_id = self.workflow.call_args.args
+        self.assertEqual(job_id, first['job_id'])
+        self.assertEqual(content_hash, self.plant.get_content_hash())
+
+        # Outro worker ou execução sobreposta do Beat
+        self.assertEqual(schedule_extraction(self.plant)['status'], 'locked')
+        self.assertEqual(self.workflow.call_count, 1)
+
+        # A conclusão do fluxo grava o hash e libera o lock
+        for stage in EXTRACTION_STAGES:
+            self.plant.run_extraction_stage(stage)
+        finish_metadata_extraction([], self.plant.pk, timezone.now().isoformat(), content_hash, lock_token)
+        self.assertFalse(is_extraction_locked(self.plant.pk))
+        self.plant.refresh_from_db()
+        self.assertEqual(schedule_extraction(self.plant)['status'], 'unchanged')
+        self.assertEqual(schedule_extraction(self.plant, force=True)['status'], 'scheduled')
+
+    def test_pending_skips_unchanged_files(self):
+        self.plant.extract_metadata()
+        BuildingPlan.objects.filter(pk=self.plant.pk).update(
+            metadata_updated_at=timezone.now() - timedelta(days=8)
+        )
+        result = process_pending_ifc_files()
+        self.assertEqual(result['scheduled_count'], 0)
+        self.assertEqual(result['unchanged_count'], 1)
+        self.workflow.assert_not_called()
+
+        with open(self.plant.ifc_file.path, 'ab') as handle:
+            handle.write(b'/* revisado */\n')
+        self.assertEqual(process_pending_ifc_files()['scheduled_count'], 1)
+        self.assertEqual(process_pending_ifc_files()['locked_count'], 1)
+        self.assertEqual(self.workflow.call_count, 1)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IFC_GEOMETRY_CACHE_MB=0, CACHES=LOCMEM_CACHE)
+class ExtractionJobApiTests(TestCase):
+    """Metadados ausentes e refresh respondem 202 com o job, sem processar o IFC na requisição."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', build_sample_model().to_string().encode()),
+        )
+        patcher = mock.patch('plant_viewer.tasks.extraction_workflow')
+        self.workflow = patcher.start()
+        self.workflow.return_value.apply_async.return_value.id = 'fluxo'
+        self.addCleanup(patcher.stop)
+
+        self.messages = []
+        layer = mock.Mock()
+
+        async def group_send(group_name, message):
+            self.messages.append((group_name, message))
+
+        layer.group_send = group_send
+        patcher = mock.patch('plant_viewer.notifications._channel_layer', return_value=layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_workflow(self):
+        """Executa as tarefas do fluxo agendado em sequência, como os workers."""
+        plant_id, content_hash, lock_token, job_id = self.workflow.call_args.args
+        results = [run_extraction_stage(plant_id, 'index', lock_token, job_id)]
+        for stage in PARALLEL_STAGES:
+            results.append(run_extraction_stage(plant_id, stage, lock_token, job_id))
+        finish_metadata_extraction(results[1:], plant_id, timezone.now().isoformat(), content_hash, lock_token, job_id)
+
+    def test_metadata_miss_returns_job(self):
+        url = f'/plant/api/plants/{self.plant.pk}/elements/'
+        with mock.patch('plant_viewer.models.BuildingPlan.extract_metadata') as extract:
+            response = self.client.get(url)
+            again = self.client.get(f'/plant/api/plants/{self.plant.pk}/metadata/')
+        extract.assert_not_called()
+
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['job']
+        self.assertEqual(job['status'], 'queued')
+        self.assertEqual(job['reason'], 'metadata_miss')
+        self.assertEqual(response['Location'], job['url'])
+        # Fluxo já agendado: o mesmo job, sem novo agendamento
+        self.assertEqual(again.status_code, 202)
+        self.assertEqual(again.json()['job']['id'], job['id'])
+        self.workflow.assert_called_once()
+
+        self.run_workflow()
+        status = self.client.get(job['url']).json()
+        self.assertEqual(status['status'], ExtractionJob.SUCCEEDED)
+        self.assertEqual(status['progress'], 1.0)
+        self.assertEqual(status['completed_stages'], status['total_stages'])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        # Progresso enviado ao grupo WebSocket da planta
+        groups = {group_name for group_name, _ in self.messages}
+        self.assertEqual(groups, {f'plant_{self.plant.pk}'})
+        states = [message['job']['status'] for _, message in self.messages if message['type'] == 'extraction_job']
+        self.assertEqual(states[0], 'running')
+        self.assertEqual(states[-1], 'succeeded')
+
+    def test_refresh_metadata(self):
+        self.plant.extract_metadata()
+        user = get_user_model().objects.create_user(username='operador', password='senha')
+        self.client.force_login(user)
+
+        response = self.client.post(f'/plant/api/plants/{self.plant.pk}/refresh_metadata/')
+        self.assertEqual(response.status_code, 202)
+        job = ExtractionJob.objects.get(pk=response.json()['job']['id'])
+        self.assertTrue(job.force)
+        self.assertEqual(job.workflow_id, 'fluxo')
+
+        jobs = self.client.get(f'/plant/api/plants/{self.plant.pk}/jobs/').json()['results']
+        self.assertEqual([item['id'] for item in jobs], [str(job.pk)])
+
+    def test_progress_and_early_sections(self):
+        response = self.client.get(f'/plant/api/plants/{self.plant.pk}/statistics/')
+        self.assertEqual(response.status_code, 202)
+        plant_id, _, lock_token, job_id = self.workflow.call_args.args
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_extraction_stage(plant_id, 'index', lock_token, job_id)
+
+        progress = [message['progress'] for _, message in self.messages if message['type'] == 'extraction_progress']
+        self.assertTrue(progress)
+        self.assertEqual(progress[-1]['stage'], 'index')
+        self.assertEqual(progress[-1]['job_id'], job_id)
+        self.assertEqual(progress[-1]['processed'], progress[-1]['total'])
+        self.assertEqual(progress[-1]['percent'], 100.0)
+        ready = [message['sections'] for _, message in self.messages if message['type'] == 'metadata_sections']
+        self.assertEqual(len(ready), 1)
+        self.assertIn('statistics', ready[0]['sections'])
+
+        # Primeira extração ainda em andamento: a seção pronta já é servida
+        self.plant.refresh_from_db()
+        self.assertIsNone(self.plant.metadata_updated_at)
+        with mock.patch('plant_viewer.models.BuildingPlan.extract_metadata') as extract:
+            response = self.client.get(f'/plant/api/plants/{self.plant.pk}/statistics/')
+            pending = self.client.get(f'/plant/api/plants/{self.plant.pk}/metadata/')
+        extract.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_elements'], progress[-1]['total'])
+        self.assertEqual(pending.status_code, 202)
+
+    def test_geometry_stage_progress(self):
+        self.client.get(f'/plant/api/plants/{self.plant.pk}/metadata/')
+        plant_id, _, lock_token, job_id = self.workflow.call_args.args
+        run_extraction_stage(plant_id, 'index', lock_token, job_id)
+        self.messages.clear()
+
+        run_extraction_stage(plant_id, 'geometry', lock_token, job_id)
+
+        progress = [message['progress'] for _, message in self.messages if message['type'] == 'extraction_progress']
+        self.assertEqual({item['stage'] for item in progress}, {'geometry'})
+        phases = {}
+        for item in progress:
+            phases.setdefault(item['phase'], []).append(item)
+        # Tesselação e plantas baixas informam o avanço por forma, não só a varredura dos produtos
+        self.assertEqual(list(phases), ['products', 'geometry', 'floor_plans'])
+        for phase in ('geometry', 'floor_plans'):
+            self.assertEqual(phases[phase][0]['processed'], 0)
+            self.assertGreater(phases[phase][-1]['total'], 0)
+            self.assertEqual(phases[phase][-1]['processed'], phases[phase][-1]['total'])
+            self.assertEqual(phases[phase][-1]['percent'], 100.0)
+
+    def test_failed_stage(self):
+        self.client.get(f'/plant/api/plants/{self.plant.pk}/metadata/')
+        plant_id, _, lock_token, job_id = self.workflow.call_args.args
+        run_extraction_stage(plant_id, 'index', lock_token, job_id)
+        with mock.patch('plant_viewer.models.BuildingPlan.run_extraction_stage', side_effect=ValueError('corrompido')):
+            with self.assertRaises(ValueError):
+                run_extraction_stage.apply(args=(plant_id, 'properties', lock_token, job_id), retries=3).get()
+
+        job = ExtractionJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, ExtractionJob.FAILED)
+        self.assertIn('corrompido', job.error)
+        # Resultado parcial descartado; o lock fica com o fluxo até o callback do chord
+        self.assertFalse(StagedExtractionPart.objects.filter(plant_id=plant_id).exists())
+        self.assertTrue(is_extraction_locked(plant_id))
+
+        # Etapa irmã que começa ou termina depois da falha não reabre o job
+        ExtractionJob.stage_started(job_id, 'geometry')
+        ExtractionJob.stage_finished(job_id, 'geometry')
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExtractionJob.FAILED)
+        self.assertEqual(job.completed_stages, 1)
+
+        # Terminadas as etapas irmãs, o Celery chama o callback de erro
+        run_extraction_stage(plant_id, 'geometry', lock_token, job_id)
+        result = abort_metadata_extraction(plant_id, lock_token, job_id)
+        self.assertTrue(result['released'])
+        self.assertFalse(is_extraction_locked(plant_id))
+        self.assertFalse(StagedExtractionPart.objects.filter(plant_id=plant_id).exists())
+        job.refresh_from_db()
+        self.assertIn('corrompido', job.error)
+
+    def test_failed_flow_keeps_new_flow_parts(self):
+        self.client.get(f'/plant/api/plants/{self.plant.pk}/metadata/')
+        plant_id, _, old_token, old_job = self.workflow.call_args.args
+        run_extraction_stage(plant_id, 'index', old_token, old_job)
+        ExtractionJob.failed(old_job, 'etapa falhou')
+        release_extraction_lock(plant_id, old_token)
+
+        # Fluxo novo começa; uma etapa atrasada do antigo ainda grava e depois é descartada
+        self.assertEqual(schedule_extraction(self.plant, force=True)['status'], 'scheduled')
+        _, _, new_token, new_job = self.workflow.call_args.args
+        self.assertNotEqual(new_job, old_job)
+        run_extraction_stage(plant_id, 'index', new_token, new_job)
+        # O lock agora é do fluxo novo: a etapa do antigo não o renova e falha sem gravar
+        with self.assertRaises(ExtractionLockLost):
+            run_extraction_stage(plant_id, 'geometry', old_token, old_job)
+        abort_metadata_extraction(plant_id, old_token, old_job)
+        self.assertEqual(ExtractionJob.objects.get(pk=old_job).error, 'etapa falhou')
+
+        self.assertFalse(StagedExtractionPart.objects.filter(job_id=old_job).exists())
+        self.assertTrue(is_extraction_locked(plant_id))
+        for stage in PARALLEL_STAGES:
+            run_extraction_stage(plant_id, stage, new_token, new_job)
+        self.assertEqual(
+            set(StagedExtractionPart.reports(self.plant, new_job)), set(EXTRACTION_STAGES)
+        )
+        finish_metadata_extraction([], plant_id, timezone.now().isoformat(), '', new_token, new_job)
+        self.assertEqual(ExtractionJob.objects.get(pk=new_job).status, ExtractionJob.SUCCEEDED)
+        self.assertFalse(StagedExtractionPart.objects.filter(plant_id=plant_id).exists())
+        self.assertFalse(is_extraction_locked(plant_id))
+
+    def test_unknown_job(self):
+        response = self.client.get(f'/plant/api/plants/{self.plant.pk}/jobs/{"0" * 32}/')
+        self.assertEqual(response.status_code, 404)
+
+
+class ProgressReporterTests(TestCase):
+    """Eventos de progresso com limite de frequência."""
+
+    def setUp(self):
+        cache.clear()
+        self.messages = []
+        self.layer = mock.Mock()
+
+        async def group_send(group_name, message):
+            self.messages.append(message)
+
+        self.layer.group_send = group_send
+
+    def test_coalesces_updates(self):
+        reporter = ProgressReporter(7, 'index', job_id='job', min_interval=60, channel_layer=self.layer)
+        for processed in range(1, 101):
+            reporter.update(processed, 100)
+        # Só o primeiro evento sai dentro do intervalo; o último fica retido até o flush
+        self.assertEqual(len(self.messages), 1)
+        self.assertEqual(self.messages[0]['progress']['processed'], 1)
+        reporter.flush()
+        reporter.flush()
+        self.assertEqual(reporter.events_sent, 2)
+
+        progress = self.messages[-1]['progress']
+        self.assertEqual(self.messages[-1]['type'], 'extraction_progress')
+        self.assertEqual((progress['plant_id'], progress['stage'], progress['job_id']), (7, 'index', 'job'))
+        self.assertEqual((progress['processed'], progress['total'], progress['percent']), (100, 100, 100.0))
+        self.assertEqual(progress['eta_s'], 0)
+        self.assertGreater(progress['rss_mb'], 0)
+
+    def test_interval_zero_sends_every_update(self):
+        reporter = ProgressReporter(7, 'index', min_interval=0, channel_layer=self.layer)
+        for processed in range(1, 4):
+            reporter.update(processed, 3)
+        self.assertEqual([message['progress']['processed'] for message in self.messages], [1, 2, 3])
+
+    def test_interval_is_per_plant(self):
+        """Etapas paralelas da mesma planta dividem o mesmo intervalo mínimo."""
+        stages = [
+            ProgressReporter(7, stage, min_interval=60, channel_layer=self.layer)
+            for stage in PARALLEL_STAGES
+        ]
+        for processed in range(1, 11):
+            for reporter in stages:
+                reporter.update(processed, 10)
+        self.assertEqual(len(self.messages), 1)
+
+        # Outra planta não é afetada
+        ProgressReporter(8, 'geometry', min_interval=60, channel_layer=self.layer).update(1, 10)
+        self.assertEqual([message['progress']['plant_id'] for message in self.messages], [7, 8])
+
+        # O valor retido de cada etapa ainda sai no flush
+        for reporter in stages:
+            reporter.flush()
+        self.assertEqual(len(self.messages), 2 + len(PARALLEL_STAGES))
+
+    def test_without_channel_layer(self):
+        with mock.patch('plant_viewer.notifications._channel_layer', return_value=None):
+            reporter = ProgressReporter(7, 'index')
+        reporter.update(1, 10)
+        reporter.flush()
+        reporter.sections_ready(['statistics'])
+        self.assertFalse(reporter.enabled)
+        self.assertEqual(reporter.events_sent, 0)
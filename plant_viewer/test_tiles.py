@@ -0,0 +1,131 @@
+"""
+Testes para os tiles de geometria por andar e célula de grade.
+"""
+
+import os
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from plant_viewer.gltf import convert_ifc_to_glb, read_glb
+from plant_viewer.ifc_processor import IFCProcessor
+from plant_viewer.models import BuildingPlan
+from plant_viewer.testing import build_sample_model
+from plant_viewer.tiles import TileSet
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def storey_map(model):
+    processor = IFCProcessor.__new__(IFCProcessor)
+    processor.model = model
+    return processor.get_storey_map()
+
+
+class TileSetTests(SimpleTestCase):
+    """Distribuição dos nós em tiles e manifesto."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = build_sample_model(storeys=2, walls_per_storey=3, columns_per_storey=4)
+        cls.directory = tempfile.mkdtemp()
+        tiles = TileSet(4.0, storey_map(cls.model), quantize=False)
+        cls.stats = convert_ifc_to_glb(
+            cls.model, os.path.join(cls.directory, 'full.glb'), num_threads=1, compression_level=0,
+            tiles=tiles, tiles_dir=cls.directory,
+        )
+        cls.manifest = cls.stats['tiles']
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def test_every_node_in_one_tile(self):
+        global_ids = []
+        for tile in self.manifest['tiles']:
+            with open(tile['path'], 'rb') as handle:
+                document, _ = read_glb(handle.read())
+            node_ids = document['scenes'][0]['extras']['ifc_nodes']
+            self.assertEqual(len(node_ids), tile['nodes'])
+            self.assertEqual(os.path.getsize(tile['path']), tile['size_bytes'])
+            global_ids += node_ids
+        self.assertEqual(len(global_ids), self.stats['nodes'])
+        self.assertEqual(len(set(global_ids)), len(global_ids))
+
+    def test_tiles_split_by_storey_and_cell(self):
+        storeys = self.manifest['storeys']
+        self.assertEqual([storey['name'] for storey in storeys], ['Nível 0', 'Nível 1'])
+
+        by_storey = {}
+        for tile in self.manifest['tiles']:
+            by_storey.setdefault(tile['storey'], []).append(tile)
+            # A célula contém o centro dos limites do tile
+            center = [(low + high) / 2 for low, high in zip(tile['bounds']['min'], tile['bounds']['max'])]
+            self.assertEqual(tile['cell'], [int(center[0] // 4.0), int(center[1] // 4.0)])
+        self.assertEqual(set(by_storey), {storey['id'] for storey in storeys})
+        self.assertGreater(len(by_storey[storeys[0]['id']]), 1)
+
+        # Tiles do andar de cima ficam acima do andar de baixo
+        upper = by_storey[storeys[1]['id']]
+        self.assertTrue(all(tile['bounds']['min'][2] >= 3.0 for tile in upper))
+
+    def test_invalid_tile_size(self):
+        with self.assertRaises(ValueError):
+            TileSet(0, {})
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IFC_GLB_TILE_SIZE=4.0)
+class TileApiTests(TestCase):
+    """Manifesto e download dos tiles pela API."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.plant = BuildingPlan.objects.create(
+            name='Planta IFC',
+            ifc_file=SimpleUploadedFile('modelo.ifc', build_sample_model(columns_per_storey=2).to_string().encode()),
+        )
+
+    def test_manifest_and_tile_download(self):
+        response = self.client.get(f'/plant/api/plants/{self.plant.id}/tiles/')
+        self.assertEqual(response.status_code, 404)
+
+        self.plant.build_glb(num_threads=1, lod=False)
+        detail = self.client.get(f'/plant/api/plants/{self.plant.id}/?include_metadata=false').json()
+        manifest = self.client.get(detail['glb_tiles_url']).json()
+        self.assertEqual(sum(tile['nodes'] for tile in manifest['tiles']), 5)
+
+        tile = manifest['tiles'][0]
+        self.assertNotIn('file', tile)
+        response = self.client.get(tile['url'], HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{tile["etag"]}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        document, _ = read_glb(b''.join(response.streaming_content))
+        self.assertEqual(len(document['scenes'][0]['extras']['ifc_nodes']), tile['nodes'])
+
+        # Revalidação sem versão na URL
+        url = f"/plant/api/plants/{self.plant.id}/tiles/{tile['id']}/"
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"{tile["etag"]}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        response = self.client.get(f'/plant/api/plants/{self.plant.id}/tiles/s0_99_99/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_rebuild_removes_previous_tiles(self):
+        self.plant.build_glb(num_threads=1, lod=False)
+        previous = [tile['file'] for tile in self.plant.get_glb_tiles().values()]
+        self.plant.build_glb(force=True, num_threads=1, lod=False)
+        current = {tile['file'] for tile in self.plant.get_glb_tiles().values()}
+
+        storage = self.plant.glb_file.storage
+        self.assertTrue(all(storage.exists(name) for name in current))
+        self.assertFalse(any(storage.exists(name) for name in previous if name not in current))
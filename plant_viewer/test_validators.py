@@ -2,7 +2,7 @@
 Testes para validators do plant_viewer.
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
 from plant_viewer.models import validate_ifc_file_size, validate_ifc_content
@@ -22,9 +22,10 @@ class IFCValidatorTests(TestCase):
         except ValidationError:
             self.fail("Arquivo válido não deveria gerar erro")
     
+    @override_settings(IFC_MAX_UPLOAD_MB=100)
     def test_validate_ifc_file_size_too_large(self):
         """Testa validação de tamanho com arquivo muito grande."""
-        # Arquivo de 101MB (inválido)
+        # Arquivo de 101MB (inválido com limite de 100MB)
         content = b'x' * (101 * 1024 * 1024)
         file = SimpleUploadedFile("test.ifc", content)
         
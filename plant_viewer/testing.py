@@ -0,0 +1,95 @@
+"""
+Utilitários de teste: construção de modelos IFC pequenos em memória.
+"""
+
+import numpy as np
+import ifcopenshell
+import ifcopenshell.api.aggregate
+import ifcopenshell.api.context
+import ifcopenshell.api.geometry
+import ifcopenshell.api.project
+import ifcopenshell.api.root
+import ifcopenshell.api.spatial
+import ifcopenshell.api.type
+import ifcopenshell.api.unit
+
+
+def translation(x=0.0, y=0.0, z=0.0) -> np.ndarray:
+    """Matriz 4x4 de translação."""
+    matrix = np.eye(4)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+
+def build_sample_model(storeys=1, walls_per_storey=3, spaces_per_storey=1, storey_height=3.0,
+                       columns_per_storey=0):
+    """
+    Cria um modelo IFC4 com projeto, site, edifício, andares, paredes e espaços.
+
+    Paredes de 1.5 x 0.2 x 3 m espaçadas 2 m em X; espaços de 4 x 4 x 3 m.
+    Pilares de 0.3 x 0.3 x 3 m espaçados 3 m em X (y = -2) compartilham a
+    representação do IfcColumnType (IfcMappedItem).
+
+    Returns:
+        ifcopenshell.file: Modelo em memória
+    """
+    model = ifcopenshell.api.project.create_file(version='IFC4')
+    project = ifcopenshell.api.root.create_entity(model, ifc_class='IfcProject', name='Projeto Teste')
+    ifcopenshell.api.unit.assign_unit(model)
+    context = ifcopenshell.api.context.add_context(model, context_type='Model')
+    body = ifcopenshell.api.context.add_context(
+        model, context_type='Model', context_identifier='Body',
+        target_view='MODEL_VIEW', parent=context
+    )
+
+    site = ifcopenshell.api.root.create_entity(model, ifc_class='IfcSite', name='Site')
+    building = ifcopenshell.api.root.create_entity(model, ifc_class='IfcBuilding', name='Edifício')
+    ifcopenshell.api.aggregate.assign_object(model, relating_object=project, products=[site])
+    ifcopenshell.api.aggregate.assign_object(model, relating_object=site, products=[building])
+
+    column_type = None
+    if columns_per_storey:
+        column_type = ifcopenshell.api.root.create_entity(model, ifc_class='IfcColumnType', name='Pilar 30x30')
+        representation = ifcopenshell.api.geometry.add_wall_representation(
+            model, context=body, length=0.3, height=3.0, thickness=0.3
+        )
+        ifcopenshell.api.geometry.assign_representation(model, product=column_type, representation=representation)
+
+    for level in range(storeys):
+        elevation = level * storey_height
+        storey = ifcopenshell.api.root.create_entity(model, ifc_class='IfcBuildingStorey', name=f'Nível {level}')
+        storey.Elevation = elevation
+        ifcopenshell.api.geometry.edit_object_placement(model, product=storey, matrix=translation(z=elevation))
+        ifcopenshell.api.aggregate.assign_object(model, relating_object=building, products=[storey])
+
+        for index in range(walls_per_storey):
+            wall = ifcopenshell.api.root.create_entity(model, ifc_class='IfcWall', name=f'Parede {level}-{index}')
+            ifcopenshell.api.geometry.edit_object_placement(
+                model, product=wall, matrix=translation(x=index * 2.0, z=elevation)
+            )
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                model, context=body, length=1.5, height=3.0, thickness=0.2
+            )
+            ifcopenshell.api.geometry.assign_representation(model, product=wall, representation=representation)
+            ifcopenshell.api.spatial.assign_container(model, relating_structure=storey, products=[wall])
+
+        for index in range(spaces_per_storey):
+            space = ifcopenshell.api.root.create_entity(model, ifc_class='IfcSpace', name=f'Sala {level}-{index}')
+            ifcopenshell.api.geometry.edit_object_placement(
+                model, product=space, matrix=translation(y=5.0 + index * 5.0, z=elevation)
+            )
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                model, context=body, length=4.0, height=3.0, thickness=4.0
+            )
+            ifcopenshell.api.geometry.assign_representation(model, product=space, representation=representation)
+            ifcopenshell.api.aggregate.assign_object(model, relating_object=storey, products=[space])
+
+        for index in range(columns_per_storey):
+            column = ifcopenshell.api.root.create_entity(model, ifc_class='IfcColumn', name=f'Pilar {level}-{index}')
+            ifcopenshell.api.geometry.edit_object_placement(
+                model, product=column, matrix=translation(x=index * 3.0, y=-2.0, z=elevation)
+            )
+            ifcopenshell.api.type.assign_type(model, related_objects=[column], relating_type=column_type)
+            ifcopenshell.api.spatial.assign_container(model, relating_structure=storey, products=[column])
+
+    return model
@@ -0,0 +1,186 @@
+"""
+Divisão da geometria exportada em tiles por andar e célula de grade.
+
+Cada elemento vai para o tile do seu andar (IfcBuildingStorey) e da
+célula da grade horizontal que contém o centro da sua caixa envolvente.
+Cada tile é um GLB independente, com os mesmos nós e extras do GLB
+completo (malhas repetidas dentro do tile continuam instanciadas), e o
+manifesto lista limites, tamanhos e ETag de cada tile para o visualizador
+buscar só o que está no campo de visão, do mais próximo ao mais distante.
+
+Limites e células usam as coordenadas do modelo (Z para cima), antes da
+rotação para o Y para cima do glTF.
+"""
+
+import hashlib
+import math
+import os
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings as django_settings
+
+from .gltf import GlbBuilder, MeshArrays, _write_glb
+
+logger = logging.getLogger(__name__)
+
+# Tile dos elementos que não estão contidos em nenhum andar
+NO_STOREY = 0
+
+
+def get_glb_tile_size() -> float:
+    """Lado da célula da grade em metros (IFC_GLB_TILE_SIZE; 0 desativa os tiles)."""
+    return float(getattr(django_settings, 'IFC_GLB_TILE_SIZE', 25.0))
+
+
+def tile_id(storey_id: int, cell: Tuple[int, int]) -> str:
+    """Identificador do tile, usado na URL e no nome do arquivo."""
+    return f's{storey_id}_{cell[0]}_{cell[1]}'
+
+
+def _bounds(points: np.ndarray) -> Dict[str, List[float]]:
+    return {
+        'min': [round(float(v), 4) for v in points.min(axis=0)],
+        'max': [round(float(v), 4) for v in points.max(axis=0)],
+    }
+
+
+class _Tile:
+    """GLB em construção de um tile."""
+
+    def __init__(self, storey_id: int, cell: Tuple[int, int], quantize: bool):
+        self.storey_id = storey_id
+        self.cell = cell
+        self.builder = GlbBuilder(quantize=quantize)
+        self.meshes: Dict[int, Optional[int]] = {}
+        self.children: List[int] = []
+        self.node_ids: Dict[str, int] = {}
+        self.corners: List[np.ndarray] = []
+
+
+class TileSet:
+    """
+    Distribui os nós da conversão GLB em tiles (ver gltf.convert_ifc_to_glb).
+
+    Args:
+        tile_size: Lado da célula da grade em metros
+        storey_map: {express_id do produto: IfcBuildingStorey}, como em
+                    IFCProcessor.get_storey_map()
+        quantize: Codificação das malhas dos tiles (a mesma do GLB completo)
+    """
+
+    def __init__(self, tile_size: float, storey_map: Dict[int, Any], quantize: bool = True):
+        if tile_size <= 0:
+            raise ValueError('O tamanho do tile deve ser positivo')
+        self.tile_size = tile_size
+        self.storey_map = storey_map
+        self.quantize = quantize
+        self.tiles: Dict[Tuple[int, Tuple[int, int]], _Tile] = {}
+        self._local_corners: Dict[int, np.ndarray] = {}
+
+    def _corners(self, mesh: int, arrays: MeshArrays) -> np.ndarray:
+        """Oito cantos da caixa local da malha (calculados uma vez por malha)."""
+        if mesh not in self._local_corners:
+            low, high = arrays.positions.min(axis=0), arrays.positions.max(axis=0)
+            self._local_corners[mesh] = np.array(
+                [[(low, high)[i][0], (low, high)[j][1], (low, high)[k][2]]
+                 for i in (0, 1) for j in (0, 1) for k in (0, 1)]
+            )
+        return self._local_corners[mesh]
+
+    def add(self, mesh: int, arrays: MeshArrays, matrix, global_id: str, extras: Dict[str, Any]):
+        """
+        Adiciona um nó ao tile do seu andar e célula.
+
+        Args:
+            mesh: Índice da malha no GLB completo (chave de instanciamento)
+            arrays: Malha completa
+            matrix: Matriz 4x4 do nó em ordem de coluna
+            global_id: GlobalId do elemento
+            extras: Extras do nó (ifcId, global_id, type, name)
+        """
+        placement = np.asarray(matrix, dtype=np.float64).reshape(4, 4).T
+        corners = self._corners(mesh, arrays) @ placement[:3, :3].T + placement[:3, 3]
+        center = (corners.min(axis=0) + corners.max(axis=0)) / 2
+        cell = (math.floor(center[0] / self.tile_size), math.floor(center[1] / self.tile_size))
+
+        storey = self.storey_map.get(extras['ifcId'])
+        storey_id = storey.id() if storey is not None else NO_STOREY
+        tile = self.tiles.get((storey_id, cell))
+        if tile is None:
+            tile = self.tiles[(storey_id, cell)] = _Tile(storey_id, cell, self.quantize)
+
+        if mesh not in tile.meshes:
+            tile.meshes[mesh] = tile.builder.add_mesh(arrays, name=extras['type'])
+        if tile.meshes[mesh] is None:
+            return
+        node = tile.builder.add_node(mesh=tile.meshes[mesh], matrix=matrix, name=global_id, extras=extras)
+        tile.children.append(node)
+        tile.node_ids[global_id] = node
+        tile.corners.append(corners)
+
+    def _storeys(self) -> List[Dict[str, Any]]:
+        """Andares com tiles, ordenados pela elevação."""
+        storeys = {}
+        for storey in self.storey_map.values():
+            if storey.id() in storeys:
+                continue
+            storeys[storey.id()] = {
+                'id': storey.id(),
+                'global_id': storey.GlobalId,
+                'name': storey.Name or f'IfcBuildingStorey_{storey.id()}',
+                'elevation': float(storey.Elevation) if getattr(storey, 'Elevation', None) is not None else None,
+            }
+        used = {tile.storey_id for tile in self.tiles.values()}
+        return sorted(
+            (data for key, data in storeys.items() if key in used),
+            key=lambda data: (data['elevation'] is None, data['elevation'] or 0.0, data['id']),
+        )
+
+    def write(self, output_dir: str, compression_level: int) -> Dict[str, Any]:
+        """
+        Grava um GLB por tile em output_dir ({id}.glb).
+
+        Returns:
+            dict: Manifesto com tile_size, bounds, storeys e tiles (id, storey,
+                  cell, bounds, nodes, triangles, size_bytes, etag, path)
+        """
+        storeys = self._storeys()
+        order = {data['id']: position for position, data in enumerate(storeys)}
+        tiles = sorted(
+            (tile for tile in self.tiles.values() if tile.children),
+            key=lambda tile: (order.get(tile.storey_id, len(order)), tile.cell),
+        )
+
+        entries = []
+        for tile in tiles:
+            identifier = tile_id(tile.storey_id, tile.cell)
+            path = os.path.join(output_dir, f'{identifier}.glb')
+            written = _write_glb(tile.builder, tile.children, tile.node_ids, path, compression_level)
+            with open(path, 'rb') as handle:
+                etag = hashlib.blake2b(handle.read(), digest_size=12).hexdigest()
+            entries.append({
+                'id': identifier,
+                'storey': tile.storey_id if tile.storey_id != NO_STOREY else None,
+                'cell': list(tile.cell),
+                'bounds': _bounds(np.vstack(tile.corners)),
+                'nodes': len(tile.children),
+                'triangles': written['triangles'],
+                'size_bytes': written['size_bytes'],
+                'etag': etag,
+                'path': path,
+            })
+
+        manifest = {
+            'tile_size': self.tile_size,
+            'bounds': _bounds(np.array([point for entry in entries for point in entry['bounds'].values()]))
+            if entries else None,
+            'storeys': storeys,
+            'tiles': entries,
+        }
+        logger.info(
+            f"{len(entries)} tiles gravados em {output_dir} "
+            f"({len(storeys)} andares, células de {self.tile_size} m)"
+        )
+        return manifest
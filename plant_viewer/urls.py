@@ -31,13 +31,25 @@ urlpatterns = [
     #   PATCH  /plant-viewer/api/plants/{id}/                - Atualizar parcial
     #   DELETE /plant-viewer/api/plants/{id}/                - Remover planta
     #   GET    /plant-viewer/api/plants/{id}/metadata/       - Metadados IFC
-    #   POST   /plant-viewer/api/plants/{id}/refresh_metadata/ - Atualizar metadados
-    #   GET    /plant-viewer/api/plants/{id}/elements/       - Elementos por tipo
+    #   POST   /plant-viewer/api/plants/{id}/refresh_metadata/ - Agendar extração (202 + job)
+    #   GET    /plant-viewer/api/plants/{id}/jobs/           - Jobs de extração recentes
+    #   GET    /plant-viewer/api/plants/{id}/jobs/{job_id}/  - Status e progresso de um job
+    #   GET    /plant-viewer/api/plants/{id}/elements/       - Elementos paginados (cursor)
+    #   GET    /plant-viewer/api/plants/{id}/elements/totals/ - Contagens por tipo e andar
     #   GET    /plant-viewer/api/plants/{id}/element/{element_id}/ - Propriedades elemento
+    #   GET    /plant-viewer/api/plants/{id}/properties/?pset=&prop=&value= - Filtrar por propriedade
     #   GET    /plant-viewer/api/plants/{id}/statistics/     - Estatísticas
     #   GET    /plant-viewer/api/plants/{id}/spatial_structure/ - Estrutura espacial
     #   GET    /plant-viewer/api/plants/{id}/bounds/         - Limites do modelo
+    #   GET    /plant-viewer/api/plants/{id}/floor_plan/     - Andares com planta baixa
+    #   GET    /plant-viewer/api/plants/{id}/floor_plan/{storey_id}/?output=geojson|svg - Planta baixa do andar
+    #   GET    /plant-viewer/api/plants/{id}/glb/?lod=       - Geometria em glTF binário (LOD opcional)
+    #   GET    /plant-viewer/api/plants/{id}/tiles/          - Manifesto dos tiles de geometria
+    #   GET    /plant-viewer/api/plants/{id}/tiles/{tile_id}/ - GLB de um tile
     #   GET    /plant-viewer/api/plants/{id}/search/?q=nome  - Buscar elementos
+    #   GET    /plant-viewer/api/plants/{id}/spatial/box/    - Elementos na caixa
+    #   GET    /plant-viewer/api/plants/{id}/spatial/point/  - Elementos no ponto
+    #   GET    /plant-viewer/api/plants/{id}/spatial/nearest/ - Vizinhos mais próximos
     path('api/', include(router.urls)),
     
     # API legada (DEPRECATED - manter por compatibilidade)
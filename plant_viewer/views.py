@@ -1,7 +1,10 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
 from django.views.generic import ListView, DetailView
-from .models import BuildingPlan
+from .models import BuildingPlan, IfcProperty
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def main_plant_view(request):
@@ -69,6 +72,7 @@ def get_plant_data_api(request, plant_id):
 
 # ==================== REST API ViewSets ====================
 
+from django.db.models import Count
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -78,10 +82,80 @@ from .serializers import (
     BuildingPlanListSerializer,
     BuildingPlanCreateSerializer,
     ElementPropertiesSerializer,
+    ExtractionJobSerializer,
     StatisticsSerializer
 )
 
 
+def conditional_metadata(view):
+    """
+    GET condicional para actions derivadas dos metadados da planta.
+    
+    Os dados só mudam com metadata_updated_at, então o ETag combina
+    planta, metadata_updated_at, action, argumentos da URL e query string.
+    O ETag é fraco (W/): o mesmo valor vale para os corpos br, gzip e sem
+    compressão, que não são idênticos byte a byte. If-None-Match/
+    If-Modified-Since válidos respondem 304 lendo apenas
+    metadata_updated_at, sem carregar os metadados. Respostas 200 e 304
+    levam ETag, Last-Modified, Cache-Control (IFC_METADATA_MAX_AGE) e
+    Vary: Accept-Encoding.
+    
+    O corpo das respostas 200 fica serializado e comprimido no cache
+    (ver response_cache); requisições seguintes não executam a action.
+    """
+    import functools
+    import hashlib
+    from django.conf import settings
+    from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+    from django.utils.http import http_date, urlencode
+    from . import response_cache
+    
+    @functools.wraps(view)
+    def wrapper(self, request, pk=None, **kwargs):
+        try:
+            updated_at = self.get_queryset().filter(pk=pk).values_list('metadata_updated_at', flat=True).first()
+        except (ValueError, TypeError):
+            updated_at = None
+        if updated_at is None:
+            # Metadados ainda não extraídos (ou planta inexistente): sem validadores
+            return view(self, request, pk=pk, **kwargs)
+        
+        key = ':'.join((
+            str(pk), updated_at.isoformat(), view.__name__,
+            urlencode(sorted(kwargs.items())), urlencode(sorted(request.query_params.lists()), doseq=True),
+        ))
+        digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        etag = f'W/"{digest}"'
+        last_modified = int(updated_at.timestamp())
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            timeout = response_cache.get_response_cache_timeout()
+            cache_key = response_cache.cache_key(digest, request.build_absolute_uri('/'))
+            entry = response_cache.get_entry(cache_key) if timeout else None
+            if entry is None:
+                response = view(self, request, pk=pk, **kwargs)
+                if response.status_code != 200:
+                    return response
+                body = response_cache.response_body(response) if timeout else None
+                if body is not None:
+                    entry = response_cache.encode_entry(*body)
+                    response_cache.put_entry(cache_key, entry, timeout)
+            if entry is not None:
+                response = response_cache.build_response(entry, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        patch_cache_control(
+            response, public=True, must_revalidate=True,
+            max_age=getattr(settings, 'IFC_METADATA_MAX_AGE', 0),
+        )
+        return response
+    
+    return wrapper
+
+
 class BuildingPlanViewSet(viewsets.ModelViewSet):
     """
     ViewSet completo para API de BuildingPlan.
@@ -93,13 +167,29 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
     - PUT/PATCH /api/plants/{id}/ - Atualizar planta (requer autenticação)
     - DELETE /api/plants/{id}/ - Remover planta (requer autenticação)
     - GET /api/plants/{id}/metadata/ - Metadados completos do IFC
-    - POST /api/plants/{id}/refresh_metadata/ - Forçar atualização de metadados
-    - GET /api/plants/{id}/elements/ - Elementos organizados por tipo
+    - POST /api/plants/{id}/refresh_metadata/ - Agendar nova extração de metadados (202 + job)
+    - GET /api/plants/{id}/jobs/ - Jobs de extração recentes da planta
+    - GET /api/plants/{id}/jobs/{job_id}/ - Status e progresso de um job de extração
+    - GET /api/plants/{id}/elements/?type=&storey=&bbox=&fields=&cursor= - Elementos paginados
+    - GET /api/plants/{id}/elements/totals/ - Contagens por tipo e andar
     - GET /api/plants/{id}/element/{element_id}/ - Propriedades de elemento específico
+    - GET /api/plants/{id}/properties/?pset=&prop=&value= - Filtrar elementos por propriedade
     - GET /api/plants/{id}/statistics/ - Estatísticas do modelo
     - GET /api/plants/{id}/spatial_structure/ - Estrutura espacial hierárquica
     - GET /api/plants/{id}/bounds/ - Limites (bounding box) do modelo
-    - GET /api/plants/{id}/search/?q=nome - Buscar elementos por nome
+    - GET /api/plants/{id}/floor_plan/ - Andares com planta baixa pré-calculada
+    - GET /api/plants/{id}/floor_plan/{storey_id}/?output=geojson|svg - Planta baixa do andar
+    - GET /api/plants/{id}/glb/?lod=proxy|low|medium - Geometria convertida em glTF binário
+    - GET /api/plants/{id}/tiles/ - Manifesto dos tiles (andar × célula de grade)
+    - GET /api/plants/{id}/tiles/{tile_id}/ - GLB de um tile (ETag, Cache-Control)
+    - GET /api/plants/{id}/search/?q=nome&type=IfcWall - Buscar elementos no índice textual
+    - GET /api/plants/{id}/spatial/box/?min_x=&min_y=&min_z=&max_x=&max_y=&max_z= - Elementos na caixa
+    - GET /api/plants/{id}/spatial/point/?x=&y=&z= - Elementos que contêm o ponto
+    - GET /api/plants/{id}/spatial/nearest/?x=&y=&z=&k=&radius= - Vizinhos mais próximos
+    
+    O arquivo IFC nunca é processado na requisição: endpoints de metadados
+    de plantas ainda não extraídas respondem 202 com o job de extração
+    (header Location), acompanhado por polling ou pelo WebSocket da planta.
     """
     
     queryset = BuildingPlan.objects.filter(is_active=True).order_by('-uploaded_at')
@@ -138,6 +228,7 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
+    @conditional_metadata
     def metadata(self, request, pk=None):
         """
         Endpoint para obter metadados completos do IFC.
@@ -147,6 +238,9 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
             statistics e bounds
         """
         plant = self.get_object()
+        pending = self._metadata_pending(request, plant)
+        if pending is not None:
+            return pending
         metadata = plant.get_metadata()
         
         if not metadata:
@@ -160,42 +254,210 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def refresh_metadata(self, request, pk=None):
         """
-        Força atualização dos metadados do IFC.
+        Agenda uma nova extração dos metadados do IFC.
         Útil quando o arquivo IFC foi atualizado.
+        
+        A extração roda nos workers Celery; a resposta 202 traz o job (e o
+        header Location) para acompanhar o progresso. Se já houver uma
+        extração em andamento, o job dela é retornado.
+        """
+        plant = self.get_object()
+        return self._extraction_job_response(request, plant, force=True, reason='refresh')
+    
+    @action(detail=True, methods=['get'])
+    def jobs(self, request, pk=None):
+        """
+        Endpoint com os jobs de extração mais recentes da planta.
+        
+        Returns:
+            JSON com results (até 20 jobs, do mais recente ao mais antigo)
         """
         plant = self.get_object()
-        metadata = plant.refresh_metadata()
+        jobs = plant.extraction_jobs.all()[:20]
+        serializer = ExtractionJobSerializer(jobs, many=True, context=self.get_serializer_context())
+        return Response({'results': serializer.data})
+    
+    @action(detail=True, methods=['get'], url_path=r'jobs/(?P<job_id>[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12})')
+    def job(self, request, pk=None, job_id=None):
+        """
+        Endpoint com o status de um job de extração.
         
-        if not metadata:
+        Returns:
+            JSON com status (queued, running, succeeded, failed), stage,
+            progress (0 a 1) e error
+        """
+        plant = self.get_object()
+        job = plant.extraction_jobs.filter(pk=job_id).first()
+        if job is None:
             return Response(
-                {'error': 'Não foi possível atualizar metadados do arquivo IFC'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': f'Job {job_id} não encontrado'},
+                status=status.HTTP_404_NOT_FOUND
             )
+        return Response(ExtractionJobSerializer(job, context=self.get_serializer_context()).data)
+    
+    def _extraction_job_response(self, request, plant, force=False, reason='metadata_miss', section=None):
+        """
+        Agenda (ou reaproveita) a extração de metadados e responde 202 com o job.
         
-        return Response({
-            'message': 'Metadados atualizados com sucesso',
-            'metadata': metadata,
-            'updated_at': plant.metadata_updated_at
-        })
+        Args:
+            plant: BuildingPlan
+            force: Reextrai mesmo com o arquivo inalterado
+            reason: Origem do pedido, gravada no job
+            section: Seção ausente que motivou o pedido (ver schedule_extraction)
+        """
+        from .models import ExtractionJob
+        from .tasks import schedule_extraction
+        
+        if not plant.ifc_file:
+            return Response(
+                {'error': 'Arquivo IFC não encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        try:
+            result = schedule_extraction(plant, force=force, reason=reason, section=section)
+        except Exception as e:
+            logger.error(f"Falha ao agendar extração da planta {plant.id}: {e}")
+            return Response(
+                {'error': 'Fila de processamento indisponível'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        if result['status'] == 'error':
+            return Response(
+                {'error': 'Arquivo IFC não encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if result['status'] == 'unchanged':
+            return Response({'detail': 'Metadados já extraídos do arquivo atual', 'job': None})
+        
+        job = ExtractionJob.objects.filter(pk=result['job_id']).first() if result['job_id'] else None
+        data = {
+            'detail': 'Extração de metadados agendada' if result['status'] == 'scheduled'
+            else 'Extração de metadados em andamento',
+            'job': ExtractionJobSerializer(job, context=self.get_serializer_context()).data if job else None,
+        }
+        response = Response(data, status=status.HTTP_202_ACCEPTED)
+        if job is not None:
+            response['Location'] = data['job']['url']
+        response['Retry-After'] = '2'
+        return response
+    
+    def _metadata_pending(self, request, plant, section=None):
+        """
+        Resposta 202 com o job de extração se a planta ainda não tem metadados (senão None).
+        
+        Args:
+            section: Seção lida pela action; se a etapa que a produz já
+                     terminou (primeira extração em andamento), ela é servida
+        """
+        if plant.metadata_updated_at is not None:
+            return None
+        if section and plant.metadata_sections.filter(section=section).exists():
+            return None
+        return self._extraction_job_response(request, plant)
     
     @action(detail=True, methods=['get'])
+    @conditional_metadata
     def elements(self, request, pk=None):
         """
-        Endpoint para obter elementos do IFC organizados por tipo.
+        Endpoint para listar elementos do IFC com paginação por cursor.
         
+        Query params:
+            - type: classes IFC separadas por vírgula (ex: IfcWall,IfcSlab)
+            - storey: ID STEP do andar (0 para elementos sem andar)
+            - bbox: min_x,min_y,max_x,max_y ou min_x,min_y,min_z,max_x,max_y,max_z;
+                    elementos cuja bounding box intersecta a caixa
+            - fields: campos retornados (ex: id,name,type,bbox)
+            - cursor, page_size: paginação (ver ElementCursorPagination)
+            
         Returns:
-            JSON com elementos agrupados por tipo (IfcWall, IfcSlab, etc.)
+            JSON com next, previous e results (elementos na ordem do ID STEP)
         """
+        from .models import IfcElement
+        from .pagination import ElementCursorPagination
+        
         plant = self.get_object()
-        metadata = plant.get_metadata()
-        elements = metadata.get('building_elements', {})
+        pending = self._metadata_pending(request, plant)
+        if pending is not None:
+            return pending
+        
+        params = request.query_params
+        try:
+            fields = [name for name in params.get('fields', '').split(',') if name] or None
+            columns = IfcElement.columns_for(fields or IfcElement.FIELD_COLUMNS)
+            queryset = self._filter_elements(plant.ifc_elements.all(), params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # express_id é a chave do cursor: adiada, custaria uma consulta por elemento
+        paginator = ElementCursorPagination()
+        page = paginator.paginate_queryset(queryset.only('express_id', *columns), request, view=self)
+        return paginator.get_paginated_response([element.to_dict(fields) for element in page])
+    
+    @staticmethod
+    def _filter_elements(queryset, params):
+        """
+        Aplica os filtros type, storey e bbox da listagem de elementos.
+        
+        Raises:
+            ValueError: Se storey ou bbox forem inválidos
+        """
+        types = [name for name in params.get('type', '').split(',') if name]
+        if types:
+            queryset = queryset.filter(ifc_type__in=types)
+        
+        if params.get('storey'):
+            try:
+                storey = int(params['storey'])
+            except ValueError:
+                raise ValueError('Parâmetro "storey" deve ser o ID STEP do andar')
+            queryset = queryset.filter(storey_express_id=storey or None)
+        
+        if params.get('bbox'):
+            try:
+                values = [float(value) for value in params['bbox'].split(',')]
+            except ValueError:
+                values = []
+            if len(values) not in (4, 6):
+                raise ValueError('Parâmetro "bbox" deve ter 4 (x, y) ou 6 (x, y, z) valores')
+            axes = 'xyz'[:len(values) // 2]
+            low, high = values[:len(axes)], values[len(axes):]
+            for axis, minimum, maximum in zip(axes, low, high):
+                queryset = queryset.filter(**{
+                    f'bbox_max_{axis}__gte': minimum,
+                    f'bbox_min_{axis}__lte': maximum,
+                })
+        return queryset
+    
+    @action(detail=True, methods=['get'], url_path='elements/totals')
+    @conditional_metadata
+    def element_totals(self, request, pk=None):
+        """
+        Endpoint com as contagens de elementos, sem listar os elementos.
         
-        # Calcular totais
-        totals = {element_type: len(items) for element_type, items in elements.items()}
+        Returns:
+            JSON com totals (por tipo IFC), storeys (por ID STEP do andar)
+            e total_elements
+        """
+        plant = self.get_object()
+        pending = self._metadata_pending(request, plant)
+        if pending is not None:
+            return pending
+        
+        # Calcular totais no banco
+        totals = dict(
+            plant.ifc_elements.values_list('ifc_type').annotate(total=Count('id')).order_by('ifc_type')
+        )
+        storeys = {
+            str(storey or 0): total
+            for storey, total in plant.ifc_elements.values_list('storey_express_id')
+            .annotate(total=Count('id')).order_by('storey_express_id')
+        }
         
         return Response({
-            'elements': elements,
             'totals': totals,
+            'storeys': storeys,
             'total_elements': sum(totals.values())
         })
     
@@ -204,14 +466,16 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
         """
         Endpoint para obter propriedades de um elemento específico.
         
+        Tudo vem do banco: identificação de IfcElement (ou, para elementos
+        espaciais, da seção spatial_structure) e propriedades de IfcProperty,
+        gravadas na extração para todos os objetos.
+        
         Args:
             element_id: ID do elemento IFC
             
         Returns:
             JSON com propriedades completas do elemento
         """
-        from .ifc_processor import IFCProcessor
-        
         plant = self.get_object()
         
         if not plant.ifc_file:
@@ -220,32 +484,128 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        try:
-            processor = IFCProcessor(plant.ifc_file.path)
-            if not processor.open():
-                return Response(
-                    {'error': 'Erro ao abrir arquivo IFC'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            properties = processor.get_element_properties(int(element_id))
-            
-            if not properties or 'error' in properties:
+        pending = self._metadata_pending(request, plant)
+        if pending is not None:
+            return pending
+        
+        express_id = int(element_id)
+        element = plant.ifc_elements.filter(express_id=express_id).first()
+        if element is not None:
+            properties = {
+                'id': element.express_id,
+                'global_id': element.global_id,
+                'name': element.name,
+                'type': element.ifc_type,
+                'description': element.description,
+            }
+            if element.material:
+                properties['material'] = element.material
+        else:
+            # Elementos espaciais (site, edifício, andares) não estão no índice
+            properties = self._find_spatial_node(plant.get_metadata_section('spatial_structure') or [], express_id)
+            if properties is None:
                 return Response(
-                    {'error': f'Elemento {element_id} não encontrado ou erro ao processar'},
+                    {'error': f'Elemento {element_id} não encontrado'},
                     status=status.HTTP_404_NOT_FOUND
                 )
+        
+        properties['properties'] = IfcProperty.get_element_property_sets(plant, express_id)
+        return Response(ElementPropertiesSerializer(properties).data)
+    
+    @staticmethod
+    def _find_spatial_node(structure, express_id):
+        """
+        Identificação de um nó da estrutura espacial pelo ID STEP.
+        
+        Returns:
+            dict: id, global_id, name, type e description, ou None
+        """
+        stack = list(structure)
+        while stack:
+            node = stack.pop()
+            if node['id'] == express_id:
+                return {key: node.get(key, '') for key in ('id', 'global_id', 'name', 'type', 'description')}
+            stack.extend(node.get('children', ()))
+        return None
+    
+    @action(detail=True, methods=['get'], url_path='properties')
+    def filter_by_property(self, request, pk=None):
+        """
+        Endpoint para filtrar elementos por valor de propriedade.
+        
+        Query params:
+            - prop: nome da propriedade (obrigatório)
+            - pset: conjunto de propriedades (ex: Pset_WallCommon)
+            - value: valor exato; se omitido, retorna elementos que possuem a propriedade
+            - type: filtra por classe IFC
+            - limit: número máximo de resultados (padrão: 100, máximo: 1000)
             
-            serializer = ElementPropertiesSerializer(properties)
-            return Response(serializer.data)
+        Exemplo:
+            /api/plants/1/properties/?pset=Pset_WallCommon&prop=FireRating&value=2h
             
-        except Exception as e:
+        Returns:
+            JSON com elementos e o valor encontrado
+        """
+        plant = self.get_object()
+        params = request.query_params
+        prop = params.get('prop', '').strip()
+        
+        if not prop:
             return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'Parâmetro "prop" é obrigatório'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = min(max(int(params.get('limit', 100)), 1), 1000)
+        except ValueError:
+            return Response(
+                {'error': 'Parâmetro "limit" deve ser um número inteiro'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        pending = self._metadata_pending(request, plant)
+        if pending is not None:
+            return pending
+        
+        matches = IfcProperty.objects.filter(plant=plant, name=prop)
+        if params.get('pset'):
+            matches = matches.filter(pset=params['pset'])
+        if 'value' in params:
+            matches = matches.filter(value=params['value'])
+        
+        elements = plant.ifc_elements.filter(
+            express_id__in=matches.values('element_express_id')
+        ).order_by('express_id')
+        if params.get('type'):
+            elements = elements.filter(ifc_type=params['type'])
+        elements = list(elements[:limit])
+        
+        values = dict(
+            matches.filter(element_express_id__in=[e.express_id for e in elements])
+            .values_list('element_express_id', 'value')
+        )
+        
+        return Response({
+            'pset': params.get('pset'),
+            'prop': prop,
+            'value': params.get('value'),
+            'results': [
+                {
+                    'id': element.express_id,
+                    'global_id': element.global_id,
+                    'name': element.name,
+                    'type': element.ifc_type,
+                    'storey': element.storey,
+                    'value': values.get(element.express_id),
+                }
+                for element in elements
+            ],
+            'total': len(elements)
+        })
     
     @action(detail=True, methods=['get'])
+    @conditional_metadata
     def statistics(self, request, pk=None):
         """
         Endpoint para obter estatísticas do modelo IFC.
@@ -254,8 +614,10 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
             JSON com estatísticas (total de elementos, tipos, etc.)
         """
         plant = self.get_object()
-        metadata = plant.get_metadata()
-        stats = metadata.get('statistics', {})
+        pending = self._metadata_pending(request, plant, 'statistics')
+        if pending is not None:
+            return pending
+        stats = plant.get_metadata_section('statistics')
         
         if not stats:
             return Response(
@@ -267,6 +629,7 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
+    @conditional_metadata
     def spatial_structure(self, request, pk=None):
         """
         Endpoint para obter estrutura espacial hierárquica.
@@ -275,8 +638,10 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
             JSON com estrutura hierárquica (projeto -> site -> edifício -> andar)
         """
         plant = self.get_object()
-        metadata = plant.get_metadata()
-        structure = metadata.get('spatial_structure', [])
+        pending = self._metadata_pending(request, plant, 'spatial_structure')
+        if pending is not None:
+            return pending
+        structure = plant.get_metadata_section('spatial_structure') or []
         
         return Response({
             'spatial_structure': structure,
@@ -293,6 +658,7 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
         return count
     
     @action(detail=True, methods=['get'])
+    @conditional_metadata
     def bounds(self, request, pk=None):
         """
         Endpoint para obter limites (bounding box) do modelo.
@@ -301,8 +667,10 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
             JSON com coordenadas min/max, centro e tamanho
         """
         plant = self.get_object()
-        metadata = plant.get_metadata()
-        bounds = metadata.get('bounds')
+        pending = self._metadata_pending(request, plant, 'bounds')
+        if pending is not None:
+            return pending
+        bounds = plant.get_metadata_section('bounds')
         
         if not bounds:
             return Response(
@@ -312,21 +680,101 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
         
         return Response(bounds)
     
+    @action(detail=True, methods=['get'])
+    @conditional_metadata
+    def floor_plan(self, request, pk=None):
+        """
+        Endpoint com os andares que possuem planta baixa pré-calculada.
+        
+        Returns:
+            JSON com tolerance, cut_height e storeys (id, name, elevation,
+            spaces, walls, bbox e url da planta de cada andar)
+        """
+        from django.urls import reverse
+        
+        plant = self.get_object()
+        pending = self._metadata_pending(request, plant, 'floor_plans')
+        if pending is not None:
+            return pending
+        index = plant.get_metadata_section('floor_plans', 'index')
+        if index is None:
+            return Response(
+                {'error': 'Planta baixa não disponível (reextraia os metadados)'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        for storey in index:
+            storey['url'] = request.build_absolute_uri(
+                reverse('plant_viewer:api-plant-storey-plan', args=[plant.pk, storey['id'] or 0])
+            )
+        return Response({
+            'plant_id': plant.id,
+            'tolerance': plant.get_metadata_section('floor_plans', 'tolerance'),
+            'cut_height': plant.get_metadata_section('floor_plans', 'cut_height'),
+            'storeys': index,
+        })
+    
+    @action(detail=True, methods=['get'], url_path=r'floor_plan/(?P<storey_id>[0-9]+)')
+    @conditional_metadata
+    def storey_plan(self, request, pk=None, storey_id=None):
+        """
+        Endpoint para a planta baixa de um andar.
+        
+        Polígonos da seção horizontal de espaços e paredes (coordenadas X/Y
+        do modelo em metros), lidos diretamente dos metadados.
+        
+        Query params:
+            - output: geojson (padrão) ou svg
+        
+        Returns:
+            FeatureCollection GeoJSON (MultiPolygon por elemento) ou imagem SVG
+        """
+        from django.http import HttpResponse
+        from .floor_plan import floor_plan_to_svg
+        
+        plant = self.get_object()
+        pending = self._metadata_pending(request, plant, 'floor_plans')
+        if pending is not None:
+            return pending
+        output = request.query_params.get('output', 'geojson')
+        if output not in ('geojson', 'svg'):
+            return Response(
+                {'error': f'Formato inválido: {output} (use geojson ou svg)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        collection = plant.get_metadata_section('floor_plans', 'storeys', f's{storey_id}')
+        if collection is None:
+            return Response(
+                {'error': f'Planta baixa não disponível para o andar {storey_id}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if output == 'svg':
+            return HttpResponse(floor_plan_to_svg(collection), content_type='image/svg+xml')
+        return JsonResponse(collection, content_type='application/geo+json')
+    
     @action(detail=True, methods=['get'])
     def search(self, request, pk=None):
         """
-        Endpoint para buscar elementos por nome.
+        Endpoint para buscar elementos no índice textual da planta.
+        
+        Busca em nome, tipo, descrição, GlobalId e valores de propriedades,
+        sem abrir o arquivo IFC. Cada palavra é tratada como prefixo.
         
         Query params:
             - q: termo de busca (obrigatório)
+            - type: filtra por classe IFC (ex: IfcWall)
+            - limit: número máximo de resultados (padrão: 50, máximo: 500)
             
         Returns:
-            JSON com elementos encontrados
+            JSON com elementos encontrados, ordenados por relevância
         """
-        from .ifc_processor import IFCProcessor
+        from .search import search_elements
         
         plant = self.get_object()
         query = request.query_params.get('q', '').strip()
+        ifc_type = request.query_params.get('type', '').strip() or None
         
         if not query:
             return Response(
@@ -334,24 +782,24 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if not plant.ifc_file:
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 500)
+        except ValueError:
             return Response(
-                {'error': 'Arquivo IFC não encontrado'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'Parâmetro "limit" deve ser um número inteiro'},
+                status=status.HTTP_400_BAD_REQUEST
             )
         
+        pending = self._metadata_pending(request, plant)
+        if pending is not None:
+            return pending
+        
         try:
-            processor = IFCProcessor(plant.ifc_file.path)
-            if not processor.open():
-                return Response(
-                    {'error': 'Erro ao abrir arquivo IFC'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            results = processor.search_elements_by_name(query)
+            results = search_elements(plant.id, query, ifc_type=ifc_type, limit=limit)
             
             return Response({
                 'query': query,
+                'type': ifc_type,
                 'results': results,
                 'total': len(results)
             })
@@ -362,64 +810,312 @@ class BuildingPlanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    @action(detail=True, methods=['get'])
-    def spaces(self, request, pk=None):
+    @staticmethod
+    def _float_params(params, names):
         """
-        Endpoint para obter espaços IFC com coordenadas para visualização de planta baixa.
+        Lê parâmetros numéricos obrigatórios da query string.
+        
+        Raises:
+            ValueError: Se algum parâmetro estiver ausente ou não for numérico
+        """
+        try:
+            return [float(params[name]) for name in names]
+        except (KeyError, ValueError):
+            raise ValueError(f'Parâmetros numéricos obrigatórios: {", ".join(names)}')
+    
+    def _spatial_response(self, plant, query, ids, distances=None):
+        """Monta a resposta de uma consulta espacial com os dados dos elementos."""
+        from .spatial_index import elements_by_id
+        
+        elements = elements_by_id(plant, ids)
+        results = []
+        for position, express_id in enumerate(ids):
+            item = elements.get(express_id)
+            if item is None:
+                continue
+            if distances is not None:
+                item['distance'] = round(distances[position], 4)
+            results.append(item)
+        return Response({'query': query, 'results': results, 'total': len(results)})
+    
+    @action(detail=True, methods=['get'], url_path='spatial/box')
+    def spatial_box(self, request, pk=None):
+        """
+        Endpoint para buscar elementos cuja bounding box intersecta uma caixa.
         
+        Query params:
+            - min_x, min_y, min_z, max_x, max_y, max_z: caixa em coordenadas globais
+            - limit: número máximo de resultados (padrão: 1000, máximo: 10000)
+            
         Returns:
-            JSON com lista de espaços contendo:
-            - id, global_id, name, description
-            - x_coordinate, y_coordinate, z_coordinate
-            - area, volume, height
+            JSON com elementos encontrados
         """
-        from .ifc_processor import IFCProcessor
+        from .spatial_index import get_spatial_index
         
         plant = self.get_object()
+        try:
+            box = self._float_params(
+                request.query_params, ('min_x', 'min_y', 'min_z', 'max_x', 'max_y', 'max_z')
+            )
+            limit = min(max(int(request.query_params.get('limit', 1000)), 1), 10000)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        if not plant.ifc_file:
+        pending = self._metadata_pending(request, plant)
+        if pending is not None:
+            return pending
+        
+        ids = get_spatial_index(plant).query_box(box[:3], box[3:])[:limit]
+        return self._spatial_response(plant, {'min': box[:3], 'max': box[3:]}, ids)
+    
+    @action(detail=True, methods=['get'], url_path='spatial/point')
+    def spatial_point(self, request, pk=None):
+        """
+        Endpoint para buscar elementos cuja bounding box contém um ponto.
+        
+        Query params:
+            - x, y, z: ponto em coordenadas globais
+            
+        Returns:
+            JSON com elementos encontrados
+        """
+        from .spatial_index import get_spatial_index
+        
+        plant = self.get_object()
+        try:
+            point = self._float_params(request.query_params, ('x', 'y', 'z'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        pending = self._metadata_pending(request, plant)
+        if pending is not None:
+            return pending
+        
+        ids = get_spatial_index(plant).query_point(point)
+        return self._spatial_response(plant, {'point': point}, ids)
+    
+    @action(detail=True, methods=['get'], url_path='spatial/nearest')
+    def spatial_nearest(self, request, pk=None):
+        """
+        Endpoint para buscar os elementos mais próximos de um ponto.
+        
+        A distância é medida até a bounding box do elemento (zero se o
+        ponto estiver dentro dela).
+        
+        Query params:
+            - x, y, z: ponto em coordenadas globais (ex: posição de um sensor)
+            - k: número de vizinhos (padrão: 10, máximo: 1000)
+            - radius: distância máxima em metros (opcional)
+            
+        Exemplo:
+            /api/plants/1/spatial/nearest/?x=10&y=4&z=1.5&radius=3&k=100
+            
+        Returns:
+            JSON com elementos e distâncias, do mais próximo ao mais distante
+        """
+        from .spatial_index import get_spatial_index
+        
+        plant = self.get_object()
+        params = request.query_params
+        try:
+            point = self._float_params(params, ('x', 'y', 'z'))
+            k = min(max(int(params.get('k', 10)), 1), 1000)
+            radius = float(params['radius']) if params.get('radius') else None
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        pending = self._metadata_pending(request, plant)
+        if pending is not None:
+            return pending
+        
+        neighbours = get_spatial_index(plant).nearest(point, k=k, max_distance=radius)
+        return self._spatial_response(
+            plant,
+            {'point': point, 'k': k, 'radius': radius},
+            [express_id for express_id, _ in neighbours],
+            [distance for _, distance in neighbours],
+        )
+    
+    @action(detail=True, methods=['get'])
+    def glb(self, request, pk=None):
+        """
+        Endpoint para baixar a geometria convertida em glTF binário.
+        
+        O GLB é gerado por `manage.py convert_ifc_to_gltf` (método builtin)
+        e só é servido enquanto estiver atualizado em relação ao IFC. O
+        arquivo gravado em gzip é enviado como está (Content-Encoding: gzip)
+        e só é descompactado para clientes que não aceitam gzip.
+        
+        Query params:
+            - lod: Nível de detalhe (proxy, low, medium); padrão: geometria completa
+        
+        Returns:
+            Arquivo model/gltf-binary ou 404 se não houver GLB atualizado
+        """
+        plant = self.get_object()
+        if not plant.has_current_glb():
             return Response(
-                {'error': 'Arquivo IFC não encontrado'},
+                {'error': 'Geometria GLB não disponível para esta planta'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        try:
-            processor = IFCProcessor(plant.ifc_file.path)
-            if not processor.open():
+        level = request.query_params.get('lod')
+        if level:
+            name = plant.get_glb_levels().get(level)
+            if name is None:
                 return Response(
-                    {'error': 'Erro ao abrir arquivo IFC'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                    {'error': f'Nível de detalhe não disponível: {level}'},
+                    status=status.HTTP_404_NOT_FOUND
                 )
+        else:
+            name = plant.glb_file.name
+        return self._glb_file_response(request, plant.glb_file.storage, name)
+    
+    def _glb_file_response(self, request, storage, name):
+        """
+        Resposta com um GLB do storage.
+        
+        Arquivos gravados em gzip são enviados como estão (Content-Encoding:
+        gzip) e só são descompactados para clientes que não aceitam gzip.
+        """
+        import gzip
+        from django.utils.cache import patch_vary_headers
+        
+        filename = name.rsplit('/', 1)[-1]
+        if not name.endswith('.gz'):
+            return FileResponse(storage.open(name, 'rb'), content_type='model/gltf-binary', filename=filename)
+        
+        filename = filename[:-len('.gz')]
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = FileResponse(storage.open(name, 'rb'), content_type='model/gltf-binary', filename=filename)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            def decompressed():
+                with gzip.open(storage.open(name, 'rb')) as stream:
+                    yield from iter(lambda: stream.read(FileResponse.block_size), b'')
             
-            spaces = processor.get_spaces_with_coordinates()
-            
-            # Calcular estatísticas dos espaços
-            total_area = sum(space['area'] for space in spaces if space['area'] > 0)
-            total_volume = sum(space['volume'] for space in spaces if space['volume'] > 0)
-            
-            # Calcular bounds dos espaços
-            if spaces:
-                x_coords = [s['x_coordinate'] for s in spaces]
-                y_coords = [s['y_coordinate'] for s in spaces]
-                z_coords = [s['z_coordinate'] for s in spaces]
-                
-                bounds = {
-                    'min': {'x': min(x_coords), 'y': min(y_coords), 'z': min(z_coords)},
-                    'max': {'x': max(x_coords), 'y': max(y_coords), 'z': max(z_coords)}
-                }
-            else:
-                bounds = None
-            
-            return Response({
-                'spaces': spaces,
-                'total_spaces': len(spaces),
-                'total_area': round(total_area, 2),
-                'total_volume': round(total_volume, 2),
-                'bounds': bounds
-            })
-            
-        except Exception as e:
+            response = StreamingHttpResponse(decompressed(), content_type='model/gltf-binary')
+            response['Content-Disposition'] = f'inline; filename="{filename}"'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def tiles(self, request, pk=None):
+        """
+        Endpoint com o manifesto dos tiles da geometria convertida.
+        
+        Cada tile reúne os elementos de um andar em uma célula da grade
+        horizontal; o visualizador busca primeiro os tiles visíveis e mais
+        próximos da câmera. Limites em coordenadas do modelo (Z para cima).
+        
+        Returns:
+            JSON com tile_size, bounds, storeys e tiles (id, storey, cell,
+            bounds, nodes, triangles, size_bytes, etag, url)
+        """
+        from django.urls import reverse
+        
+        plant = self.get_object()
+        manifest = (plant.glb_stats or {}).get('tiles') if plant.has_current_glb() else None
+        if not manifest:
             return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+                {'error': 'Tiles de geometria não disponíveis para esta planta'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        tiles = []
+        for tile in manifest['tiles']:
+            entry = {key: value for key, value in tile.items() if key != 'file'}
+            # A versão na URL permite cache longo: um tile alterado muda de URL
+            entry['url'] = request.build_absolute_uri(
+                reverse('plant_viewer:api-plant-tile', args=[plant.pk, tile['id']])
+            ) + f"?v={tile['etag']}"
+            tiles.append(entry)
+        return Response({**manifest, 'plant_id': plant.id, 'tiles': tiles})
+    
+    @action(detail=True, methods=['get'], url_path=r'tiles/(?P<tile_id>[A-Za-z0-9_-]+)')
+    def tile(self, request, pk=None, tile_id=None):
+        """
+        Endpoint para baixar o GLB de um tile.
+        
+        Responde com ETag do conteúdo e 304 para If-None-Match igual. Com
+        ?v= igual ao ETag a URL é imutável e o cache dura
+        IFC_GLB_TILE_MAX_AGE segundos; sem versão o cliente revalida.
+        
+        Returns:
+            Arquivo model/gltf-binary, 304 ou 404 se o tile não existir
+        """
+        from django.conf import settings
+        from django.http import HttpResponseNotModified
+        from django.utils.cache import patch_cache_control
+        
+        plant = self.get_object()
+        tile = plant.get_glb_tiles().get(tile_id) if plant.has_current_glb() else None
+        if tile is None:
+            return Response(
+                {'error': f'Tile não disponível: {tile_id}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        etag = f'"{tile["etag"]}"'
+        if request.query_params.get('v') == tile['etag']:
+            cache_control = {'public': True, 'max_age': getattr(settings, 'IFC_GLB_TILE_MAX_AGE', 31536000),
+                             'immutable': True}
+        else:
+            cache_control = {'public': True, 'no_cache': True}
+        
+        if etag in [value.strip() for value in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            response = self._glb_file_response(request, plant.glb_file.storage, tile['file'])
+        response['ETag'] = etag
+        patch_cache_control(response, **cache_control)
+        return response
+    
+    @action(detail=True, methods=['get'])
+    @conditional_metadata
+    def spaces(self, request, pk=None):
+        """
+        Endpoint para obter espaços IFC com coordenadas para visualização de planta baixa.
+        
+        Lidos da seção spaces dos metadados, calculada na extração. Metadados
+        extraídos antes da seção existir agendam uma nova extração (202).
+        
+        Returns:
+            JSON com lista de espaços contendo:
+            - id, global_id, name, description
+            - x_coordinate, y_coordinate, z_coordinate
+            - area, volume, height
+        """
+        plant = self.get_object()
+        pending = self._metadata_pending(request, plant, 'spaces')
+        if pending is not None:
+            return pending
+        spaces = plant.get_metadata_section('spaces')
+        if spaces is None:
+            # Sem forçar: o polling reaproveita o job ativo em vez de reiniciar a extração
+            return self._extraction_job_response(request, plant, reason='section_miss', section='spaces')
+        
+        # Calcular estatísticas dos espaços
+        total_area = sum(space['area'] for space in spaces if space['area'] > 0)
+        total_volume = sum(space['volume'] for space in spaces if space['volume'] > 0)
+        
+        # Calcular bounds dos espaços
+        if spaces:
+            x_coords = [s['x_coordinate'] for s in spaces]
+            y_coords = [s['y_coordinate'] for s in spaces]
+            z_coords = [s['z_coordinate'] for s in spaces]
+            
+            bounds = {
+                'min': {'x': min(x_coords), 'y': min(y_coords), 'z': min(z_coords)},
+                'max': {'x': max(x_coords), 'y': max(y_coords), 'z': max(z_coords)}
+            }
+        else:
+            bounds = None
+        
+        return Response({
+            'spaces': spaces,
+            'total_spaces': len(spaces),
+            'total_area': round(total_area, 2),
+            'total_volume': round(total_volume, 2),
+            'bounds': bounds
+        })
\ No newline at end of file
@@ -14,6 +14,9 @@ class FloorPlanViewer {
         this.canvas = null;
         this.ctx = null;
         this.spaces = [];
+        this.walls = [];
+        this.storeys = [];
+        this.storey = null;
         this.bounds = null;
         this.scale = 1;
         this.offsetX = 0;
@@ -67,6 +70,11 @@ class FloorPlanViewer {
     }
     
     async loadSpaces() {
+        // Plantas baixas pré-calculadas (polígonos por andar)
+        if (await this.loadFloorPlan()) {
+            return;
+        }
+        
         try {
             console.log(`Carregando espaços da planta ${this.plantId}...`);
             
@@ -96,6 +104,107 @@ class FloorPlanViewer {
         }
     }
     
+    async loadFloorPlan(storeyId = null) {
+        try {
+            const indexResponse = await fetch(`/plant/api/plants/${this.plantId}/floor_plan/`);
+            if (!indexResponse.ok) {
+                return false;
+            }
+            
+            const index = await indexResponse.json();
+            this.storeys = index.storeys || [];
+            const storey = this.storeys.find(s => s.id === storeyId) || this.storeys[0];
+            if (!storey) {
+                return false;
+            }
+            
+            const response = await fetch(storey.url);
+            if (!response.ok) {
+                return false;
+            }
+            
+            const collection = await response.json();
+            console.log(`Planta baixa do andar ${storey.name} recebida:`, collection);
+            this.applyFloorPlan(collection, storey);
+            return this.spaces.length > 0 || this.walls.length > 0;
+            
+        } catch (error) {
+            console.warn('Planta baixa pré-calculada indisponível:', error);
+            return false;
+        }
+    }
+    
+    applyFloorPlan(collection, storey) {
+        this.storey = storey;
+        this.spaces = [];
+        this.walls = [];
+        
+        collection.features.forEach(feature => {
+            const rings = feature.geometry.coordinates;
+            const properties = feature.properties;
+            
+            if (properties.kind === 'wall') {
+                this.walls.push({ id: feature.id, name: properties.name, polygons: rings });
+                return;
+            }
+            
+            // Centro da caixa do maior anel externo, usado para o rótulo
+            const outer = rings.reduce((a, b) => (b[0].length > a[0].length ? b : a))[0];
+            const xs = outer.map(p => p[0]);
+            const ys = outer.map(p => p[1]);
+            this.spaces.push({
+                id: feature.id,
+                name: properties.name,
+                global_id: properties.global_id,
+                object_type: properties.ifc_type,
+                area: properties.area,
+                polygons: rings,
+                x_coordinate: (Math.min(...xs) + Math.max(...xs)) / 2,
+                y_coordinate: (Math.min(...ys) + Math.max(...ys)) / 2,
+                z_coordinate: storey.elevation || 0
+            });
+        });
+        
+        const [minX, minY, maxX, maxY] = collection.bbox;
+        this.bounds = { min: { x: minX, y: minY }, max: { x: maxX, y: maxY } };
+        this.calculateScale();
+        this.draw();
+    }
+    
+    tracePolygons(polygons) {
+        this.ctx.beginPath();
+        polygons.forEach(polygon => {
+            polygon.forEach(ring => {
+                ring.forEach(([x, y], i) => {
+                    const pos = this.worldToCanvas(x, y);
+                    if (i === 0) {
+                        this.ctx.moveTo(pos.x, pos.y);
+                    } else {
+                        this.ctx.lineTo(pos.x, pos.y);
+                    }
+                });
+                this.ctx.closePath();
+            });
+        });
+    }
+    
+    containsPoint(polygons, x, y) {
+        // Regra par-ímpar: furos (anéis internos) ficam de fora
+        let inside = false;
+        polygons.forEach(polygon => {
+            polygon.forEach(ring => {
+                for (let i = 0, j = ring.length - 1; i < ring.length; j = i++) {
+                    const [xi, yi] = ring[i];
+                    const [xj, yj] = ring[j];
+                    if ((yi > y) !== (yj > y) && x < (xj - xi) * (y - yi) / (yj - yi) + xi) {
+                        inside = !inside;
+                    }
+                }
+            });
+        });
+        return inside;
+    }
+    
     generateExampleSpaces() {
         // Gerar espaços de exemplo similar ao sistema Streamlit
         this.spaces = [
@@ -174,6 +283,13 @@ class FloorPlanViewer {
             this.drawSpace(space, index);
         });
         
+        // Paredes por cima dos espaços
+        this.ctx.fillStyle = '#37474F';
+        this.walls.forEach(wall => {
+            this.tracePolygons(wall.polygons);
+            this.ctx.fill('evenodd');
+        });
+        
         // Desenhar legenda
         this.drawLegend();
         
@@ -234,6 +350,11 @@ class FloorPlanViewer {
     }
     
     drawSpace(space, index) {
+        if (space.polygons) {
+            this.drawSpacePolygon(space, index);
+            return;
+        }
+        
         const pos = this.worldToCanvas(space.x_coordinate, space.y_coordinate);
         
         // Tamanho do marcador baseado na área
@@ -280,6 +401,42 @@ class FloorPlanViewer {
         }
     }
     
+    drawSpacePolygon(space, index) {
+        const color = this.colorPalette[index % this.colorPalette.length];
+        
+        let alpha = 0.35;
+        let strokeWidth = 1;
+        
+        if (space === this.selectedSpace) {
+            alpha = 0.8;
+            strokeWidth = 3;
+        } else if (space === this.hoveredSpace) {
+            alpha = 0.6;
+            strokeWidth = 2;
+        }
+        
+        this.ctx.fillStyle = this.hexToRgba(color, alpha);
+        this.ctx.strokeStyle = color;
+        this.ctx.lineWidth = strokeWidth;
+        this.tracePolygons(space.polygons);
+        this.ctx.fill('evenodd');
+        this.ctx.stroke();
+        
+        // Rótulo no centro do espaço
+        const pos = this.worldToCanvas(space.x_coordinate, space.y_coordinate);
+        this.ctx.fillStyle = '#333';
+        this.ctx.font = 'bold 11px Arial';
+        this.ctx.textAlign = 'center';
+        this.ctx.textBaseline = 'middle';
+        this.ctx.fillText(space.name, pos.x, pos.y - 6);
+        
+        if (space.area > 0) {
+            this.ctx.fillStyle = '#666';
+            this.ctx.font = '9px Arial';
+            this.ctx.fillText(`${space.area.toFixed(1)} m²`, pos.x, pos.y + 8);
+        }
+    }
+    
     drawLegend() {
         const legendX = 10;
         const legendY = 10;
@@ -310,15 +467,16 @@ class FloorPlanViewer {
         // Instruções
         this.ctx.font = '9px Arial';
         this.ctx.fillStyle = '#999';
-        this.ctx.fillText('Clique nos círculos', legendX + 10, legendY + 70);
+        this.ctx.fillText('Clique nos espaços', legendX + 10, legendY + 70);
         this.ctx.fillText('para mais detalhes', legendX + 10, legendY + 82);
     }
     
     drawTitle() {
+        const title = this.storey ? `Planta Baixa - ${this.storey.name}` : 'Planta Baixa - Vista 2D';
         this.ctx.fillStyle = '#333';
         this.ctx.font = 'bold 18px Arial';
         this.ctx.textAlign = 'center';
-        this.ctx.fillText('Planta Baixa - Vista 2D', this.canvas.width / 2, 25);
+        this.ctx.fillText(title, this.canvas.width / 2, 25);
     }
     
     onMouseMove(event) {
@@ -330,7 +488,18 @@ class FloorPlanViewer {
         const prevHovered = this.hoveredSpace;
         this.hoveredSpace = null;
         
+        const world = this.canvasToWorld(canvasX, canvasY);
+        
         for (const space of this.spaces) {
+            if (space.polygons) {
+                if (this.containsPoint(space.polygons, world.x, world.y)) {
+                    this.hoveredSpace = space;
+                    this.canvas.style.cursor = 'pointer';
+                    break;
+                }
+                continue;
+            }
+            
             const pos = this.worldToCanvas(space.x_coordinate, space.y_coordinate);
             const size = Math.max(15, Math.min(50, Math.sqrt(space.area || 25) * this.scale * 0.5));
             
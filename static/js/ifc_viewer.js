@@ -22,6 +22,9 @@ class AdvancedIFCViewer {
         this.controls = null;
         this.model = null;
         this.ifcLoader = null;
+        this.glbNodes = {}; // GlobalId → índice do nó no GLB
+        this.elementLods = null; // GlobalId → THREE.LOD do elemento
+        this.tileState = null; // Tiles de geometria pendentes e em carregamento
         this.selectedElement = null;
         this.raycaster = new THREE.Raycaster();
         this.mouse = new THREE.Vector2();
@@ -328,6 +331,15 @@ class AdvancedIFCViewer {
             const plantData = await response.json();
             console.log('Dados da planta:', plantData);
             
+            // Geometria pré-convertida (GLB) dispensa interpretar o IFC no navegador;
+            // com tiles, só o que está no campo de visão é baixado
+            if (plantData.glb_tiles_url && await this.loadTiledGeometry(plantData.glb_tiles_url)) {
+                return;
+            }
+            if (plantData.glb_url && await this.loadGLBGeometry(plantData.glb_url, plantData.glb_lod_urls)) {
+                return;
+            }
+            
             // Verificar se tem arquivo IFC (API retorna 'ifc_url' ou 'ifc_file')
             const ifcUrl = plantData.ifc_url || (plantData.ifc_file ? plantData.ifc_file.url : null);
             
@@ -354,6 +366,221 @@ class AdvancedIFCViewer {
         }
     }
     
+    async loadGLBGeometry(glbUrl, lodUrls = null) {
+        this.showLoading(true, 'Carregando geometria convertida...');
+        
+        // Do nível mais grosso (caixas) ao completo
+        const levels = Object.entries(lodUrls || {});
+        levels.push(['full', glbUrl]);
+        
+        let loader;
+        let first;
+        try {
+            const { GLTFLoader } = await import('three/addons/loaders/GLTFLoader.js');
+            loader = new GLTFLoader();
+            first = await loader.loadAsync(levels[0][1]);
+        } catch (error) {
+            console.error('Erro ao carregar GLB, usando o arquivo IFC:', error);
+            return false;
+        }
+        
+        // Nós do GLB trazem ifcId, global_id, type e name em userData (extras)
+        this.decodeOctahedralNormals(first.scene);
+        this.model = first.scene;
+        this.glbNodes = first.scene.userData.ifc_nodes || {};
+        if (levels.length > 1) {
+            this.elementLods = this.createElementLods(first.scene, levels[0][0]);
+        }
+        this.scene.add(this.model);
+        
+        this.fitCameraToModel();
+        this.showLoading(false);
+        this.showSuccessMessage('Modelo carregado a partir da geometria convertida (GLB)!');
+        
+        // Refinamento em segundo plano: cada nível entra no LOD do seu elemento
+        this.refineLevels(loader, levels.slice(1));
+        return true;
+    }
+    
+    async loadTiledGeometry(tilesUrl) {
+        this.showLoading(true, 'Carregando manifesto de tiles...');
+        
+        let manifest;
+        let loader;
+        try {
+            const response = await fetch(tilesUrl);
+            if (!response.ok) {
+                throw new Error(`Erro ao buscar tiles: ${response.status}`);
+            }
+            manifest = await response.json();
+            const { GLTFLoader } = await import('three/addons/loaders/GLTFLoader.js');
+            loader = new GLTFLoader();
+        } catch (error) {
+            console.error('Erro ao carregar tiles, usando o GLB completo:', error);
+            return false;
+        }
+        if (!manifest.tiles || !manifest.tiles.length) {
+            return false;
+        }
+        
+        for (const tile of manifest.tiles) {
+            tile.box = this.zUpBoundsToBox(tile.bounds);
+        }
+        this.model = new THREE.Group();
+        this.model.name = 'IfcTiles';
+        this.scene.add(this.model);
+        this.tileState = { loader, pending: [...manifest.tiles], loading: 0, loaded: 0, total: manifest.tiles.length };
+        
+        this.fitCameraToModel(this.zUpBoundsToBox(manifest.bounds));
+        this.showLoading(false);
+        this.updateTiles();
+        return true;
+    }
+    
+    zUpBoundsToBox(bounds) {
+        // Mesma rotação do nó IfcModel dos GLBs: (x, y, z) → (x, z, -y)
+        return new THREE.Box3(
+            new THREE.Vector3(bounds.min[0], bounds.min[2], -bounds.max[1]),
+            new THREE.Vector3(bounds.max[0], bounds.max[2], -bounds.min[1])
+        );
+    }
+    
+    updateTiles() {
+        // Chamado a cada quadro: inicia o download dos tiles visíveis, dos mais próximos aos mais distantes
+        const state = this.tileState;
+        const maxConcurrent = 4;
+        if (!state || !state.pending.length || state.loading >= maxConcurrent) return;
+        
+        this.camera.updateMatrixWorld();
+        const frustum = new THREE.Frustum().setFromProjectionMatrix(
+            new THREE.Matrix4().multiplyMatrices(this.camera.projectionMatrix, this.camera.matrixWorldInverse)
+        );
+        const visible = state.pending
+            .filter(tile => frustum.intersectsBox(tile.box))
+            .map(tile => ({ tile, distance: tile.box.distanceToPoint(this.camera.position) }))
+            .sort((a, b) => a.distance - b.distance);
+        
+        for (const { tile } of visible.slice(0, maxConcurrent - state.loading)) {
+            state.pending.splice(state.pending.indexOf(tile), 1);
+            this.loadTile(tile);
+        }
+    }
+    
+    async loadTile(tile) {
+        const state = this.tileState;
+        state.loading++;
+        try {
+            const gltf = await state.loader.loadAsync(tile.url);
+            this.decodeOctahedralNormals(gltf.scene);
+            gltf.scene.userData.tileId = tile.id;
+            this.model.add(gltf.scene);
+            state.loaded++;
+            if (state.loaded === 1) {
+                this.showSuccessMessage('Modelo carregado por tiles a partir da geometria convertida (GLB)!');
+            }
+        } catch (error) {
+            console.warn(`Falha ao carregar tile ${tile.id}:`, error);
+        } finally {
+            state.loading--;
+        }
+    }
+    
+    async refineLevels(loader, levels) {
+        for (const [level, url] of levels) {
+            try {
+                const gltf = await loader.loadAsync(url);
+                this.decodeOctahedralNormals(gltf.scene);
+                this.addLodLevel(gltf.scene, level);
+                console.log(`Nível de detalhe "${level}" carregado`);
+            } catch (error) {
+                console.warn(`Falha ao carregar nível de detalhe "${level}":`, error);
+                return;
+            }
+        }
+    }
+    
+    createElementLods(root, level) {
+        // Cada elemento vira um THREE.LOD posicionado no centro da sua caixa,
+        // para que a distância à câmera seja medida a partir do elemento
+        const modelNode = root.getObjectByName('IfcModel');
+        const lods = {};
+        if (!modelNode) return lods;
+        
+        root.updateMatrixWorld(true);
+        for (const node of [...modelNode.children]) {
+            const globalId = node.userData.global_id;
+            if (!globalId) continue;
+            
+            const box = new THREE.Box3().setFromObject(node);
+            const size = box.getSize(new THREE.Vector3()).length() || 1;
+            const center = modelNode.worldToLocal(box.getCenter(new THREE.Vector3()));
+            
+            const lod = new THREE.LOD();
+            lod.name = node.name;
+            lod.userData = { ...node.userData };
+            lod.position.copy(center);
+            modelNode.remove(node);
+            modelNode.add(lod);
+            
+            lods[globalId] = { lod, center, size };
+            this.addElementLevel(lods[globalId], node, level);
+        }
+        return lods;
+    }
+    
+    addLodLevel(root, level) {
+        const modelNode = root.getObjectByName('IfcModel');
+        if (!modelNode || !this.elementLods) return;
+        
+        for (const node of [...modelNode.children]) {
+            const entry = this.elementLods[node.userData.global_id];
+            if (entry) {
+                this.addElementLevel(entry, node, level);
+            }
+        }
+    }
+    
+    addElementLevel(entry, node, level) {
+        // Distância (em múltiplos do tamanho do elemento) a partir da qual o nível aparece
+        const distances = { full: 0, medium: 4, low: 12, proxy: 40 };
+        node.position.sub(entry.center);
+        entry.lod.addLevel(node, entry.size * (distances[level] ?? 0));
+    }
+    
+    decodeOctahedralNormals(root) {
+        // Normais do GLB quantizado vêm em dois int16 (atributo _NORMAL_OCT);
+        // viram int16 normalizado xyz, ainda metade do tamanho de float32
+        root.traverse((child) => {
+            const geometry = child.geometry;
+            if (!geometry) return;
+            
+            const encoded = geometry.getAttribute('_normal_oct');
+            if (encoded) {
+                const normals = new Int16Array(encoded.count * 3);
+                for (let i = 0; i < encoded.count; i++) {
+                    let x = encoded.getX(i);
+                    let y = encoded.getY(i);
+                    const z = 1 - Math.abs(x) - Math.abs(y);
+                    const t = Math.max(-z, 0);
+                    x += x >= 0 ? -t : t;
+                    y += y >= 0 ? -t : t;
+                    const length = Math.hypot(x, y, z) || 1;
+                    normals[i * 3] = Math.round(x / length * 32767);
+                    normals[i * 3 + 1] = Math.round(y / length * 32767);
+                    normals[i * 3 + 2] = Math.round(z / length * 32767);
+                }
+                geometry.setAttribute('normal', new encoded.constructor(normals, 3, true));
+                geometry.deleteAttribute('_normal_oct');
+            }
+            
+            // O GLTFLoader usa sombreamento plano quando a malha chega sem normais
+            if (geometry.getAttribute('normal') && child.material && child.material.flatShading) {
+                child.material.flatShading = false;
+                child.material.needsUpdate = true;
+            }
+        });
+    }
+    
     async loadRealIFCGeometry(ifcFileUrl) {
         this.showLoading(true, 'Carregando arquivo IFC...');
         
@@ -406,17 +633,47 @@ class AdvancedIFCViewer {
         }
     }
     
+    async fetchMetadata(plantId) {
+        // Metadados ainda não extraídos: a API responde 202 com o job de
+        // extração (rodando nos workers), consultado até terminar
+        const url = `/plant/api/plants/${plantId}/metadata/`;
+        let response = await fetch(url);
+        while (response.status === 202) {
+            const { job } = await response.json();
+            if (job) {
+                const status = await this.waitForExtractionJob(job.url);
+                if (status === 'failed') {
+                    throw new Error('Falha na extração de metadados');
+                }
+            } else {
+                await new Promise((resolve) => setTimeout(resolve, 2000));
+            }
+            response = await fetch(url);
+        }
+        if (!response.ok) {
+            throw new Error('Erro ao buscar metadados');
+        }
+        return response.json();
+    }
+    
+    async waitForExtractionJob(jobUrl) {
+        for (;;) {
+            const job = await (await fetch(jobUrl)).json();
+            if (job.status === 'succeeded' || job.status === 'failed') {
+                return job.status;
+            }
+            const percent = Math.round((job.progress || 0) * 100);
+            this.showLoading(true, `Extraindo metadados do IFC... ${percent}%`);
+            await new Promise((resolve) => setTimeout(resolve, 2000));
+        }
+    }
+    
     async loadIFCFromAPI(plantId) {
         this.showLoading(true, 'Carregando dados do IFC...');
         
         try {
             // Buscar metadados e elementos
-            const metadataResponse = await fetch(`/plant/api/plants/${plantId}/metadata/`);
-            if (!metadataResponse.ok) {
-                throw new Error('Erro ao buscar metadados');
-            }
-            
-            const metadata = await metadataResponse.json();
+            const metadata = await this.fetchMetadata(plantId);
             console.log('Metadados do IFC:', metadata);
             
             // Criar modelo baseado nos metadados
@@ -628,10 +885,10 @@ class AdvancedIFCViewer {
         this.fitCameraToModel();
     }
     
-    fitCameraToModel() {
+    fitCameraToModel(bounds = null) {
         if (!this.model) return;
         
-        const box = new THREE.Box3().setFromObject(this.model);
+        const box = bounds || new THREE.Box3().setFromObject(this.model);
         const center = box.getCenter(new THREE.Vector3());
         const size = box.getSize(new THREE.Vector3());
         
@@ -665,13 +922,22 @@ class AdvancedIFCViewer {
         const intersects = this.raycaster.intersectObjects(this.scene.children, true);
         
         if (intersects.length > 0) {
-            const object = intersects[0].object;
+            let object = intersects[0].object;
             
             // Ignorar grid e floor
             if (object.name === 'gridHelper' || object.name === 'floor') {
                 return;
             }
             
+            // No GLB, malhas com vários materiais ficam dentro do nó do elemento
+            let owner = object;
+            while (owner && owner.userData.ifcId === undefined && owner.parent && owner.parent !== this.scene) {
+                owner = owner.parent;
+            }
+            if (owner && owner.userData.ifcId !== undefined) {
+                object = owner;
+            }
+            
             this.selectElement(object);
         } else {
             this.deselectAll();
@@ -689,21 +955,28 @@ class AdvancedIFCViewer {
         // Selecionar novo
         this.selectedElement = mesh;
         
-        // Highlight visual
-        if (mesh.material) {
-            mesh.userData.originalColor = mesh.material.color.getHex();
-            mesh.material.color.setHex(0xffff00); // Amarelo
-        }
+        // Highlight visual (materiais do GLB são compartilhados: trocar por uma cópia)
+        mesh.traverse((child) => {
+            if (child.isMesh && child.material && !Array.isArray(child.material)) {
+                child.userData.originalMaterial = child.material;
+                child.material = child.material.clone();
+                child.material.color.setHex(0xffff00); // Amarelo
+            }
+        });
         
         // Mostrar propriedades
         this.showElementProperties(mesh);
     }
     
     deselectAll() {
-        if (this.selectedElement && this.selectedElement.material) {
-            if (this.selectedElement.userData.originalColor !== undefined) {
-                this.selectedElement.material.color.setHex(this.selectedElement.userData.originalColor);
-            }
+        if (this.selectedElement) {
+            this.selectedElement.traverse((child) => {
+                if (child.userData.originalMaterial) {
+                    child.material.dispose();
+                    child.material = child.userData.originalMaterial;
+                    delete child.userData.originalMaterial;
+                }
+            });
         }
         this.selectedElement = null;
         this.hideElementProperties();
@@ -783,6 +1056,8 @@ class AdvancedIFCViewer {
             this.controls.update();
         }
         
+        this.updateTiles();
+        
         this.renderer.render(this.scene, this.camera);
     }
     